@@ -6,11 +6,12 @@ from fastapi import APIRouter, Depends, HTTPException, status, Query
 from fastapi.responses import JSONResponse
 from pydantic import BaseModel, Field
 from typing import Dict, Any, Optional, List
+import asyncio
 import logging
 from datetime import datetime
 
 from api.dependencies import get_current_user_admin
-from services.groq_service import GroqService
+from services.groq_service import GroqService, invalidate_groq_settings_cache
 from utils.response import success_response, error_response
 from utils.exceptions import AppException
 from models.supabase_client import supabase_client
@@ -65,7 +66,10 @@ class ModelInfoResponse(BaseModel):
 async def get_groq_settings_from_db() -> Dict[str, Any]:
     """Groq ayarlarını veritabanından çek"""
     try:
-        response = supabase_client.supabase.table('groq_settings').select('setting_key, setting_value, setting_type').eq('is_active', True).execute()
+        # Supabase client is synchronous; keep the event loop free while it runs
+        response = await asyncio.to_thread(
+            supabase_client.supabase.table('groq_settings').select('setting_key, setting_value, setting_type').eq('is_active', True).execute
+        )
         
         settings = {}
         for row in response.data:
@@ -238,7 +242,7 @@ async def get_groq_settings(
         # Get settings from database
         current_settings = await get_groq_settings_from_db()
         groq_service = GroqService()
-        available_models = groq_service.get_available_models()
+        available_models = await groq_service.get_available_models()
         
         settings_response = GroqSettingsResponse(
             default_model=current_settings["default_model"],
@@ -283,7 +287,7 @@ async def update_groq_settings(
     """
     try:
         groq_service = GroqService()
-        available_models = groq_service.get_available_models()
+        available_models = await groq_service.get_available_models()
         
         # Validate model if provided
         if request.default_model and request.default_model not in available_models:
@@ -356,6 +360,9 @@ async def update_groq_settings(
                     if field not in updated_fields:
                         updated_fields.append(field)
         
+        # Running services must not keep serving the old settings
+        invalidate_groq_settings_cache()
+        
         # Log the change
         logger.info(f"Admin {current_user['email']} updated Groq settings in database: {updated_fields}")
         
@@ -468,7 +475,7 @@ async def get_available_models(
     """
     try:
         groq_service = GroqService()
-        available_models = groq_service.get_available_models()
+        available_models = await groq_service.get_available_models()
         
         # Enhanced model information (Updated 2025)
         model_info = {
@@ -622,7 +629,7 @@ async def get_groq_status(
         # Get current settings from database
         current_settings = await get_groq_settings_from_db()
         
-        available_models = groq_service.get_available_models()
+        available_models = await groq_service.get_available_models()
         
         status_info = {
             "service_status": "healthy" if health_response else "unhealthy",
@@ -695,6 +702,8 @@ async def reset_groq_settings(
                 value_type = "string"
             await update_groq_setting_in_db(key, value, value_type)
         
+        invalidate_groq_settings_cache()
+        
         logger.info(f"Admin {current_user['email']} reset Groq settings to default in database")
         
         return {
@@ -14,6 +14,7 @@ import uuid
 from datetime import datetime
 
 from core.database import get_db
+from core.config import settings
 from api.dependencies import get_admin_user
 from models.schemas import (
     UserResponse, DocumentResponse, DocumentCreate, 
@@ -25,8 +26,16 @@ from models.payment_schemas import PaymentSettingsResponse, PaymentSettingsUpdat
 from models.supabase_client import supabase_client
 from services.storage_service import StorageService
 from services.redis_service import RedisService
+from services.catalog_service import catalog_service, invalidate_catalog_cache
+from services.elasticsearch_index_manager import ElasticsearchIndexManager, EmbeddingModelMismatchError, versioned_index_name
+from services.service_container import service_container
+from services.elasticsearch_service import chunk_fields_from_update
+from services.document_router import DocumentRouter
 from tasks.document_processor import process_document_task
 from tasks.yargitay_document_processor import process_yargitay_document_task
+from tasks.index_maintenance import (
+    backfill_filter_fields_task, build_document_centroids_task, reembed_index_task, get_reindex_state, reindex_job_is_active
+)
 from services.yargitay_mongo_service import yargitay_mongo_service
 from utils.response import success_response, error_response
 from utils.exceptions import AppException
@@ -191,39 +200,31 @@ async def elasticsearch_health(
 
 @router.get("/institutions", response_model=Dict[str, Any])
 async def get_institutions(
+    refresh: bool = Query(False, description="Rebuild the catalog from Elasticsearch"),
     current_user: UserResponse = Depends(get_admin_user)
 ):
     """
-    Get list of unique institution names from documents (Admin only)
+    Get list of unique institution names from indexed documents (Admin only)
     
     Returns:
-        List of unique institution names from mevzuat_documents table
+        Institution names plus institution/category facets with document and
+        chunk counts from Elasticsearch aggregations
     """
     try:
         logger.info(f"Admin {current_user.id} requesting institution list")
         
-        # Query distinct institutions from Supabase
-        response = supabase_client.supabase.table('mevzuat_documents')\
-            .select('institution')\
-            .execute()
-        
-        # Extract unique institutions and filter out None/empty values
-        institutions = set()
-        if response.data:
-            for doc in response.data:
-                institution = doc.get('institution')
-                if institution and institution.strip():
-                    institutions.add(institution.strip())
-        
-        # Sort institutions alphabetically
-        institutions_list = sorted(list(institutions))
+        catalog = await catalog_service.get_catalog(force_refresh=refresh)
+        institutions_list = await catalog_service.get_institution_names()
         
         logger.info(f"Found {len(institutions_list)} unique institutions")
         
         return success_response(
             data={
                 "institutions": institutions_list,
-                "total_count": len(institutions_list)
+                "total_count": len(institutions_list),
+                "institution_facets": catalog["institutions"],
+                "category_facets": catalog["categories"],
+                "generated_at": catalog.get("generated_at")
             }
         )
         
@@ -1386,6 +1387,19 @@ async def update_document(
                 error_code="DOCUMENT_NOT_FOUND"
             )
         
+        # Metadata değişikliği chunk'lara yerinde yazılır, yeniden embedding yok
+        fields, metadata = chunk_fields_from_update(document_update.model_dump(exclude_none=True))
+        if fields or metadata:
+            try:
+                updated_chunks = await service_container.elasticsearch_service.update_document_fields(
+                    document_id, fields, metadata
+                )
+                logger.info(f"Doküman {document_id} için {updated_chunks} chunk güncellendi")
+                if "source_institution" in fields or "category" in fields:
+                    await invalidate_catalog_cache()
+            except Exception as es_error:
+                logger.error(f"Doküman {document_id} chunk alanları güncellenemedi: {es_error}")
+        
         return success_response(data=document)
         
     except AppException:
@@ -2795,21 +2809,22 @@ async def get_elasticsearch_status(
                 cluster_info = {"error": "Cluster stats unavailable"}
             
             # Get index-specific information
+            # Alias üzerinden: arkasındaki fiziksel index'lerin toplamı
             index_info = {}
             try:
-                async with session.get(f"{es_service.elasticsearch_url}/{es_service.index_name}/_stats") as response:
-                    if response.status == 200:
-                        index_data = await response.json()
-                        indices = index_data.get("indices", {})
-                        if es_service.index_name in indices:
-                            idx_stats = indices[es_service.index_name]
-                            index_info = {
-                                "index_name": es_service.index_name,
-                                "total_docs": idx_stats.get("total", {}).get("docs", {}).get("count", 0),
-                                "deleted_docs": idx_stats.get("total", {}).get("docs", {}).get("deleted", 0),
-                                "store_size_bytes": idx_stats.get("total", {}).get("store", {}).get("size_in_bytes", 0),
-                                "store_size_human": f"{idx_stats.get('total', {}).get('store', {}).get('size_in_bytes', 0) / (1024*1024):.2f} MB"
-                            }
+                footprint = await es_service.get_index_footprint()
+                vector_info = await es_service.get_vector_field_info()
+                index_info = {
+                    "index_name": es_service.index_name,
+                    "physical_indexes": footprint["indexes"],
+                    "total_docs": footprint["docs"],
+                    "deleted_docs": footprint["deleted_docs"],
+                    "store_size_bytes": footprint["total_store_bytes"],
+                    "store_size_human": f"{footprint['total_store_bytes'] / (1024*1024):.2f} MB",
+                    "bytes_per_chunk": footprint["bytes_per_doc"],
+                    "vector_index_type": (vector_info.get("index_options") or {}).get("type"),
+                    "vector_in_source": vector_info.get("vector_in_source")
+                }
             except Exception:
                 index_info = {"error": "Index stats unavailable"}
             
@@ -2984,6 +2999,387 @@ async def clear_document_from_elasticsearch(
             "message": f"Doküman silme başarısız: {str(e)}"
         }
 
+@router.get("/elasticsearch/vector-index")
+async def get_elasticsearch_vector_index(
+    current_user: UserResponse = Depends(get_admin_user)
+):
+    """Vektör alanı eşlemesi (HNSW) ve aktif arama modu (Admin only)"""
+    try:
+        es_service = service_container.elasticsearch_service
+        indexes = {}
+        for index_name in (settings.ELASTICSEARCH_INDEX, settings.ELASTICSEARCH_YARGITAY_INDEX):
+            try:
+                indexes[index_name] = await es_service.get_vector_field_info(refresh=True, index_name=index_name)
+            except Exception as index_error:
+                indexes[index_name] = {"error": str(index_error)}
+        
+        return success_response(
+            data={
+                "search_mode": settings.ELASTICSEARCH_SEARCH_MODE,
+                "knn_min_candidates": settings.ELASTICSEARCH_KNN_MIN_CANDIDATES,
+                "knn_candidate_multiplier": settings.ELASTICSEARCH_KNN_CANDIDATE_MULTIPLIER,
+                "indexes": indexes
+            }
+        )
+        
+    except Exception as e:
+        logger.error(f"Vektör index bilgisi alınamadı: {e}")
+        raise AppException(
+            message="Failed to fetch vector index info",
+            detail=str(e),
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            error_code="VECTOR_INDEX_INFO_FAILED"
+        )
+
+@router.post("/elasticsearch/knn-recall")
+async def check_elasticsearch_knn_recall(
+    query: str = Form(..., description="Test sorgusu"),
+    k: int = Form(10, ge=1, le=100),
+    institution_filter: Optional[str] = Form(None),
+    current_user: UserResponse = Depends(get_admin_user)
+):
+    """Aynı sorgu için kNN (HNSW) ve exact arama sonuçlarını karşılaştır - recall@k (Admin only)"""
+    try:
+        logger.info(f"Admin {current_user.email} kNN recall kontrolü: '{query[:50]}'")
+        
+        query_embedding = await service_container.embedding_service.generate_embedding(query)
+        comparison = await service_container.elasticsearch_service.compare_search_modes(
+            query_vector=query_embedding,
+            k=k,
+            institution_filter=institution_filter
+        )
+        
+        return success_response(data={"query": query, **comparison})
+        
+    except Exception as e:
+        logger.error(f"kNN recall kontrolü başarısız: {e}")
+        raise AppException(
+            message="kNN recall check failed",
+            detail=str(e),
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            error_code="KNN_RECALL_CHECK_FAILED"
+        )
+
+@router.post("/elasticsearch/routing-recall")
+async def check_document_routing_recall(
+    query: str = Form(..., description="Test sorgusu"),
+    k: int = Form(10, ge=1, le=100),
+    top_n: int = Form(20, ge=1, le=500, description="Merkez vektörüne göre seçilecek belge sayısı"),
+    institution_filter: Optional[str] = Form(None),
+    current_user: UserResponse = Depends(get_admin_user)
+):
+    """Belge yönlendirmeli (iki aşamalı) arama ile tüm chunk'larda aramayı karşılaştır - recall@k (Admin only)"""
+    try:
+        logger.info(f"Admin {current_user.email} belge yönlendirme recall kontrolü: '{query[:50]}', top_n={top_n}")
+        
+        query_embedding = await service_container.embedding_service.generate_embedding(query)
+        comparison = await DocumentRouter(service_container.elasticsearch_service).compare_routing(
+            query_vector=query_embedding,
+            k=k,
+            top_n=top_n,
+            institution_filter=institution_filter
+        )
+        
+        return success_response(data={"query": query, **comparison})
+        
+    except Exception as e:
+        logger.error(f"Belge yönlendirme recall kontrolü başarısız: {e}")
+        raise AppException(
+            message="Document routing recall check failed",
+            detail=str(e),
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            error_code="ROUTING_RECALL_CHECK_FAILED"
+        )
+
+@router.post("/elasticsearch/document-centroids/rebuild")
+async def rebuild_document_centroids(
+    recreate: bool = Form(False, description="Yönlendirme index'ini silip yeniden oluştur"),
+    current_user: UserResponse = Depends(get_admin_user)
+):
+    """Belge merkez vektörlerini kayıtlı chunk vektörlerinden yeniden hesapla (Admin only)"""
+    try:
+        logger.info(f"Admin {current_user.email} belge merkez vektörlerini yeniden oluşturuyor (recreate={recreate})")
+        task = build_document_centroids_task.delay(recreate)
+        
+        return success_response(
+            data={
+                "message": "Belge merkez vektörü oluşturma işlemi başlatıldı",
+                "index": settings.ELASTICSEARCH_DOCUMENT_INDEX,
+                "task_id": task.id
+            }
+        )
+        
+    except Exception as e:
+        logger.error(f"Belge merkez vektörü oluşturma başlatılamadı: {e}")
+        raise AppException(
+            message="Failed to start document centroid build",
+            detail=str(e),
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            error_code="CENTROID_BUILD_START_FAILED"
+        )
+
+def _reciprocal_rank(document_ids: List[str], expected: set) -> float:
+    """1/rank of the first expected document in a result list (0 if missing)"""
+    for rank, document_id in enumerate(document_ids, start=1):
+        if document_id in expected:
+            return 1.0 / rank
+    return 0.0
+
+@router.post("/elasticsearch/hybrid-benchmark")
+async def benchmark_hybrid_retrieval(
+    queries: str = Form(..., description="Satır başına bir sorgu; beklenen belgeler 'sorgu | doc_id1,doc_id2' ile verilebilir"),
+    k: int = Form(10, ge=1, le=100),
+    institution_filter: Optional[str] = Form(None),
+    current_user: UserResponse = Depends(get_admin_user)
+):
+    """Saf vektör ve hibrit (BM25 + vektör, RRF) aramayı aynı sorgularla karşılaştır (Admin only)"""
+    cases = []
+    for line in queries.splitlines():
+        text, _, expected = line.partition("|")
+        if text.strip():
+            cases.append({
+                "query": text.strip(),
+                "expected": {document_id.strip() for document_id in expected.split(",") if document_id.strip()}
+            })
+    if not cases or len(cases) > 50:
+        raise AppException(
+            message="Invalid benchmark queries",
+            detail="Provide between 1 and 50 queries, one per line",
+            status_code=status.HTTP_400_BAD_REQUEST,
+            error_code="INVALID_BENCHMARK_QUERIES"
+        )
+    
+    try:
+        logger.info(f"Admin {current_user.email} hibrit arama karşılaştırması: {len(cases)} sorgu, k={k}")
+        
+        es_service = service_container.elasticsearch_service
+        embeddings = await service_container.embedding_service.generate_embeddings_batch(
+            [case["query"] for case in cases], use_store=False
+        )
+        
+        per_query = []
+        for case, embedding in zip(cases, embeddings):
+            comparison = await es_service.compare_retrieval_modes(
+                query_vector=embedding.tolist(),
+                query_text=case["query"],
+                k=k,
+                institution_filter=institution_filter
+            )
+            row = {
+                "query": case["query"],
+                "overlap_at_k": comparison["overlap_at_k"],
+                "latency_ms": comparison["latency_ms"],
+                "lexical_only_hits": comparison["lexical_only_hits"],
+                "vector_document_ids": comparison["vector_document_ids"],
+                "hybrid_document_ids": comparison["hybrid_document_ids"]
+            }
+            if case["expected"]:
+                row["reciprocal_rank"] = {
+                    mode: _reciprocal_rank(comparison[f"{mode}_document_ids"], case["expected"])
+                    for mode in ("vector", "hybrid")
+                }
+            per_query.append(row)
+        
+        count = len(per_query)
+        judged = [row for row in per_query if "reciprocal_rank" in row]
+        summary = {
+            "queries": count,
+            "k": k,
+            "mean_overlap_at_k": round(sum(row["overlap_at_k"] for row in per_query) / count, 4),
+            "mean_lexical_only_hits": round(sum(row["lexical_only_hits"] for row in per_query) / count, 2),
+            "mean_latency_ms": {
+                mode: round(sum(row["latency_ms"][mode] for row in per_query) / count, 1)
+                for mode in ("vector", "hybrid")
+            },
+            "judged_queries": len(judged)
+        }
+        if judged:
+            for mode in ("vector", "hybrid"):
+                summary[f"{mode}_hit_rate_at_k"] = round(
+                    sum(1 for row in judged if row["reciprocal_rank"][mode] > 0) / len(judged), 4
+                )
+                summary[f"{mode}_mrr"] = round(sum(row["reciprocal_rank"][mode] for row in judged) / len(judged), 4)
+        
+        return success_response(data={"summary": summary, "queries": per_query})
+        
+    except Exception as e:
+        logger.error(f"Hibrit arama karşılaştırması başarısız: {e}")
+        raise AppException(
+            message="Hybrid retrieval benchmark failed",
+            detail=str(e),
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            error_code="HYBRID_BENCHMARK_FAILED"
+        )
+
+def _resolve_index_alias(target: str) -> str:
+    """'mevzuat' / 'yargitay' -> read/write alias name"""
+    aliases = {
+        "mevzuat": settings.ELASTICSEARCH_INDEX,
+        "yargitay": settings.ELASTICSEARCH_YARGITAY_INDEX
+    }
+    if target not in aliases:
+        raise AppException(
+            message="Invalid index target",
+            detail=f"target must be one of: {', '.join(aliases)}",
+            status_code=status.HTTP_400_BAD_REQUEST,
+            error_code="INVALID_INDEX_TARGET"
+        )
+    return aliases[target]
+
+@router.post("/elasticsearch/reindex")
+async def start_elasticsearch_reindex(
+    target: str = Form("mevzuat", description="mevzuat veya yargitay"),
+    resume: bool = Form(True, description="Yarıda kalan işi kaldığı yerden devam ettir"),
+    embedding_model: Optional[str] = Form(None),
+    embedding_dimensions: Optional[int] = Form(None),
+    delete_legacy_index: bool = Form(False, description="Alias adındaki eski fiziksel index'i _v0 kopyası almadan sil"),
+    current_user: UserResponse = Depends(get_admin_user)
+):
+    """Yeni index versiyonuna yeniden embedding + atomik alias geçişi başlat (Admin only)"""
+    alias = _resolve_index_alias(target)
+    try:
+        state = await get_reindex_state(alias)
+        if reindex_job_is_active(state):
+            raise AppException(
+                message="A re-embedding job is already running for this index",
+                detail=f"target_index={state.get('target_index')}, documents_done={state.get('documents_done', 0)}",
+                status_code=status.HTTP_409_CONFLICT,
+                error_code="REINDEX_ALREADY_RUNNING"
+            )
+        
+        logger.info(f"Admin {current_user.email} {alias} için yeniden embedding başlattı (resume={resume})")
+        task = reembed_index_task.delay(alias, resume, embedding_model, embedding_dimensions, delete_legacy_index)
+        
+        return success_response(
+            data={
+                "message": "Yeniden embedding işlemi başlatıldı",
+                "alias": alias,
+                "task_id": task.id
+            }
+        )
+        
+    except AppException:
+        raise
+    except Exception as e:
+        logger.error(f"Yeniden embedding başlatılamadı: {e}")
+        raise AppException(
+            message="Failed to start re-embedding job",
+            detail=str(e),
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            error_code="REINDEX_START_FAILED"
+        )
+
+@router.get("/elasticsearch/reindex/status")
+async def get_elasticsearch_reindex_status(
+    target: str = Query("mevzuat", description="mevzuat veya yargitay"),
+    current_user: UserResponse = Depends(get_admin_user)
+):
+    """Yeniden embedding işinin ilerlemesi ve alias durumu (Admin only)"""
+    alias = _resolve_index_alias(target)
+    try:
+        index_manager = ElasticsearchIndexManager(service_container.elasticsearch_service)
+        return success_response(
+            data={
+                "alias": alias,
+                "alias_targets": await index_manager.get_alias_indexes(alias),
+                "versions": await index_manager.list_index_versions(alias),
+                "job": await get_reindex_state(alias)
+            }
+        )
+        
+    except Exception as e:
+        logger.error(f"Yeniden embedding durumu alınamadı: {e}")
+        raise AppException(
+            message="Failed to fetch re-embedding status",
+            detail=str(e),
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            error_code="REINDEX_STATUS_FAILED"
+        )
+
+@router.post("/elasticsearch/alias/swap")
+async def swap_elasticsearch_alias(
+    target: str = Form("mevzuat", description="mevzuat veya yargitay"),
+    version: int = Form(..., ge=0, description="Alias'ın işaret edeceği index versiyonu (v0: alias öncesi index'in kopyası)"),
+    delete_legacy_index: bool = Form(False, description="Alias adındaki eski fiziksel index'i _v0 kopyası almadan sil"),
+    force: bool = Form(False, description="Index sorgu embedding modelinden farklı bir modelle oluşturulmuş olsa da çevir"),
+    current_user: UserResponse = Depends(get_admin_user)
+):
+    """Alias'ı mevcut bir index versiyonuna atomik olarak çevir - geri alma için (Admin only)"""
+    alias = _resolve_index_alias(target)
+    try:
+        index_manager = ElasticsearchIndexManager(service_container.elasticsearch_service)
+        if version not in await index_manager.list_index_versions(alias):
+            raise AppException(
+                message="Index version not found",
+                detail=f"{versioned_index_name(alias, version)} does not exist",
+                status_code=status.HTTP_404_NOT_FOUND,
+                error_code="INDEX_VERSION_NOT_FOUND"
+            )
+        
+        state = await get_reindex_state(alias)
+        if reindex_job_is_active(state):
+            raise AppException(
+                message="A re-embedding job is running for this index",
+                status_code=status.HTTP_409_CONFLICT,
+                error_code="REINDEX_ALREADY_RUNNING"
+            )
+        
+        logger.info(f"Admin {current_user.email} {alias} alias'ını v{version} versiyonuna çeviriyor")
+        try:
+            swap = await index_manager.swap_alias(
+                alias, versioned_index_name(alias, version), delete_legacy_index=delete_legacy_index, force=force
+            )
+        except EmbeddingModelMismatchError as e:
+            raise AppException(
+                message="Index was embedded with a different model than queries",
+                detail=str(e),
+                status_code=status.HTTP_409_CONFLICT,
+                error_code="EMBEDDING_MODEL_MISMATCH"
+            )
+        if alias == settings.ELASTICSEARCH_INDEX:
+            await invalidate_catalog_cache()
+            # Routing centroids must average the vectors of the version now served
+            build_document_centroids_task.delay(True)
+        
+        return success_response(data=swap)
+        
+    except AppException:
+        raise
+    except Exception as e:
+        logger.error(f"Alias geçişi başarısız: {e}")
+        raise AppException(
+            message="Failed to swap index alias",
+            detail=str(e),
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            error_code="ALIAS_SWAP_FAILED"
+        )
+
+@router.post("/elasticsearch/backfill-filters")
+async def backfill_elasticsearch_filter_fields(
+    current_user: UserResponse = Depends(get_admin_user)
+):
+    """Mevcut vektörlere kurum/kategori/yayın tarihi/durum filtre alanlarını yaz (Admin only)"""
+    try:
+        logger.info(f"Admin {current_user.email} filtre alanı backfill işlemini başlattı")
+        
+        task = backfill_filter_fields_task.delay()
+        
+        return success_response(
+            data={
+                "message": "Filtre alanı backfill işlemi başlatıldı",
+                "task_id": task.id
+            }
+        )
+        
+    except Exception as e:
+        logger.error(f"Filtre alanı backfill başlatılamadı: {e}")
+        raise AppException(
+            message="Failed to start filter field backfill",
+            detail=str(e),
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            error_code="BACKFILL_FAILED"
+        )
+
 @router.post("/elasticsearch/clear-documents")
 async def clear_multiple_documents_from_elasticsearch(
     document_ids: List[str],
@@ -3095,6 +3491,15 @@ async def get_system_status(
             except asyncio.TimeoutError:
                 redis_status["user_histories"] = "timeout"
             
+            # Query cache hit/miss counters
+            try:
+                stats_task = asyncio.create_task(redis_service.get_cache_stats())
+                redis_status["query_cache"] = await asyncio.wait_for(stats_task, timeout=2.0)
+                from services.semantic_cache_service import semantic_cache_service
+                redis_status["semantic_cache"] = semantic_cache_service.get_local_stats()
+            except asyncio.TimeoutError:
+                redis_status["query_cache"] = "timeout"
+            
             # Connection pool automatically manages connections
             
         except asyncio.TimeoutError:
@@ -3941,6 +4346,69 @@ async def get_redis_connections(
         }
 
 
+@router.get("/openai/rate-limit")
+async def get_openai_rate_limit_state(
+    current_user: UserResponse = Depends(get_admin_user)
+):
+    """Worker'lar arasında paylaşılan OpenAI embedding kotasının anlık durumu (Admin only)"""
+    try:
+        # Import here to avoid circular imports
+        from services.openai_rate_limiter import openai_rate_limiter
+        
+        state = await openai_rate_limiter.get_state()
+        return success_response(data=state)
+        
+    except Exception as e:
+        logger.error(f"OpenAI kota durumu alınamadı: {e}")
+        raise AppException(
+            message="OpenAI rate limit state could not be read",
+            detail=str(e),
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            error_code="OPENAI_RATE_LIMIT_STATE_FAILED"
+        )
+
+@router.get("/openai/embedding-micro-batches")
+async def get_embedding_micro_batch_stats(
+    current_user: UserResponse = Depends(get_admin_user)
+):
+    """Sorgu embedding'lerinin toplu isteklerde birleştirilme istatistikleri - bu API süreci (Admin only)"""
+    micro_batcher = service_container.embedding_service.micro_batcher
+    if micro_batcher is None:
+        return success_response(data={"enabled": False})
+    return success_response(data={"enabled": True, **micro_batcher.get_stats()})
+
+@router.get("/embeddings/store/stats")
+async def get_embedding_store_stats(
+    current_user: UserResponse = Depends(get_admin_user)
+):
+    """İçerik adresli chunk embedding deposu: tekrar eden metinlerin oranı ve tasarruf edilen token (Admin only)"""
+    try:
+        # Import here to avoid circular imports
+        from services.embedding_store import embedding_store
+        
+        return success_response(data=await embedding_store.get_stats())
+        
+    except Exception as e:
+        logger.error(f"Embedding deposu istatistikleri alınamadı: {e}")
+        raise AppException(
+            message="Embedding store statistics could not be read",
+            detail=str(e),
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            error_code="EMBEDDING_STORE_STATS_FAILED"
+        )
+
+@router.delete("/embeddings/store/stats")
+async def reset_embedding_store_stats(
+    current_user: UserResponse = Depends(get_admin_user)
+):
+    """Embedding deposu sayaçlarını sıfırla, saklanan vektörler korunur (Admin only)"""
+    # Import here to avoid circular imports
+    from services.embedding_store import embedding_store
+    
+    logger.info(f"Admin {current_user.email} embedding deposu sayaçlarını sıfırlıyor")
+    await embedding_store.reset_stats()
+    return success_response(data={"reset": True})
+
 @router.get("/redis/connection-details")
 async def get_redis_connection_details(
     current_user: UserResponse = Depends(get_admin_user)
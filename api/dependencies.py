@@ -3,16 +3,18 @@ FastAPI dependencies for authentication and authorization
 Reusable dependency functions for route protection
 """
 
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional
 import logging
 
+from core.config import settings
 from core.database import get_db
 from services.supabase_auth_service import auth_service
+from services.redis_service import RedisService
 from models.schemas import UserResponse
-from utils.exceptions import AppException
+from utils.exceptions import AppException, RateLimitError
 
 logger = logging.getLogger(__name__)
 
@@ -174,3 +176,53 @@ async def get_current_user_admin(
         "full_name": current_user.full_name,
         "role": current_user.role
     }
+
+
+def rate_limit(endpoint: str):
+    """
+    Dependency factory enforcing the sliding-window limits of an endpoint
+    
+    Limits come from settings.ENDPOINT_RATE_LIMITS[endpoint] by user role,
+    plus a per-IP limit. The remaining budget is stored on
+    request.state.rate_limit_remaining for the handler.
+    
+    Args:
+        endpoint: Key in ENDPOINT_RATE_LIMITS ("ask", "voice-query", "search")
+        
+    Returns:
+        Dependency returning the remaining request budget
+        
+    Raises:
+        RateLimitError: 429 with retry_after when a window is exhausted
+    """
+    async def check_endpoint_rate_limit(
+        request: Request,
+        current_user: UserResponse = Depends(get_current_user)
+    ) -> int:
+        limits = settings.ENDPOINT_RATE_LIMITS.get(endpoint, {})
+        user_limit = limits.get(current_user.role, limits.get("user", settings.RATE_LIMIT_REQUESTS))
+        
+        if not settings.RATE_LIMIT_ENABLED:
+            request.state.rate_limit_remaining = user_limit
+            return user_limit
+        
+        is_allowed, remaining, retry_after = await RedisService().check_rate_limit(
+            user_id=str(current_user.id),
+            endpoint=endpoint,
+            limit=user_limit,
+            window=settings.RATE_LIMIT_WINDOW,
+            client_ip=request.client.host if request.client else None,
+            ip_limit=limits.get("ip")
+        )
+        request.state.rate_limit_remaining = remaining
+        
+        if not is_allowed:
+            logger.warning(f"Rate limit exceeded on {endpoint} for user {current_user.id} (retry after {retry_after}s)")
+            raise RateLimitError(
+                retry_after=retry_after,
+                detail=f"Too many {endpoint} requests, retry after {retry_after} seconds"
+            )
+        
+        return remaining
+    
+    return check_endpoint_rate_limit
@@ -4,14 +4,17 @@ Accessible by authenticated users with appropriate permissions
 """
 
 from fastapi import APIRouter, Depends, Query, HTTPException, status, File, UploadFile, Form
+from fastapi.responses import StreamingResponse
 from uuid import UUID
 from datetime import datetime
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List, Optional
+from typing import List, Optional, Dict, Any, AsyncIterator
+import json
+import asyncio
 import logging
 
 from core.database import get_db
-from api.dependencies import get_current_user, get_optional_user
+from api.dependencies import get_current_user, get_optional_user, rate_limit
 from models.supabase_client import supabase_client
 from models.schemas import (
     UserResponse, SearchRequest, SearchResponse, 
@@ -24,7 +27,9 @@ from models.payment_schemas import PurchaseHistoryResponse, PurchaseHistoryItem,
 from services.search_service import SearchService
 from services.document_service import DocumentService
 from services.query_service import QueryService
+from services.service_container import service_container
 from services.credit_service import credit_service
+from services.catalog_service import catalog_service
 from services.search_history_service import SearchHistoryService
 from services.whisper_service import WhisperService
 from services.tts_service import TTSService
@@ -38,6 +43,7 @@ router = APIRouter()
 async def search_documents(
     search_request: SearchRequest,
     current_user: UserResponse = Depends(get_current_user),
+    rate_limit_remaining: int = Depends(rate_limit("search")),
     db: AsyncSession = Depends(get_db)
 ):
     """
@@ -55,11 +61,19 @@ async def search_documents(
         Search results with relevant document chunks and similarity scores
     """
     try:
-        search_service = SearchService(db)
+        search_service = SearchService(
+            db,
+            embedding_service=service_container.embedding_service,
+            openai_client=service_container.openai_client
+        )
+        
+        # Embed the query once, then search with the precomputed vector
+        query_embedding = await search_service.embedding_service.generate_embedding(search_request.query)
         
         # Perform semantic search
         results = await search_service.semantic_search(
             query=search_request.query,
+            query_embedding=query_embedding,
             limit=search_request.limit,
             similarity_threshold=search_request.similarity_threshold,
             category_filter=search_request.category,
@@ -90,42 +104,32 @@ async def get_institutions(
     current_user: UserResponse = Depends(get_current_user)
 ):
     """
-    Get list of unique institution names from documents (User access)
+    Get list of unique institution names from indexed documents (User access)
     
-    Returns list of unique institution names from mevzuat_documents table
-    for filtering purposes.
+    Returns the institution catalog built from Elasticsearch aggregations
+    (cached, refreshed when documents are ingested or deleted) for filtering
+    purposes.
     
     Args:
         current_user: Current authenticated user
     
     Returns:
-        List of unique institution names
+        List of unique institution names and per-institution document counts
     """
     try:
         logger.info(f"User {current_user.id} requesting institution list")
         
-        # Query distinct institutions from Supabase
-        response = supabase_client.supabase.table('mevzuat_documents')\
-            .select('institution')\
-            .execute()
-        
-        # Extract unique institutions and filter out None/empty values
-        institutions = set()
-        if response.data:
-            for doc in response.data:
-                institution = doc.get('institution')
-                if institution and institution.strip():
-                    institutions.add(institution.strip())
-        
-        # Sort institutions alphabetically
-        institutions_list = sorted(list(institutions))
+        catalog = await catalog_service.get_catalog()
+        institutions_list = await catalog_service.get_institution_names()
         
         logger.info(f"Returned {len(institutions_list)} unique institutions to user {current_user.id}")
         
         return success_response(
             data={
                 "institutions": institutions_list,
-                "total_count": len(institutions_list)
+                "total_count": len(institutions_list),
+                "institution_facets": catalog["institutions"],
+                "category_facets": catalog["categories"]
             }
         )
         
@@ -277,10 +281,209 @@ async def get_document_categories(
             error_code="CATEGORIES_FAILED"
         )
 
+async def _reserve_ask_credits(
+    query_service: QueryService,
+    user_id: str,
+    query: str
+) -> Dict[str, Any]:
+    """
+    Check the balance and deduct the credits of an ask query up front
+
+    Raises HTTPException(402) before any work is done when the balance is
+    insufficient. Admin users are never charged.
+
+    Returns:
+        Dict with is_admin, required_credits and current_balance
+    """
+    # 2-3. Admin kontrolü ve bakiye sorgusu birbirinden bağımsız, paralel çalıştır
+    is_admin, current_balance = await asyncio.gather(
+        credit_service.is_admin_user(user_id),
+        credit_service.get_user_balance(user_id, check_admin=False)
+    )
+    required_credits = 0  # Default değer
+    
+    if is_admin:
+        # Admin kullanıcılar için kredi kontrolü bypass
+        current_balance = 0
+    else:
+        # 3. Sorgu için gerekli kredi miktarını hesapla (Intent-based)
+        required_credits = query_service.calculate_intent_based_credits(query)
+        
+        if current_balance < required_credits:
+            # Yetersiz kredi durumu
+            logger.warning(f"Insufficient credits for user {user_id}: required={required_credits}, balance={current_balance}")
+            raise HTTPException(
+                status_code=402,  # Payment Required
+                detail={
+                    "error": "insufficient_credits",
+                    "message": "Krediniz bu sorgu için yeterli değil",
+                    "required_credits": required_credits,
+                    "current_balance": current_balance,
+                    "query": query[:100] + "..." if len(query) > 100 else query
+                }
+            )
+        
+        # 4. Krediyi düş (işlem başlamadan önce)
+        deduction_success = await credit_service.deduct_credits(
+            user_id=user_id,
+            amount=required_credits,
+            description=f"Sorgu: '{query[:50]}{'...' if len(query) > 50 else ''}'",
+            query_id=None  # Query ID henüz yok, sonra güncellenecek
+        )
+        
+        if not deduction_success:
+            logger.error(f"Credit deduction failed for user {user_id}")
+            raise HTTPException(
+                status_code=500,
+                detail="Kredi düşüm işlemi başarısız oldu"
+            )
+        
+        logger.info(f"Credits deducted for user {user_id}: {required_credits} credits, balance: {current_balance - required_credits}")
+
+    return {
+        "is_admin": is_admin,
+        "required_credits": required_credits,
+        "current_balance": current_balance
+    }
+
+
+async def _settle_ask_credits(
+    user_id: str,
+    query: str,
+    result: Dict[str, Any],
+    is_admin: bool,
+    required_credits: int,
+    current_balance: int
+) -> Dict[str, Any]:
+    """
+    Refund reserved credits for no-info / low-confidence answers
+
+    Returns:
+        credit_info block for the ask response
+    """
+    # 6. AI cevabını kontrol et - bilgi bulunamadıysa kredi iade et
+    ai_answer = result.get("answer", "")
+    no_info_phrases = [
+        "Verilen belge içeriğinde bu konuda bilgi bulunmamaktadır",
+        "belge içeriğinde bu konuda bilgi bulunmamaktadır",
+        "bilgi bulunmamaktadır"
+    ]
+    
+    # Bilgi bulunamadığını gösteren ifadeler varsa kredi iade et
+    is_no_info_response = any(phrase in ai_answer for phrase in no_info_phrases)
+    
+    # Debug log
+    if is_no_info_response:
+        logger.info(f"No info response detected for query '{query}' - AI answer: '{ai_answer[:100]}...'")
+    else:
+        logger.debug(f"Info found for query '{query}' - AI answer: '{ai_answer[:100]}...'")
+    refund_applied = False
+    
+    if not is_admin and is_no_info_response and required_credits > 0:
+        # Kredi iadesi yap
+        search_log_id = result.get("search_log_id")
+        refund_success = await credit_service.refund_credits(
+            user_id=user_id,
+            amount=required_credits,
+            query_id=search_log_id if search_log_id else "no_info",
+            reason=f"Bilgi bulunamadı: '{query[:50]}{'...' if len(query) > 50 else ''}'"
+        )
+        
+        if refund_success:
+            refund_applied = True
+            logger.info(f"Credit refunded for user {user_id}: {required_credits} credits (no info found)")
+        else:
+            logger.error(f"Credit refund failed for user {user_id}")
+    
+    # Check for low confidence and refund credits if needed (NEW)
+    confidence_score = result.get("confidence_score", 1.0)
+    confidence_threshold = 0.4
+    is_low_confidence = confidence_score < confidence_threshold
+    
+    if not is_admin and is_low_confidence and required_credits > 0 and not refund_applied:
+        # Kredi iadesi yap - düşük güvenilirlik
+        search_log_id = result.get("search_log_id")
+        refund_success = await credit_service.refund_credits(
+            user_id=user_id,
+            amount=required_credits,
+            query_id=search_log_id if search_log_id else "low_confidence",
+            reason=f"Düşük güvenilirlik (%{int(confidence_score * 100)}): '{query[:50]}{'...' if len(query) > 50 else ''}'"
+        )
+        
+        if refund_success:
+            refund_applied = True
+            logger.info(f"Credit refunded for user {user_id}: {required_credits} credits (low confidence: {confidence_score:.2f})")
+        else:
+            logger.error(f"Credit refund failed for user {user_id} (low confidence)")
+    
+    # 7. Kredi bilgilerini hazırla
+    if not is_admin:
+        final_balance = current_balance if refund_applied else current_balance - required_credits
+        credits_used = 0 if refund_applied else required_credits
+        
+        # Determine refund reason
+        refund_reason = None
+        if refund_applied:
+            if is_no_info_response:
+                refund_reason = "Bilgi bulunamadı"
+            elif is_low_confidence:
+                refund_reason = f"Düşük güvenilirlik (%{int(confidence_score * 100)})"
+        
+        credit_info = {
+            "credits_used": credits_used,
+            "remaining_balance": final_balance,
+            "refund_applied": refund_applied,
+            "refund_reason": refund_reason,
+            "confidence_score": confidence_score,
+            "no_info_detected": is_no_info_response,  # Debug bilgisi
+            "low_confidence_detected": is_low_confidence  # Debug bilgisi
+        }
+    else:
+        credit_info = {
+            "credits_used": 0,
+            "remaining_balance": "unlimited",
+            "admin_user": True,
+            "refund_would_apply": is_no_info_response,  # Admin olsaydı kredi iade edilir miydi
+            "no_info_detected": is_no_info_response  # Debug bilgisi
+        }
+
+    return credit_info
+
+
+def _save_conversation_messages(
+    conversation_id: Optional[UUID],
+    user_id: str,
+    result: Dict[str, Any]
+) -> None:
+    """Record the user/assistant message pair of an answered question"""
+    # 8. Konuşma mesajlarını kaydet (best-effort)
+    if conversation_id:
+        try:
+            search_log_id = result.get("search_log_id")
+            messages_payload = [
+                {
+                    "conversation_id": str(conversation_id),
+                    "user_id": user_id,
+                    "role": "user",
+                    "search_log_id": search_log_id
+                },
+                {
+                    "conversation_id": str(conversation_id),
+                    "user_id": user_id,
+                    "role": "assistant",
+                    "search_log_id": search_log_id
+                }
+            ]
+            supabase_client.supabase.table("conversation_messages").insert(messages_payload).execute()
+        except Exception as e:
+            logger.warning(f"Conversation messages insert failed for user {user_id}: {e}")
+
+
 @router.post("/ask", response_model=AskResponse)
 async def ask_question(
     ask_request: AskRequest,
     current_user: UserResponse = Depends(get_current_user),
+    rate_limit_remaining: int = Depends(rate_limit("ask")),
     db: AsyncSession = Depends(get_db)
 ):
     """
@@ -315,54 +518,15 @@ async def ask_question(
         query = ask_request.query
         
         # 1. Intent classification for all users (needed for routing)
-        query_service_temp = QueryService(db)
-        query_intent = query_service_temp.classify_query_intent(query)
+        query_service = QueryService(db)
+        query_intent = query_service.classify_query_intent(query)
         
-        # 2. Admin kullanıcılar için kredi kontrolü bypass
-        is_admin = await credit_service.is_admin_user(user_id)
-        required_credits = 0  # Default değer
-        
-        if not is_admin:
-            # 3. Sorgu için gerekli kredi miktarını hesapla (Intent-based)
-            required_credits = query_service_temp.calculate_intent_based_credits(query)
-            
-            # 3. Kullanıcının yeterli kredisi var mı kontrol et
-            current_balance = await credit_service.get_user_balance(user_id)
-            
-            if current_balance < required_credits:
-                # Yetersiz kredi durumu
-                logger.warning(f"Insufficient credits for user {user_id}: required={required_credits}, balance={current_balance}")
-                raise HTTPException(
-                    status_code=402,  # Payment Required
-                    detail={
-                        "error": "insufficient_credits",
-                        "message": "Krediniz bu sorgu için yeterli değil",
-                        "required_credits": required_credits,
-                        "current_balance": current_balance,
-                        "query": query[:100] + "..." if len(query) > 100 else query
-                    }
-                )
-            
-            # 4. Krediyi düş (işlem başlamadan önce)
-            deduction_success = await credit_service.deduct_credits(
-                user_id=user_id,
-                amount=required_credits,
-                description=f"Sorgu: '{query[:50]}{'...' if len(query) > 50 else ''}'",
-                query_id=None  # Query ID henüz yok, sonra güncellenecek
-            )
-            
-            if not deduction_success:
-                logger.error(f"Credit deduction failed for user {user_id}")
-                raise HTTPException(
-                    status_code=500,
-                    detail="Kredi düşüm işlemi başarısız oldu"
-                )
-            
-            logger.info(f"Credits deducted for user {user_id}: {required_credits} credits, balance: {current_balance - required_credits}")
+        # 2-4. Admin bypass, kredi kontrolü ve kredi düşümü
+        credits = await _reserve_ask_credits(query_service, user_id, query)
+        is_admin = credits["is_admin"]
+        required_credits = credits["required_credits"]
         
         # 5. Normal ask query processing
-        query_service = QueryService(db)
-        
         result = await query_service.process_ask_query(
             query=ask_request.query,
             user_id=user_id,
@@ -371,122 +535,27 @@ async def ask_question(
             similarity_threshold=ask_request.similarity_threshold,
             use_cache=ask_request.use_cache,
             intent=query_intent,
-            conversation_id=str(ask_request.conversation_id) if ask_request.conversation_id else None
+            conversation_id=str(ask_request.conversation_id) if ask_request.conversation_id else None,
+            rate_limit_remaining=rate_limit_remaining,
+            corpora=ask_request.corpora,
+            retrieval_mode=ask_request.retrieval_mode
         )
         
-        # 6. AI cevabını kontrol et - bilgi bulunamadıysa kredi iade et
-        ai_answer = result.get("answer", "")
-        no_info_phrases = [
-            "Verilen belge içeriğinde bu konuda bilgi bulunmamaktadır",
-            "belge içeriğinde bu konuda bilgi bulunmamaktadır",
-            "bilgi bulunmamaktadır"
-        ]
-        
-        # Bilgi bulunamadığını gösteren ifadeler varsa kredi iade et
-        is_no_info_response = any(phrase in ai_answer for phrase in no_info_phrases)
-        
-        # Debug log
-        if is_no_info_response:
-            logger.info(f"No info response detected for query '{ask_request.query}' - AI answer: '{ai_answer[:100]}...'")
-        else:
-            logger.debug(f"Info found for query '{ask_request.query}' - AI answer: '{ai_answer[:100]}...'")
-        refund_applied = False
-        
-        if not is_admin and is_no_info_response and required_credits > 0:
-            # Kredi iadesi yap
-            search_log_id = result.get("search_log_id")
-            refund_success = await credit_service.refund_credits(
-                user_id=user_id,
-                amount=required_credits,
-                query_id=search_log_id if search_log_id else "no_info",
-                reason=f"Bilgi bulunamadı: '{ask_request.query[:50]}{'...' if len(ask_request.query) > 50 else ''}'"
-            )
-            
-            if refund_success:
-                refund_applied = True
-                logger.info(f"Credit refunded for user {user_id}: {required_credits} credits (no info found)")
-            else:
-                logger.error(f"Credit refund failed for user {user_id}")
-        
-        # Check for low confidence and refund credits if needed (NEW)
-        confidence_score = result.get("confidence_score", 1.0)
-        confidence_threshold = 0.4
-        is_low_confidence = confidence_score < confidence_threshold
-        
-        if not is_admin and is_low_confidence and required_credits > 0 and not refund_applied:
-            # Kredi iadesi yap - düşük güvenilirlik
-            search_log_id = result.get("search_log_id")
-            refund_success = await credit_service.refund_credits(
-                user_id=user_id,
-                amount=required_credits,
-                query_id=search_log_id if search_log_id else "low_confidence",
-                reason=f"Düşük güvenilirlik (%{int(confidence_score * 100)}): '{ask_request.query[:50]}{'...' if len(ask_request.query) > 50 else ''}'"
-            )
-            
-            if refund_success:
-                refund_applied = True
-                logger.info(f"Credit refunded for user {user_id}: {required_credits} credits (low confidence: {confidence_score:.2f})")
-            else:
-                logger.error(f"Credit refund failed for user {user_id} (low confidence)")
-        
-        # 7. Kredi bilgilerini response'a ekle
-        if not is_admin:
-            # current_balance variables'ını güvenli şekilde kullan
-            balance = locals().get('current_balance', 0)
-            final_balance = balance if refund_applied else balance - required_credits
-            credits_used = 0 if refund_applied else required_credits
-            
-            # Determine refund reason
-            refund_reason = None
-            if refund_applied:
-                if is_no_info_response:
-                    refund_reason = "Bilgi bulunamadı"
-                elif is_low_confidence:
-                    refund_reason = f"Düşük güvenilirlik (%{int(confidence_score * 100)})"
-            
-            result["credit_info"] = {
-                "credits_used": credits_used,
-                "remaining_balance": final_balance,
-                "refund_applied": refund_applied,
-                "refund_reason": refund_reason,
-                "confidence_score": confidence_score,
-                "no_info_detected": is_no_info_response,  # Debug bilgisi
-                "low_confidence_detected": is_low_confidence  # Debug bilgisi
-            }
-        else:
-            result["credit_info"] = {
-                "credits_used": 0,
-                "remaining_balance": "unlimited",
-                "admin_user": True,
-                "refund_would_apply": is_no_info_response,  # Admin olsaydı kredi iade edilir miydi
-                "no_info_detected": is_no_info_response  # Debug bilgisi
-            }
+        # 6-7. Bilgi bulunamadıysa / düşük güvenilirlikte kredi iade et
+        result["credit_info"] = await _settle_ask_credits(
+            user_id=user_id,
+            query=query,
+            result=result,
+            is_admin=is_admin,
+            required_credits=required_credits,
+            current_balance=credits["current_balance"]
+        )
         
         # Konuşma ID'yi response'a ekle
         result["conversation_id"] = str(ask_request.conversation_id) if ask_request.conversation_id else None
 
         # 8. Konuşma mesajlarını kaydet (best-effort)
-        conversation_id = ask_request.conversation_id
-        if conversation_id:
-            try:
-                search_log_id = result.get("search_log_id")
-                messages_payload = [
-                    {
-                        "conversation_id": str(conversation_id),
-                        "user_id": user_id,
-                        "role": "user",
-                        "search_log_id": search_log_id
-                    },
-                    {
-                        "conversation_id": str(conversation_id),
-                        "user_id": user_id,
-                        "role": "assistant",
-                        "search_log_id": search_log_id
-                    }
-                ]
-                supabase_client.supabase.table("conversation_messages").insert(messages_payload).execute()
-            except Exception as e:
-                logger.warning(f"Conversation messages insert failed for user {user_id}: {e}")
+        _save_conversation_messages(ask_request.conversation_id, user_id, result)
         
         logger.info(f"Ask query processed for user {user_id}: '{ask_request.query[:50]}' - confidence: {result['confidence_score']}")
         
@@ -551,6 +620,128 @@ async def ask_question(
             error_code="ASK_FAILED"
         )
 
+def _format_sse(event: str, data: Dict[str, Any]) -> str:
+    """Serialize one Server-Sent Events frame"""
+    payload = json.dumps(data, ensure_ascii=False, default=str)
+    return f"event: {event}\ndata: {payload}\n\n"
+
+
+@router.post("/ask/stream")
+async def ask_question_stream(
+    ask_request: AskRequest,
+    current_user: UserResponse = Depends(get_current_user),
+    rate_limit_remaining: int = Depends(rate_limit("ask")),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Ask a question and stream the answer as Server-Sent Events
+    
+    Same pipeline, credit rules and response payload as /ask, but the client
+    receives the sources as soon as retrieval finishes and the answer token by
+    token instead of waiting for the full generation.
+    
+    Events:
+    - sources: retrieved sources and retrieval timings
+    - token: {"text": "..."} raw model output delta
+    - done: the full /ask response data including credit_info; its answer is
+      the cleaned final text (it may carry the low-confidence warning) and
+      replaces the text assembled from the token events
+    - error: {"message", "error_code"}; reserved credits are refunded
+    
+    Credit checks run before the stream opens, so insufficient credits still
+    return a regular 402 response. Credits reserved for a stream that ends
+    without a done event (error or client disconnect) are refunded.
+    
+    Args:
+        ask_request: Question and search parameters
+        current_user: Current authenticated user
+        db: Database session
+    
+    Returns:
+        text/event-stream response
+    """
+    user_id = str(current_user.id)
+    query = ask_request.query
+    
+    query_service = QueryService(db)
+    query_intent = query_service.classify_query_intent(query)
+    credits = await _reserve_ask_credits(query_service, user_id, query)
+    
+    async def refund_reserved_credits(reason: str) -> None:
+        if credits["is_admin"] or credits["required_credits"] <= 0:
+            return
+        try:
+            await credit_service.refund_credits(
+                user_id=user_id,
+                amount=credits["required_credits"],
+                query_id="failed",
+                reason=reason
+            )
+            logger.info(f"Credits refunded for user {user_id}: {credits['required_credits']} credits ({reason})")
+        except Exception as refund_error:
+            logger.error(f"Credit refund failed for user {user_id}: {refund_error}")
+    
+    async def event_stream() -> AsyncIterator[str]:
+        # Reserved credits are settled by the done event or refunded exactly once
+        settled = False
+        try:
+            async for event in query_service.process_ask_query_stream(
+                query=query,
+                user_id=user_id,
+                institution_filter=ask_request.institution_filter,
+                limit=ask_request.limit,
+                similarity_threshold=ask_request.similarity_threshold,
+                use_cache=ask_request.use_cache,
+                intent=query_intent,
+                conversation_id=str(ask_request.conversation_id) if ask_request.conversation_id else None,
+                rate_limit_remaining=rate_limit_remaining,
+                corpora=ask_request.corpora,
+                retrieval_mode=ask_request.retrieval_mode
+            ):
+                if event["event"] == "done":
+                    result = event["data"]
+                    result["credit_info"] = await _settle_ask_credits(
+                        user_id=user_id,
+                        query=query,
+                        result=result,
+                        is_admin=credits["is_admin"],
+                        required_credits=credits["required_credits"],
+                        current_balance=credits["current_balance"]
+                    )
+                    settled = True
+                    result["conversation_id"] = str(ask_request.conversation_id) if ask_request.conversation_id else None
+                    _save_conversation_messages(ask_request.conversation_id, user_id, result)
+                    logger.info(f"Streamed ask query processed for user {user_id}: '{query[:50]}' - confidence: {result.get('confidence_score')}")
+                
+                yield _format_sse(event["event"], event["data"])
+                
+        except Exception as e:
+            logger.error(f"Ask stream error for user {user_id}: {str(e)}")
+            
+            if not settled:
+                settled = True
+                await refund_reserved_credits(f"İşlem hatası: {str(e)}")
+            
+            yield _format_sse("error", {
+                "message": e.message if isinstance(e, AppException) else "Failed to process question",
+                "error_code": e.error_code if isinstance(e, AppException) else "ASK_FAILED"
+            })
+        finally:
+            # Client disconnects end the generator with CancelledError/GeneratorExit,
+            # which the handler above does not catch
+            if not settled:
+                logger.info(f"Ask stream closed before completion for user {user_id}")
+                await asyncio.shield(refund_reserved_credits("Bağlantı kesildi"))
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"  # Disable proxy buffering (nginx)
+        }
+    )
+
 @router.get("/suggestions", response_model=SuggestionsResponse)
 async def get_user_suggestions(
     current_user: UserResponse = Depends(get_current_user),
@@ -1039,6 +1230,7 @@ async def voice_query(
     limit: int = Form(default=5),
     similarity_threshold: float = Form(default=0.7),
     current_user: UserResponse = Depends(get_current_user),
+    rate_limit_remaining: int = Depends(rate_limit("voice-query")),
     db: AsyncSession = Depends(get_db)
 ):
     """
@@ -1113,15 +1305,15 @@ async def voice_query(
         logger.info(f"Voice query - transcription completed: '{transcribed_query}' ({transcription_result['word_count']} words)")
         
         # Step 2: Process query through AI system (same logic as /ask endpoint)
-        query_service_temp = QueryService(db)
-        query_intent = query_service_temp.classify_query_intent(transcribed_query)
+        query_service = QueryService(db)
+        query_intent = query_service.classify_query_intent(transcribed_query)
         
         # Credit check and deduction
         is_admin = await credit_service.is_admin_user(user_id)
         required_credits = 0
         
         if not is_admin:
-            required_credits = query_service_temp.calculate_intent_based_credits(transcribed_query)
+            required_credits = query_service.calculate_intent_based_credits(transcribed_query)
             current_balance = await credit_service.get_user_balance(user_id)
             
             if current_balance < required_credits:
@@ -1155,7 +1347,6 @@ async def voice_query(
             logger.info(f"Credits deducted for voice query user {user_id}: {required_credits} credits")
         
         # Process query and get AI answer (with concise response for voice)
-        query_service = QueryService(db)
         ai_result = await query_service.process_ask_query(
             query=transcribed_query,
             user_id=user_id,
@@ -1164,7 +1355,8 @@ async def voice_query(
             similarity_threshold=similarity_threshold,
             use_cache=True,
             intent=query_intent,
-            response_style="concise"  # Short answers for voice (100-150 words)
+            response_style="concise",  # Short answers for voice (100-150 words)
+            rate_limit_remaining=rate_limit_remaining
         )
         
         logger.info(f"Voice query - AI answer generated for user {user_id}: {len(ai_result.get('answer', ''))} chars")
@@ -5,7 +5,7 @@ Handles environment variables and application settings
 
 from pydantic_settings import BaseSettings
 from pydantic import Field, field_validator
-from typing import List, Optional
+from typing import List, Optional, Dict
 import os
 from dotenv import load_dotenv
 
@@ -43,13 +43,78 @@ class Settings(BaseSettings):
     OPENAI_MODEL: str = "gpt-4o"  # the newest OpenAI model is "gpt-4o" which was released May 13, 2024
     OPENAI_EMBEDDING_MODEL: str = "text-embedding-3-large"  # Upgraded: 2048 dimensions for Elasticsearch
     OPENAI_EMBEDDING_DIMENSIONS: int = 2048  # ES 8.19.2 optimized dimensions
+    # Batched embedding (ingestion, re-embedding): texts packed per request by token count
+    EMBEDDING_MAX_INPUT_TOKENS: int = 8191  # per-input limit of the embedding models
+    EMBEDDING_BATCH_MAX_TOKENS: int = 100000  # per request (API limit 300k)
+    EMBEDDING_BATCH_MAX_INPUTS: int = 2048  # per request (API limit)
+    EMBEDDING_BATCH_CONCURRENCY: int = 4  # requests in flight per batcher
+    EMBEDDING_BATCH_MAX_RETRIES: int = 5
+    EMBEDDING_BATCH_RETRY_BACKOFF: float = 1.0  # seconds, doubled per attempt
+    # Query embeddings arriving together on the API process share one request
+    EMBEDDING_MICRO_BATCH_ENABLED: bool = True
+    EMBEDDING_MICRO_BATCH_MAX_WAIT_MS: float = 5.0  # window opened by the first waiting query
+    EMBEDDING_MICRO_BATCH_MAX_SIZE: int = 64  # texts per request; a full batch is sent at once
+    # Shared OpenAI quota across the API and all Celery workers (services.openai_rate_limiter)
+    OPENAI_RATE_LIMIT_ENABLED: bool = True
+    OPENAI_EMBEDDING_RPM: int = 3000  # until the first x-ratelimit-* headers arrive
+    OPENAI_EMBEDDING_TPM: int = 1000000
+    OPENAI_RATE_LIMIT_HEADROOM: float = 0.95  # share of the reported limits we use
+    OPENAI_RATE_LIMIT_INTERACTIVE_RESERVE: float = 0.2  # share of each bucket batch jobs leave to live queries
+    OPENAI_RATE_LIMIT_MAX_INTERACTIVE_WAIT: float = 10.0  # seconds a live query waits before sending anyway
     OPENAI_MAX_TOKENS: int = 4000
 
     # Elasticsearch Vector Database (Primary)
     ELASTICSEARCH_URL: str = "https://elastic.mevzuatgpt.org"
     ELASTICSEARCH_INDEX: str = "mevzuat_embeddings"
     ELASTICSEARCH_YARGITAY_INDEX: str = "yargitay_embeddings"
-    ELASTICSEARCH_TIMEOUT: int = 30
+    ELASTICSEARCH_TIMEOUT: int = 30  # seconds per request (searches, counts, mappings)
+    ELASTICSEARCH_BULK_TIMEOUT: int = 300  # seconds per _bulk / _by_query request
+    ELASTICSEARCH_BULK_MAX_BYTES: int = 8 * 1024 * 1024  # _bulk body size per batch (a 2048D chunk is ~45 KB)
+    ELASTICSEARCH_BULK_MAX_DOCS: int = 500
+    ELASTICSEARCH_BULK_CONCURRENCY: int = 4  # batches in flight at once
+    ELASTICSEARCH_BULK_MAX_RETRIES: int = 5  # retries of items rejected with 429/503
+    ELASTICSEARCH_BULK_RETRY_BACKOFF: float = 0.5  # seconds, doubled per retry (plus jitter)
+    ELASTICSEARCH_CONNECT_TIMEOUT: int = 5  # seconds to get a pooled or new connection
+    ELASTICSEARCH_POOL_SIZE: int = 64  # open connections per process
+    ELASTICSEARCH_POOL_SIZE_PER_HOST: int = 32
+    ELASTICSEARCH_KEEPALIVE_TIMEOUT: int = 60  # seconds an idle connection stays open
+    ELASTICSEARCH_DNS_CACHE_TTL: int = 300
+
+    # Vector search: "knn" = approximate HNSW search, "exact" = script_score brute force
+    ELASTICSEARCH_SEARCH_MODE: str = "knn"
+    ELASTICSEARCH_KNN_MIN_CANDIDATES: int = 100  # num_candidates floor per shard
+    ELASTICSEARCH_KNN_CANDIDATE_MULTIPLIER: int = 10  # num_candidates = k * multiplier
+    ELASTICSEARCH_HNSW_M: int = 16  # graph connections per node
+    ELASTICSEARCH_HNSW_EF_CONSTRUCTION: int = 100  # candidates considered while building the graph
+    ELASTICSEARCH_VECTOR_INDEX_TYPE: str = "int8_hnsw"  # hnsw | int8_hnsw | int4_hnsw | bbq_hnsw (new index versions)
+    ELASTICSEARCH_EXCLUDE_VECTOR_FROM_SOURCE: bool = True  # vectors live only in the vector field (new index versions)
+    ELASTICSEARCH_KNN_RESCORE_OVERSAMPLE: float = 3.0  # quantized graphs: rescore k * oversample on raw vectors, <= 1 disables
+
+    # Multi-corpus retrieval (mevzuat + Yargıtay in one _msearch)
+    SEARCH_EXTRA_CORPORA: Dict[str, str] = {}  # further corpus name -> index alias
+    SEARCH_CORPUS_QUOTAS: Dict[str, float] = {"mevzuat": 0.6, "yargitay": 0.4}  # guaranteed share of the result slots
+    ASK_DEFAULT_CORPORA: List[str] = ["mevzuat"]
+
+    # Hybrid retrieval (BM25 + vector fused with reciprocal rank fusion)
+    ASK_DEFAULT_RETRIEVAL_MODE: str = "vector"  # "vector" or "hybrid", overridable per request
+    HYBRID_RRF_RANK_CONSTANT: int = 60  # RRF k: larger values flatten the head of each ranking
+    HYBRID_RANK_WINDOW: int = 50  # hits per leg considered by the fusion (at least k)
+
+    # Result diversity: overlapping chunks of one page waste prompt tokens
+    SEARCH_MAX_CHUNKS_PER_DOCUMENT: int = 3  # ES collapse on document_id (inner_hits size), 0 disables
+    SEARCH_MAX_CHUNKS_PER_PAGE: int = 2  # 0 disables
+    SEARCH_DEDUP_OVERLAP_THRESHOLD: float = 0.8  # drop a chunk whose word shingles overlap a kept one beyond this, >= 1 disables
+    SEARCH_COLLAPSE_OVERSAMPLE: int = 4  # kNN neighbours per requested document when collapsing
+
+    # Two-stage retrieval: pick documents by centroid, then search only their chunks
+    ELASTICSEARCH_DOCUMENT_INDEX: str = "mevzuat_documents"  # one centroid vector per mevzuat document
+    SEARCH_DOCUMENT_ROUTING_TOP_N: int = 0  # documents searched per question, 0 searches every chunk
+
+    # Re-embedding into a new index version (admin job, resumable)
+    REINDEX_CONCURRENCY: int = 4  # documents re-embedded in parallel
+    REINDEX_PAGE_SIZE: int = 50  # documents per Redis checkpoint
+    REINDEX_STALE_AFTER: int = 900  # seconds without a checkpoint before a running job counts as dead
+    REINDEX_REPORT_SAMPLE_QUERIES: int = 20  # sampled queries for the size/latency report before the swap
 
     # MongoDB (Yargitay metadata)
     MONGODB_CONNECTION_STRING: str
@@ -71,6 +136,10 @@ class Settings(BaseSettings):
     # AI Model Configuration
     GROQ_API_KEY: str = "your-groq-api-key-here"
     GROQ_MODEL: str = "llama3-70b-8192"  # Default Groq model
+    GROQ_MAX_CONNECTIONS: int = 20  # Shared HTTP pool per process
+    GROQ_TIMEOUT: float = 60.0  # seconds
+    GROQ_SETTINGS_CACHE_TTL: int = 60  # seconds, bounds staleness across workers
+    GROQ_SETTINGS_FAILURE_CACHE_TTL: int = 5  # seconds the defaults are served after a DB error
     OLLAMA_BASE_URL: str = "http://localhost:11434"
     OLLAMA_MODEL: str = "llama3"
     OLLAMA_TIMEOUT: int = 30
@@ -98,6 +167,30 @@ class Settings(BaseSettings):
     # Rate Limiting
     RATE_LIMIT_REQUESTS: int = 100
     RATE_LIMIT_WINDOW: int = 60  # seconds
+    RATE_LIMIT_ENABLED: bool = True
+    # Requests per RATE_LIMIT_WINDOW by endpoint and role; "ip" applies per client address
+    ENDPOINT_RATE_LIMITS: Dict[str, Dict[str, int]] = {
+        "ask": {"user": 30, "admin": 300, "ip": 60},
+        "voice-query": {"user": 10, "admin": 100, "ip": 20},
+        "search": {"user": 60, "admin": 600, "ip": 120},
+    }
+
+    # Query caches (Redis)
+    EMBEDDING_CACHE_TTL: int = 7 * 24 * 3600  # seconds, embeddings are deterministic per model
+    SEARCH_CACHE_TTL: int = 1800  # seconds
+
+    # Content-addressed chunk embeddings shared by all workers (services.embedding_store)
+    CHUNK_EMBEDDING_STORE_ENABLED: bool = True
+    CHUNK_EMBEDDING_STORE_TTL: int = 30 * 24 * 3600  # seconds since the last hit
+
+    # Semantic answer cache (near-duplicate questions)
+    SEMANTIC_CACHE_ENABLED: bool = True
+    SEMANTIC_CACHE_MAX_DISTANCE: float = 0.05  # cosine distance, i.e. similarity >= 0.95
+    SEMANTIC_CACHE_CAPACITY: int = 1000  # entries per process (and in the Redis mirror)
+    SEMANTIC_CACHE_TTL: int = 6 * 3600  # seconds
+
+    # Institution/category catalog (Elasticsearch aggregations, invalidated on ingest/delete)
+    CATALOG_CACHE_TTL: int = 3600  # seconds
 
     # Vector Search - Elasticsearch optimized
     SEARCH_LIMIT: int = 10
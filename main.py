@@ -44,18 +44,18 @@ logger = logging.getLogger(__name__)
 async def lifespan(app: FastAPI):
     """
     Application lifespan events - runs on startup and shutdown
-    Handles Redis pool, orphaned task recovery
+    Handles shared service clients, orphaned task recovery
     """
     # Startup
     logger.info("🚀 MevzuatGPT API Server starting up...")
     
-    # Initialize Redis connection pool
+    # Initialize shared clients (Redis pool, OpenAI, Groq, Elasticsearch, ...)
     try:
-        from services.redis_service import get_redis_pool
-        await get_redis_pool()
-        logger.info("✅ Redis connection pool initialized")
+        from services.service_container import service_container
+        await service_container.startup()
+        logger.info("✅ Service container initialized (Redis pool, AI and search clients)")
     except Exception as e:
-        logger.error(f"⚠️ Redis pool initialization failed: {str(e)}")
+        logger.error(f"⚠️ Service container initialization failed: {str(e)}")
 
     # Celery broker/worker health check (best-effort)
     try:
@@ -81,13 +81,13 @@ async def lifespan(app: FastAPI):
     # Shutdown
     logger.info("🛑 MevzuatGPT API Server shutting down...")
     
-    # Close Redis connection pool
+    # Close shared clients (Redis pool, HTTP connection pools, thread pools)
     try:
-        from services.redis_service import close_redis_pool
-        await close_redis_pool()
-        logger.info("✅ Redis connection pool closed")
+        from services.service_container import service_container
+        await service_container.shutdown()
+        logger.info("✅ Service container shut down")
     except Exception as e:
-        logger.error(f"⚠️ Redis pool closure failed: {str(e)}")
+        logger.error(f"⚠️ Service container shutdown failed: {str(e)}")
 
 
 # Initialize FastAPI app with lifespan
@@ -173,16 +173,23 @@ async def validation_exception_handler(request: Request, exc: RequestValidationE
 @app.exception_handler(AppException)
 async def app_exception_handler(request: Request, exc: AppException):
     logger.error(f"App exception: {exc.message} - {exc.detail}")
+    error_body = {
+        "message": exc.message,
+        "detail": exc.detail,
+        "code": exc.error_code
+    }
+    headers = None
+    retry_after = exc.extra_data.get("retry_after") if exc.extra_data else None
+    if exc.status_code == 429 and retry_after:
+        error_body["retry_after"] = retry_after
+        headers = {"Retry-After": str(retry_after)}
     return JSONResponse(
         status_code=exc.status_code,
         content={
             "success": False,
-            "error": {
-                "message": exc.message,
-                "detail": exc.detail,
-                "code": exc.error_code
-            }
-        }
+            "error": error_body
+        },
+        headers=headers
     )
 
 # Global exception handler
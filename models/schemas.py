@@ -195,6 +195,13 @@ class AskRequest(BaseModel):
     limit: int = Field(10, ge=1, le=50, description="Maximum number of search results")
     similarity_threshold: float = Field(0.5, ge=0.3, le=1.0, description="Minimum similarity score")
     use_cache: bool = Field(True, description="Whether to use Redis cache")
+    corpora: Optional[List[str]] = Field(
+        None, description="Corpora to search, e.g. [\"mevzuat\", \"yargitay\"] (default: mevzuat)"
+    )
+    retrieval_mode: Optional[str] = Field(
+        None, pattern="^(vector|hybrid)$",
+        description="vector (embedding only) or hybrid (BM25 + vector, RRF fused); default from server settings"
+    )
 
 class SourceItem(BaseModel):
     """Source document information in Ask response"""
@@ -0,0 +1,184 @@
+"""
+Institution and category catalog
+Facets with document and chunk counts from Elasticsearch terms aggregations,
+cached in Redis and invalidated when documents are ingested or deleted
+"""
+
+import json
+import asyncio
+import logging
+import unicodedata
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Union
+
+from core.config import settings
+from services.redis_service import RedisService
+
+logger = logging.getLogger(__name__)
+
+CATALOG_CACHE_KEY = "catalog:facets"
+
+# Facet name -> keyword field on the chunk index
+CATALOG_FACET_FIELDS = {
+    "institutions": "source_institution.keyword",
+    "categories": "category.keyword"
+}
+
+# Placeholder written at ingestion when a document has no institution
+UNSPECIFIED_INSTITUTION = "Belirtilmemiş"
+
+
+def fold_institution_name(name: str) -> str:
+    """Turkish-aware lowercase of an institution name with whitespace collapsed"""
+    text = unicodedata.normalize("NFC", str(name or ""))
+    text = text.replace("I", "ı").replace("İ", "i").lower()
+    return " ".join(text.split())
+
+
+def institution_acronym(name: str) -> str:
+    """Folded initials of the capitalized words ("Sosyal Güvenlik Kurumu" -> "sgk")"""
+    initials = "".join(word[0] for word in str(name or "").split() if word[0].isupper())
+    return fold_institution_name(initials)
+
+
+def match_institution_names(value: str, names: List[str]) -> List[str]:
+    """
+    Catalog names an institution filter refers to
+
+    An exact (folded) match wins; otherwise every name containing the
+    filter, or whose acronym is the filter, matches. Folding maps I/ı and
+    İ/i as Turkish does, so "İŞKUR" and "işkur" find the same institution.
+    """
+    folded = fold_institution_name(value)
+    if not folded:
+        return []
+    exact = [name for name in names if fold_institution_name(name) == folded]
+    if exact:
+        return exact
+    return [
+        name for name in names
+        if folded in fold_institution_name(name)
+        or (len(folded) >= 2 and institution_acronym(name) == folded)
+    ]
+
+
+async def invalidate_catalog_cache() -> None:
+    """
+    Drop the cached catalog so the next read rebuilds it
+
+    Safe to call from Celery workers: it only touches Redis.
+    """
+    try:
+        async with RedisService() as client:
+            await client.delete(CATALOG_CACHE_KEY)
+        logger.info("Institution catalog cache invalidated")
+    except Exception as e:
+        logger.warning(f"Catalog cache invalidation failed: {e}")
+
+
+class CatalogService:
+    """Institution/category facets of the document index"""
+
+    def __init__(self):
+        self._lock: Optional[asyncio.Lock] = None
+
+    async def _read_cache(self) -> Optional[Dict[str, Any]]:
+        try:
+            async with RedisService() as client:
+                payload = await client.get(CATALOG_CACHE_KEY)
+            return json.loads(payload) if payload else None
+        except Exception as e:
+            logger.warning(f"Catalog cache read failed: {e}")
+            return None
+
+    async def _write_cache(self, catalog: Dict[str, Any]) -> None:
+        try:
+            async with RedisService() as client:
+                await client.set(
+                    CATALOG_CACHE_KEY,
+                    json.dumps(catalog, ensure_ascii=False),
+                    ex=settings.CATALOG_CACHE_TTL
+                )
+        except Exception as e:
+            logger.warning(f"Catalog cache write failed: {e}")
+
+    async def _build_catalog(self) -> Dict[str, Any]:
+        # Import here to avoid circular imports
+        from services.service_container import service_container
+
+        facets = await service_container.elasticsearch_service.get_facets(CATALOG_FACET_FIELDS)
+        return {
+            "institutions": facets.get("institutions", []),
+            "categories": facets.get("categories", []),
+            "generated_at": datetime.utcnow().isoformat()
+        }
+
+    async def get_catalog(self, force_refresh: bool = False) -> Dict[str, Any]:
+        """
+        Get institution and category facets
+
+        Args:
+            force_refresh: Rebuild from Elasticsearch even if a cached copy exists
+
+        Returns:
+            Dict with "institutions" and "categories" facet lists
+            ([{"name", "document_count", "chunk_count"}]) and "generated_at"
+
+        Raises:
+            Exception: If the cache is empty and the aggregation fails
+        """
+        if not force_refresh:
+            cached = await self._read_cache()
+            if cached:
+                return cached
+
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+
+        async with self._lock:
+            # Another request may have rebuilt the catalog while we waited
+            if not force_refresh:
+                cached = await self._read_cache()
+                if cached:
+                    return cached
+
+            catalog = await self._build_catalog()
+            await self._write_cache(catalog)
+            logger.info(
+                f"Institution catalog rebuilt: {len(catalog['institutions'])} institutions, "
+                f"{len(catalog['categories'])} categories"
+            )
+            return catalog
+
+    async def get_institution_names(self) -> List[str]:
+        """Sorted institution names (without the 'unspecified' placeholder)"""
+        catalog = await self.get_catalog()
+        return sorted(
+            facet["name"] for facet in catalog["institutions"]
+            if facet["name"] and facet["name"].strip() and facet["name"] != UNSPECIFIED_INSTITUTION
+        )
+
+    async def resolve_institution_filter(self, value: Optional[str]) -> Union[str, List[str], None]:
+        """
+        Canonical institution names for a user supplied filter
+
+        Returns:
+            The matching catalog names (see match_institution_names), or the
+            filter unchanged when the catalog is unavailable or nothing matches
+        """
+        if not value or not value.strip():
+            return value
+        try:
+            names = await self.get_institution_names()
+        except Exception as e:
+            logger.warning(f"Institution catalog unavailable, filtering on '{value}' as given: {e}")
+            return value
+        matches = match_institution_names(value, names)
+        if not matches:
+            logger.info(f"Institution filter '{value}' matches no catalog institution")
+            return value
+        return matches
+
+
+# Global instance
+catalog_service = CatalogService()
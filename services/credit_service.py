@@ -12,6 +12,7 @@ Modüler tasarım ile mevcut sistemi bozmadan entegre edilmiştir.
 """
 
 import math
+import asyncio
 import logging
 from datetime import datetime
 from typing import Optional, List, Dict, Any
@@ -30,27 +31,32 @@ class CreditService:
         self.base_credit_cost = 1        # Her sorgu için temel kredi
         self.character_threshold = 100   # Karakter bazlı ek kredi eşiği
     
-    async def get_user_balance(self, user_id: str) -> int:
+    async def get_user_balance(self, user_id: str, check_admin: bool = True) -> int:
         """
         Kullanıcının mevcut kredi bakiyesini getir
         Admin kullanıcılar unlimited kredi sahibidir
         
         Args:
             user_id: Kullanıcı UUID'si
+            check_admin: False ise admin kontrolü atlanır (çağıran kontrolü
+                paralel olarak kendisi yapıyorsa)
             
         Returns:
             Mevcut kredi bakiyesi (admin için 999999)
         """
         try:
             # Admin kullanıcılar için unlimited kredi
-            if await self.is_admin_user(user_id):
+            if check_admin and await self.is_admin_user(user_id):
                 return 999999  # Unlimited credits for admin
             
-            response = supabase_client.supabase.table('user_credit_balance') \
-                .select('current_balance') \
-                .eq('user_id', user_id) \
-                .single() \
-                .execute()
+            # Supabase client senkron; event loop'u bloklamamak için thread'de çalıştır
+            response = await asyncio.to_thread(
+                supabase_client.supabase.table('user_credit_balance')
+                .select('current_balance')
+                .eq('user_id', user_id)
+                .single()
+                .execute
+            )
             
             if response.data:
                 return response.data['current_balance']
@@ -288,11 +294,13 @@ class CreditService:
         """
         try:
             # user_profiles tablosundan role kontrol et (id column kullan, user_id değil)
-            response = supabase_client.supabase.table('user_profiles') \
-                .select('role') \
-                .eq('id', user_id) \
-                .single() \
-                .execute()
+            response = await asyncio.to_thread(
+                supabase_client.supabase.table('user_profiles')
+                .select('role')
+                .eq('id', user_id)
+                .single()
+                .execute
+            )
             
             if response.data:
                 return response.data.get('role') == 'admin'
@@ -0,0 +1,278 @@
+"""
+Document-level routing index
+Keeps one centroid vector per mevzuat document (the normalized mean of its
+chunk vectors) in a small companion index, so a question can first pick the
+closest documents and then run chunk kNN restricted to them
+"""
+
+import time
+import logging
+from typing import List, Dict, Any, Optional, Union
+from datetime import datetime
+
+import numpy as np
+
+from core.config import settings
+from services.elasticsearch_service import ElasticsearchService, FILTER_FIELD_MAPPINGS, resolve_filter_clauses
+from services.elasticsearch_index_manager import KEYWORD_TEXT_FIELD, build_vector_field_mapping
+
+logger = logging.getLogger(__name__)
+
+# Chunk fields copied onto the centroid document so the search filters apply to both indexes
+ROUTING_FIELDS = ("source_institution", "source_document", "belge_adi", "category", "publish_date", "document_status")
+
+
+def document_centroid(vectors: Union[np.ndarray, List[List[float]]]) -> Optional[List[float]]:
+    """Unit-length mean of the chunk vectors (None without vectors)"""
+    if len(vectors) == 0:
+        return None
+    centroid = np.asarray(vectors, dtype=np.float32).mean(axis=0, dtype=np.float64)
+    norm = float(np.linalg.norm(centroid))
+    if norm == 0:
+        return None
+    return (centroid / norm).tolist()
+
+
+def build_document_index_body(dims: Optional[int] = None) -> Dict[str, Any]:
+    """Settings and mappings of the routing index (same filter field shapes as the chunk index)"""
+    vector_mapping = build_vector_field_mapping(dims)
+    return {
+        "mappings": {
+            "_meta": {
+                "embedding_model": settings.OPENAI_EMBEDDING_MODEL,
+                "embedding_dimensions": vector_mapping["dims"]
+            },
+            "properties": {
+                "document_id": KEYWORD_TEXT_FIELD,
+                "centroid": vector_mapping,
+                "chunk_count": {"type": "integer"},
+                "source_institution": KEYWORD_TEXT_FIELD,
+                "source_document": KEYWORD_TEXT_FIELD,
+                "belge_adi": KEYWORD_TEXT_FIELD,
+                "updated_at": {"type": "date"},
+                **FILTER_FIELD_MAPPINGS
+            }
+        }
+    }
+
+
+class DocumentRouter:
+    """
+    Centroid index maintenance and first-stage document routing
+
+    The index is derived data: it can be dropped and rebuilt from the chunk
+    index at any time (tasks.index_maintenance.build_document_centroids_task).
+    """
+
+    def __init__(self, es_service: ElasticsearchService, index_name: Optional[str] = None):
+        self.es_service = es_service
+        self.elasticsearch_url = es_service.elasticsearch_url
+        self.index_name = index_name or settings.ELASTICSEARCH_DOCUMENT_INDEX
+
+    async def ensure_index(self, dims: Optional[int] = None) -> bool:
+        """Create the routing index if it is missing; True when it was created"""
+        session = await self.es_service._get_session()
+        async with session.head(f"{self.elasticsearch_url}/{self.index_name}") as response:
+            if response.status == 200:
+                return False
+
+        async with session.put(
+            f"{self.elasticsearch_url}/{self.index_name}",
+            json=build_document_index_body(dims)
+        ) as response:
+            if response.status != 200:
+                error_text = await response.text()
+                raise Exception(f"Routing index creation failed for {self.index_name}: HTTP {response.status}, {error_text}")
+        logger.info(f"Created document routing index {self.index_name}")
+        return True
+
+    async def recreate_index(self, dims: Optional[int] = None) -> None:
+        """Drop and create the routing index (after the chunk vectors changed model)"""
+        session = await self.es_service._get_session()
+        async with session.delete(f"{self.elasticsearch_url}/{self.index_name}") as response:
+            if response.status not in (200, 404):
+                error_text = await response.text()
+                raise Exception(f"Routing index deletion failed for {self.index_name}: HTTP {response.status}, {error_text}")
+        await self.ensure_index(dims)
+
+    async def upsert_document(
+        self,
+        document_id: str,
+        vectors: Union[np.ndarray, List[List[float]]],
+        fields: Dict[str, Any],
+        refresh: bool = False
+    ) -> bool:
+        """
+        Store the centroid of a document's chunk vectors
+
+        Args:
+            document_id: Document UUID
+            vectors: All chunk vectors of the document
+            fields: Chunk fields; ROUTING_FIELDS are copied
+            refresh: Make the centroid searchable immediately
+
+        Returns:
+            False if there were no vectors to average
+        """
+        centroid = document_centroid(vectors)
+        if centroid is None:
+            return False
+
+        body = {
+            "document_id": document_id,
+            "centroid": centroid,
+            "chunk_count": len(vectors),
+            "updated_at": datetime.utcnow().isoformat(),
+            **{field: fields[field] for field in ROUTING_FIELDS if fields.get(field) is not None}
+        }
+        session = await self.es_service._get_session()
+        async with session.put(
+            f"{self.elasticsearch_url}/{self.index_name}/_doc/{document_id}",
+            params={"refresh": "true" if refresh else "false"},
+            json=body
+        ) as response:
+            if response.status not in (200, 201):
+                error_text = await response.text()
+                raise Exception(f"Centroid upsert failed for {document_id}: HTTP {response.status}, {error_text}")
+        return True
+
+    async def update_fields(self, document_id: str, fields: Dict[str, Any]) -> bool:
+        """Apply changed filter fields to a stored centroid (False if there is none)"""
+        routing_fields = {field: value for field, value in fields.items() if field in ROUTING_FIELDS}
+        if not routing_fields:
+            return False
+
+        session = await self.es_service._get_session()
+        async with session.post(
+            f"{self.elasticsearch_url}/{self.index_name}/_update/{document_id}",
+            json={"doc": routing_fields}
+        ) as response:
+            if response.status == 404:
+                return False
+            if response.status != 200:
+                error_text = await response.text()
+                raise Exception(f"Centroid field update failed for {document_id}: HTTP {response.status}, {error_text}")
+        return True
+
+    async def delete_document(self, document_id: str) -> None:
+        session = await self.es_service._get_session()
+        async with session.delete(f"{self.elasticsearch_url}/{self.index_name}/_doc/{document_id}") as response:
+            if response.status not in (200, 404):
+                error_text = await response.text()
+                logger.warning(f"Centroid delete failed for {document_id}: HTTP {response.status}, {error_text}")
+
+    async def refresh(self) -> None:
+        session = await self.es_service._get_session()
+        async with session.post(f"{self.elasticsearch_url}/{self.index_name}/_refresh") as response:
+            if response.status != 200:
+                error_text = await response.text()
+                logger.warning(f"Refresh of {self.index_name} failed: HTTP {response.status}, {error_text}")
+
+    async def route(
+        self,
+        query_vector: List[float],
+        top_n: int,
+        institution_filter: Optional[str] = None,
+        category_filter: Optional[str] = None,
+        date_filter: Optional[Dict[str, Any]] = None,
+        status_filter: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Documents whose centroid is closest to the question
+
+        Returns:
+            [{"document_id", "similarity"}] best first
+
+        Raises:
+            Exception: If the routing index cannot be searched
+        """
+        filter_clauses = await resolve_filter_clauses(
+            institution_filter=institution_filter,
+            category_filter=category_filter,
+            date_filter=date_filter,
+            status_filter=status_filter
+        )
+        query = {
+            "size": top_n,
+            "knn": {
+                "field": "centroid",
+                "query_vector": query_vector,
+                "k": top_n,
+                "num_candidates": self.es_service._num_candidates(top_n),
+                "filter": {"bool": filter_clauses}
+            },
+            "_source": ["document_id"]
+        }
+        session = await self.es_service._get_session()
+        async with session.post(
+            f"{self.elasticsearch_url}/{self.index_name}/_search",
+            json=query
+        ) as response:
+            if response.status != 200:
+                error_text = await response.text()
+                raise Exception(f"Document routing failed: HTTP {response.status}, {error_text}")
+            result = await response.json()
+
+        return [
+            {
+                "document_id": hit["_source"]["document_id"],
+                "similarity": 2.0 * hit["_score"] - 1.0  # knn cosine _score = (1 + cos) / 2
+            }
+            for hit in result.get("hits", {}).get("hits", [])
+        ]
+
+    async def compare_routing(
+        self,
+        query_vector: List[float],
+        k: int = 10,
+        top_n: Optional[int] = None,
+        similarity_threshold: float = 0.0,
+        **filters
+    ) -> Dict[str, Any]:
+        """
+        Recall and latency of routed chunk search against searching every chunk
+
+        Returns:
+            Dict with chunk recall@k, the share of the directly found documents
+            that routing picked, latencies of both paths and the hit IDs
+        """
+        top_n = top_n or settings.SEARCH_DOCUMENT_ROUTING_TOP_N or 20
+        timings = {}
+
+        start = time.perf_counter()
+        direct = await self.es_service.similarity_search(
+            query_vector=query_vector, k=k, similarity_threshold=similarity_threshold, **filters
+        )
+        timings["direct"] = int((time.perf_counter() - start) * 1000)
+
+        start = time.perf_counter()
+        routed_documents = await self.route(
+            query_vector, top_n,
+            institution_filter=filters.get("institution_filter"),
+            category_filter=filters.get("category_filter"),
+            date_filter=filters.get("date_filter"),
+            status_filter=filters.get("status_filter")
+        )
+        timings["route"] = int((time.perf_counter() - start) * 1000)
+        routed_ids = [document["document_id"] for document in routed_documents]
+
+        start = time.perf_counter()
+        routed = await self.es_service.similarity_search(
+            query_vector=query_vector, k=k, similarity_threshold=similarity_threshold,
+            document_ids=routed_ids, **filters
+        ) if routed_ids else []
+        timings["routed_chunks"] = int((time.perf_counter() - start) * 1000)
+        timings["routed_total"] = timings["route"] + timings["routed_chunks"]
+
+        direct_ids = {result["id"] for result in direct}
+        direct_documents = {result["document_id"] for result in direct}
+        return {
+            "k": k,
+            "top_n": top_n,
+            "recall_at_k": round(len(direct_ids & {result["id"] for result in routed}) / len(direct_ids), 4) if direct_ids else 1.0,
+            "document_recall": round(len(direct_documents & set(routed_ids)) / len(direct_documents), 4) if direct_documents else 1.0,
+            "latency_ms": timings,
+            "routed_documents": routed_documents,
+            "direct_ids": [result["id"] for result in direct],
+            "routed_ids": [result["id"] for result in routed]
+        }
@@ -0,0 +1,217 @@
+"""
+Elasticsearch bulk indexer
+Loads documents through several in-flight _bulk requests, sized by bytes,
+retrying only the items Elasticsearch rejected as overloaded (429/503)
+"""
+
+import json
+import time
+import random
+import asyncio
+import logging
+from typing import List, Dict, Any, Optional, Tuple
+
+import aiohttp
+import numpy as np
+
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Item and HTTP statuses that mean "try again later" rather than "bad document"
+RETRYABLE_STATUSES = {429, 502, 503, 504}
+
+# Decimals written per vector value: below float32 resolution for embedding
+# values, and ~12 characters instead of the 17-digit repr of a widened float32
+VECTOR_JSON_DECIMALS = 9
+
+
+def vector_to_json(vector: np.ndarray) -> List[float]:
+    """Short-repr float list of a float32 vector for a JSON request body"""
+    return np.round(vector.astype(np.float64), VECTOR_JSON_DECIMALS).tolist()
+
+
+class BulkIndexError(Exception):
+    """Some documents could not be indexed after all retries"""
+
+    def __init__(self, message: str, result: Dict[str, Any]):
+        super().__init__(message)
+        self.result = result
+
+
+class ElasticsearchBulkIndexer:
+    """
+    Parallel _bulk loader for one index
+
+    Documents are serialized once and packed into batches of at most
+    ELASTICSEARCH_BULK_MAX_BYTES / ELASTICSEARCH_BULK_MAX_DOCS. Up to
+    ELASTICSEARCH_BULK_CONCURRENCY batches are in flight at once. Batches are
+    sent with refresh=false and the index is refreshed once at the end.
+    Rejected items are retried with exponential backoff when Elasticsearch
+    reports back-pressure, and every other item error is reported as a failure
+    instead of being dropped.
+    """
+
+    def __init__(
+        self,
+        session: aiohttp.ClientSession,
+        elasticsearch_url: str,
+        index_name: str,
+        max_batch_bytes: Optional[int] = None,
+        max_batch_docs: Optional[int] = None,
+        concurrency: Optional[int] = None,
+        max_retries: Optional[int] = None
+    ):
+        self.session = session
+        self.elasticsearch_url = elasticsearch_url
+        self.index_name = index_name
+        self.max_batch_bytes = max_batch_bytes or settings.ELASTICSEARCH_BULK_MAX_BYTES
+        self.max_batch_docs = max_batch_docs or settings.ELASTICSEARCH_BULK_MAX_DOCS
+        self.concurrency = concurrency or settings.ELASTICSEARCH_BULK_CONCURRENCY
+        self.max_retries = max_retries if max_retries is not None else settings.ELASTICSEARCH_BULK_MAX_RETRIES
+        self.timeout = aiohttp.ClientTimeout(
+            total=settings.ELASTICSEARCH_BULK_TIMEOUT,
+            connect=settings.ELASTICSEARCH_CONNECT_TIMEOUT
+        )
+
+    def _serialize(self, document: Dict[str, Any]) -> bytes:
+        action = {"_index": self.index_name}
+        if document.get("_id"):
+            action["_id"] = document["_id"]
+        source = document["_source"]
+        if isinstance(source.get("embedding"), np.ndarray):
+            # Vectors stay float32 arrays until this line is written
+            source = {**source, "embedding": vector_to_json(source["embedding"])}
+        return (
+            json.dumps({"index": action}) + "\n" +
+            json.dumps(source, ensure_ascii=False, default=str) + "\n"
+        ).encode("utf-8")
+
+    def _pack_batches(self, lines: List[bytes]) -> List[List[int]]:
+        """Positions per batch, bounded by bytes and document count"""
+        batches, current, current_bytes = [], [], 0
+        for position, line in enumerate(lines):
+            if current and (current_bytes + len(line) > self.max_batch_bytes or len(current) >= self.max_batch_docs):
+                batches.append(current)
+                current, current_bytes = [], 0
+            current.append(position)
+            current_bytes += len(line)
+        if current:
+            batches.append(current)
+        return batches
+
+    def _backoff(self, attempt: int) -> float:
+        base = settings.ELASTICSEARCH_BULK_RETRY_BACKOFF * (2 ** attempt)
+        return base + random.uniform(0, base)
+
+    async def _send(self, body: bytes) -> Tuple[int, Optional[Dict[str, Any]], str]:
+        """POST one _bulk body: (HTTP status, parsed response or None, error text)"""
+        try:
+            async with self.session.post(
+                f"{self.elasticsearch_url}/_bulk",
+                params={"refresh": "false"},
+                data=body,
+                headers={"Content-Type": "application/x-ndjson"},
+                timeout=self.timeout
+            ) as response:
+                if response.status == 200:
+                    return 200, await response.json(), ""
+                return response.status, None, await response.text()
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            # Connection problems are treated like back-pressure
+            return 503, None, f"{type(e).__name__}: {e}"
+
+    async def _index_batch(
+        self,
+        positions: List[int],
+        lines: List[bytes],
+        ids: List[Optional[str]],
+        failures: Dict[int, Dict[str, Any]],
+        stats: Dict[str, int]
+    ) -> None:
+        pending = positions
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                await asyncio.sleep(self._backoff(attempt - 1))
+                stats["retries"] += 1
+
+            status, result, error_text = await self._send(b"".join(lines[position] for position in pending))
+            if result is None:
+                error = {"status": status, "error": error_text[:500]}
+                if status not in RETRYABLE_STATUSES:
+                    for position in pending:
+                        failures[position] = error
+                    return
+                logger.warning(f"Bulk request to {self.index_name} rejected (HTTP {status}), retrying {len(pending)} documents")
+                for position in pending:
+                    failures[position] = error
+                continue
+
+            retry = []
+            for position, item in zip(pending, result.get("items", [])):
+                outcome = item.get("index", {})
+                item_status = outcome.get("status", 500)
+                if outcome.get("error") is None and item_status < 300:
+                    ids[position] = outcome.get("_id")
+                    failures.pop(position, None)
+                elif item_status in RETRYABLE_STATUSES:
+                    failures[position] = {"status": item_status, "error": outcome.get("error")}
+                    retry.append(position)
+                else:
+                    failures[position] = {"status": item_status, "error": outcome.get("error")}
+
+            if not retry:
+                return
+            logger.warning(f"Bulk batch to {self.index_name}: {len(retry)} documents rejected with back-pressure, retrying")
+            pending = retry
+
+    async def refresh(self) -> None:
+        """Make everything loaded so far searchable"""
+        async with self.session.post(f"{self.elasticsearch_url}/{self.index_name}/_refresh") as response:
+            if response.status != 200:
+                error_text = await response.text()
+                logger.warning(f"Refresh of {self.index_name} failed: HTTP {response.status}, {error_text}")
+
+    async def index(self, documents: List[Dict[str, Any]], refresh: bool = True) -> Dict[str, Any]:
+        """
+        Index documents, optionally refreshing the index once at the end
+
+        Args:
+            documents: [{"_source": {...}}] with an optional fixed "_id"
+            refresh: Refresh the index after the last batch
+
+        Returns:
+            Dict with "indexed" (exact count), "ids" (in input order, None for
+            failed documents), "failed" ([{"position", "status", "error"}]),
+            "batches", "retries" and "duration_ms"
+        """
+        start = time.perf_counter()
+        lines = [self._serialize(document) for document in documents]
+        batches = self._pack_batches(lines)
+        ids: List[Optional[str]] = [None] * len(documents)
+        failures: Dict[int, Dict[str, Any]] = {}
+        stats = {"retries": 0}
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def run_batch(positions: List[int]) -> None:
+            async with semaphore:
+                await self._index_batch(positions, lines, ids, failures, stats)
+
+        await asyncio.gather(*(run_batch(positions) for positions in batches))
+
+        if refresh and documents:
+            await self.refresh()
+
+        result = {
+            "indexed": sum(1 for document_id in ids if document_id),
+            "ids": ids,
+            "failed": [{"position": position, **failure} for position, failure in sorted(failures.items())],
+            "batches": len(batches),
+            "retries": stats["retries"],
+            "duration_ms": int((time.perf_counter() - start) * 1000)
+        }
+        logger.info(
+            f"Bulk indexed {result['indexed']}/{len(documents)} documents into {self.index_name} "
+            f"({result['batches']} batches, {result['retries']} retries, {result['duration_ms']} ms)"
+        )
+        return result
@@ -0,0 +1,401 @@
+"""
+Elasticsearch index mapping manager
+Creates versioned chunk indexes with explicit mappings (including an
+HNSW-indexed dense_vector field) behind the read/write aliases
+ELASTICSEARCH_INDEX and ELASTICSEARCH_YARGITAY_INDEX
+"""
+
+import re
+import logging
+from typing import Dict, Any, Optional, List
+
+from core.config import settings
+from services.elasticsearch_service import (
+    ElasticsearchService, CONTENT_FIELD_MAPPING, FILTER_FIELD_MAPPINGS, QUANTIZED_INDEX_TYPES, invalidate_vector_field_cache
+)
+from services.redis_service import RedisService, bump_cache_generation
+
+logger = logging.getLogger(__name__)
+
+# Re-embedding job state per alias (see tasks.index_maintenance.reembed_index_task)
+REINDEX_STATE_PREFIX = "reindex"
+
+
+def reindex_state_key(alias: str) -> str:
+    return f"{REINDEX_STATE_PREFIX}:{alias}"
+
+
+def reindex_dirty_key(alias: str) -> str:
+    return f"{REINDEX_STATE_PREFIX}:{alias}:dirty"
+
+
+async def mark_reindex_dirty(alias: str, document_id: str) -> None:
+    """
+    Record a document written or deleted through an alias while a
+    re-embedding job for that alias is running, so the job copies the
+    change into the new index version before swapping
+    """
+    try:
+        async with RedisService() as client:
+            if await client.hget(reindex_state_key(alias), "status") == "running":
+                await client.sadd(reindex_dirty_key(alias), document_id)
+    except Exception as e:
+        logger.warning(f"Could not mark {document_id} dirty for re-embedding of {alias}: {e}")
+
+
+class EmbeddingModelMismatchError(Exception):
+    """The index was embedded with another model/dimensions than queries are"""
+
+
+def versioned_index_name(alias: str, version: int) -> str:
+    """Physical index behind an alias, e.g. mevzuat_embeddings_v3"""
+    return f"{alias}_v{version}"
+
+# text + keyword subfield, the same shape dynamic mapping produced for the existing indexes
+KEYWORD_TEXT_FIELD = {
+    "type": "text",
+    "fields": {"keyword": {"type": "keyword", "ignore_above": 256}}
+}
+
+
+def build_vector_field_mapping(dims: Optional[int] = None, index_type: Optional[str] = None) -> Dict[str, Any]:
+    """
+    dense_vector mapping with an HNSW graph and cosine similarity
+
+    index_type "int8_hnsw" (default) keeps 1 byte per dimension in the graph,
+    "int4_hnsw" half that and "bbq_hnsw" 1 bit per dimension; quantized
+    searches rescore their top candidates on the raw vectors.
+    """
+    index_type = index_type or settings.ELASTICSEARCH_VECTOR_INDEX_TYPE
+    if index_type not in ("hnsw",) + QUANTIZED_INDEX_TYPES:
+        raise ValueError(f"Unsupported vector index type: {index_type}")
+    return {
+        "type": "dense_vector",
+        "dims": dims or settings.OPENAI_EMBEDDING_DIMENSIONS,
+        "index": True,
+        "similarity": "cosine",
+        "index_options": {
+            "type": index_type,
+            "m": settings.ELASTICSEARCH_HNSW_M,
+            "ef_construction": settings.ELASTICSEARCH_HNSW_EF_CONSTRUCTION
+        }
+    }
+
+
+def build_chunk_index_body(
+    dims: Optional[int] = None,
+    meta: Optional[Dict[str, Any]] = None,
+    index_type: Optional[str] = None,
+    exclude_vector_from_source: Optional[bool] = None
+) -> Dict[str, Any]:
+    """
+    Settings and mappings for a chunk index (mevzuat and Yargıtay)
+
+    Field shapes match what dynamic mapping created so far, so existing
+    queries on `<field>.keyword` keep working against new indexes.
+
+    Args:
+        dims: Vector dimensions (defaults to OPENAI_EMBEDDING_DIMENSIONS)
+        meta: Stored as mapping _meta (embedding model, dimensions, ...)
+        index_type: Vector graph type (defaults to ELASTICSEARCH_VECTOR_INDEX_TYPE)
+        exclude_vector_from_source: Keep the ~8 KB vector out of _source
+            (defaults to ELASTICSEARCH_EXCLUDE_VECTOR_FROM_SOURCE)
+    """
+    vector_mapping = build_vector_field_mapping(dims, index_type)
+    if exclude_vector_from_source is None:
+        exclude_vector_from_source = settings.ELASTICSEARCH_EXCLUDE_VECTOR_FROM_SOURCE
+
+    mappings = {
+        "_meta": {
+            "embedding_model": settings.OPENAI_EMBEDDING_MODEL,
+            "embedding_dimensions": vector_mapping["dims"],
+            "vector_index_type": vector_mapping["index_options"]["type"],
+            **(meta or {})
+        },
+        "properties": {
+            "document_id": KEYWORD_TEXT_FIELD,
+            "content": CONTENT_FIELD_MAPPING,
+            "content_hash": {"type": "keyword"},
+            "embedding": vector_mapping,
+            "chunk_index": {"type": "integer"},
+            "page_number": {"type": "integer"},
+            "line_start": {"type": "integer"},
+            "line_end": {"type": "integer"},
+            "source_institution": KEYWORD_TEXT_FIELD,
+            "source_document": KEYWORD_TEXT_FIELD,
+            "belge_adi": KEYWORD_TEXT_FIELD,
+            "metadata": {"type": "object", "dynamic": True},
+            "created_at": {"type": "date"},
+            **FILTER_FIELD_MAPPINGS
+        }
+    }
+    if exclude_vector_from_source:
+        # Searches never return vectors; the raw floats stay on disk for knn rescoring
+        mappings["_source"] = {"excludes": ["embedding"]}
+
+    return {"mappings": mappings}
+
+
+class ElasticsearchIndexManager:
+    """Create and inspect chunk indexes over the shared HTTP client"""
+
+    def __init__(self, es_service: ElasticsearchService):
+        self.es_service = es_service
+        self.elasticsearch_url = es_service.elasticsearch_url
+
+    async def index_exists(self, index_name: str) -> bool:
+        session = await self.es_service._get_session()
+        async with session.head(f"{self.elasticsearch_url}/{index_name}") as response:
+            return response.status == 200
+
+    async def create_index(
+        self,
+        index_name: str,
+        dims: Optional[int] = None,
+        meta: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """
+        Create a chunk index with the HNSW vector mapping
+
+        Raises:
+            Exception: If Elasticsearch rejects the index (e.g. it already exists)
+        """
+        session = await self.es_service._get_session()
+        async with session.put(
+            f"{self.elasticsearch_url}/{index_name}",
+            json=build_chunk_index_body(dims, meta)
+        ) as response:
+            result = await response.json()
+            if response.status != 200:
+                raise Exception(f"Index creation failed for {index_name}: HTTP {response.status}, {result}")
+
+        invalidate_vector_field_cache(index_name)
+        logger.info(f"Created Elasticsearch index {index_name} with HNSW vector mapping")
+        return result
+
+    async def get_alias_indexes(self, alias: str) -> List[str]:
+        """Physical indexes the alias points to ([] if the name is not an alias)"""
+        session = await self.es_service._get_session()
+        async with session.get(f"{self.elasticsearch_url}/_alias/{alias}") as response:
+            if response.status == 404:
+                return []
+            if response.status != 200:
+                error_text = await response.text()
+                raise Exception(f"Alias lookup failed for {alias}: HTTP {response.status}, {error_text}")
+            result = await response.json()
+        return sorted(result.keys())
+
+    async def get_index_meta(self, index_name: str) -> Dict[str, Any]:
+        """Mapping _meta of the index (embedding model/dimensions of versioned indexes)"""
+        session = await self.es_service._get_session()
+        async with session.get(f"{self.elasticsearch_url}/{index_name}/_mapping") as response:
+            if response.status != 200:
+                return {}
+            result = await response.json()
+        for index_mapping in result.values():
+            return index_mapping.get("mappings", {}).get("_meta", {})
+        return {}
+
+    async def list_index_versions(self, alias: str) -> List[int]:
+        """Existing version numbers of <alias>_v<N> indexes, ascending"""
+        session = await self.es_service._get_session()
+        async with session.get(
+            f"{self.elasticsearch_url}/_cat/indices/{alias}_v*",
+            params={"format": "json", "h": "index"}
+        ) as response:
+            if response.status != 200:
+                return []
+            rows = await response.json()
+        pattern = re.compile(rf"^{re.escape(alias)}_v(\d+)$")
+        return sorted(int(match.group(1)) for row in rows if (match := pattern.match(row.get("index", ""))))
+
+    async def create_next_version(
+        self,
+        alias: str,
+        dims: Optional[int] = None,
+        meta: Optional[Dict[str, Any]] = None
+    ) -> str:
+        """Create <alias>_v<N+1> with the current mapping; the alias is not touched"""
+        versions = await self.list_index_versions(alias)
+        index_name = versioned_index_name(alias, (versions[-1] if versions else 0) + 1)
+        await self.create_index(index_name, dims=dims, meta=meta)
+        return index_name
+
+    async def preserve_legacy_index(self, alias: str) -> str:
+        """
+        Clone a pre-alias physical index carrying the alias name to <alias>_v0
+
+        The clone hard-links the segments, so it is fast and keeps the stored
+        vectors. Cloning needs a write block on the source: writes through the
+        name fail from here until swap_alias replaces the index by the alias.
+
+        Returns:
+            Name of the clone (the rollback target)
+        """
+        clone_name = versioned_index_name(alias, 0)
+        if await self.index_exists(clone_name):
+            raise Exception(f"Cannot preserve legacy index {alias}: {clone_name} already exists")
+
+        session = await self.es_service._get_session()
+        async with session.put(
+            f"{self.elasticsearch_url}/{alias}/_settings",
+            json={"index.blocks.write": True}
+        ) as response:
+            if response.status != 200:
+                error_text = await response.text()
+                raise Exception(f"Write block on {alias} failed: HTTP {response.status}, {error_text}")
+
+        try:
+            async with session.post(f"{self.elasticsearch_url}/{alias}/_clone/{clone_name}") as response:
+                if response.status != 200:
+                    error_text = await response.text()
+                    raise Exception(f"Clone of {alias} to {clone_name} failed: HTTP {response.status}, {error_text}")
+            # The clone copies the write block; the rollback target must accept writes
+            async with session.put(
+                f"{self.elasticsearch_url}/{clone_name}/_settings",
+                json={"index.blocks.write": None}
+            ) as response:
+                if response.status != 200:
+                    error_text = await response.text()
+                    raise Exception(f"Write unblock of {clone_name} failed: HTTP {response.status}, {error_text}")
+        except Exception:
+            await self._remove_write_block(alias)
+            raise
+
+        invalidate_vector_field_cache(clone_name)
+        logger.info(f"Legacy index {alias} cloned to {clone_name} for rollback")
+        return clone_name
+
+    async def _remove_write_block(self, index_name: str) -> None:
+        session = await self.es_service._get_session()
+        async with session.put(
+            f"{self.elasticsearch_url}/{index_name}/_settings",
+            json={"index.blocks.write": None}
+        ) as response:
+            if response.status != 200:
+                error_text = await response.text()
+                logger.error(f"Write block on {index_name} could not be removed: HTTP {response.status}, {error_text}")
+
+    async def check_serving_model(self, index_name: str) -> None:
+        """
+        Refuse an index whose vectors queries cannot be compared with
+
+        Query vectors are always made with OPENAI_EMBEDDING_MODEL and
+        OPENAI_EMBEDDING_DIMENSIONS; an index embedded otherwise would serve
+        wrong neighbours (or, with other dimensions, no results at all).
+
+        Raises:
+            EmbeddingModelMismatchError: If the index _meta names another model or dimensions
+        """
+        meta = await self.get_index_meta(index_name)
+        model = meta.get("embedding_model")
+        dimensions = meta.get("embedding_dimensions")
+        if (model and model != settings.OPENAI_EMBEDDING_MODEL) or (
+            dimensions and int(dimensions) != settings.OPENAI_EMBEDDING_DIMENSIONS
+        ):
+            raise EmbeddingModelMismatchError(
+                f"{index_name} holds {model}/{dimensions} vectors but queries are embedded with "
+                f"{settings.OPENAI_EMBEDDING_MODEL}/{settings.OPENAI_EMBEDDING_DIMENSIONS}; switch the "
+                f"query settings first or swap with force"
+            )
+
+    async def swap_alias(
+        self,
+        alias: str,
+        index_name: str,
+        delete_legacy_index: bool = False,
+        force: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Atomically point the read/write alias at index_name
+
+        Versioned indexes the alias pointed to stay in place for rollback.
+        A pre-alias physical index carrying the alias name itself cannot
+        exist next to the alias, so it is removed in the same atomic request;
+        it is first cloned to <alias>_v0, which becomes the rollback target,
+        unless delete_legacy_index is set.
+
+        An index embedded with another model or dimensions than the query
+        settings is refused (see check_serving_model) unless force is set.
+
+        Args:
+            alias: Read/write alias
+            index_name: Versioned index the alias should point to
+            delete_legacy_index: Drop a pre-alias index without keeping a copy
+            force: Swap even if the index does not match the query embedding settings
+
+        Returns:
+            Dict with "alias", "index", "previous" indexes (still available
+            for rollback) and "deleted_legacy_index"
+
+        Raises:
+            EmbeddingModelMismatchError: If the index does not match the query settings and force is not set
+        """
+        if not force:
+            await self.check_serving_model(index_name)
+        previous = await self.get_alias_indexes(alias)
+        actions = [{"remove": {"index": old_index, "alias": alias}} for old_index in previous if old_index != index_name]
+        actions.append({"add": {"index": index_name, "alias": alias, "is_write_index": True}})
+        legacy = not previous and await self.index_exists(alias)
+        if legacy:
+            if not delete_legacy_index:
+                previous = [await self.preserve_legacy_index(alias)]
+            actions.append({"remove_index": {"index": alias}})
+
+        session = await self.es_service._get_session()
+        async with session.post(
+            f"{self.elasticsearch_url}/_aliases",
+            json={"actions": actions}
+        ) as response:
+            if response.status != 200:
+                error_text = await response.text()
+                if legacy and not delete_legacy_index:
+                    await self._remove_write_block(alias)
+                raise Exception(f"Alias swap failed for {alias} -> {index_name}: HTTP {response.status}, {error_text}")
+
+        invalidate_vector_field_cache(alias)
+        logger.info(f"Alias {alias} now points to {index_name} (previous: {previous})")
+        await bump_cache_generation(f"alias {alias} swapped to {index_name}")
+        return {
+            "alias": alias,
+            "index": index_name,
+            "previous": previous,
+            "deleted_legacy_index": legacy and delete_legacy_index
+        }
+
+    async def ensure_index(self, index_name: str) -> Dict[str, Any]:
+        """
+        Make sure the alias resolves to a chunk index and report its vector field
+
+        A missing alias is created as <alias>_v1 plus the alias. Existing
+        indexes are never modified: a dense_vector field cannot be switched
+        to indexed in place, that takes a re-embedding job into a new version.
+
+        Returns:
+            Dict with "index", "created", "alias_targets" and the vector field info
+        """
+        created = False
+        if not await self.index_exists(index_name):
+            physical_index = await self.create_next_version(index_name)
+            await self.swap_alias(index_name, physical_index)
+            created = True
+
+        info = await self.es_service.get_vector_field_info(refresh=True, index_name=index_name)
+        if not info["indexed"]:
+            logger.warning(
+                f"Index {index_name} embedding field is not HNSW-indexed "
+                f"(type={info['type']}); searches on it use exact script_score"
+            )
+        meta = await self.get_index_meta(index_name)
+        if meta.get("embedding_model") and meta["embedding_model"] != settings.OPENAI_EMBEDDING_MODEL:
+            logger.error(
+                f"Index {index_name} was embedded with {meta['embedding_model']} but queries use "
+                f"{settings.OPENAI_EMBEDDING_MODEL}; update OPENAI_EMBEDDING_MODEL or swap the alias back"
+            )
+        return {
+            "index": index_name,
+            "created": created,
+            "alias_targets": await self.get_alias_indexes(index_name),
+            "meta": meta,
+            **info
+        }
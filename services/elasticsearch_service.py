@@ -4,48 +4,445 @@ Bypasses Python client compatibility issues with v8/v9 headers
 """
 
 import aiohttp
+import asyncio
+import hashlib
 import json
+import math
+import re
+import time
 import logging
-from typing import List, Dict, Any, Optional
-from datetime import datetime
+from typing import List, Dict, Any, Optional, Tuple, Union
+from datetime import datetime, date
 
 from core.config import settings
+from services.elasticsearch_bulk_indexer import ElasticsearchBulkIndexer, BulkIndexError
+from services.redis_service import bump_cache_generation
 
 logger = logging.getLogger(__name__)
 
+# Process-wide HTTP session, see get_elasticsearch_session
+_shared_session: Optional[aiohttp.ClientSession] = None
+_shared_session_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+async def get_elasticsearch_session() -> aiohttp.ClientSession:
+    """
+    Get or create the process-wide Elasticsearch session
+
+    Keeps TCP+TLS connections alive between requests, bounds the pool and
+    caches DNS. Opened by the FastAPI lifespan and by Celery worker_process_init.
+    A session is bound to the event loop that created it, so a call from
+    another loop gets a fresh session for that loop.
+    """
+    global _shared_session, _shared_session_loop
+    loop = asyncio.get_running_loop()
+    if _shared_session is None or _shared_session.closed or _shared_session_loop is not loop:
+        connector = aiohttp.TCPConnector(
+            limit=settings.ELASTICSEARCH_POOL_SIZE,
+            limit_per_host=settings.ELASTICSEARCH_POOL_SIZE_PER_HOST,
+            ttl_dns_cache=settings.ELASTICSEARCH_DNS_CACHE_TTL,
+            keepalive_timeout=settings.ELASTICSEARCH_KEEPALIVE_TIMEOUT
+        )
+        _shared_session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(
+                total=settings.ELASTICSEARCH_TIMEOUT,
+                connect=settings.ELASTICSEARCH_CONNECT_TIMEOUT
+            ),
+            headers={
+                "Content-Type": "application/json",
+                "Accept": "application/json"
+            }
+        )
+        _shared_session_loop = loop
+        logger.info(f"✅ Elasticsearch HTTP session created (pool {settings.ELASTICSEARCH_POOL_SIZE} connections)")
+    return _shared_session
+
+
+async def close_elasticsearch_session():
+    """Close the process-wide Elasticsearch session"""
+    global _shared_session, _shared_session_loop
+    if _shared_session is not None and not _shared_session.closed:
+        await _shared_session.close()
+    _shared_session = None
+    _shared_session_loop = None
+
+
+def _bulk_timeout() -> aiohttp.ClientTimeout:
+    """Longer per-request timeout for _bulk and _by_query calls"""
+    return aiohttp.ClientTimeout(
+        total=settings.ELASTICSEARCH_BULK_TIMEOUT,
+        connect=settings.ELASTICSEARCH_CONNECT_TIMEOUT
+    )
+
+# Embedding field mapping per index name, see ElasticsearchService.get_vector_field_info
+_vector_field_cache: Dict[str, Dict[str, Any]] = {}
+
+
+def invalidate_vector_field_cache(index_name: Optional[str] = None) -> None:
+    """Forget cached embedding mappings (after creating or swapping an index)"""
+    if index_name:
+        _vector_field_cache.pop(index_name, None)
+    else:
+        _vector_field_cache.clear()
+
+# Filter fields written on every chunk at ingest time (see extract_filter_fields)
+FILTER_FIELD_MAPPINGS = {
+    "category": {
+        "type": "text",
+        "fields": {"keyword": {"type": "keyword", "ignore_above": 256}}
+    },
+    "publish_date": {"type": "date", "format": "yyyy-MM-dd||strict_date_optional_time"},
+    "document_status": {"type": "keyword"}
+}
+
+# dense_vector index_options types whose graph stores compressed vectors
+QUANTIZED_INDEX_TYPES = ("int8_hnsw", "int4_hnsw", "bbq_hnsw")
+
+# Documents in these states are never returned by search
+INACTIVE_DOCUMENT_STATUSES = ["inactive", "pasif"]
+
+# content keeps the standard analyzer (verbatim numbers and terms); content.tr adds
+# Turkish lowercasing (I/ı), stop words and stemming for BM25 retrieval
+CONTENT_FIELD_MAPPING = {
+    "type": "text",
+    "fields": {"tr": {"type": "text", "analyzer": "turkish"}}
+}
+
+# Cosine similarity of lexical hits, read from the dense_vector doc values
+LEXICAL_SIMILARITY_SCRIPT = """
+if (doc['embedding'].size() == 0) { return null; }
+float[] v = doc['embedding'].vectorValue;
+double dot = 0; double norm = 0;
+for (int i = 0; i < v.length; i++) { dot += v[i] * params.query_vector[i]; norm += v[i] * v[i]; }
+return norm == 0 ? null : dot / (Math.sqrt(norm) * params.query_norm);
+"""
+
+# "4857 sayılı", "madde 17", "17. madde", "md. 17"
+LAW_NUMBER_PATTERN = re.compile(r"(\d+)\s+sayılı", re.IGNORECASE)
+ARTICLE_NUMBER_PATTERN = re.compile(r"(?:madde|md\.?)\s*(\d+)|(\d+)\s*\.\s*madde", re.IGNORECASE)
+
+SEARCH_SOURCE_FIELDS = [
+    "document_id", "content", "chunk_index", "page_number", "source_institution",
+    "source_document", "belge_adi", "category", "publish_date", "metadata"
+]
+
+
+def _normalize_publish_date(value: Any) -> Optional[str]:
+    """Return a YYYY-MM-DD string for ES date filtering, None if unparseable"""
+    if not value:
+        return None
+    if isinstance(value, (datetime, date)):
+        return value.strftime("%Y-%m-%d")
+    try:
+        return datetime.fromisoformat(str(value).strip().replace("Z", "+00:00")).strftime("%Y-%m-%d")
+    except ValueError:
+        logger.warning(f"Unparseable publish_date ignored: {value}")
+        return None
+
+
+def extract_filter_fields(document: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Filterable chunk fields derived from a mevzuat_documents row
+    
+    Used by ingestion and by the backfill of already indexed chunks so both
+    write the same values.
+    """
+    metadata = document.get('metadata') or {}
+    return {
+        "source_institution": (
+            document.get('source_institution') or document.get('institution')
+            or metadata.get('source_institution') or 'Belirtilmemiş'
+        ),
+        "category": document.get('category') or metadata.get('category'),
+        "publish_date": _normalize_publish_date(document.get('publish_date') or metadata.get('publish_date')),
+        "document_status": document.get('status')
+    }
+
+
+def chunk_fields_from_update(update: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """
+    Split a mevzuat_documents column update into chunk fields and chunk metadata keys
+    
+    Returns:
+        (top-level chunk fields, keys for the chunk metadata object); columns
+        not stored on chunks are ignored
+    """
+    fields, metadata = {}, {}
+    if "source_institution" in update:
+        fields["source_institution"] = update["source_institution"]
+    if "category" in update:
+        fields["category"] = update["category"]
+    if "publish_date" in update:
+        fields["publish_date"] = _normalize_publish_date(update["publish_date"])
+    if "status" in update:
+        fields["document_status"] = update["status"]
+    if "title" in update:
+        metadata["document_title"] = update["title"]
+    for key in ("description", "keywords"):
+        if key in update:
+            metadata[key] = update[key]
+    return fields, metadata
+
+
+def build_filter_clauses(
+    institution_filter: Union[str, List[str], None] = None,
+    category_filter: Optional[str] = None,
+    date_filter: Optional[Dict[str, Any]] = None,
+    status_filter: Optional[str] = None,
+    document_ids: Optional[List[str]] = None
+) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Native filter clauses for the search queries
+    
+    Args:
+        institution_filter: Canonical institution names (exact), or a single
+            name matched exactly but case-insensitively. Substring matching
+            happens before this, see resolve_filter_clauses
+        category_filter: Exact category (case-insensitive)
+        date_filter: {"start": date, "end": date} publish date range, either bound optional
+        status_filter: Only return chunks of documents in this status
+        document_ids: Restrict to these documents
+    
+    Returns:
+        {"filter": [...], "must_not": [...]} for a bool query
+    """
+    filters = []
+    if isinstance(institution_filter, list):
+        filters.append({"terms": {"source_institution.keyword": institution_filter}})
+    elif institution_filter:
+        filters.append({"term": {"source_institution.keyword": {"value": institution_filter, "case_insensitive": True}}})
+    if category_filter:
+        filters.append({"term": {"category.keyword": {"value": category_filter, "case_insensitive": True}}})
+    if date_filter:
+        date_range = {}
+        if date_filter.get("start"):
+            date_range["gte"] = _normalize_publish_date(date_filter["start"])
+        if date_filter.get("end"):
+            date_range["lte"] = _normalize_publish_date(date_filter["end"])
+        if date_range:
+            filters.append({"range": {"publish_date": date_range}})
+    if status_filter:
+        filters.append({"term": {"document_status": status_filter}})
+    if document_ids:
+        filters.append({"terms": {"document_id.keyword": document_ids}})
+    
+    return {
+        "filter": filters,
+        "must_not": [{"terms": {"document_status": INACTIVE_DOCUMENT_STATUSES}}]
+    }
+
+
+async def resolve_filter_clauses(
+    institution_filter: Optional[str] = None,
+    category_filter: Optional[str] = None,
+    date_filter: Optional[Dict[str, Any]] = None,
+    status_filter: Optional[str] = None,
+    document_ids: Optional[List[str]] = None
+) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    build_filter_clauses with the institution filter resolved against the catalog
+
+    Users type partial names, acronyms and any casing ("sosyal güvenlik",
+    "SGK", "İŞKUR"), while the keyword field only matches whole names and ES
+    case folding is not Turkish-aware. The filter is therefore mapped to the
+    catalog names it refers to first and searched as an exact terms filter;
+    a filter that matches no catalog name is used as given.
+    """
+    # Import here to avoid circular imports
+    from services.catalog_service import catalog_service
+
+    return build_filter_clauses(
+        institution_filter=await catalog_service.resolve_institution_filter(institution_filter),
+        category_filter=category_filter,
+        date_filter=date_filter,
+        status_filter=status_filter,
+        document_ids=document_ids
+    )
+
+
+def chunk_content_hash(content: str) -> str:
+    """SHA-256 of the chunk text, stored as content_hash on every chunk"""
+    return hashlib.sha256((content or "").encode("utf-8")).hexdigest()
+
+
+def chunk_id(document_id: str, chunk_index: int, content_hash: str) -> str:
+    """
+    Deterministic Elasticsearch ID of a chunk
+
+    Re-indexing the same text at the same position overwrites the chunk
+    instead of duplicating it; a changed or moved chunk gets a new ID.
+    """
+    return f"{document_id}:{chunk_index}:{content_hash[:16]}"
+
+
+# Chunks per page when reading back all chunks of a document
+DOCUMENT_CHUNK_PAGE_SIZE = 1000
+
+# Written on every processing run without the chunk itself changing
+VOLATILE_CHUNK_FIELDS = ("embedding", "created_at")
+VOLATILE_CHUNK_METADATA_FIELDS = ("processing_timestamp",)
+
+
+def build_chunk_source(data: Dict[str, Any], created_at: str) -> Dict[str, Any]:
+    """_source of a chunk document as bulk_create_embeddings writes it"""
+    return {
+        "document_id": data["document_id"],
+        "content": data["content"],
+        "embedding": data.get("embedding"),
+        "chunk_index": data.get("chunk_index", 0),
+        "page_number": data.get("page_number"),
+        "line_start": data.get("line_start"),
+        "line_end": data.get("line_end"),
+        "source_institution": data.get("source_institution"),
+        "source_document": data.get("source_document"),
+        "belge_adi": data.get("belge_adi"),  # Document name field
+        "category": data.get("category"),
+        "publish_date": data.get("publish_date"),
+        "document_status": data.get("document_status"),
+        "content_hash": data.get("content_hash") or chunk_content_hash(data["content"]),
+        "metadata": data.get("metadata", {}),
+        "created_at": created_at
+    }
+
+
+def _comparable_chunk_source(source: Dict[str, Any]) -> Dict[str, Any]:
+    comparable = {
+        field: value for field, value in source.items()
+        if field not in VOLATILE_CHUNK_FIELDS and value is not None
+    }
+    if isinstance(comparable.get("metadata"), dict):
+        comparable["metadata"] = {
+            field: value for field, value in comparable["metadata"].items()
+            if field not in VOLATILE_CHUNK_METADATA_FIELDS and value is not None
+        }
+    # Same JSON round trip the stored _source went through (dates, tuples, ...)
+    return json.loads(json.dumps(comparable, ensure_ascii=False, default=str))
+
+
+def chunk_source_matches(stored: Dict[str, Any], new: Dict[str, Any]) -> bool:
+    """
+    True when a stored chunk _source already holds every field of the new one
+
+    Vectors and timestamps are ignored: an unchanged hash under the same
+    deterministic ID means the same text and therefore the same vector.
+    Fields (and metadata keys) the stored chunk has beyond the new one, such
+    as values backfilled by update_document_fields, do not count as a change.
+    None in the new chunk means "not provided", not "cleared".
+    """
+    stored_comparable = _comparable_chunk_source(stored)
+    new_comparable = _comparable_chunk_source(new)
+    new_metadata = new_comparable.pop("metadata", None) or {}
+    stored_metadata = stored_comparable.get("metadata") or {}
+
+    for field, value in new_comparable.items():
+        if stored_comparable.get(field) != value:
+            return False
+    for field, value in new_metadata.items():
+        if stored_metadata.get(field) != value:
+            return False
+    return True
+
+
+def build_lexical_clauses(query_text: str) -> List[Dict[str, Any]]:
+    """
+    BM25 should-clauses for a question
+    
+    Terms match both the verbatim and the stemmed Turkish field. Law and
+    article numbers quoted in the question ("4857 sayılı Kanun madde 17")
+    are additionally matched as phrases, so the chunk carrying that article
+    outranks chunks that merely mention the words.
+    """
+    clauses = [{
+        "multi_match": {
+            "query": query_text,
+            "fields": ["content", "content.tr"],
+            "type": "most_fields"
+        }
+    }]
+    phrases = [f"{number} sayılı" for number in LAW_NUMBER_PATTERN.findall(query_text)]
+    phrases += [f"madde {first or second}" for first, second in ARTICLE_NUMBER_PATTERN.findall(query_text)]
+    for phrase in phrases:
+        for field in ("content", "content.tr"):
+            clauses.append({"match_phrase": {field: {"query": phrase, "boost": 3.0}}})
+    return clauses
+
+
+def reciprocal_rank_fusion(
+    ranked_lists: Dict[str, List[Dict[str, Any]]],
+    limit: int,
+    rank_constant: Optional[int] = None,
+    weights: Optional[Dict[str, float]] = None
+) -> List[Dict[str, Any]]:
+    """
+    Fuse ranked result lists with reciprocal rank fusion
+    
+    A result scores sum(weight / (rank_constant + rank)) over the lists it
+    appears in. Only ranks are used, so BM25 scores and cosine similarities
+    never have to share a scale.
+    
+    Args:
+        ranked_lists: List name -> results (with "id"), best first; the fields
+            of the first list a result appears in are kept
+        limit: Number of fused results
+        rank_constant: Dampens the head of each list (defaults to HYBRID_RRF_RANK_CONSTANT)
+        weights: List name -> weight (default 1.0)
+        
+    Returns:
+        Results with "rrf_score" and "ranks" (list name -> 1-based rank)
+    """
+    rank_constant = rank_constant or settings.HYBRID_RRF_RANK_CONSTANT
+    fused: Dict[str, Dict[str, Any]] = {}
+    for name, results in ranked_lists.items():
+        weight = (weights or {}).get(name, 1.0)
+        for rank, result in enumerate(results, start=1):
+            entry = fused.setdefault(result["id"], {**result, "rrf_score": 0.0, "ranks": {}})
+            entry["rrf_score"] += weight / (rank_constant + rank)
+            entry["ranks"][name] = rank
+    return sorted(fused.values(), key=lambda result: result["rrf_score"], reverse=True)[:limit]
+
+
+def get_search_corpora() -> Dict[str, str]:
+    """Corpus name -> index alias available to multi-corpus retrieval"""
+    return {
+        "mevzuat": settings.ELASTICSEARCH_INDEX,
+        "yargitay": settings.ELASTICSEARCH_YARGITAY_INDEX,
+        **settings.SEARCH_EXTRA_CORPORA
+    }
+
+
+class VectorsNotInSourceError(Exception):
+    """Stored vectors are neither in _source nor readable from doc values"""
+
+
 class ElasticsearchService:
-    """Simple HTTP-based Elasticsearch client to avoid version compatibility issues"""
+    """
+    Simple HTTP-based Elasticsearch client to avoid version compatibility issues
+    
+    Instances are cheap: every instance uses the process-wide pooled session,
+    so `async with ElasticsearchService(...)` no longer opens connections.
+    """
     
     def __init__(self, index_name: Optional[str] = None):
         self.elasticsearch_url = settings.ELASTICSEARCH_URL
         self.index_name = index_name or settings.ELASTICSEARCH_INDEX
-        self.session = None
         
-        logger.info(f"Simple Elasticsearch service initialized: {self.elasticsearch_url}")
+        logger.debug(f"Simple Elasticsearch service initialized: {self.elasticsearch_url} ({self.index_name})")
     
     async def _get_session(self):
-        """Get or create aiohttp session"""
-        if self.session is None:
-            self.session = aiohttp.ClientSession(
-                headers={
-                    "Content-Type": "application/json",
-                    "Accept": "application/json"
-                }
-            )
-        return self.session
+        """Shared pooled aiohttp session"""
+        return await get_elasticsearch_session()
     
     async def close_session(self):
-        """Cleanup session to prevent memory leaks"""
-        if self.session and not self.session.closed:
-            await self.session.close()
-            self.session = None
+        """No-op: the shared session is closed by the owner of the process (lifespan/worker)"""
+        return None
     
     async def __aenter__(self):
         """Async context manager entry"""
         return self
     
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        """Async context manager exit - cleanup sessions"""
+        """Async context manager exit (the shared session stays open)"""
         await self.close_session()
     
     async def health_check(self) -> Dict[str, Any]:
@@ -74,91 +471,187 @@ class ElasticsearchService:
             return {"health": "error", "error": str(e)}
     
     async def bulk_create_embeddings(self, embeddings_data: List[Dict[str, Any]]) -> List[str]:
-        """Bulk create embeddings using HTTP POST with batching to avoid payload limits"""
-        try:
-            session = await self._get_session()
-            
-            # Split into batches with increased limits (nginx: 200M, ES: 200mb)
-            batch_size = 100  # Increased with new server limits
-            all_embedding_ids = []
+        """
+        Index chunk embeddings through the parallel bulk indexer
+        
+        Args:
+            embeddings_data: Chunk fields (document_id, content, embedding, ...)
             
-            for i in range(0, len(embeddings_data), batch_size):
-                batch = embeddings_data[i:i + batch_size]
-                logger.info(f"Processing batch {i//batch_size + 1}/{(len(embeddings_data) + batch_size - 1)//batch_size} ({len(batch)} embeddings)")
-                
-                # Prepare bulk request body for this batch
-                bulk_body = []
-                for data in batch:
-                    # Index action
-                    bulk_body.append(json.dumps({"index": {"_index": self.index_name}}))
-                    
-                    # Document data
-                    doc = {
-                        "document_id": data["document_id"],
-                        "content": data["content"],
-                        "embedding": data["embedding"],
-                        "chunk_index": data.get("chunk_index", 0),
-                        "page_number": data.get("page_number"),
-                        "line_start": data.get("line_start"),
-                        "line_end": data.get("line_end"),
-                        "source_institution": data.get("source_institution"),
-                        "source_document": data.get("source_document"),
-                        "belge_adi": data.get("belge_adi"),  # Document name field
-                        "metadata": data.get("metadata", {}),
-                        "created_at": datetime.utcnow().isoformat()
-                    }
-                    bulk_body.append(json.dumps(doc))
-                
-                bulk_data = "\n".join(bulk_body) + "\n"
-                
-                async with session.post(
-                    f"{self.elasticsearch_url}/_bulk",
-                    data=bulk_data,
-                    headers={"Content-Type": "application/x-ndjson"}
-                ) as response:
-                    
-                    if response.status == 200:
-                        result = await response.json()
-                        
-                        # Extract document IDs from response
-                        batch_ids = []
-                        for item in result.get("items", []):
-                            if "index" in item and item["index"].get("_id"):
-                                batch_ids.append(item["index"]["_id"])
-                        
-                        all_embedding_ids.extend(batch_ids)
-                        logger.info(f"Batch {i//batch_size + 1} created {len(batch_ids)} embeddings")
-                        
-                    else:
-                        error_text = await response.text()
-                        logger.error(f"Batch {i//batch_size + 1} failed: HTTP {response.status}, {error_text}")
-                        # Continue with next batch even if one fails
+        Returns:
+            Elasticsearch IDs of the indexed chunks, in input order
             
-            logger.info(f"Bulk create completed: {len(all_embedding_ids)} total embeddings created")
-            return all_embedding_ids
-                    
+        Raises:
+            BulkIndexError: If any chunk is still rejected after the retries,
+                so a document is never marked completed with missing chunks
+        """
+        created_at = datetime.utcnow().isoformat()
+        documents = [
+            {"_id": data.get("_id"), "_source": build_chunk_source(data, created_at)}
+            for data in embeddings_data
+        ]
+        
+        indexer = ElasticsearchBulkIndexer(await self._get_session(), self.elasticsearch_url, self.index_name)
+        result = await indexer.index(documents, refresh=True)
+        if result["failed"]:
+            first = result["failed"][0]
+            raise BulkIndexError(
+                f"{len(result['failed'])} of {len(documents)} chunks were not indexed "
+                f"(first: HTTP {first['status']}, {first['error']})",
+                result
+            )
+        return result["ids"]
+    
+    async def get_vector_field_info(self, refresh: bool = False, index_name: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Mapping of the embedding field of an index (cached per index)
+        
+        Args:
+            refresh: Re-read the mapping instead of using the cached copy
+            index_name: Index or alias to inspect (defaults to this service's index)
+        
+        Returns:
+            Dict with "type", "dims", "similarity", "index_options",
+            "indexed" (True when the field has an HNSW graph usable by knn)
+            and "vector_in_source" (False when _source excludes the embedding)
+        """
+        index_name = index_name or self.index_name
+        if not refresh and index_name in _vector_field_cache:
+            return _vector_field_cache[index_name]
+        
+        session = await self._get_session()
+        async with session.get(f"{self.elasticsearch_url}/{index_name}/_mapping") as response:
+            if response.status != 200:
+                error_text = await response.text()
+                raise Exception(f"Vector field mapping lookup failed: HTTP {response.status}, {error_text}")
+            result = await response.json()
+        
+        # Response is keyed by concrete index name (the index may be an alias)
+        mappings = next(iter(result.values()), {}).get("mappings", {})
+        field = mappings.get("properties", {}).get("embedding", {})
+        source_excludes = mappings.get("_source", {}).get("excludes", [])
+        
+        info = {
+            "type": field.get("type"),
+            "dims": field.get("dims"),
+            "similarity": field.get("similarity"),
+            "index_options": field.get("index_options"),
+            "indexed": field.get("type") == "dense_vector" and bool(field.get("index", "similarity" in field)),
+            "vector_in_source": "embedding" not in source_excludes
+        }
+        _vector_field_cache[index_name] = info
+        return info
+    
+    async def _resolve_search_mode(self, search_mode: Optional[str]) -> str:
+        """'knn' when requested and the index supports it, otherwise 'exact'"""
+        mode = search_mode or settings.ELASTICSEARCH_SEARCH_MODE
+        if mode != "knn":
+            return "exact"
+        try:
+            info = await self.get_vector_field_info()
         except Exception as e:
-            logger.error(f"Bulk create embeddings failed: {e}")
-            return []
+            logger.warning(f"kNN capability check failed for {self.index_name}, using exact search: {e}")
+            return "exact"
+        if not info["indexed"]:
+            logger.warning(f"Index {self.index_name} has no HNSW-indexed embedding field, using exact search")
+            return "exact"
+        return "knn"
     
-    async def similarity_search(
+    @staticmethod
+    def _num_candidates(k: int) -> int:
+        """HNSW candidates per shard: more candidates, better recall, slower query"""
+        return min(max(k * settings.ELASTICSEARCH_KNN_CANDIDATE_MULTIPLIER, settings.ELASTICSEARCH_KNN_MIN_CANDIDATES), 10000)
+    
+    async def _knn_clause(
         self,
         query_vector: List[float],
-        k: int = 10,
-        institution_filter: Optional[str] = None,
-        document_ids: Optional[List[str]] = None,
-        similarity_threshold: float = 0.7
-    ) -> List[Dict[str, Any]]:
-        """Perform vector similarity search using HTTP POST"""
-        try:
-            session = await self._get_session()
-            
-            # Build Elasticsearch query
+        k: int,
+        filter_clauses: Dict[str, List[Dict[str, Any]]],
+        **options
+    ) -> Dict[str, Any]:
+        """
+        knn clause for the embedding field
+        
+        Quantized graphs (int8/int4/bbq) rank on compressed vectors; their
+        top candidates are rescored against the raw float vectors kept on
+        disk when ELASTICSEARCH_KNN_RESCORE_OVERSAMPLE is set.
+        """
+        clause = {
+            "field": "embedding",
+            "query_vector": query_vector,
+            "k": k,
+            "num_candidates": self._num_candidates(k),
+            "filter": {"bool": filter_clauses},
+            **options
+        }
+        info = await self.get_vector_field_info()
+        index_type = (info.get("index_options") or {}).get("type", "")
+        if index_type in QUANTIZED_INDEX_TYPES and settings.ELASTICSEARCH_KNN_RESCORE_OVERSAMPLE > 1.0:
+            clause["rescore_vector"] = {"oversample": settings.ELASTICSEARCH_KNN_RESCORE_OVERSAMPLE}
+        return clause
+    
+    @staticmethod
+    def _collapse(query: Dict[str, Any], per_document: int, inner: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Collapse a search body on document_id: one top-level hit per document
+        carrying its best `per_document` chunks as inner hits (0 leaves it as is)
+        """
+        if per_document <= 0:
+            return query
+        query["collapse"] = {
+            "field": "document_id.keyword",
+            "inner_hits": {
+                "name": "chunks",
+                "size": per_document,
+                "_source": query.get("_source", SEARCH_SOURCE_FIELDS),
+                **(inner or {})
+            }
+        }
+        # The group's best chunk is repeated in its inner hits
+        query["_source"] = False
+        return query
+    
+    @staticmethod
+    def _response_hits(response: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Chunk hits of a search response, collapsed groups flattened back by score"""
+        top_hits = response.get("hits", {}).get("hits", [])
+        if not any("inner_hits" in hit for hit in top_hits):
+            return top_hits
+        hits = [chunk for hit in top_hits for chunk in hit["inner_hits"]["chunks"]["hits"]["hits"]]
+        hits.sort(key=lambda hit: hit.get("_score") or 0.0, reverse=True)
+        return hits
+    
+    async def _similarity_query(
+        self,
+        query_vector: List[float],
+        k: int,
+        filter_clauses: Dict[str, List[Dict[str, Any]]],
+        similarity_threshold: float,
+        mode: str,
+        collapse_per_document: int = 0
+    ) -> Dict[str, Any]:
+        """
+        Search body of similarity_search for a resolved mode
+        
+        With collapse_per_document, k counts documents; kNN then looks at
+        k * SEARCH_COLLAPSE_OVERSAMPLE neighbours so that enough distinct
+        documents survive the collapse.
+        """
+        if mode == "knn":
+            neighbours = k * settings.SEARCH_COLLAPSE_OVERSAMPLE if collapse_per_document > 0 else k
+            query = {
+                "size": k,
+                "knn": await self._knn_clause(
+                    query_vector, neighbours, filter_clauses,
+                    similarity=similarity_threshold  # Raw cosine for the cosine similarity
+                ),
+                "_source": SEARCH_SOURCE_FIELDS
+            }
+        else:
             query = {
                 "size": k,
                 "query": {
                     "script_score": {
-                        "query": {"match_all": {}},
+                        "query": {"bool": filter_clauses},
                         "script": {
                             "source": "cosineSimilarity(params.query_vector, 'embedding') + 1.0",
                             "params": {"query_vector": query_vector}
@@ -166,30 +659,150 @@ class ElasticsearchService:
                         "min_score": similarity_threshold + 1.0  # Adjust for +1.0 offset
                     }
                 },
-                "_source": ["document_id", "content", "chunk_index", "page_number", "source_institution", "source_document", "belge_adi", "metadata"]
+                "_source": SEARCH_SOURCE_FIELDS
             }
-            
-            # Add institution filter if provided
-            if institution_filter:
-                query["query"]["script_score"]["query"] = {
-                    "term": {"source_institution": institution_filter}
+        return self._collapse(query, collapse_per_document)
+    
+    @staticmethod
+    def _hit_similarity(hit: Dict[str, Any], mode: str) -> float:
+        """Cosine similarity from the _score of either mode"""
+        if mode == "knn":
+            return 2.0 * hit["_score"] - 1.0  # knn cosine _score = (1 + cos) / 2
+        return hit["_score"] - 1.0  # Remove the +1.0 offset
+    
+    @staticmethod
+    def _format_hit(hit: Dict[str, Any], similarity: float) -> Dict[str, Any]:
+        source = hit["_source"]
+        return {
+            "id": hit["_id"],
+            "document_id": source["document_id"],
+            "content": source["content"],
+            "chunk_index": source.get("chunk_index", 0),
+            "page_number": source.get("page_number"),
+            "source_institution": source.get("source_institution"),
+            "source_document": source.get("source_document"),
+            "belge_adi": source.get("belge_adi"),
+            "category": source.get("category"),
+            "publish_date": source.get("publish_date"),
+            "metadata": source.get("metadata", {}),
+            "similarity": similarity
+        }
+    
+    def _lexical_query(
+        self,
+        query_text: str,
+        query_vector: List[float],
+        k: int,
+        filter_clauses: Dict[str, List[Dict[str, Any]]],
+        collapse_per_document: int = 0
+    ) -> Dict[str, Any]:
+        """BM25 leg of hybrid search, each hit carrying its cosine similarity as a script field"""
+        script_fields = {
+            "vector_similarity": {
+                "script": {
+                    "source": LEXICAL_SIMILARITY_SCRIPT,
+                    "params": {
+                        "query_vector": query_vector,
+                        "query_norm": math.sqrt(sum(value * value for value in query_vector)) or 1.0
+                    }
                 }
+            }
+        }
+        query = {
+            "size": k,
+            "query": {
+                "bool": {
+                    "should": build_lexical_clauses(query_text),
+                    "minimum_should_match": 1,
+                    **filter_clauses
+                }
+            },
+            "_source": SEARCH_SOURCE_FIELDS
+        }
+        if collapse_per_document > 0:
+            return self._collapse(query, collapse_per_document, inner={"script_fields": script_fields})
+        query["script_fields"] = script_fields
+        return query
+    
+    @staticmethod
+    def _hybrid_window(k: int) -> int:
+        """Hits per leg handed to the fusion"""
+        return max(k, settings.HYBRID_RANK_WINDOW)
+    
+    def _fuse_hybrid(
+        self,
+        vector_response: Dict[str, Any],
+        lexical_response: Dict[str, Any],
+        k: int,
+        mode: str,
+        vector_weight: float = 1.0,
+        text_weight: float = 1.0
+    ) -> List[Dict[str, Any]]:
+        """
+        RRF over the two legs of one hybrid search
+        
+        "similarity" stays the cosine similarity: from the kNN/exact score for
+        vector hits, from the script field for hits only BM25 found. A failed
+        leg is logged and the other leg is returned on its own.
+        """
+        legs = {}
+        if vector_response.get("error"):
+            logger.error(f"Hybrid search vector leg failed: {vector_response['error']}")
+        else:
+            legs["vector"] = [
+                self._format_hit(hit, self._hit_similarity(hit, mode))
+                for hit in self._response_hits(vector_response)
+            ]
+        if lexical_response.get("error"):
+            logger.error(f"Hybrid search lexical leg failed: {lexical_response['error']}")
+        else:
+            legs["lexical"] = [
+                self._format_hit(hit, (hit.get("fields", {}).get("vector_similarity") or [0.0])[0] or 0.0)
+                for hit in self._response_hits(lexical_response)
+            ]
+        return reciprocal_rank_fusion(legs, k, weights={"vector": vector_weight, "lexical": text_weight})
+    
+    async def similarity_search(
+        self,
+        query_vector: List[float],
+        k: int = 10,
+        institution_filter: Optional[str] = None,
+        document_ids: Optional[List[str]] = None,
+        similarity_threshold: float = 0.7,
+        category_filter: Optional[str] = None,
+        date_filter: Optional[Dict[str, Any]] = None,
+        status_filter: Optional[str] = None,
+        search_mode: Optional[str] = None,
+        collapse_per_document: int = 0
+    ) -> List[Dict[str, Any]]:
+        """
+        Perform vector similarity search using HTTP POST (filters run inside ES)
+        
+        search_mode "knn" (default, ELASTICSEARCH_SEARCH_MODE) walks the HNSW
+        graph; "exact" scores every filtered chunk with script_score. kNN falls
+        back to exact when the index has no indexed vector field or the kNN
+        request fails. Both modes return cosine similarity in "similarity".
+        
+        With collapse_per_document > 0, ES collapses hits on document_id and
+        returns the best chunks of up to k documents, at most
+        collapse_per_document each, as one score-ordered list.
+        """
+        try:
+            session = await self._get_session()
+            mode = await self._resolve_search_mode(search_mode)
             
-            # Add document IDs filter if provided
-            if document_ids:
-                if institution_filter:
-                    query["query"]["script_score"]["query"] = {
-                        "bool": {
-                            "must": [
-                                {"term": {"source_institution": institution_filter}},
-                                {"terms": {"document_id": document_ids}}
-                            ]
-                        }
-                    }
-                else:
-                    query["query"]["script_score"]["query"] = {
-                        "terms": {"document_id": document_ids}
-                    }
+            # Filters narrow the candidate set before scoring in both modes
+            filter_clauses = await resolve_filter_clauses(
+                institution_filter=institution_filter,
+                category_filter=category_filter,
+                date_filter=date_filter,
+                status_filter=status_filter,
+                document_ids=document_ids
+            )
+            
+            query = await self._similarity_query(
+                query_vector, k, filter_clauses, similarity_threshold, mode, collapse_per_document
+            )
             
             async with session.post(
                 f"{self.elasticsearch_url}/{self.index_name}/_search",
@@ -199,36 +812,163 @@ class ElasticsearchService:
                 if response.status == 200:
                     result = await response.json()
                     
-                    # Process search results
-                    results = []
-                    for hit in result.get("hits", {}).get("hits", []):
-                        source = hit["_source"]
-                        similarity = hit["_score"] - 1.0  # Remove the +1.0 offset
-                        
-                        results.append({
-                            "id": hit["_id"],
-                            "document_id": source["document_id"],
-                            "content": source["content"],
-                            "chunk_index": source.get("chunk_index", 0),
-                            "page_number": source.get("page_number"),
-                            "source_institution": source.get("source_institution"),
-                            "source_document": source.get("source_document"),
-                            "belge_adi": source.get("belge_adi"),
-                            "metadata": source.get("metadata", {}),
-                            "similarity": similarity
-                        })
+                    # Both modes are reported as cosine similarity
+                    results = [
+                        self._format_hit(hit, self._hit_similarity(hit, mode))
+                        for hit in self._response_hits(result)
+                    ]
                     
-                    logger.info(f"Similarity search found {len(results)} results")
+                    logger.info(f"Similarity search ({mode}) found {len(results)} results")
                     return results
                 else:
                     error_text = await response.text()
-                    logger.error(f"Similarity search failed: HTTP {response.status}, {error_text}")
+                    logger.error(f"Similarity search ({mode}) failed: HTTP {response.status}, {error_text}")
+                    if mode == "knn":
+                        return await self.similarity_search(
+                            query_vector=query_vector,
+                            k=k,
+                            institution_filter=institution_filter,
+                            document_ids=document_ids,
+                            similarity_threshold=similarity_threshold,
+                            category_filter=category_filter,
+                            date_filter=date_filter,
+                            status_filter=status_filter,
+                            search_mode="exact",
+                            collapse_per_document=collapse_per_document
+                        )
                     return []
                     
         except Exception as e:
             logger.error(f"Error in similarity search: {e}")
             return []
     
+    async def multi_index_search(
+        self,
+        query_vector: List[float],
+        index_limits: Dict[str, int],
+        similarity_threshold: float = 0.7,
+        institution_filter: Optional[str] = None,
+        category_filter: Optional[str] = None,
+        date_filter: Optional[Dict[str, Any]] = None,
+        status_filter: Optional[str] = None,
+        search_mode: Optional[str] = None,
+        query_text: Optional[str] = None,
+        collapse_per_document: int = 0
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Similarity search over several indexes in a single _msearch round trip
+        
+        Every index gets its own search mode (kNN where its mapping allows it)
+        and the same filters. A failing index yields no results instead of
+        failing the others.
+        
+        Args:
+            query_vector: Query embedding (all indexes must share the embedding model)
+            index_limits: Index or alias -> number of results (k)
+            query_text: When given, every index is searched hybrid (BM25 + vector,
+                fused per index like hybrid_search)
+            collapse_per_document: Collapse each index's hits per document (see similarity_search)
+            
+        Returns:
+            Index -> results formatted like similarity_search (or hybrid_search)
+        """
+        filter_clauses = await resolve_filter_clauses(
+            institution_filter=institution_filter,
+            category_filter=category_filter,
+            date_filter=date_filter,
+            status_filter=status_filter
+        )
+        
+        lines, modes = [], {}
+        for index_name, k in index_limits.items():
+            index_service = ElasticsearchService(index_name=index_name)
+            modes[index_name] = await index_service._resolve_search_mode(search_mode)
+            window = self._hybrid_window(k) if query_text else k
+            lines.append(json.dumps({"index": index_name}))
+            lines.append(json.dumps(await index_service._similarity_query(
+                query_vector, window, filter_clauses, similarity_threshold, modes[index_name], collapse_per_document
+            )))
+            if query_text:
+                lines.append(json.dumps({"index": index_name}))
+                lines.append(json.dumps(self._lexical_query(
+                    query_text, query_vector, window, filter_clauses, collapse_per_document
+                )))
+        
+        session = await self._get_session()
+        async with session.post(
+            f"{self.elasticsearch_url}/_msearch",
+            data="\n".join(lines) + "\n",
+            headers={"Content-Type": "application/x-ndjson"}
+        ) as response:
+            if response.status != 200:
+                error_text = await response.text()
+                raise Exception(f"Multi-index search failed: HTTP {response.status}, {error_text}")
+            result = await response.json()
+        
+        responses = result.get("responses", [])
+        results = {}
+        if query_text:
+            for position, (index_name, k) in enumerate(index_limits.items()):
+                vector_response, lexical_response = responses[2 * position:2 * position + 2]
+                results[index_name] = self._fuse_hybrid(vector_response, lexical_response, k, modes[index_name])
+            logger.info(
+                "Multi-index hybrid search: " + ", ".join(f"{index_name}={len(hits)}" for index_name, hits in results.items())
+            )
+            return results
+        
+        for index_name, item in zip(index_limits, responses):
+            if item.get("error"):
+                logger.error(f"Multi-index search on {index_name} failed: {item['error']}")
+                results[index_name] = []
+                continue
+            results[index_name] = [
+                self._format_hit(hit, self._hit_similarity(hit, modes[index_name]))
+                for hit in self._response_hits(item)
+            ]
+        
+        logger.info(
+            "Multi-index search: " + ", ".join(f"{index_name}={len(hits)}" for index_name, hits in results.items())
+        )
+        return results
+    
+    async def compare_search_modes(
+        self,
+        query_vector: List[float],
+        k: int = 10,
+        similarity_threshold: float = 0.0,
+        **filters
+    ) -> Dict[str, Any]:
+        """
+        Recall of the kNN path against exact search for one query vector
+        
+        Returns:
+            Dict with recall@k, latencies of both modes and the hit IDs
+        """
+        timings = {}
+        hits = {}
+        for mode in ("exact", "knn"):
+            start = time.perf_counter()
+            results = await self.similarity_search(
+                query_vector=query_vector,
+                k=k,
+                similarity_threshold=similarity_threshold,
+                search_mode=mode,
+                **filters
+            )
+            timings[mode] = int((time.perf_counter() - start) * 1000)
+            hits[mode] = [result["id"] for result in results]
+        
+        exact_ids = set(hits["exact"])
+        recall = len(exact_ids & set(hits["knn"])) / len(exact_ids) if exact_ids else 1.0
+        return {
+            "k": k,
+            "recall_at_k": round(recall, 4),
+            "num_candidates": self._num_candidates(k),
+            "latency_ms": timings,
+            "exact_ids": hits["exact"],
+            "knn_ids": hits["knn"]
+        }
+    
     async def get_embeddings_count(self, document_id: Optional[str] = None) -> int:
         """Get embeddings count using HTTP GET"""
         try:
@@ -328,6 +1068,7 @@ class ElasticsearchService:
             
             async with session.post(
                 f"{self.elasticsearch_url}/{self.index_name}/_delete_by_query",
+                timeout=_bulk_timeout(),
                 json=delete_query
             ) as response:
                 
@@ -335,6 +1076,17 @@ class ElasticsearchService:
                     result = await response.json()
                     deleted = result.get("deleted", 0)
                     logger.info(f"Deleted {deleted} embeddings for document {document_id}")
+                    # Import here to avoid circular imports
+                    from services.elasticsearch_index_manager import mark_reindex_dirty
+                    await mark_reindex_dirty(self.index_name, document_id)
+                    if deleted:
+                        await bump_cache_generation(f"document {document_id} deleted from {self.index_name}")
+                    if self.index_name == settings.ELASTICSEARCH_INDEX:
+                        from services.document_router import DocumentRouter
+                        await DocumentRouter(self).delete_document(document_id)
+                        if deleted:
+                            from services.catalog_service import invalidate_catalog_cache
+                            await invalidate_catalog_cache()
                     return deleted
                 else:
                     error_text = await response.text()
@@ -345,11 +1097,415 @@ class ElasticsearchService:
             logger.error(f"Error deleting embeddings: {e}")
             return 0
     
+    async def get_facets(self, fields: Dict[str, str], size: int = 1000) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Terms aggregation over keyword fields with per-bucket document counts
+        
+        Args:
+            fields: Facet name -> keyword field (e.g. {"institutions": "source_institution.keyword"})
+            size: Maximum number of buckets per facet
+            
+        Returns:
+            Facet name -> [{"name", "document_count", "chunk_count"}], sorted by chunk count
+        """
+        session = await self._get_session()
+        
+        aggs = {
+            facet: {
+                "terms": {"field": field, "size": size},
+                "aggs": {
+                    "documents": {
+                        "cardinality": {"field": "document_id.keyword", "precision_threshold": 10000}
+                    }
+                }
+            }
+            for facet, field in fields.items()
+        }
+        
+        async with session.post(
+            f"{self.elasticsearch_url}/{self.index_name}/_search",
+            json={"size": 0, "aggs": aggs}
+        ) as response:
+            if response.status != 200:
+                error_text = await response.text()
+                raise Exception(f"Facet aggregation failed: HTTP {response.status}, {error_text}")
+            result = await response.json()
+        
+        facets = {}
+        for facet in fields:
+            buckets = result.get("aggregations", {}).get(facet, {}).get("buckets", [])
+            facets[facet] = [
+                {
+                    "name": bucket["key"],
+                    "document_count": bucket.get("documents", {}).get("value", 0),
+                    "chunk_count": bucket["doc_count"]
+                }
+                for bucket in buckets
+            ]
+        return facets
+    
+    async def ensure_filter_mappings(self) -> bool:
+        """
+        Add explicit mappings for the filter fields (and content_hash) to the index
+        
+        Without this, publish_date and document_status would be mapped
+        dynamically by the first chunk that carries them. The Turkish
+        content.tr subfield is added as well; chunks indexed before it existed
+        only get it through a re-embedding job into a new index version.
+        """
+        session = await self._get_session()
+        async with session.put(
+            f"{self.elasticsearch_url}/{self.index_name}/_mapping",
+            json={"properties": {**FILTER_FIELD_MAPPINGS, "content_hash": {"type": "keyword"}, "content": CONTENT_FIELD_MAPPING}}
+        ) as response:
+            if response.status == 200:
+                return True
+            error_text = await response.text()
+            logger.warning(f"Filter field mapping update failed: HTTP {response.status}, {error_text}")
+            return False
+    
+    async def update_document_fields(
+        self,
+        document_id: str,
+        fields: Dict[str, Any],
+        metadata: Optional[Dict[str, Any]] = None
+    ) -> int:
+        """
+        Set fields on every chunk of a document without re-embedding
+        
+        Indexes that keep vectors in _source are updated in place with
+        _update_by_query. Indexes that exclude them are rewritten from the
+        stored chunks plus their vectors read back from doc values, since an
+        in-place update would drop the vector.
+        
+        Args:
+            document_id: Document UUID
+            fields: Top-level field name -> value, e.g. extract_filter_fields(document)
+            metadata: Keys merged into each chunk's metadata object
+            
+        Returns:
+            Number of updated chunks
+            
+        Raises:
+            VectorsNotInSourceError: If stored vectors cannot be read back
+            Exception: If the update request fails
+        """
+        metadata = metadata or {}
+        info = await self.get_vector_field_info()
+        
+        if not info["vector_in_source"]:
+            chunks = await self.get_document_chunks(document_id)
+            vectors = await self.get_chunk_vectors([chunk["_id"] for chunk in chunks])
+            missing = [chunk["_id"] for chunk in chunks if chunk["_id"] not in vectors]
+            if missing:
+                raise VectorsNotInSourceError(
+                    f"{len(missing)} chunks of {document_id} have no readable vector in {self.index_name}"
+                )
+            documents = []
+            for chunk in chunks:
+                source = {**chunk["_source"], **fields, "embedding": vectors[chunk["_id"]]}
+                if metadata:
+                    source["metadata"] = {**(source.get("metadata") or {}), **metadata}
+                documents.append({"_id": chunk["_id"], "_source": source})
+            updated = await self.bulk_index_documents(documents, refresh=True)
+            await self._update_routing_fields(document_id, fields)
+            await self._invalidate_result_caches(document_id, fields)
+            return updated
+        
+        session = await self._get_session()
+        body = {
+            "query": {"term": {"document_id.keyword": document_id}},
+            "script": {
+                "lang": "painless",
+                "source": (
+                    "for (entry in params.fields.entrySet()) { ctx._source[entry.getKey()] = entry.getValue(); } "
+                    "if (!params.metadata.isEmpty()) { "
+                    "if (ctx._source.metadata == null) { ctx._source.metadata = new HashMap(); } "
+                    "ctx._source.metadata.putAll(params.metadata); }"
+                ),
+                "params": {"fields": fields, "metadata": metadata}
+            }
+        }
+        async with session.post(
+            f"{self.elasticsearch_url}/{self.index_name}/_update_by_query",
+            timeout=_bulk_timeout(),
+            params={"conflicts": "proceed", "refresh": "true"},
+            json=body
+        ) as response:
+            if response.status != 200:
+                error_text = await response.text()
+                raise Exception(f"Field update failed for {document_id}: HTTP {response.status}, {error_text}")
+            result = await response.json()
+        
+        await self._update_routing_fields(document_id, fields)
+        await self._invalidate_result_caches(document_id, fields)
+        return result.get("updated", 0)
+    
+    async def _invalidate_result_caches(self, document_id: str, fields: Dict[str, Any]) -> None:
+        """Deactivated documents must not keep answering from cached results"""
+        if fields.get("document_status") in INACTIVE_DOCUMENT_STATUSES:
+            await bump_cache_generation(f"document {document_id} status set to {fields['document_status']}")
+    
+    async def _update_routing_fields(self, document_id: str, fields: Dict[str, Any]) -> None:
+        """Keep the document's routing centroid filterable like its chunks"""
+        if self.index_name != settings.ELASTICSEARCH_INDEX:
+            return
+        try:
+            # Import here to avoid circular imports
+            from services.document_router import DocumentRouter
+            await DocumentRouter(self).update_fields(document_id, fields)
+        except Exception as e:
+            logger.warning(f"Routing fields of {document_id} not updated: {e}")
+    
+    async def scan_document_ids(
+        self,
+        after_key: Optional[Dict[str, Any]] = None,
+        page_size: int = 50
+    ) -> Tuple[List[str], Optional[Dict[str, Any]]]:
+        """
+        Page through the distinct document IDs of the index in a stable order
+        
+        Args:
+            after_key: Cursor returned by the previous page (None for the first page)
+            page_size: Documents per page
+            
+        Returns:
+            (document IDs, cursor for the next page or None when exhausted)
+        """
+        session = await self._get_session()
+        composite = {
+            "size": page_size,
+            "sources": [{"document_id": {"terms": {"field": "document_id.keyword"}}}]
+        }
+        if after_key:
+            composite["after"] = after_key
+        
+        async with session.post(
+            f"{self.elasticsearch_url}/{self.index_name}/_search",
+            json={"size": 0, "aggs": {"documents": {"composite": composite}}}
+        ) as response:
+            if response.status != 200:
+                error_text = await response.text()
+                raise Exception(f"Document ID scan failed: HTTP {response.status}, {error_text}")
+            result = await response.json()
+        
+        documents = result.get("aggregations", {}).get("documents", {})
+        document_ids = [bucket["key"]["document_id"] for bucket in documents.get("buckets", [])]
+        next_after_key = documents.get("after_key") if len(document_ids) == page_size else None
+        return document_ids, next_after_key
+    
+    async def get_document_chunks(self, document_id: str) -> List[Dict[str, Any]]:
+        """
+        All chunks of a document in chunk order, without their vectors
+        
+        Pages through a point in time with search_after, sorted on
+        chunk_index and _shard_doc, so documents of any size are read
+        completely and chunks sharing an index (a stale and a new version)
+        are neither skipped nor returned twice.
+        
+        Returns:
+            [{"_id", "_source"}] as stored in the index
+        """
+        session = await self._get_session()
+        async with session.post(
+            f"{self.elasticsearch_url}/{self.index_name}/_pit",
+            params={"keep_alive": "1m"}
+        ) as response:
+            if response.status != 200:
+                error_text = await response.text()
+                raise Exception(f"Chunk fetch failed for {document_id}: HTTP {response.status}, {error_text}")
+            pit_id = (await response.json())["id"]
+        
+        chunks = []
+        search_after = None
+        try:
+            while True:
+                query = {
+                    "size": DOCUMENT_CHUNK_PAGE_SIZE,
+                    "query": {"term": {"document_id.keyword": document_id}},
+                    "pit": {"id": pit_id, "keep_alive": "1m"},
+                    "sort": [{"chunk_index": "asc"}, {"_shard_doc": "asc"}],
+                    "_source": {"excludes": ["embedding"]}
+                }
+                if search_after is not None:
+                    query["search_after"] = search_after
+                async with session.post(f"{self.elasticsearch_url}/_search", json=query) as response:
+                    if response.status != 200:
+                        error_text = await response.text()
+                        raise Exception(f"Chunk fetch failed for {document_id}: HTTP {response.status}, {error_text}")
+                    result = await response.json()
+                
+                pit_id = result.get("pit_id", pit_id)
+                hits = result.get("hits", {}).get("hits", [])
+                chunks.extend({"_id": hit["_id"], "_source": hit["_source"]} for hit in hits)
+                if len(hits) < DOCUMENT_CHUNK_PAGE_SIZE:
+                    return chunks
+                search_after = hits[-1]["sort"]
+        finally:
+            try:
+                async with session.delete(f"{self.elasticsearch_url}/_pit", json={"id": pit_id}):
+                    pass
+            except Exception as e:
+                logger.debug(f"Closing point in time for {document_id} failed: {e}")
+    
+    async def get_chunk_vectors(self, chunk_ids: List[str]) -> Dict[str, List[float]]:
+        """
+        Stored vectors of chunks by ID
+        
+        Read from _source where the index keeps them there, otherwise from
+        the dense_vector doc values through a script field.
+        
+        Returns:
+            Chunk ID -> vector (chunks without a vector are left out)
+        """
+        if not chunk_ids:
+            return {}
+        
+        info = await self.get_vector_field_info()
+        session = await self._get_session()
+        vectors = {}
+        for start in range(0, len(chunk_ids), 1000):
+            batch = chunk_ids[start:start + 1000]
+            query = {"size": len(batch), "query": {"ids": {"values": batch}}}
+            if info["vector_in_source"]:
+                query["_source"] = ["embedding"]
+            else:
+                query["_source"] = False
+                query["script_fields"] = {
+                    "embedding": {
+                        "script": {"source": "doc['embedding'].size() == 0 ? null : doc['embedding'].vectorValue"}
+                    }
+                }
+            async with session.post(
+                f"{self.elasticsearch_url}/{self.index_name}/_search",
+                json=query
+            ) as response:
+                if response.status != 200:
+                    error_text = await response.text()
+                    raise Exception(f"Vector fetch failed: HTTP {response.status}, {error_text}")
+                result = await response.json()
+            
+            for hit in result.get("hits", {}).get("hits", []):
+                if info["vector_in_source"]:
+                    vector = hit.get("_source", {}).get("embedding")
+                else:
+                    vector = hit.get("fields", {}).get("embedding")
+                if vector:
+                    vectors[hit["_id"]] = vector
+        return vectors
+    
+    async def delete_chunks(self, chunk_ids: List[str]) -> int:
+        """Delete chunks by ID (stale chunks after an incremental re-index)"""
+        if not chunk_ids:
+            return 0
+        session = await self._get_session()
+        async with session.post(
+            f"{self.elasticsearch_url}/{self.index_name}/_delete_by_query",
+            timeout=_bulk_timeout(),
+            params={"refresh": "true", "conflicts": "proceed"},
+            json={"query": {"ids": {"values": chunk_ids}}}
+        ) as response:
+            if response.status != 200:
+                error_text = await response.text()
+                raise Exception(f"Chunk delete failed: HTTP {response.status}, {error_text}")
+            result = await response.json()
+        return result.get("deleted", 0)
+    
+    async def bulk_index_documents(self, documents: List[Dict[str, Any]], refresh: bool = False) -> int:
+        """
+        Index prepared documents under fixed IDs (re-running overwrites, never duplicates)
+        
+        Args:
+            documents: [{"_id", "_source"}]
+            refresh: Refresh the index after the load (bulk jobs refresh once at the end)
+            
+        Returns:
+            Number of indexed documents
+            
+        Raises:
+            BulkIndexError: If any document is rejected after the retries
+        """
+        if not documents:
+            return 0
+        
+        indexer = ElasticsearchBulkIndexer(await self._get_session(), self.elasticsearch_url, self.index_name)
+        result = await indexer.index(documents, refresh=refresh)
+        if result["failed"]:
+            first = result["failed"][0]
+            raise BulkIndexError(
+                f"Bulk index rejected {len(result['failed'])} documents, first error: {first['error']}",
+                result
+            )
+        return result["indexed"]
+    
+    async def refresh_index(self) -> None:
+        """Make documents loaded with refresh=false searchable"""
+        indexer = ElasticsearchBulkIndexer(await self._get_session(), self.elasticsearch_url, self.index_name)
+        await indexer.refresh()
+
+    async def get_index_footprint(self, index_name: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Document count and disk usage of an index or alias
+
+        An alias is summed over the physical indexes it points to.
+
+        Returns:
+            Dict with "indexes", "docs", "deleted_docs", "primary_store_bytes",
+            "total_store_bytes" and "bytes_per_doc" (primary store / docs)
+        """
+        session = await self._get_session()
+        async with session.get(
+            f"{self.elasticsearch_url}/{index_name or self.index_name}/_stats/docs,store"
+        ) as response:
+            if response.status != 200:
+                error_text = await response.text()
+                raise Exception(f"Index stats failed: HTTP {response.status}, {error_text}")
+            result = await response.json()
+
+        indices = result.get("indices", {})
+        docs = sum(index["primaries"].get("docs", {}).get("count", 0) for index in indices.values())
+        deleted_docs = sum(index["primaries"].get("docs", {}).get("deleted", 0) for index in indices.values())
+        primary_bytes = sum(index["primaries"].get("store", {}).get("size_in_bytes", 0) for index in indices.values())
+        total_bytes = sum(index["total"].get("store", {}).get("size_in_bytes", 0) for index in indices.values())
+        return {
+            "indexes": sorted(indices.keys()),
+            "docs": docs,
+            "deleted_docs": deleted_docs,
+            "primary_store_bytes": primary_bytes,
+            "total_store_bytes": total_bytes,
+            "bytes_per_doc": round(primary_bytes / docs, 1) if docs else 0
+        }
+
+    async def sample_chunk_contents(self, size: int = 20, seed: int = 0) -> List[str]:
+        """Contents of randomly picked chunks (deterministic for a given seed)"""
+        session = await self._get_session()
+        query = {
+            "size": size,
+            "query": {
+                "function_score": {
+                    "query": {"exists": {"field": "content"}},
+                    "random_score": {"seed": seed, "field": "_seq_no"}
+                }
+            },
+            "_source": ["content"]
+        }
+        async with session.post(
+            f"{self.elasticsearch_url}/{self.index_name}/_search",
+            json=query
+        ) as response:
+            if response.status != 200:
+                error_text = await response.text()
+                raise Exception(f"Chunk sampling failed: HTTP {response.status}, {error_text}")
+            result = await response.json()
+
+        return [
+            hit["_source"]["content"] for hit in result.get("hits", {}).get("hits", [])
+            if (hit["_source"].get("content") or "").strip()
+        ]
+
     async def close(self):
-        """Close aiohttp session"""
-        if self.session:
-            await self.session.close()
-            self.session = None
+        """No-op, see close_session"""
+        await self.close_session()
     
     async def hybrid_search(
         self,
@@ -357,84 +1513,115 @@ class ElasticsearchService:
         query_text: str,
         k: int = 10,
         institution_filter: Optional[str] = None,
-        vector_boost: float = 2.0,
-        text_boost: float = 1.0
+        vector_boost: float = 1.0,
+        text_boost: float = 1.0,
+        category_filter: Optional[str] = None,
+        date_filter: Optional[Dict[str, Any]] = None,
+        status_filter: Optional[str] = None,
+        search_mode: Optional[str] = None,
+        similarity_threshold: float = 0.0,
+        document_ids: Optional[List[str]] = None,
+        collapse_per_document: int = 0
     ) -> List[Dict[str, Any]]:
-        """Hybrid search combining vector and text search"""
+        """
+        Hybrid search: BM25 and vector (kNN or exact) fused with reciprocal rank fusion
+        
+        Both legs run in one _msearch round trip with the same filters and
+        return up to max(k, HYBRID_RANK_WINDOW) hits each. RRF is done here
+        rather than with the rrf retriever, which needs a paid license, and so
+        every hit keeps its cosine "similarity" next to "rrf_score" and
+        "ranks". similarity_threshold only bounds the vector leg: exact
+        lexical matches (quoted article numbers) are kept even when their
+        embedding is not close to the question.
+        
+        Args:
+            vector_boost: RRF weight of the vector leg
+            text_boost: RRF weight of the BM25 leg
+            collapse_per_document: Collapse both legs per document (see similarity_search)
+        """
         try:
             session = await self._get_session()
+            mode = await self._resolve_search_mode(search_mode)
+            window = self._hybrid_window(k)
             
-            # Build hybrid query
-            query = {
-                "size": k,
-                "query": {
-                    "bool": {
-                        "should": [
-                            {
-                                "script_score": {
-                                    "query": {"match_all": {}},
-                                    "script": {
-                                        "source": f"({vector_boost} * (cosineSimilarity(params.query_vector, 'embedding') + 1.0))",
-                                        "params": {"query_vector": query_vector}
-                                    }
-                                }
-                            },
-                            {
-                                "match": {
-                                    "content": {
-                                        "query": query_text,
-                                        "boost": text_boost
-                                    }
-                                }
-                            }
-                        ]
-                    }
-                },
-                "_source": ["document_id", "content", "chunk_index", "page_number", "source_institution", "source_document", "belge_adi", "metadata"]
-            }
-            
-            # Add institution filter
-            if institution_filter:
-                query["query"]["bool"]["filter"] = [
-                    {"term": {"source_institution": institution_filter}}
-                ]
+            filter_clauses = await resolve_filter_clauses(
+                institution_filter=institution_filter,
+                category_filter=category_filter,
+                date_filter=date_filter,
+                status_filter=status_filter,
+                document_ids=document_ids
+            )
+            vector_query = await self._similarity_query(
+                query_vector, window, filter_clauses, similarity_threshold, mode, collapse_per_document
+            )
+            lexical_query = self._lexical_query(query_text, query_vector, window, filter_clauses, collapse_per_document)
+            body = "".join(
+                json.dumps({"index": self.index_name}) + "\n" + json.dumps(query) + "\n"
+                for query in (vector_query, lexical_query)
+            )
             
             async with session.post(
-                f"{self.elasticsearch_url}/{self.index_name}/_search",
-                json=query
+                f"{self.elasticsearch_url}/_msearch",
+                data=body,
+                headers={"Content-Type": "application/x-ndjson"}
             ) as response:
-                
-                if response.status == 200:
-                    result = await response.json()
-                    
-                    # Process hybrid search results
-                    results = []
-                    for hit in result.get("hits", {}).get("hits", []):
-                        source = hit["_source"]
-                        
-                        results.append({
-                            "id": hit["_id"],
-                            "document_id": source["document_id"],
-                            "content": source["content"],
-                            "chunk_index": source.get("chunk_index", 0),
-                            "page_number": source.get("page_number"),
-                            "source_institution": source.get("source_institution"),
-                            "source_document": source.get("source_document"),
-                            "metadata": source.get("metadata", {}),
-                            "similarity": hit["_score"] / (vector_boost + text_boost)  # Normalize score
-                        })
-                    
-                    logger.info(f"Hybrid search found {len(results)} results")
-                    return results
-                else:
+                if response.status != 200:
                     error_text = await response.text()
                     logger.error(f"Hybrid search failed: HTTP {response.status}, {error_text}")
                     return []
+                result = await response.json()
+            
+            vector_response, lexical_response = result.get("responses", [{}, {}])
+            results = self._fuse_hybrid(vector_response, lexical_response, k, mode, vector_boost, text_boost)
+            lexical_only = sum(1 for hit in results if "vector" not in hit["ranks"])
+            logger.info(f"Hybrid search ({mode}) found {len(results)} results, {lexical_only} from BM25 only")
+            return results
                     
         except Exception as e:
             logger.error(f"Error in hybrid search: {e}")
             return []
     
+    async def compare_retrieval_modes(
+        self,
+        query_vector: List[float],
+        query_text: str,
+        k: int = 10,
+        similarity_threshold: float = 0.0,
+        **filters
+    ) -> Dict[str, Any]:
+        """
+        Pure vector search against hybrid search for one question
+        
+        Returns:
+            Dict with latencies, the overlap of both top k and the hit IDs
+        """
+        timings = {}
+        start = time.perf_counter()
+        vector_results = await self.similarity_search(
+            query_vector=query_vector, k=k, similarity_threshold=similarity_threshold, **filters
+        )
+        timings["vector"] = int((time.perf_counter() - start) * 1000)
+        
+        start = time.perf_counter()
+        hybrid_results = await self.hybrid_search(
+            query_vector=query_vector, query_text=query_text, k=k,
+            similarity_threshold=similarity_threshold, **filters
+        )
+        timings["hybrid"] = int((time.perf_counter() - start) * 1000)
+        
+        vector_ids = [result["id"] for result in vector_results]
+        hybrid_ids = [result["id"] for result in hybrid_results]
+        return {
+            "k": k,
+            "overlap_at_k": round(len(set(vector_ids) & set(hybrid_ids)) / k, 4),
+            "latency_ms": timings,
+            "lexical_only_hits": sum(1 for result in hybrid_results if "vector" not in result["ranks"]),
+            "vector_ids": vector_ids,
+            "hybrid_ids": hybrid_ids,
+            "vector_document_ids": [result["document_id"] for result in vector_results],
+            "hybrid_document_ids": [result["document_id"] for result in hybrid_results]
+        }
+    
     async def get_vector_stats(self, document_id: str) -> Dict[str, Any]:
         """Get vector statistics for a document"""
         try:
@@ -442,7 +1629,7 @@ class ElasticsearchService:
             count_query = {
                 "query": {
                     "term": {
-                        "document_id": document_id
+                        "document_id.keyword": document_id
                     }
                 }
             }
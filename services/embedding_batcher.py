@@ -0,0 +1,402 @@
+"""
+Embedding batcher
+Embeds many texts with few OpenAI requests: inputs are packed into batches by
+token count, several batches are in flight at once and results come back in
+input order. EmbeddingMicroBatcher does the same for single query embeddings
+arriving concurrently on the request path.
+
+Vectors are requested as base64 float32 and decoded straight into NumPy
+arrays, never into 2048 Python floats per chunk.
+"""
+
+import math
+import time
+import base64
+import random
+import asyncio
+import logging
+import unicodedata
+from typing import List, Dict, Any, Optional, Callable, Awaitable, Tuple
+
+import openai
+import numpy as np
+
+from core.config import settings
+from services.openai_rate_limiter import OpenAIRateLimiter, openai_rate_limiter, retry_after_seconds
+
+logger = logging.getLogger(__name__)
+
+try:
+    import tiktoken
+    _ENCODING = tiktoken.get_encoding("cl100k_base")  # tokenizer of the text-embedding-3 models
+    TIKTOKEN_AVAILABLE = True
+except Exception:
+    _ENCODING = None
+    TIKTOKEN_AVAILABLE = False
+    logger.warning("tiktoken not available. Embedding batches are sized with a character estimate.")
+
+# Without tiktoken: Turkish legal text averages well above 2 characters per token
+ESTIMATED_CHARS_PER_TOKEN = 2
+
+# Errors worth another attempt; anything else (bad input, auth) fails the batch at once
+RETRYABLE_ERRORS = (
+    openai.RateLimitError,
+    openai.APIConnectionError,
+    openai.APITimeoutError,
+    openai.InternalServerError
+)
+
+BatchCallback = Callable[[Dict[str, Any]], Awaitable[None]]
+
+
+class EmbeddingBatchError(Exception):
+    """A batch could not be embedded after all retries"""
+
+
+def decode_embedding_payload(payload: Any) -> np.ndarray:
+    """float32 vector from an embedding item: base64 (little-endian float32) or a float list"""
+    if isinstance(payload, str):
+        return np.frombuffer(base64.b64decode(payload), dtype="<f4")
+    return np.asarray(payload, dtype=np.float32)
+
+
+def count_tokens(text: str) -> int:
+    """Tokens of a text for the embedding model (estimated without tiktoken)"""
+    if _ENCODING is not None:
+        return len(_ENCODING.encode(text))
+    return math.ceil(len(text) / ESTIMATED_CHARS_PER_TOKEN)
+
+
+def prepare_embedding_input(text: str, max_tokens: Optional[int] = None) -> str:
+    """NFC-normalized, stripped text cut to the model's per-input token limit"""
+    max_tokens = max_tokens or settings.EMBEDDING_MAX_INPUT_TOKENS
+    if isinstance(text, bytes):
+        text = text.decode("utf-8", errors="replace")
+    text = unicodedata.normalize("NFC", str(text).strip())
+    if _ENCODING is not None:
+        tokens = _ENCODING.encode(text)
+        if len(tokens) > max_tokens:
+            logger.warning(f"Embedding input truncated from {len(tokens)} to {max_tokens} tokens")
+            text = _ENCODING.decode(tokens[:max_tokens])
+    elif len(text) > max_tokens * ESTIMATED_CHARS_PER_TOKEN:
+        logger.warning(f"Embedding input truncated from {len(text)} to {max_tokens * ESTIMATED_CHARS_PER_TOKEN} characters")
+        text = text[:max_tokens * ESTIMATED_CHARS_PER_TOKEN]
+    return text
+
+
+class EmbeddingBatcher:
+    """
+    Token-packed, concurrent embedding of a list of texts
+
+    Inputs are packed in order into batches of at most
+    EMBEDDING_BATCH_MAX_TOKENS tokens and EMBEDDING_BATCH_MAX_INPUTS texts.
+    Up to EMBEDDING_BATCH_CONCURRENCY batches run at once on the synchronous
+    OpenAI client in the default executor. Every request first takes its
+    share of the quota from the shared OpenAIRateLimiter at "batch" priority,
+    so ingestion never crowds out live queries. Rate limit, connection and
+    server errors are retried with exponential backoff and jitter; a 429
+    pauses all workers for its retry-after.
+    """
+
+    def __init__(
+        self,
+        openai_client: openai.OpenAI,
+        model: Optional[str] = None,
+        dimensions: Optional[int] = None,
+        max_batch_tokens: Optional[int] = None,
+        max_batch_inputs: Optional[int] = None,
+        concurrency: Optional[int] = None,
+        max_retries: Optional[int] = None,
+        priority: str = "batch"
+    ):
+        self.openai_client = openai_client
+        self.model = model or settings.OPENAI_EMBEDDING_MODEL
+        self.dimensions = dimensions or settings.OPENAI_EMBEDDING_DIMENSIONS
+        self.max_batch_tokens = max_batch_tokens or settings.EMBEDDING_BATCH_MAX_TOKENS
+        self.max_batch_inputs = max_batch_inputs or settings.EMBEDDING_BATCH_MAX_INPUTS
+        self.concurrency = concurrency or settings.EMBEDDING_BATCH_CONCURRENCY
+        self.max_retries = max_retries if max_retries is not None else settings.EMBEDDING_BATCH_MAX_RETRIES
+        self.priority = priority
+        # Quota is per model; a re-embedding into another model gets its own buckets
+        self.rate_limiter = openai_rate_limiter if self.model == openai_rate_limiter.model else OpenAIRateLimiter(self.model)
+
+    def _pack(self, token_counts: List[int]) -> List[List[int]]:
+        """Positions per batch, bounded by tokens and input count"""
+        batches, current, current_tokens = [], [], 0
+        for position, tokens in enumerate(token_counts):
+            if current and (current_tokens + tokens > self.max_batch_tokens or len(current) >= self.max_batch_inputs):
+                batches.append(current)
+                current, current_tokens = [], 0
+            current.append(position)
+            current_tokens += tokens
+        if current:
+            batches.append(current)
+        return batches
+
+    def _backoff(self, attempt: int) -> float:
+        base = settings.EMBEDDING_BATCH_RETRY_BACKOFF * (2 ** attempt)
+        return base + random.uniform(0, base)
+
+    async def _request(self, inputs: List[str], tokens: int) -> np.ndarray:
+        await self.rate_limiter.acquire(tokens, self.priority)
+        loop = asyncio.get_running_loop()
+        raw_response = await loop.run_in_executor(
+            None,
+            lambda: self.openai_client.embeddings.with_raw_response.create(
+                model=self.model,
+                input=inputs,
+                encoding_format="base64",
+                dimensions=self.dimensions
+            )
+        )
+        await self.rate_limiter.observe(raw_response.headers)
+        response = raw_response.parse()
+        # The API returns one item per input, ordered by "index"
+        items = sorted(response.data, key=lambda item: item.index)
+        matrix = np.empty((len(items), self.dimensions), dtype=np.float32)
+        for row, item in enumerate(items):
+            vector = decode_embedding_payload(item.embedding)
+            if vector.shape[0] != self.dimensions:
+                raise EmbeddingBatchError(f"Embedding with {vector.shape[0]} dimensions returned, expected {self.dimensions}")
+            matrix[row] = vector
+        return matrix
+
+    async def _embed_batch(self, inputs: List[str], tokens: int) -> Dict[str, Any]:
+        """Embed one batch with retries: {"embeddings", "attempts"}"""
+        for attempt in range(self.max_retries + 1):
+            try:
+                embeddings = await self._request(inputs, tokens)
+                if len(embeddings) != len(inputs):
+                    raise EmbeddingBatchError(f"{len(embeddings)} embeddings returned for {len(inputs)} inputs")
+                return {"embeddings": embeddings, "attempts": attempt + 1}
+            except RETRYABLE_ERRORS as e:
+                if attempt == self.max_retries:
+                    raise EmbeddingBatchError(
+                        f"Embedding batch of {len(inputs)} inputs failed after {attempt + 1} attempts: {e}"
+                    ) from e
+                delay = self._backoff(attempt)
+                if isinstance(e, openai.RateLimitError):
+                    # Tell every worker, not only this batcher, to back off
+                    delay = max(delay, retry_after_seconds(e.response.headers, default=0.0))
+                    await self.rate_limiter.pause(delay)
+                logger.warning(f"Embedding batch of {len(inputs)} inputs failed ({type(e).__name__}), retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+
+    async def embed(self, texts: List[str], on_batch: Optional[BatchCallback] = None) -> np.ndarray:
+        """
+        Embed texts into one contiguous float32 array, one row per text in input order
+
+        Args:
+            texts: Non-empty texts
+            on_batch: Awaited after every finished batch with its stats
+                ("batch", "batches", "batches_done", "inputs", "tokens",
+                "duration_ms", "attempts", "inputs_done", "inputs_total")
+
+        Raises:
+            ValueError: If a text is empty (the API rejects empty inputs)
+            EmbeddingBatchError: If a batch fails after all retries
+        """
+        inputs = [prepare_embedding_input(text) for text in texts]
+        empty = [position for position, text in enumerate(inputs) if not text]
+        if empty:
+            raise ValueError(f"Cannot embed empty texts at positions {empty[:10]}")
+        if not inputs:
+            return np.empty((0, self.dimensions), dtype=np.float32)
+
+        token_counts = [count_tokens(text) for text in inputs]
+        batches = self._pack(token_counts)
+        embeddings = np.empty((len(inputs), self.dimensions), dtype=np.float32)
+        semaphore = asyncio.Semaphore(self.concurrency)
+        progress = {"inputs_done": 0, "batches_done": 0, "retries": 0}
+        start = time.perf_counter()
+
+        async def run_batch(number: int, positions: List[int]) -> None:
+            async with semaphore:
+                batch_start = time.perf_counter()
+                result = await self._embed_batch(
+                    [inputs[position] for position in positions],
+                    sum(token_counts[position] for position in positions)
+                )
+                embeddings[positions] = result["embeddings"]
+                progress["inputs_done"] += len(positions)
+                progress["batches_done"] += 1
+                progress["retries"] += result["attempts"] - 1
+                if on_batch is not None:
+                    await on_batch({
+                        "batch": number,
+                        "batches": len(batches),
+                        "batches_done": progress["batches_done"],
+                        "inputs": len(positions),
+                        "tokens": sum(token_counts[position] for position in positions),
+                        "duration_ms": int((time.perf_counter() - batch_start) * 1000),
+                        "attempts": result["attempts"],
+                        "inputs_done": progress["inputs_done"],
+                        "inputs_total": len(inputs)
+                    })
+
+        tasks = [
+            asyncio.ensure_future(run_batch(number, positions))
+            for number, positions in enumerate(batches, start=1)
+        ]
+        try:
+            await asyncio.gather(*tasks)
+        except Exception:
+            # One failed batch fails the call; stop spending tokens on the rest
+            for task in tasks:
+                task.cancel()
+            raise
+
+        logger.info(
+            f"Embedded {len(inputs)} texts ({sum(token_counts)} tokens) in {len(batches)} batches, "
+            f"{progress['retries']} retries, {int((time.perf_counter() - start) * 1000)} ms"
+        )
+        return embeddings
+
+
+class EmbeddingMicroBatcher:
+    """
+    Coalesces concurrent single-text embedding calls into batched requests
+
+    The first call opens a window of EMBEDDING_MICRO_BATCH_MAX_WAIT_MS; every
+    call arriving inside it joins the same request on the shared AsyncOpenAI
+    client, which is sent early once EMBEDDING_MICRO_BATCH_MAX_SIZE texts are
+    waiting. Each caller gets its own vector back. Requests take their quota
+    at "interactive" priority. Must be used from a single event loop (the
+    API process); Celery workers embed through EmbeddingBatcher.
+    """
+
+    def __init__(
+        self,
+        async_openai_client: openai.AsyncOpenAI,
+        model: Optional[str] = None,
+        dimensions: Optional[int] = None,
+        max_wait_ms: Optional[float] = None,
+        max_batch_size: Optional[int] = None
+    ):
+        self.async_openai_client = async_openai_client
+        self.model = model or settings.OPENAI_EMBEDDING_MODEL
+        self.dimensions = dimensions or settings.OPENAI_EMBEDDING_DIMENSIONS
+        self.max_wait = (max_wait_ms if max_wait_ms is not None else settings.EMBEDDING_MICRO_BATCH_MAX_WAIT_MS) / 1000
+        self.max_batch_size = max_batch_size or settings.EMBEDDING_MICRO_BATCH_MAX_SIZE
+        self.rate_limiter = openai_rate_limiter if self.model == openai_rate_limiter.model else OpenAIRateLimiter(self.model)
+        self._pending: List[Tuple[str, int, asyncio.Future]] = []
+        self._pending_tokens = 0
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._in_flight = set()
+        self.stats = {
+            "calls": 0,
+            "requests": 0,
+            "failed_requests": 0,
+            "deduplicated": 0,
+            "batch_sizes": {},  # texts per request -> requests
+            "request_ms_total": 0.0
+        }
+
+    async def embed(self, text: str) -> List[float]:
+        """
+        Embed one text as part of the next batched request
+
+        Raises:
+            ValueError: If the text is empty
+            openai.OpenAIError: If the batched request failed
+        """
+        text = prepare_embedding_input(text)
+        if not text:
+            raise ValueError("Cannot embed empty text")
+
+        tokens = count_tokens(text)
+        if self._pending and self._pending_tokens + tokens > settings.EMBEDDING_BATCH_MAX_TOKENS:
+            self._flush()
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((text, tokens, future))
+        self._pending_tokens += tokens
+        self.stats["calls"] += 1
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        """Send everything waiting as one request (timer callback or full batch)"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+        batch, self._pending, self._pending_tokens = self._pending, [], 0
+        task = asyncio.ensure_future(self._run(batch))
+        self._in_flight.add(task)
+        task.add_done_callback(self._in_flight.discard)
+
+    async def _run(self, batch: List[Tuple[str, int, asyncio.Future]]) -> None:
+        # Identical questions in one window (retries, double clicks) share an input
+        positions: Dict[str, int] = {}
+        inputs: List[str] = []
+        tokens = 0
+        for text, text_tokens, _ in batch:
+            if text not in positions:
+                positions[text] = len(inputs)
+                inputs.append(text)
+                tokens += text_tokens
+
+        self.stats["requests"] += 1
+        self.stats["deduplicated"] += len(batch) - len(inputs)
+        self.stats["batch_sizes"][len(inputs)] = self.stats["batch_sizes"].get(len(inputs), 0) + 1
+
+        start = time.perf_counter()
+        try:
+            await self.rate_limiter.acquire(tokens, priority="interactive")
+            try:
+                raw_response = await self.async_openai_client.embeddings.with_raw_response.create(
+                    model=self.model,
+                    input=inputs,
+                    encoding_format="base64",
+                    dimensions=self.dimensions
+                )
+            except openai.RateLimitError as e:
+                await self.rate_limiter.pause(retry_after_seconds(e.response.headers))
+                raise
+            await self.rate_limiter.observe(raw_response.headers)
+            response = raw_response.parse()
+            # Query vectors go into JSON search bodies and caches, so callers get lists
+            embeddings = [
+                decode_embedding_payload(item.embedding).tolist()
+                for item in sorted(response.data, key=lambda item: item.index)
+            ]
+            if len(embeddings) != len(inputs):
+                raise EmbeddingBatchError(f"{len(embeddings)} embeddings returned for {len(inputs)} inputs")
+        except Exception as e:
+            self.stats["failed_requests"] += 1
+            logger.error(f"Batched query embedding of {len(inputs)} texts failed: {e}")
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        finally:
+            self.stats["request_ms_total"] += (time.perf_counter() - start) * 1000
+
+        for text, _, future in batch:
+            # Callers that went away (client disconnect) have a cancelled future
+            if not future.done():
+                future.set_result(embeddings[positions[text]])
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Counters since process start, with the batch-size distribution"""
+        requests = self.stats["requests"]
+        return {
+            "calls": self.stats["calls"],
+            "requests": requests,
+            "failed_requests": self.stats["failed_requests"],
+            "deduplicated": self.stats["deduplicated"],
+            "calls_per_request": round(self.stats["calls"] / requests, 2) if requests else None,
+            "batch_size_distribution": dict(sorted(self.stats["batch_sizes"].items())),
+            "avg_request_ms": round(self.stats["request_ms_total"] / requests, 1) if requests else None,
+            "max_wait_ms": self.max_wait * 1000,
+            "max_batch_size": self.max_batch_size,
+            "pending": len(self._pending),
+            "in_flight": len(self._in_flight)
+        }
@@ -8,9 +8,16 @@ from typing import List, Dict, Any, Optional
 import logging
 import openai
 import asyncio
+import numpy as np
 
 from core.config import get_settings
-from services.elasticsearch_service import ElasticsearchService
+from services.elasticsearch_service import (
+    ElasticsearchService, build_chunk_source, chunk_content_hash, chunk_id, chunk_source_matches
+)
+from services.document_router import DocumentRouter
+from services.embedding_batcher import EmbeddingBatcher, EmbeddingMicroBatcher, BatchCallback, count_tokens, decode_embedding_payload
+from services.openai_rate_limiter import openai_rate_limiter, retry_after_seconds
+from services.embedding_store import embedding_store
 from utils.exceptions import AppException
 
 logger = logging.getLogger(__name__)
@@ -18,10 +25,24 @@ logger = logging.getLogger(__name__)
 class EmbeddingService:
     """Clean Elasticsearch-based embedding service with OpenAI text-embedding-3-large"""
     
-    def __init__(self, *args, **kwargs):
+    def __init__(
+        self,
+        *args,
+        openai_client: Optional[openai.OpenAI] = None,
+        elasticsearch_service: Optional[ElasticsearchService] = None,
+        async_openai_client: Optional[openai.AsyncOpenAI] = None,
+        **kwargs
+    ):
         self.settings = get_settings()
-        self.openai_client = openai.OpenAI(api_key=self.settings.OPENAI_API_KEY)
-        self.elasticsearch_service = ElasticsearchService()
+        # Shared clients are injected by the service container on the request path
+        self.openai_client = openai_client or openai.OpenAI(api_key=self.settings.OPENAI_API_KEY)
+        self.elasticsearch_service = elasticsearch_service or ElasticsearchService()
+        # Concurrent query embeddings share requests on the async client (API process only)
+        self.micro_batcher = (
+            EmbeddingMicroBatcher(async_openai_client)
+            if async_openai_client is not None and self.settings.EMBEDDING_MICRO_BATCH_ENABLED
+            else None
+        )
     
         logger.info("EmbeddingService initialized with Elasticsearch backend")
     
@@ -34,6 +55,9 @@ class EmbeddingService:
         """
         Generate 2048-dimensional embedding using OpenAI text-embedding-3-large
         
+        With a micro-batcher (service container), the call joins concurrent
+        calls in one batched request instead of a request of its own.
+        
         Args:
             text: Text to generate embedding for
             
@@ -44,40 +68,10 @@ class EmbeddingService:
             AppException: If embedding generation fails
         """
         try:
-            # Run OpenAI API call in thread pool to avoid blocking
-            loop = asyncio.get_event_loop()
-            # Ensure text is properly encoded for OpenAI API
-            try:
-                # Handle Turkish characters properly for API call
-                if isinstance(text, bytes):
-                    processed_text = text.decode('utf-8', errors='replace')
-                else:
-                    processed_text = str(text)
-                
-                # Normalize Unicode for consistency
-                import unicodedata
-                processed_text = unicodedata.normalize('NFC', processed_text.strip())
-                
-                # Ensure text length is reasonable for API
-                if len(processed_text) > 8000:  # OpenAI limit safety
-                    processed_text = processed_text[:8000]
-                    logger.warning(f"Text truncated to 8000 characters for embedding generation")
-                
-            except Exception as text_processing_error:
-                logger.warning(f"Text processing issue: {text_processing_error}")
-                processed_text = str(text).strip()[:8000]
-            
-            response = await loop.run_in_executor(
-                None,
-                lambda: self.openai_client.embeddings.create(
-                    model=self.settings.OPENAI_EMBEDDING_MODEL,  # text-embedding-3-large
-                    input=processed_text,
-                    encoding_format="float",
-                    dimensions=self.settings.OPENAI_EMBEDDING_DIMENSIONS  # 2048 for ES optimization
-                )
-            )
-            
-            embedding = response.data[0].embedding
+            if self.micro_batcher is not None:
+                embedding = await self.micro_batcher.embed(text)
+            else:
+                embedding = await self._embed_single(text)
             
             logger.debug(f"Generated 2048D embedding for text (length: {len(text)}, dimensions: {len(embedding)})")
             
@@ -98,53 +92,105 @@ class EmbeddingService:
                 error_code="EMBEDDING_GENERATION_FAILED"
             )
     
-    async def generate_embeddings_batch(self, texts: List[str]) -> List[List[float]]:
+    async def _embed_single(self, text: str) -> List[float]:
+        """One request for one text on the synchronous client (no micro-batcher)"""
+        # Run OpenAI API call in thread pool to avoid blocking
+        loop = asyncio.get_event_loop()
+        # Ensure text is properly encoded for OpenAI API
+        try:
+            # Handle Turkish characters properly for API call
+            if isinstance(text, bytes):
+                processed_text = text.decode('utf-8', errors='replace')
+            else:
+                processed_text = str(text)
+            
+            # Normalize Unicode for consistency
+            import unicodedata
+            processed_text = unicodedata.normalize('NFC', processed_text.strip())
+            
+            # Ensure text length is reasonable for API
+            if len(processed_text) > 8000:  # OpenAI limit safety
+                processed_text = processed_text[:8000]
+                logger.warning(f"Text truncated to 8000 characters for embedding generation")
+            
+        except Exception as text_processing_error:
+            logger.warning(f"Text processing issue: {text_processing_error}")
+            processed_text = str(text).strip()[:8000]
+        
+        # Live queries share the quota with ingestion but may use its reserved share
+        await openai_rate_limiter.acquire(count_tokens(processed_text), priority="interactive")
+        try:
+            raw_response = await loop.run_in_executor(
+                None,
+                lambda: self.openai_client.embeddings.with_raw_response.create(
+                    model=self.settings.OPENAI_EMBEDDING_MODEL,  # text-embedding-3-large
+                    input=processed_text,
+                    encoding_format="base64",  # 4 bytes per dimension instead of JSON floats
+                    dimensions=self.settings.OPENAI_EMBEDDING_DIMENSIONS  # 2048 for ES optimization
+                )
+            )
+        except openai.RateLimitError as rate_limit_error:
+            await openai_rate_limiter.pause(retry_after_seconds(rate_limit_error.response.headers))
+            raise
+        await openai_rate_limiter.observe(raw_response.headers)
+        response = raw_response.parse()
+        
+        return decode_embedding_payload(response.data[0].embedding).tolist()
+    
+    async def generate_embeddings_batch(
+        self,
+        texts: List[str],
+        model: Optional[str] = None,
+        dimensions: Optional[int] = None,
+        on_batch: Optional[BatchCallback] = None,
+        use_store: bool = True
+    ) -> np.ndarray:
         """
-        Generate 2048-dimensional embeddings for multiple texts in batch
+        Generate 2048-dimensional embeddings for many texts with few requests
+        
+        Texts already embedded by any worker are taken from the
+        content-addressed embedding store; the rest are packed into
+        token-bounded requests that run concurrently (see EmbeddingBatcher)
+        and added to the store. The result is one contiguous float32 array
+        with a row per text, in input order; rows go to Elasticsearch as they
+        are (see ElasticsearchBulkIndexer), query vectors need .tolist().
         
         Args:
-            texts: List of texts to generate embeddings for
+            texts: Non-empty texts to generate embeddings for
+            model: Embedding model override (re-embedding into a new index version)
+            dimensions: Dimensions override, paired with model
+            on_batch: Awaited with the stats of every finished request
+            use_store: Look up and record chunk texts in the embedding store
+                (off for one-off texts such as benchmark queries)
             
         Returns:
-            List of 2048-dimensional embedding lists
+            float32 array of shape (len(texts), dimensions)
             
         Raises:
             AppException: If batch embedding generation fails
         """
         try:
-            # OpenAI supports batch embedding generation
-            # Clean and prepare texts
-            clean_texts = [text.strip() for text in texts if text.strip()]
-            
-            if not clean_texts:
-                return []
-            
-            # Run batch embedding generation with text-embedding-3-large
-            loop = asyncio.get_event_loop()
-            response = await loop.run_in_executor(
-                None,
-                lambda: self.openai_client.embeddings.create(
-                    model=self.settings.OPENAI_EMBEDDING_MODEL,  # text-embedding-3-large
-                    input=clean_texts,
-                    encoding_format="float",
-                    dimensions=self.settings.OPENAI_EMBEDDING_DIMENSIONS  # 2048
-                )
-            )
-            
-            embeddings = [item.embedding for item in response.data]
-            
-            # Verify all embeddings have correct dimensions
-            for i, embedding in enumerate(embeddings):
-                if len(embedding) != self.settings.OPENAI_EMBEDDING_DIMENSIONS:
-                    raise AppException(
-                        message=f"Invalid embedding dimensions for text {i}: {len(embedding)}, expected: {self.settings.OPENAI_EMBEDDING_DIMENSIONS}",
-                        error_code="INVALID_BATCH_EMBEDDING_DIMENSIONS"
-                    )
-            
-            logger.info(f"Generated {len(embeddings)} 2048D embeddings in batch")
+            model = model or self.settings.OPENAI_EMBEDDING_MODEL
+            dimensions = dimensions or self.settings.OPENAI_EMBEDDING_DIMENSIONS
+            stored = await embedding_store.get_many(texts, model, dimensions) if use_store else {}
+            missing = [i for i in range(len(texts)) if i not in stored]
+            
+            embeddings = np.empty((len(texts), dimensions), dtype=np.float32)
+            for i, vector in stored.items():
+                embeddings[i] = vector
+            if missing:
+                batcher = EmbeddingBatcher(self.openai_client, model=model, dimensions=dimensions)
+                new_embeddings = await batcher.embed([texts[i] for i in missing], on_batch=on_batch)
+                embeddings[missing] = new_embeddings
+                if use_store:
+                    await embedding_store.put_many([texts[i] for i in missing], new_embeddings, model, dimensions)
+            if stored:
+                logger.info(f"Embedding store supplied {len(stored)} of {len(texts)} vectors")
             
             return embeddings
             
+        except AppException:
+            raise
         except Exception as e:
             logger.error(f"Failed to generate 2048D embeddings batch: {str(e)}")
             raise AppException(
@@ -161,7 +207,7 @@ class EmbeddingService:
         include_positions: bool = True
     ) -> List[str]:
         """
-        Store embeddings in Elasticsearch with ultra optimization
+        Store embeddings in Elasticsearch (incrementally, see sync_document_chunks)
         
         Args:
             document_id: Document UUID as string
@@ -170,60 +216,193 @@ class EmbeddingService:
         Returns:
             List of Elasticsearch document IDs
             
+        Raises:
+            AppException: If storage fails
+        """
+        result = await self.sync_document_chunks(document_id, chunks, index_name, include_positions)
+        return result["ids"]
+    
+    async def sync_document_chunks(
+        self,
+        document_id: str,
+        chunks: List[Dict[str, Any]],
+        index_name: Optional[str] = None,
+        include_positions: bool = True,
+        on_batch: Optional[BatchCallback] = None
+    ) -> Dict[str, Any]:
+        """
+        Make the indexed chunks of a document match the given chunks
+        
+        Chunks get deterministic IDs (document_id:chunk_index:content_hash)
+        and the document is diffed against the index: chunks already stored
+        under their ID with the same fields are left alone, new or changed
+        chunks are upserted and chunks of the previous version that are no
+        longer part of it are deleted afterwards. A chunk to write without an
+        "embedding" reuses the stored vector of an indexed chunk with the
+        same text (e.g. a chunk that moved to another chunk_index), then the
+        shared embedding store, then OpenAI in token-packed batches.
+        
+        Args:
+            document_id: Document UUID as string
+            chunks: Chunk dicts (content, metadata, optional embedding) in chunk order
+            index_name: Target index or alias (defaults to ELASTICSEARCH_INDEX)
+            include_positions: Store page/line positions
+            on_batch: Awaited after every embedding request (progress reporting)
+            
+        Returns:
+            Dict with "ids" (every chunk of the document, in chunk order), the
+            "unchanged", "embedded", "reused" and "deleted" counts and whether
+            the routing "centroid" was stored
+            
         Raises:
             AppException: If storage fails
         """
         try:
-            # Use context manager to ensure session cleanup
-            async with ElasticsearchService(index_name=index_name) as es_service:
-                # Delete existing embeddings for this document
-                await es_service.delete_document_embeddings(document_id)
-                
-                # Prepare embeddings data for Elasticsearch bulk insert
-                embeddings_data = []
-                for i, chunk in enumerate(chunks):
-                    # Ensure embedding is a list of floats
-                    embedding_vector = chunk["embedding"]
-                    if isinstance(embedding_vector, str):
-                        import json
-                        try:
-                            embedding_vector = json.loads(embedding_vector)
-                        except:
-                            logger.error(f"Failed to parse embedding string for chunk {i}")
-                            raise AppException("Invalid embedding format")
-                    
-                    # Verify 2048 dimensions
-                    if len(embedding_vector) != self.settings.OPENAI_EMBEDDING_DIMENSIONS:
-                        raise AppException(
-                            message=f"Invalid embedding dimensions for chunk {i}: {len(embedding_vector)}, expected: {self.settings.OPENAI_EMBEDDING_DIMENSIONS}",
-                            error_code="INVALID_EMBEDDING_DIMENSIONS"
-                        )
-                    
-                    # Prepare Elasticsearch document
-                    embedding_data = {
-                        "document_id": document_id,
-                        "content": chunk["content"],
-                        "embedding": embedding_vector,
-                        "chunk_index": i,
-                        "source_institution": chunk.get("source_institution"),
-                        "source_document": chunk.get("source_document"),
-                        "metadata": chunk.get("metadata", {})
+            es_service = ElasticsearchService(index_name=index_name) if index_name else self.elasticsearch_service
+            dimensions = self.settings.OPENAI_EMBEDDING_DIMENSIONS
+            
+            # Target state of every chunk, without vectors
+            chunk_data = []
+            for i, chunk in enumerate(chunks):
+                content_hash = chunk_content_hash(chunk["content"])
+                chunk_index = chunk.get("chunk_index", i)
+                data = {
+                    "_id": chunk_id(document_id, chunk_index, content_hash),
+                    "document_id": document_id,
+                    "content": chunk["content"],
+                    "content_hash": content_hash,
+                    "chunk_index": chunk_index,
+                    "source_institution": chunk.get("source_institution"),
+                    "source_document": chunk.get("source_document"),
+                    "metadata": chunk.get("metadata", {})
+                }
+                if chunk.get("belge_adi"):
+                    data["belge_adi"] = chunk.get("belge_adi")
+                for filter_field in ("category", "publish_date", "document_status"):
+                    if chunk.get(filter_field):
+                        data[filter_field] = chunk.get(filter_field)
+                if include_positions:
+                    data["page_number"] = chunk.get("page_number")
+                    data["line_start"] = chunk.get("line_start")
+                    data["line_end"] = chunk.get("line_end")
+                chunk_data.append(data)
+            
+            # Diff against the index: unchanged chunks are skipped, stale ones deleted
+            existing_chunks = await es_service.get_document_chunks(document_id)
+            existing_sources = {existing["_id"]: existing["_source"] for existing in existing_chunks}
+            to_write = [
+                i for i, (chunk, data) in enumerate(zip(chunks, chunk_data))
+                if chunk.get("embedding") is not None
+                or data["_id"] not in existing_sources
+                or not chunk_source_matches(existing_sources[data["_id"]], build_chunk_source(data, ""))
+            ]
+            unchanged = len(chunks) - len(to_write)
+            new_ids = {data["_id"] for data in chunk_data}
+            stale_ids = sorted(set(existing_sources) - new_ids)
+            
+            # Given vectors first, then stored vectors of the same text under another ID
+            vectors_to_write: Dict[int, Any] = {}
+            for i in to_write:
+                embedding_vector = chunks[i].get("embedding")
+                if isinstance(embedding_vector, str):
+                    import json
+                    try:
+                        embedding_vector = json.loads(embedding_vector)
+                    except:
+                        logger.error(f"Failed to parse embedding string for chunk {i}")
+                        raise AppException("Invalid embedding format")
+                if embedding_vector is not None:
+                    vectors_to_write[i] = embedding_vector
+            
+            missing_hashes = {chunk_data[i]["content_hash"] for i in to_write if i not in vectors_to_write}
+            reusable_ids = {}
+            for existing_id, source in existing_sources.items():
+                existing_hash = source.get("content_hash") or chunk_content_hash(source.get("content", ""))
+                if existing_hash in missing_hashes:
+                    reusable_ids.setdefault(existing_hash, existing_id)
+            stored_vectors = {}
+            if reusable_ids:
+                try:
+                    vectors = await es_service.get_chunk_vectors(list(reusable_ids.values()))
+                    stored_vectors = {
+                        content_hash: vectors[existing_id]
+                        for content_hash, existing_id in reusable_ids.items()
+                        if existing_id in vectors
                     }
-                    if chunk.get("belge_adi"):
-                        embedding_data["belge_adi"] = chunk.get("belge_adi")
-                    if include_positions:
-                        embedding_data["page_number"] = chunk.get("page_number")
-                        embedding_data["line_start"] = chunk.get("line_start")
-                        embedding_data["line_end"] = chunk.get("line_end")
-                    embeddings_data.append(embedding_data)
-                
-                # Bulk insert to Elasticsearch
-                embedding_ids = await es_service.bulk_create_embeddings(embeddings_data)
-                
-                logger.info(f"Stored {len(embedding_ids)} embeddings in Elasticsearch for document {document_id}")
-                
-                return embedding_ids
+                except Exception as e:
+                    logger.warning(f"Stored vectors of {document_id} not readable, re-embedding moved chunks: {e}")
+            
+            reused = 0
+            for i in to_write:
+                if i not in vectors_to_write and chunk_data[i]["content_hash"] in stored_vectors:
+                    vectors_to_write[i] = stored_vectors[chunk_data[i]["content_hash"]]
+                    reused += 1
+            
+            # Everything else in one batched pass (embedding store, then OpenAI)
+            to_embed = [i for i in to_write if i not in vectors_to_write]
+            if to_embed:
+                vectors = await self.generate_embeddings_batch(
+                    [chunks[i]["content"] for i in to_embed],
+                    on_batch=on_batch
+                )
+                vectors_to_write.update(zip(to_embed, vectors))
+            embedded = len(to_embed)
+            
+            # The vectors written in this run live in one float32 array, chunks hold row views of it
+            write_vectors = np.empty((len(to_write), dimensions), dtype=np.float32)
+            embeddings_data = []
+            for row, i in enumerate(to_write):
+                embedding_vector = vectors_to_write[i]
+                # Verify 2048 dimensions
+                if len(embedding_vector) != dimensions:
+                    raise AppException(
+                        message=f"Invalid embedding dimensions for chunk {i}: {len(embedding_vector)}, expected: {dimensions}",
+                        error_code="INVALID_EMBEDDING_DIMENSIONS"
+                    )
+                write_vectors[row] = embedding_vector
+                embeddings_data.append({**chunk_data[i], "embedding": write_vectors[row]})
+            
+            # Upsert the difference, then drop what is no longer part of the document
+            if embeddings_data:
+                await es_service.bulk_create_embeddings(embeddings_data)
+            deleted = await es_service.delete_chunks(stale_ids) if stale_ids else 0
+            
+            if embeddings_data or stale_ids:
+                # A running re-embedding job of this index must copy the change
+                from services.elasticsearch_index_manager import mark_reindex_dirty
+                await mark_reindex_dirty(es_service.index_name, document_id)
+            
+            # Routing centroid over all chunk vectors (mevzuat corpus only), only when the set changed;
+            # the vectors of unchanged chunks are read back for it
+            centroid_stored = False
+            if es_service.index_name == self.settings.ELASTICSEARCH_INDEX and chunk_data and (embeddings_data or stale_ids):
+                try:
+                    written = set(to_write)
+                    unchanged_ids = [data["_id"] for i, data in enumerate(chunk_data) if i not in written]
+                    unchanged_vectors = await es_service.get_chunk_vectors(unchanged_ids) if unchanged_ids else {}
+                    centroid_stored = await DocumentRouter(es_service).upsert_document(
+                        document_id,
+                        [*write_vectors, *unchanged_vectors.values()],
+                        chunk_data[0]
+                    )
+                except Exception as e:
+                    logger.warning(f"Routing centroid of {document_id} not stored: {e}")
             
+            logger.info(
+                f"Synced {len(chunk_data)} chunks in Elasticsearch for document {document_id} "
+                f"({unchanged} unchanged, {embedded} embedded, {reused} reused, {deleted} stale deleted)"
+            )
+            return {
+                "ids": [data["_id"] for data in chunk_data],
+                "unchanged": unchanged,
+                "embedded": embedded,
+                "reused": reused,
+                "deleted": deleted,
+                "centroid": centroid_stored
+            }
+            
+        except AppException:
+            raise
         except Exception as e:
             logger.error(f"Failed to store embeddings for document {document_id}: {str(e)}")
             raise AppException(
@@ -243,10 +422,9 @@ class EmbeddingService:
             True if deletion successful
         """
         try:
-            async with ElasticsearchService() as es_service:
-                deleted_count = await es_service.delete_document_embeddings(document_id)
-                logger.info(f"Deleted {deleted_count} embeddings from Elasticsearch for document {document_id}")
-                return True
+            deleted_count = await self.elasticsearch_service.delete_document_embeddings(document_id)
+            logger.info(f"Deleted {deleted_count} embeddings from Elasticsearch for document {document_id}")
+            return True
                 
         except Exception as e:
             logger.error(f"Failed to delete embeddings for document {document_id}: {str(e)}")
@@ -254,40 +432,58 @@ class EmbeddingService:
     
     async def similarity_search(
         self,
-        query_text: str,
+        query_vector: List[float],
         k: int = 10,
         institution_filter: Optional[str] = None,
         document_ids: Optional[List[str]] = None,
-        similarity_threshold: float = 0.7
+        similarity_threshold: float = 0.7,
+        category_filter: Optional[str] = None,
+        date_filter: Optional[Dict[str, Any]] = None,
+        status_filter: Optional[str] = None,
+        search_mode: Optional[str] = None,
+        collapse_per_document: int = 0
     ) -> List[Dict[str, Any]]:
         """
         Perform semantic similarity search using Elasticsearch
         
+        The query vector must be computed by the caller (once per request);
+        this method never calls OpenAI itself. All filters are applied by
+        Elasticsearch before the top k are selected.
+        
         Args:
-            query_text: Text to search for
+            query_vector: Precomputed 2048D query embedding
             k: Number of results to return
             institution_filter: Filter by source institution
             document_ids: Filter by specific document IDs
             similarity_threshold: Minimum similarity score
+            category_filter: Filter by document category
+            date_filter: Publish date range ({"start", "end"})
+            status_filter: Filter by document status
+            search_mode: "knn" or "exact" (defaults to ELASTICSEARCH_SEARCH_MODE)
+            collapse_per_document: Max chunks per document, collapsed in ES (0 = no collapse)
             
         Returns:
             List of search results with similarity scores
         """
         try:
-            # Generate embedding for query text
-            query_embedding = await self.generate_embedding(query_text)
-            
-            # Perform similarity search in Elasticsearch using context manager
-            async with ElasticsearchService() as es_service:
-                results = await es_service.similarity_search(
-                    query_vector=query_embedding,
-                    k=k,
-                    institution_filter=institution_filter,
-                    document_ids=document_ids,
-                    similarity_threshold=similarity_threshold
-                )
+            self._validate_query_vector(query_vector)
+            
+            # Shared service over the process-wide pooled session
+            es_service = self.elasticsearch_service
+            results = await es_service.similarity_search(
+                query_vector=query_vector,
+                k=k,
+                institution_filter=institution_filter,
+                document_ids=document_ids,
+                similarity_threshold=similarity_threshold,
+                category_filter=category_filter,
+                date_filter=date_filter,
+                status_filter=status_filter,
+                search_mode=search_mode,
+                collapse_per_document=collapse_per_document
+            )
             
-            logger.info(f"Similarity search found {len(results)} results for query: {query_text[:50]}...")
+            logger.info(f"Similarity search found {len(results)} results")
             
             return results
             
@@ -301,39 +497,61 @@ class EmbeddingService:
     
     async def hybrid_search(
         self,
+        query_vector: List[float],
         query_text: str,
         k: int = 10,
         institution_filter: Optional[str] = None,
-        vector_boost: float = 2.0,
-        text_boost: float = 1.0
+        vector_boost: float = 1.0,
+        text_boost: float = 1.0,
+        category_filter: Optional[str] = None,
+        date_filter: Optional[Dict[str, Any]] = None,
+        status_filter: Optional[str] = None,
+        search_mode: Optional[str] = None,
+        similarity_threshold: float = 0.0,
+        document_ids: Optional[List[str]] = None,
+        collapse_per_document: int = 0
     ) -> List[Dict[str, Any]]:
         """
-        Perform hybrid search combining vector and text search
+        Perform hybrid search: BM25 and vector search fused with reciprocal rank fusion
         
         Args:
-            query_text: Text to search for
+            query_vector: Precomputed 2048D query embedding
+            query_text: Raw query text for the lexical part
             k: Number of results to return
             institution_filter: Filter by source institution
-            vector_boost: Weight for vector search
-            text_boost: Weight for text search
+            vector_boost: RRF weight of the vector ranking
+            text_boost: RRF weight of the BM25 ranking
+            category_filter: Filter by document category
+            date_filter: Publish date range ({"start", "end"})
+            status_filter: Filter by document status
+            search_mode: "knn" or "exact" (defaults to ELASTICSEARCH_SEARCH_MODE)
+            similarity_threshold: Minimum similarity of vector hits (BM25 hits are kept)
+            document_ids: Filter by specific document IDs
+            collapse_per_document: Max chunks per document, collapsed in ES (0 = no collapse)
             
         Returns:
-            List of hybrid search results
+            List of hybrid search results with "similarity", "rrf_score" and "ranks"
         """
         try:
-            # Generate embedding for query text
-            query_embedding = await self.generate_embedding(query_text)
-            
-            # Perform hybrid search in Elasticsearch using context manager
-            async with ElasticsearchService() as es_service:
-                results = await es_service.hybrid_search(
-                    query_vector=query_embedding,
-                    query_text=query_text,
-                    k=k,
-                    institution_filter=institution_filter,
-                    vector_boost=vector_boost,
-                    text_boost=text_boost
-                )
+            self._validate_query_vector(query_vector)
+            
+            # Shared service over the process-wide pooled session
+            es_service = self.elasticsearch_service
+            results = await es_service.hybrid_search(
+                query_vector=query_vector,
+                query_text=query_text,
+                k=k,
+                institution_filter=institution_filter,
+                vector_boost=vector_boost,
+                text_boost=text_boost,
+                category_filter=category_filter,
+                date_filter=date_filter,
+                status_filter=status_filter,
+                search_mode=search_mode,
+                similarity_threshold=similarity_threshold,
+                document_ids=document_ids,
+                collapse_per_document=collapse_per_document
+            )
             
             logger.info(f"Hybrid search found {len(results)} results for query: {query_text[:50]}...")
             
@@ -347,6 +565,14 @@ class EmbeddingService:
                 error_code="HYBRID_SEARCH_FAILED"
             )
     
+    def _validate_query_vector(self, query_vector: List[float]) -> None:
+        """Reject missing or wrongly sized query vectors before hitting Elasticsearch"""
+        if query_vector is None or len(query_vector) != self.settings.OPENAI_EMBEDDING_DIMENSIONS:
+            raise AppException(
+                message=f"Invalid query vector dimensions: {len(query_vector) if query_vector is not None else 0}, expected: {self.settings.OPENAI_EMBEDDING_DIMENSIONS}",
+                error_code="INVALID_QUERY_VECTOR"
+            )
+    
     async def get_embeddings_count(self, document_id: Optional[str] = None) -> int:
         """
         Get total embeddings count from Elasticsearch
@@ -358,9 +584,7 @@ class EmbeddingService:
             Number of embeddings
         """
         try:
-            async with ElasticsearchService() as es_service:
-                count = await es_service.get_embeddings_count(document_id)
-                return count
+            return await self.elasticsearch_service.get_embeddings_count(document_id)
             
         except Exception as e:
             logger.error(f"Failed to get embeddings count: {str(e)}")
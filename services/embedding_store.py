@@ -0,0 +1,136 @@
+"""
+Content-addressed chunk embedding store
+Vectors (base64 float32) of embedded chunk texts in Redis, keyed by the
+model, the dimensions and the hash of the normalized text, so boilerplate
+repeated across documents ("Yürürlük", "Yürütme", standard definitions, unchanged articles of
+a consolidated law) is embedded once for every worker
+"""
+
+import base64
+import hashlib
+import logging
+from typing import List, Dict, Any
+
+import numpy as np
+
+from core.config import settings
+from services.redis_service import RedisService
+from services.embedding_batcher import prepare_embedding_input, count_tokens
+
+logger = logging.getLogger(__name__)
+
+CHUNK_EMBEDDING_PREFIX = "chunk_emb"
+CHUNK_EMBEDDING_STATS_KEY = "chunk_emb_stats"
+
+# Keys per MGET / pipeline round trip (~11 KB per 2048D vector)
+STORE_BATCH_SIZE = 200
+
+
+def normalize_chunk_text(text: str) -> str:
+    """The text as it is sent to the model, with whitespace runs collapsed"""
+    return " ".join(prepare_embedding_input(text).split())
+
+
+def content_address(text: str, model: str, dimensions: int) -> str:
+    """Store key of a chunk text for one model and dimension count"""
+    digest = hashlib.sha256(normalize_chunk_text(text).encode("utf-8")).hexdigest()
+    return f"{CHUNK_EMBEDDING_PREFIX}:{model}:{dimensions}:{digest}"
+
+
+class EmbeddingStore:
+    """
+    Shared lookup of already embedded chunk texts
+
+    Entries expire CHUNK_EMBEDDING_STORE_TTL seconds after their last hit.
+    Every operation is best-effort: a Redis failure turns lookups into misses
+    and writes into no-ops, ingestion then simply embeds the text again.
+    """
+
+    async def get_many(self, texts: List[str], model: str, dimensions: int) -> Dict[int, np.ndarray]:
+        """
+        Stored vectors for the given texts
+
+        Returns:
+            {position in texts: float32 vector} for the texts found
+        """
+        if not texts or not settings.CHUNK_EMBEDDING_STORE_ENABLED:
+            return {}
+
+        keys = [content_address(text, model, dimensions) for text in texts]
+        found: Dict[int, np.ndarray] = {}
+        try:
+            async with RedisService() as client:
+                for start in range(0, len(keys), STORE_BATCH_SIZE):
+                    batch_keys = keys[start:start + STORE_BATCH_SIZE]
+                    payloads = await client.mget(batch_keys)
+                    hit_keys = []
+                    for offset, payload in enumerate(payloads):
+                        if not payload:
+                            continue
+                        vector = np.frombuffer(base64.b64decode(payload), dtype="<f4")
+                        if vector.shape[0] != dimensions:
+                            continue
+                        found[start + offset] = vector
+                        hit_keys.append(batch_keys[offset])
+                    if hit_keys:
+                        # Boilerplate that keeps coming back stays in the store
+                        pipe = client.pipeline(transaction=False)
+                        for key in hit_keys:
+                            pipe.expire(key, settings.CHUNK_EMBEDDING_STORE_TTL)
+                        await pipe.execute()
+
+                pipe = client.pipeline(transaction=False)
+                pipe.hincrby(CHUNK_EMBEDDING_STATS_KEY, "lookups", len(texts))
+                pipe.hincrby(CHUNK_EMBEDDING_STATS_KEY, "hits", len(found))
+                pipe.hincrby(
+                    CHUNK_EMBEDDING_STATS_KEY, "tokens_saved",
+                    sum(count_tokens(texts[position]) for position in found)
+                )
+                await pipe.execute()
+        except Exception as e:
+            logger.warning(f"Chunk embedding store lookup failed, embedding all {len(texts)} texts: {e}")
+            return {}
+        return found
+
+    async def put_many(self, texts: List[str], vectors: np.ndarray, model: str, dimensions: int) -> None:
+        """Store freshly embedded vectors under their content address"""
+        if not texts or not settings.CHUNK_EMBEDDING_STORE_ENABLED:
+            return
+        try:
+            async with RedisService() as client:
+                for start in range(0, len(texts), STORE_BATCH_SIZE):
+                    pipe = client.pipeline(transaction=False)
+                    for text, vector in zip(texts[start:start + STORE_BATCH_SIZE], vectors[start:start + STORE_BATCH_SIZE]):
+                        pipe.setex(
+                            content_address(text, model, dimensions),
+                            settings.CHUNK_EMBEDDING_STORE_TTL,
+                            base64.b64encode(np.asarray(vector, dtype="<f4").tobytes()).decode("ascii")
+                        )
+                    await pipe.execute()
+                await client.hincrby(CHUNK_EMBEDDING_STATS_KEY, "stored", len(texts))
+        except Exception as e:
+            logger.warning(f"Chunk embedding store write failed for {len(texts)} vectors: {e}")
+
+    async def get_stats(self) -> Dict[str, Any]:
+        """Lookup/hit counters and the dedup ratio since the counters were last reset"""
+        async with RedisService() as client:
+            raw = await client.hgetall(CHUNK_EMBEDDING_STATS_KEY)
+        lookups = int(raw.get("lookups", 0))
+        hits = int(raw.get("hits", 0))
+        return {
+            "enabled": settings.CHUNK_EMBEDDING_STORE_ENABLED,
+            "lookups": lookups,
+            "hits": hits,
+            "dedup_ratio": round(hits / lookups, 4) if lookups else 0.0,
+            "tokens_saved": int(raw.get("tokens_saved", 0)),
+            "stored": int(raw.get("stored", 0)),
+            "ttl_seconds": settings.CHUNK_EMBEDDING_STORE_TTL
+        }
+
+    async def reset_stats(self) -> None:
+        async with RedisService() as client:
+            await client.delete(CHUNK_EMBEDDING_STATS_KEY)
+
+
+# Global instance
+embedding_store = EmbeddingStore()
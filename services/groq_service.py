@@ -3,9 +3,11 @@ Groq service for fast AI inference
 High-performance alternative to Ollama with cost efficiency
 """
 
+import asyncio
 import logging
-from typing import Dict, Any, Optional, List
-from groq import Groq
+from typing import Dict, Any, Optional, List, AsyncIterator
+import httpx
+from groq import AsyncGroq, DefaultAsyncHttpxClient
 import time
 
 from core.config import settings
@@ -14,6 +16,69 @@ from services.prompt_service import prompt_service
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_GROQ_SETTINGS: Dict[str, Any] = {
+    "default_model": "llama-3.3-70b-versatile",  # Fallback default
+    "temperature": 0.3,
+    "max_tokens": 2048,
+    "top_p": 0.9,
+    "frequency_penalty": 0.5,
+    "presence_penalty": 0.6,
+    "creativity_mode": "balanced",
+    "response_style": "detailed",
+    "available_models": [
+        "llama-3.3-70b-versatile",
+        "llama-3.1-8b-instant", 
+        "gpt-oss-120B"
+    ]
+}
+
+# Process-wide state shared by every GroqService instance
+_async_client: Optional[AsyncGroq] = None
+_settings_cache: Dict[str, Any] = {"value": None, "expires_at": 0.0}
+_settings_lock: Optional[asyncio.Lock] = None
+
+
+def get_groq_client() -> AsyncGroq:
+    """
+    Return the process-wide AsyncGroq client
+    
+    All GroqService instances share one client so requests reuse a single
+    keep-alive connection pool instead of opening a new one per instance.
+    """
+    global _async_client
+    if _async_client is None:
+        _async_client = AsyncGroq(
+            api_key=settings.GROQ_API_KEY,
+            timeout=settings.GROQ_TIMEOUT,
+            http_client=DefaultAsyncHttpxClient(
+                limits=httpx.Limits(
+                    max_connections=settings.GROQ_MAX_CONNECTIONS,
+                    max_keepalive_connections=settings.GROQ_MAX_CONNECTIONS
+                )
+            )
+        )
+    return _async_client
+
+
+async def close_groq_client() -> None:
+    """Close the shared client's connection pool (application shutdown)"""
+    global _async_client
+    if _async_client is not None:
+        await _async_client.close()
+        _async_client = None
+
+
+def invalidate_groq_settings_cache() -> None:
+    """
+    Drop the cached admin settings so the next request reloads them
+    
+    Called by the admin Groq endpoints after settings change. Other worker
+    processes pick up the change when their GROQ_SETTINGS_CACHE_TTL expires.
+    """
+    _settings_cache["value"] = None
+    _settings_cache["expires_at"] = 0.0
+
+
 class GroqService:
     """Service class for Groq AI inference"""
     
@@ -25,57 +90,54 @@ class GroqService:
                 error_code="GROQ_CONFIG_ERROR"
             )
         
-        self.client = Groq(api_key=settings.GROQ_API_KEY)
+        self.client = get_groq_client()
         # Model bilgisi artık tamamen veritabanından çekilecek
         
         logger.info("Groq service initialized successfully")
     
-    def get_current_settings(self) -> Dict[str, Any]:
+    async def get_current_settings(self) -> Dict[str, Any]:
         """
-        Get current Groq settings directly from database
+        Get current Groq admin settings
+        
+        Settings are read from the database once and cached in-process for
+        GROQ_SETTINGS_CACHE_TTL seconds; admin updates invalidate the cache.
+        When the database read fails the defaults are cached for
+        GROQ_SETTINGS_FAILURE_CACHE_TTL seconds, so an outage does not turn
+        every request into another failing query.
         
         Returns:
             Current Groq settings dictionary
         """
-        try:
-            # Import here to avoid circular imports
-            from api.admin.groq_routes import get_groq_settings_from_db
-            import asyncio
-            
-            # Get fresh settings from database
-            if hasattr(asyncio, '_get_running_loop') and asyncio._get_running_loop() is not None:
-                # We're in an async context, create a new event loop
-                loop = asyncio.new_event_loop()
-                settings = loop.run_until_complete(get_groq_settings_from_db())
-                loop.close()
-            else:
-                # We're not in an async context
-                loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(loop)
-                settings = loop.run_until_complete(get_groq_settings_from_db())
-                loop.close()
-            
-            return settings
-            
-        except Exception as e:
-            logger.warning(f"Failed to get fresh settings from database: {str(e)}")
-            return {
-                "default_model": "llama-3.3-70b-versatile",  # Fallback default
-                "temperature": 0.3,
-                "max_tokens": 2048,
-                "top_p": 0.9,
-                "frequency_penalty": 0.5,
-                "presence_penalty": 0.6,
-                "creativity_mode": "balanced",
-                "response_style": "detailed",
-                "available_models": [
-                    "llama-3.3-70b-versatile",
-                    "llama-3.1-8b-instant", 
-                    "gpt-oss-120B"
-                ]
-            }
+        global _settings_lock
+        
+        if _settings_cache["value"] is not None and _settings_cache["expires_at"] > time.time():
+            return _settings_cache["value"]
+        
+        if _settings_lock is None:
+            _settings_lock = asyncio.Lock()
+        
+        async with _settings_lock:
+            # Another request may have refreshed the cache while we waited
+            if _settings_cache["value"] is not None and _settings_cache["expires_at"] > time.time():
+                return _settings_cache["value"]
+            
+            try:
+                # Import here to avoid circular imports
+                from api.admin.groq_routes import get_groq_settings_from_db
+                
+                current_settings = await get_groq_settings_from_db()
+                _settings_cache["value"] = current_settings
+                _settings_cache["expires_at"] = time.time() + settings.GROQ_SETTINGS_CACHE_TTL
+                return current_settings
+                
+            except Exception as e:
+                logger.warning(f"Failed to get fresh settings from database: {str(e)}")
+                fallback = dict(DEFAULT_GROQ_SETTINGS)
+                _settings_cache["value"] = fallback
+                _settings_cache["expires_at"] = time.time() + settings.GROQ_SETTINGS_FAILURE_CACHE_TTL
+                return fallback
     
-    async def generate_response(
+    async def _build_chat_request(
         self,
         query: str,
         context: str,
@@ -86,44 +148,38 @@ class GroqService:
         conversation_context: Optional[str] = None
     ) -> Dict[str, Any]:
         """
-        Generate AI response using Groq with dynamic admin settings
+        Build chat completion parameters from admin settings and the prompt template
+        
+        Shared by the blocking and streaming generation paths so both send
+        exactly the same prompt.
         
-        Args:
-            query: User's question/query
-            context: Relevant document context
-            model: Model to use (if not specified, uses admin settings)
-            max_tokens: Maximum tokens in response (if not specified, uses admin settings)
-            temperature: Response creativity (if not specified, uses admin settings)
-            
         Returns:
-            Dict with response, metadata, and performance metrics
+            Dict with "params" (kwargs for chat.completions.create) and
+            "settings_used" (for response metadata)
         """
-        start_time = time.time()
+        # Get current admin settings
+        current_settings = await self.get_current_settings()
         
-        try:
-            # Get current admin settings
-            current_settings = self.get_current_settings()
-            
-            # Use specified parameters or fall back to admin settings
-            model_name = model or current_settings.get("default_model", "llama-3.3-70b-versatile")
-            max_tokens_final = max_tokens or current_settings.get("max_tokens", 2048)
-            temperature_final = temperature if temperature is not None else current_settings.get("temperature", 0.3)
-            top_p = current_settings.get("top_p", 0.9)
-            frequency_penalty = current_settings.get("frequency_penalty", 0.5)
-            presence_penalty = current_settings.get("presence_penalty", 0.6)
-            
-            # Get dynamic system message from database
-            system_message = await prompt_service.get_system_prompt("groq_legal")
-            
-            # Construct user message based on response style
-            # Use provided response_style parameter or fall back to admin settings
-            response_style_final = response_style or current_settings.get("response_style", "detailed")
-            creativity_mode = current_settings.get("creativity_mode", "balanced")
-            
-            # Style-specific instructions (markdown rules now in database system prompt)
-            style_instructions = {
-                "concise": """Kısa ve öz bir cevap ver. Ana noktaları özetleyerek maksimum 100-150 kelimelik açıklama yap.""",
-                "detailed": """Bu soruyu kapsamlı, detaylı ve analitik şekilde cevapla. Sadece kısa cevap verme - konuyu derinlemesine açıkla, belgedeki ilgili tüm bilgileri kullan ve hukuki terimleri anlaşılır şekilde açıkla. En az 200-300 kelimelik detaylı analiz yap.
+        # Use specified parameters or fall back to admin settings
+        model_name = model or current_settings.get("default_model", "llama-3.3-70b-versatile")
+        max_tokens_final = max_tokens or current_settings.get("max_tokens", 2048)
+        temperature_final = temperature if temperature is not None else current_settings.get("temperature", 0.3)
+        top_p = current_settings.get("top_p", 0.9)
+        frequency_penalty = current_settings.get("frequency_penalty", 0.5)
+        presence_penalty = current_settings.get("presence_penalty", 0.6)
+        
+        # Get dynamic system message from database
+        system_message = await prompt_service.get_system_prompt("groq_legal")
+        
+        # Construct user message based on response style
+        # Use provided response_style parameter or fall back to admin settings
+        response_style_final = response_style or current_settings.get("response_style", "detailed")
+        creativity_mode = current_settings.get("creativity_mode", "balanced")
+        
+        # Style-specific instructions (markdown rules now in database system prompt)
+        style_instructions = {
+            "concise": """Kısa ve öz bir cevap ver. Ana noktaları özetleyerek maksimum 100-150 kelimelik açıklama yap.""",
+            "detailed": """Bu soruyu kapsamlı, detaylı ve analitik şekilde cevapla. Sadece kısa cevap verme - konuyu derinlemesine açıkla, belgedeki ilgili tüm bilgileri kullan ve hukuki terimleri anlaşılır şekilde açıkla. En az 200-300 kelimelik detaylı analiz yap.
 
 YAPISAL ORGANİZASYON (bu başlıkları EMOJİ ile kullan):
 
@@ -144,7 +200,7 @@ YAPISAL ORGANİZASYON (bu başlıkları EMOJİ ile kullan):
 
 ## ✅ Önemli Noktalar
 (dikkat edilmesi gerekenler - vurgu kutuları kullan: ⚠️ Dikkat, 💡 İpucu)""",
-                "analytical": """Bu soruyu analitik bir yaklaşımla cevapla. Konuyu sistematik olarak incele, farklı boyutlarını ele al ve hukuki çerçevede değerlendir. Sebep-sonuç ilişkilerini açıkla.
+            "analytical": """Bu soruyu analitik bir yaklaşımla cevapla. Konuyu sistematik olarak incele, farklı boyutlarını ele al ve hukuki çerçevede değerlendir. Sebep-sonuç ilişkilerini açıkla.
 
 YAPISAL ORGANİZASYON (bu başlıkları EMOJİ ile kullan):
 
@@ -160,90 +216,220 @@ YAPISAL ORGANİZASYON (bu başlıkları EMOJİ ile kullan):
 
 ## 💡 Sonuç ve Öneriler
 (genel değerlendirme ve öneriler - vurgu kutuları kullan)""",
-                "conversational": """Bu soruyu sohbet tarzında, anlaşılır ve samimi bir dille cevapla. Karmaşık terimleri basit örneklerle açıkla ve kullanıcıyla diyalog kuruyormuş gibi yaz."""
-            }
-            
-            style_instruction = style_instructions.get(response_style_final, style_instructions["detailed"])
-            
-            # Construct user message with context
-            conversation_section = ""
-            if conversation_context and conversation_context.strip():
-                conversation_section = f"""ÖNCEKİ KONUŞMALAR (yalnızca bağlam için, bilgi kaynağı değildir):
+            "conversational": """Bu soruyu sohbet tarzında, anlaşılır ve samimi bir dille cevapla. Karmaşık terimleri basit örneklerle açıkla ve kullanıcıyla diyalog kuruyormuş gibi yaz."""
+        }
+        
+        style_instruction = style_instructions.get(response_style_final, style_instructions["detailed"])
+        
+        # Construct user message with context
+        conversation_section = ""
+        if conversation_context and conversation_context.strip():
+            conversation_section = f"""ÖNCEKİ KONUŞMALAR (yalnızca bağlam için, bilgi kaynağı değildir):
 {conversation_context}
 
 """
 
-            if not context or context.strip() == "":
-                user_message = f"""{conversation_section}BELGE İÇERİĞİ: [BOŞ]
+        if not context or context.strip() == "":
+            user_message = f"""{conversation_section}BELGE İÇERİĞİ: [BOŞ]
 
 SORU: {query}
 
 {style_instruction}"""
-            else:
-                user_message = f"""{conversation_section}BELGE İÇERİĞİ:
+        else:
+            user_message = f"""{conversation_section}BELGE İÇERİĞİ:
 {context}
 
 SORU: {query}
 
 {style_instruction}"""
-            
-            # Call Groq API with dynamic admin settings
-            response = self.client.chat.completions.create(
-                model=model_name,
-                messages=[
+        
+        return {
+            "params": {
+                "model": model_name,
+                "messages": [
                     {"role": "system", "content": system_message},
                     {"role": "user", "content": user_message}
                 ],
-                max_tokens=max_tokens_final,
-                temperature=temperature_final,
-                top_p=top_p,
-                frequency_penalty=frequency_penalty,
-                presence_penalty=presence_penalty,
-                stream=False
-            )
+                "max_tokens": max_tokens_final,
+                "temperature": temperature_final,
+                "top_p": top_p,
+                "frequency_penalty": frequency_penalty,
+                "presence_penalty": presence_penalty
+            },
+            "settings_used": {
+                "model": model_name,
+                "temperature": temperature_final,
+                "max_tokens": max_tokens_final,
+                "top_p": top_p,
+                "frequency_penalty": frequency_penalty,
+                "presence_penalty": presence_penalty,
+                "response_style": response_style,
+                "creativity_mode": creativity_mode
+            }
+        }
+    
+    def _build_result(
+        self,
+        ai_response: str,
+        context: str,
+        settings_used: Dict[str, Any],
+        start_time: float,
+        usage: Any = None
+    ) -> Dict[str, Any]:
+        """Post-process generated text and assemble the response dictionary"""
+        ai_response = (ai_response or "").strip()
+        
+        # Post-process to remove repetitive patterns
+        ai_response = self._clean_repetitive_text(ai_response)
+        
+        # Calculate processing time
+        processing_time = round(time.time() - start_time, 2)
+        
+        # Calculate confidence based on response characteristics
+        confidence_score = self._calculate_confidence(ai_response, context)
+        
+        prompt_tokens = getattr(usage, "prompt_tokens", 0) if usage else 0
+        completion_tokens = getattr(usage, "completion_tokens", 0) if usage else 0
+        total_tokens = getattr(usage, "total_tokens", 0) if usage else 0
+        
+        logger.info(f"Groq response generated in {processing_time}s (model: {settings_used['model']}, style: {settings_used['response_style']}, creativity: {settings_used['creativity_mode']})")
+        
+        return {
+            "answer": ai_response,  # Match expected field name
+            "response": ai_response,
+            "model_used": settings_used["model"],
+            "processing_time": processing_time,
+            "generation_time_ms": int(processing_time * 1000),  # Add missing field
+            "confidence_score": confidence_score,
+            "prompt_tokens": prompt_tokens,
+            "response_tokens": completion_tokens,
+            "token_usage": {
+                "completion_tokens": completion_tokens,
+                "prompt_tokens": prompt_tokens,
+                "total_tokens": total_tokens
+            },
+            "settings_used": settings_used
+        }
+    
+    async def generate_response(
+        self,
+        query: str,
+        context: str,
+        model: Optional[str] = None,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        response_style: Optional[str] = None,
+        conversation_context: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Generate AI response using Groq with dynamic admin settings
+        
+        Args:
+            query: User's question/query
+            context: Relevant document context
+            model: Model to use (if not specified, uses admin settings)
+            max_tokens: Maximum tokens in response (if not specified, uses admin settings)
+            temperature: Response creativity (if not specified, uses admin settings)
             
-            # Extract response and clean repetitions
-            ai_response = response.choices[0].message.content
-            if ai_response:
-                ai_response = ai_response.strip()
-            else:
-                ai_response = ""
+        Returns:
+            Dict with response, metadata, and performance metrics
+        """
+        start_time = time.time()
+        
+        try:
+            request = await self._build_chat_request(
+                query=query,
+                context=context,
+                model=model,
+                max_tokens=max_tokens,
+                temperature=temperature,
+                response_style=response_style,
+                conversation_context=conversation_context
+            )
             
-            # Post-process to remove repetitive patterns
-            ai_response = self._clean_repetitive_text(ai_response)
+            # Call Groq API with dynamic admin settings
+            response = await self.client.chat.completions.create(
+                **request["params"],
+                stream=False
+            )
             
-            # Calculate processing time
-            processing_time = round(time.time() - start_time, 2)
+            return self._build_result(
+                ai_response=response.choices[0].message.content,
+                context=context,
+                settings_used=request["settings_used"],
+                start_time=start_time,
+                usage=response.usage
+            )
             
-            # Calculate confidence based on response characteristics
-            confidence_score = self._calculate_confidence(ai_response, context)
+        except Exception as e:
+            error_msg = f"Groq API error: {str(e)}"
+            logger.error(error_msg)
+            raise AppException(
+                message="AI response generation failed",
+                detail=error_msg,
+                error_code="GROQ_GENERATION_FAILED"
+            )
+    
+    async def generate_response_stream(
+        self,
+        query: str,
+        context: str,
+        model: Optional[str] = None,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        response_style: Optional[str] = None,
+        conversation_context: Optional[str] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Stream an AI response from Groq token by token
+        
+        Yields {"type": "token", "text": ...} for every content delta and a
+        final {"type": "result", "result": ...} with the same dictionary
+        generate_response returns (cleaned answer, confidence, token usage).
+        
+        Raises:
+            AppException: If the Groq request fails
+        """
+        start_time = time.time()
+        
+        try:
+            request = await self._build_chat_request(
+                query=query,
+                context=context,
+                model=model,
+                max_tokens=max_tokens,
+                temperature=temperature,
+                response_style=response_style,
+                conversation_context=conversation_context
+            )
             
-            logger.info(f"Groq response generated in {processing_time}s (model: {model_name}, style: {response_style}, creativity: {creativity_mode})")
+            stream = await self.client.chat.completions.create(
+                **request["params"],
+                stream=True
+            )
             
-            return {
-                "answer": ai_response,  # Match expected field name
-                "response": ai_response,
-                "model_used": model_name,
-                "processing_time": processing_time,
-                "generation_time_ms": int(processing_time * 1000),  # Add missing field
-                "confidence_score": confidence_score,
-                "prompt_tokens": response.usage.prompt_tokens if response.usage else 0,
-                "response_tokens": response.usage.completion_tokens if response.usage else 0,
-                "token_usage": {
-                    "completion_tokens": response.usage.completion_tokens if response.usage else 0,
-                    "prompt_tokens": response.usage.prompt_tokens if response.usage else 0,
-                    "total_tokens": response.usage.total_tokens if response.usage else 0
-                },
-                "settings_used": {
-                    "model": model_name,
-                    "temperature": temperature_final,
-                    "max_tokens": max_tokens_final,
-                    "top_p": top_p,
-                    "frequency_penalty": frequency_penalty,
-                    "presence_penalty": presence_penalty,
-                    "response_style": response_style,
-                    "creativity_mode": creativity_mode
-                }
+            parts = []
+            usage = None
+            async for chunk in stream:
+                if chunk.choices:
+                    delta = chunk.choices[0].delta.content
+                    if delta:
+                        parts.append(delta)
+                        yield {"type": "token", "text": delta}
+                # Groq reports usage on the last chunk under x_groq
+                x_groq = getattr(chunk, "x_groq", None)
+                if x_groq is not None and getattr(x_groq, "usage", None):
+                    usage = x_groq.usage
+            
+            yield {
+                "type": "result",
+                "result": self._build_result(
+                    ai_response="".join(parts),
+                    context=context,
+                    settings_used=request["settings_used"],
+                    start_time=start_time,
+                    usage=usage
+                )
             }
             
         except Exception as e:
@@ -364,11 +550,11 @@ SORU: {query}
         """
         try:
             # Get current model from settings
-            current_settings = self.get_current_settings()
+            current_settings = await self.get_current_settings()
             model_name = current_settings.get("default_model", "llama-3.3-70b-versatile")
             
             # Simple test request
-            test_response = self.client.chat.completions.create(
+            test_response = await self.client.chat.completions.create(
                 model=model_name,
                 messages=[{"role": "user", "content": "Test"}],
                 max_tokens=10,
@@ -390,7 +576,7 @@ SORU: {query}
                 "available": False
             }
     
-    def get_available_models(self) -> List[str]:
+    async def get_available_models(self) -> List[str]:
         """
         Get list of available Groq models from database
         
@@ -399,7 +585,7 @@ SORU: {query}
         """
         try:
             # Get model list from admin settings
-            current_settings = self.get_current_settings()
+            current_settings = await self.get_current_settings()
             models_from_db = current_settings.get("available_models", [])
             
             # If we got models from database, return them
@@ -0,0 +1,263 @@
+"""
+Distributed OpenAI rate limiter
+Token buckets for requests-per-minute and tokens-per-minute in Redis, shared by
+the API process and every Celery worker, so concurrent ingestion jobs spend one
+quota together instead of each running into 429s on its own
+"""
+
+import time
+import random
+import asyncio
+import logging
+from typing import Dict, Any, Optional, Mapping
+
+from core.config import settings
+from services.redis_service import RedisService
+
+logger = logging.getLogger(__name__)
+
+OPENAI_RATE_LIMIT_PREFIX = "openai_ratelimit"
+
+PRIORITIES = ("interactive", "batch")
+
+# Longest single sleep between acquire attempts; shorter than most waits so a
+# pause lifted early (new headers, config change) is picked up quickly
+MAX_POLL_SECONDS = 2.0
+
+# Two buckets (requests, tokens) refilled continuously at capacity per minute.
+# Batch callers must leave reserve * capacity in each bucket, interactive
+# callers may drain it, so live queries always find room. Both buckets are
+# debited together or not at all.
+# KEYS[1]: requests bucket; KEYS[2]: tokens bucket; KEYS[3]: pause-until key
+# ARGV[1]: tokens wanted; ARGV[2]: default requests/min; ARGV[3]: default
+# tokens/min; ARGV[4]: reserved share of each bucket for this caller
+# Returns 0 when acquired, otherwise milliseconds to wait
+ACQUIRE_LUA = """
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+local paused_until = tonumber(redis.call('GET', KEYS[3]) or '0')
+if paused_until > now then
+    return math.ceil((paused_until - now) * 1000)
+end
+
+local wants = {1, tonumber(ARGV[1])}
+local defaults = {tonumber(ARGV[2]), tonumber(ARGV[3])}
+local reserve = tonumber(ARGV[4])
+local capacities, levels = {}, {}
+local wait = 0
+
+for i = 1, 2 do
+    local state = redis.call('HMGET', KEYS[i], 'capacity', 'level', 'ts')
+    local capacity = tonumber(state[1]) or defaults[i]
+    local level = tonumber(state[2]) or capacity
+    local ts = tonumber(state[3]) or now
+    level = math.min(capacity, level + math.max(0, now - ts) * capacity / 60)
+    -- An oversized request waits for a full bucket instead of forever
+    local want = math.min(wants[i], capacity * (1 - reserve))
+    local floor = capacity * reserve
+    if level - want < floor then
+        wait = math.max(wait, math.ceil((want + floor - level) * 60000 / capacity))
+    end
+    capacities[i], levels[i], wants[i] = capacity, level, want
+end
+
+for i = 1, 2 do
+    local level = levels[i]
+    if wait == 0 then
+        level = level - wants[i]
+    end
+    redis.call('HSET', KEYS[i], 'capacity', capacities[i], 'level', level, 'ts', now)
+    redis.call('EXPIRE', KEYS[i], 3600)
+end
+
+return wait
+"""
+
+# Align the buckets with what OpenAI reports: capacity from x-ratelimit-limit-*,
+# level lowered to x-ratelimit-remaining-* when the server has seen more usage
+# (other clients on the same key, requests sent while Redis was unreachable)
+# KEYS[1]: requests bucket; KEYS[2]: tokens bucket
+# ARGV[1], ARGV[2]: request limit, remaining; ARGV[3], ARGV[4]: token limit,
+# remaining ('' when the header was missing)
+OBSERVE_LUA = """
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+
+for i = 1, 2 do
+    local limit = tonumber(ARGV[2 * i - 1])
+    local remaining = tonumber(ARGV[2 * i])
+    local state = redis.call('HMGET', KEYS[i], 'capacity', 'level', 'ts')
+    local capacity = limit or tonumber(state[1])
+    if capacity then
+        local level = tonumber(state[2]) or capacity
+        local ts = tonumber(state[3]) or now
+        level = math.min(capacity, level + math.max(0, now - ts) * capacity / 60)
+        if remaining and remaining < level then
+            level = math.max(0, remaining)
+        end
+        redis.call('HSET', KEYS[i], 'capacity', capacity, 'level', level, 'ts', now)
+        redis.call('EXPIRE', KEYS[i], 3600)
+    end
+end
+
+return 1
+"""
+
+# Stop every caller until now + ARGV[1] seconds (never shortens a longer pause)
+PAUSE_LUA = """
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+local seconds = tonumber(ARGV[1])
+local current = tonumber(redis.call('GET', KEYS[1]) or '0')
+if now + seconds > current then
+    redis.call('SET', KEYS[1], now + seconds, 'PX', math.ceil(seconds * 1000))
+end
+return 1
+"""
+
+
+def _header_number(headers: Mapping[str, str], name: str) -> Optional[float]:
+    value = headers.get(name)
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def retry_after_seconds(headers: Optional[Mapping[str, str]], default: float = 1.0) -> float:
+    """Wait requested by a 429 response (retry-after-ms, then retry-after)"""
+    if headers is not None:
+        retry_after_ms = _header_number(headers, "retry-after-ms")
+        if retry_after_ms is not None:
+            return max(retry_after_ms / 1000, 0.0)
+        retry_after = _header_number(headers, "retry-after")
+        if retry_after is not None:
+            return max(retry_after, 0.0)
+    return default
+
+
+class OpenAIRateLimiter:
+    """
+    Shared RPM/TPM scheduler for one OpenAI model
+
+    Callers acquire before every request with the tokens it will spend and
+    report the response headers afterwards. Redis errors never block a
+    request: the limiter fails open and the batcher's retries take over.
+    """
+
+    def __init__(self, model: Optional[str] = None):
+        self.model = model or settings.OPENAI_EMBEDDING_MODEL
+        prefix = f"{OPENAI_RATE_LIMIT_PREFIX}:{self.model}"
+        self.keys = [f"{prefix}:requests", f"{prefix}:tokens"]
+        self.pause_key = f"{prefix}:paused_until"
+
+    async def acquire(self, tokens: int, priority: str = "batch") -> float:
+        """
+        Wait until the shared quota has room for one request of `tokens`
+
+        Args:
+            tokens: Input tokens the request will spend
+            priority: "interactive" (live queries) may use the reserved share
+                of each bucket and gives up waiting after
+                OPENAI_RATE_LIMIT_MAX_INTERACTIVE_WAIT seconds; "batch"
+                (ingestion) leaves the reserve alone and waits as long as needed
+
+        Returns:
+            Seconds spent waiting
+        """
+        if priority not in PRIORITIES:
+            raise ValueError(f"Unknown rate limit priority: {priority}")
+        if not settings.OPENAI_RATE_LIMIT_ENABLED:
+            return 0.0
+
+        headroom = settings.OPENAI_RATE_LIMIT_HEADROOM
+        reserve = 0.0 if priority == "interactive" else settings.OPENAI_RATE_LIMIT_INTERACTIVE_RESERVE
+        start = time.perf_counter()
+        while True:
+            try:
+                async with RedisService() as client:
+                    script = client.register_script(ACQUIRE_LUA)
+                    wait_ms = int(await script(
+                        keys=[*self.keys, self.pause_key],
+                        args=[
+                            max(int(tokens), 1),
+                            settings.OPENAI_EMBEDDING_RPM * headroom,
+                            settings.OPENAI_EMBEDDING_TPM * headroom,
+                            reserve
+                        ]
+                    ))
+            except Exception as e:
+                logger.warning(f"OpenAI rate limiter unavailable, sending request unthrottled: {e}")
+                return time.perf_counter() - start
+
+            waited = time.perf_counter() - start
+            if wait_ms <= 0:
+                if waited > 1:
+                    logger.info(f"{priority.capitalize()} embedding request of {tokens} tokens waited {waited:.1f}s for quota")
+                return waited
+            if priority == "interactive" and waited >= settings.OPENAI_RATE_LIMIT_MAX_INTERACTIVE_WAIT:
+                # Better a possible 429 than a hanging /ask
+                logger.warning(f"Interactive embedding request sent without quota after {waited:.1f}s")
+                return waited
+
+            await asyncio.sleep(min(wait_ms / 1000, MAX_POLL_SECONDS) * random.uniform(1.0, 1.2))
+
+    async def observe(self, headers: Optional[Mapping[str, str]]) -> None:
+        """Adapt both buckets to the x-ratelimit-* headers of a response"""
+        if headers is None or not settings.OPENAI_RATE_LIMIT_ENABLED:
+            return
+
+        headroom = settings.OPENAI_RATE_LIMIT_HEADROOM
+        args = []
+        for kind in ("requests", "tokens"):
+            limit = _header_number(headers, f"x-ratelimit-limit-{kind}")
+            remaining = _header_number(headers, f"x-ratelimit-remaining-{kind}")
+            if limit is not None and limit <= 0:
+                limit = None
+            # The headroom share of the limit is never handed out, so it is not "remaining" either
+            if limit is not None and remaining is not None:
+                remaining -= limit * (1 - headroom)
+            args.extend([
+                "" if limit is None else limit * headroom,
+                "" if remaining is None else remaining
+            ])
+        if all(arg == "" for arg in args):
+            return
+
+        try:
+            async with RedisService() as client:
+                script = client.register_script(OBSERVE_LUA)
+                await script(keys=self.keys, args=args)
+        except Exception as e:
+            logger.warning(f"Could not record OpenAI rate limit headers: {e}")
+
+    async def pause(self, seconds: float) -> None:
+        """Hold every caller back after a 429 (retry-after from the response)"""
+        if seconds <= 0 or not settings.OPENAI_RATE_LIMIT_ENABLED:
+            return
+        try:
+            async with RedisService() as client:
+                script = client.register_script(PAUSE_LUA)
+                await script(keys=[self.pause_key], args=[seconds])
+            logger.warning(f"OpenAI rate limited, pausing {self.model} requests for {seconds:.1f}s")
+        except Exception as e:
+            logger.warning(f"Could not record OpenAI rate limit pause: {e}")
+
+    async def get_state(self) -> Dict[str, Any]:
+        """Current bucket contents (for monitoring)"""
+        async with RedisService() as client:
+            requests_bucket = await client.hgetall(self.keys[0])
+            tokens_bucket = await client.hgetall(self.keys[1])
+            paused_until = await client.get(self.pause_key)
+        return {
+            "model": self.model,
+            "requests": requests_bucket,
+            "tokens": tokens_bucket,
+            "paused_until": float(paused_until) if paused_until else None
+        }
+
+
+# Global instance
+openai_rate_limiter = OpenAIRateLimiter()
@@ -73,9 +73,10 @@ class ProgressService:
         completed_steps: int,
         total_steps: Optional[int] = None,
         status: str = "processing",
-        error_message: Optional[str] = None
+        error_message: Optional[str] = None,
+        details: Optional[Dict[str, Any]] = None
     ) -> None:
-        """Update task progress"""
+        """Update task progress (details are merged into the stored "details" dict)"""
         try:
             key = f"{self.progress_key_prefix}{task_id}"
             async with RedisService() as client:
@@ -96,6 +97,9 @@ class ProgressService:
                 if total_steps:
                     progress_data["total_steps"] = total_steps
                 
+                if details:
+                    progress_data["details"] = {**progress_data.get("details", {}), **details}
+                
                 if error_message:
                     progress_data["error_message"] = error_message
                     progress_data["status"] = "failed"
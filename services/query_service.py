@@ -4,21 +4,20 @@ Handles the complete flow from user query to AI response
 """
 
 import time
+import asyncio
 import logging
 import re
-from typing import Dict, List, Any, Optional, Literal
+from typing import Dict, List, Any, Optional, Literal, AsyncIterator, Tuple
 from sqlalchemy.ext.asyncio import AsyncSession
 import openai
-from openai import AsyncOpenAI
 
-from services.embedding_service import EmbeddingService
 from services.search_service import SearchService
 from services.llm_service import ollama_service
-from services.groq_service import GroqService
-from services.redis_service import RedisService
-from services.reliability_service import ReliabilityService
-from services.source_enhancement_service import SourceEnhancementService
+from services.redis_service import RedisService, get_cache_generation
 from services.search_history_service import SearchHistoryService
+from services.semantic_cache_service import semantic_cache_service
+from services.catalog_service import catalog_service
+from services.service_container import service_container
 from services.credit_service import credit_service
 from core.supabase_client import supabase_client
 from utils.exceptions import AppException
@@ -69,23 +68,29 @@ class QueryService:
     
     def __init__(self, db: AsyncSession):
         self.db = db
-        self.embedding_service = EmbeddingService(db)
-        self.search_service = SearchService(db)
-        self.reliability_service = ReliabilityService()
-        self.source_enhancement_service = SourceEnhancementService()
+        # Clients and stateless services are process-wide; only DB-bound services are per request
+        self.embedding_service = service_container.embedding_service
+        self.search_service = SearchService(
+            db,
+            embedding_service=service_container.embedding_service,
+            openai_client=service_container.openai_client
+        )
+        self.reliability_service = service_container.reliability_service
+        self.source_enhancement_service = service_container.source_enhancement_service
         self.search_history_service = SearchHistoryService(db)
         self.redis_service = RedisService()  # Add redis_service instance
         
         # Initialize AI provider based on configuration
-        if settings.AI_PROVIDER == "groq" and settings.GROQ_API_KEY:
-            self.ai_service = GroqService()
+        groq_service = service_container.groq_service
+        if groq_service is not None:
+            self.ai_service = groq_service
             self.ai_provider = "groq"
         else:
             self.ai_service = ollama_service
             self.ai_provider = "ollama"
         
-        # Initialize OpenAI client for fallback
-        self.openai_client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY) if settings.OPENAI_API_KEY else None
+        # Shared OpenAI client for fallback
+        self.openai_client = service_container.async_openai_client
     
     def classify_query_intent(self, query: str) -> QueryIntent:
         """
@@ -232,7 +237,12 @@ class QueryService:
             from services.credit_service import credit_service
             return credit_service.calculate_credit_cost(query)
     
-    async def handle_general_conversation(self, query: str, user_id: str) -> Dict[str, Any]:
+    async def handle_general_conversation(
+        self,
+        query: str,
+        user_id: str,
+        rate_limit_remaining: Optional[int] = None
+    ) -> Dict[str, Any]:
         """
         Handle general conversation queries with simple responses
         
@@ -315,7 +325,7 @@ class QueryService:
                     "reliability_time_ms": 0,
                     "total_pipeline_time_ms": processing_time,
                     "cache_used": False,
-                    "rate_limit_remaining": 30,
+                    "rate_limit_remaining": rate_limit_remaining,
                     "low_confidence": False,
                     "confidence_threshold": 0.0,
                     "credits_used": 1  # Fixed 1 credit for general conversation
@@ -349,7 +359,7 @@ class QueryService:
                     "reliability_time_ms": 0,
                     "total_pipeline_time_ms": 0,
                     "cache_used": False,
-                    "rate_limit_remaining": 30,
+                    "rate_limit_remaining": rate_limit_remaining,
                     "low_confidence": False,
                     "confidence_threshold": 0.0,
                     "credits_used": 1
@@ -361,7 +371,12 @@ class QueryService:
                 }
             }
     
-    async def handle_ambiguous_query(self, query: str, user_id: str) -> Dict[str, Any]:
+    async def handle_ambiguous_query(
+        self,
+        query: str,
+        user_id: str,
+        rate_limit_remaining: Optional[int] = None
+    ) -> Dict[str, Any]:
         """
         Handle ambiguous queries with clarifying questions
         
@@ -453,7 +468,7 @@ class QueryService:
                     "reliability_time_ms": 0,
                     "total_pipeline_time_ms": processing_time,
                     "cache_used": False,
-                    "rate_limit_remaining": 30,
+                    "rate_limit_remaining": rate_limit_remaining,
                     "low_confidence": False,
                     "confidence_threshold": 0.0,
                     "credits_used": 1,  # Fixed 1 credit for clarification
@@ -489,7 +504,7 @@ class QueryService:
                     "reliability_time_ms": 0,
                     "total_pipeline_time_ms": 0,
                     "cache_used": False,
-                    "rate_limit_remaining": 30,
+                    "rate_limit_remaining": rate_limit_remaining,
                     "low_confidence": False,
                     "confidence_threshold": 0.0,
                     "credits_used": 1,
@@ -513,7 +528,10 @@ class QueryService:
         use_cache: bool = True,
         intent: Optional[QueryIntent] = None,
         response_style: Optional[str] = None,
-        conversation_id: Optional[str] = None
+        conversation_id: Optional[str] = None,
+        rate_limit_remaining: Optional[int] = None,
+        corpora: Optional[List[str]] = None,
+        retrieval_mode: Optional[str] = None
     ) -> Dict[str, Any]:
         """
         Process complete ask query pipeline
@@ -525,6 +543,8 @@ class QueryService:
             limit: Max search results
             similarity_threshold: Min similarity for search
             use_cache: Whether to use Redis cache
+            corpora: Corpora to retrieve from (defaults to ASK_DEFAULT_CORPORA)
+            retrieval_mode: "vector" or "hybrid" (defaults to ASK_DEFAULT_RETRIEVAL_MODE)
             
         Returns:
             Complete response with answer, sources, and metadata
@@ -545,238 +565,627 @@ class QueryService:
             # Route to appropriate handler based on intent
             if query_intent == "general_conversation":
                 logger.info("🗣️ Routing to general conversation handler")
-                return await self.handle_general_conversation(query, user_id)
+                return await self.handle_general_conversation(query, user_id, rate_limit_remaining)
             
             elif query_intent == "ambiguous":
                 logger.info("❓ Routing to ambiguous query handler")
-                return await self.handle_ambiguous_query(query, user_id)
+                return await self.handle_ambiguous_query(query, user_id, rate_limit_remaining)
             
             # If we reach here, it's a legal_question - continue with full RAG pipeline
             logger.info("⚖️ Routing to legal question handler (full RAG pipeline)")
             
-            # 1. Rate limiting check
-            is_allowed, remaining = await self.redis_service.check_rate_limit(
-                user_id=user_id,
-                endpoint="ask",
-                limit=30,  # 30 requests per minute
-                window=60
-            )
-            
-            if not is_allowed:
-                raise AppException(
-                    message="Rate limit exceeded",
-                    detail="You have exceeded the maximum number of requests per minute",
-                    status_code=429,
-                    error_code="RATE_LIMIT_EXCEEDED"
+            stage_timings: Dict[str, int] = {}
+            # Conversation history is only needed for generation; load it while retrieval runs
+            conversation_task = self._start_conversation_context(conversation_id, user_id, stage_timings)
+            try:
+                retrieval = await self._retrieve_for_ask(
+                    query=query,
+                    user_id=user_id,
+                    institution_filter=institution_filter,
+                    limit=limit,
+                    similarity_threshold=similarity_threshold,
+                    use_cache=use_cache,
+                    response_style=response_style,
+                    conversation_id=conversation_id,
+                    rate_limit_remaining=rate_limit_remaining,
+                    stage_timings=stage_timings,
+                    corpora=corpora,
+                    retrieval_mode=retrieval_mode
+                )
+                
+                if retrieval["semantic_hit"]:
+                    return await self._build_semantic_cache_response(
+                        query=query,
+                        user_id=user_id,
+                        institution_filter=institution_filter,
+                        cached=retrieval["semantic_hit"],
+                        pipeline_start=pipeline_start,
+                        embedding_time=retrieval["embedding_time"],
+                        embedding_cache_hit=retrieval["embedding_cache_hit"],
+                        rate_limit_remaining=retrieval["rate_limit_remaining"],
+                        stage_timings=stage_timings
+                    )
+                
+                # 5. Generate AI response using configured provider
+                ai_start = time.time()
+                llm_response = await self._generate_llm_response(
+                    query=query,
+                    search_results=retrieval["search_results"],
+                    institution_filter=institution_filter,
+                    response_style=response_style,
+                    conversation_task=conversation_task
                 )
+                ai_time = int((time.time() - ai_start) * 1000)
+                stage_timings["generation"] = ai_time
+                
+                return await self._finalize_ask_response(
+                    query=query,
+                    user_id=user_id,
+                    institution_filter=institution_filter,
+                    response_style=response_style,
+                    use_cache=use_cache,
+                    retrieval=retrieval,
+                    llm_response=llm_response,
+                    ai_time=ai_time,
+                    pipeline_start=pipeline_start
+                )
+            finally:
+                self._cancel_conversation_context(conversation_task)
             
-            # 2. Check cache for similar query
-            search_filters = {"institution": institution_filter} if institution_filter else None
-            cached_results = None
+        except AppException:
+            raise
+        except Exception as e:
+            logger.error(f"Failed to process ask query: {e}")
+            raise AppException(
+                message="Failed to process query",
+                detail=str(e),
+                error_code="QUERY_PROCESSING_FAILED"
+            )
+    
+    async def process_ask_query_stream(
+        self,
+        query: str,
+        user_id: str,
+        institution_filter: Optional[str] = None,
+        limit: int = 10,
+        similarity_threshold: float = 0.5,
+        use_cache: bool = True,
+        intent: Optional[QueryIntent] = None,
+        response_style: Optional[str] = None,
+        conversation_id: Optional[str] = None,
+        rate_limit_remaining: Optional[int] = None,
+        corpora: Optional[List[str]] = None,
+        retrieval_mode: Optional[str] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Streaming variant of process_ask_query
+        
+        Yields events in order:
+            {"event": "sources", "data": {...}}  as soon as retrieval completes
+            {"event": "token", "data": {"text": ...}}  for each answer delta
+            {"event": "done", "data": {...}}  the same dict process_ask_query returns
+        
+        The "sources" event carries the retrieved sources before confidence
+        filtering; the "done" payload is authoritative (low-confidence answers
+        come back with an empty source list and a warning prefix).
+        """
+        try:
+            pipeline_start = time.time()
+            query_intent = intent or self.classify_query_intent(query)
             
-            if use_cache:
-                cached_results = await self.redis_service.get_cached_search_results(
+            if query_intent != "legal_question":
+                # Template answers are instant, nothing to stream
+                result = await self.process_ask_query(
                     query=query,
-                    filters=search_filters or {},
+                    user_id=user_id,
+                    institution_filter=institution_filter,
                     limit=limit,
-                    similarity_threshold=similarity_threshold
+                    similarity_threshold=similarity_threshold,
+                    use_cache=use_cache,
+                    intent=query_intent,
+                    response_style=response_style,
+                    conversation_id=conversation_id,
+                    rate_limit_remaining=rate_limit_remaining
                 )
+                yield {"event": "sources", "data": {"sources": [], "total_chunks_found": 0}}
+                yield {"event": "token", "data": {"text": result.get("answer", "")}}
+                yield {"event": "done", "data": result}
+                return
             
-            # 3. Generate embedding (with cache)
-            embedding_start = time.time()
-            query_embedding = None
-            
-            if use_cache:
-                query_embedding = await self.redis_service.get_cached_embedding(query)
-            
-            if not query_embedding:
-                query_embedding = await self.embedding_service.generate_embedding(query)
-                if use_cache:
-                    await self.redis_service.cache_embedding(query, query_embedding)
-            
-            embedding_time = int((time.time() - embedding_start) * 1000)
-            
-            # 4. Perform search (use cache if available)
-            search_start = time.time()
-            
-            if cached_results:
-                search_results = cached_results
-                logger.info(f"Using cached search results for: {query[:50]}")
-                # IMPORTANT: Cached results also need enhancement for PDF URLs
-                logger.info(f"🔄 Cached results found, but will still enhance for PDF URLs")
-            else:
-                # Pre-filter documents by institution for optimization
-                document_ids_filter = None
-                if institution_filter:
-                    logger.info(f"Starting institution pre-filtering for: '{institution_filter}'")
-                    await self._update_institutions_cache()
-                    try:
-                        document_ids_filter = await self._get_documents_by_institution(institution_filter)
-                        if document_ids_filter:
-                            logger.info(f"OPTIMIZATION: Pre-filtering to {len(document_ids_filter)} documents for institution: '{institution_filter}'")
-                        else:
-                            logger.warning(f"No documents found for institution: '{institution_filter}' - continuing without filter")
-                            document_ids_filter = None
-                    except Exception as e:
-                        logger.error(f"Pre-filtering failed: {e}")
-                        document_ids_filter = None
-                
-                logger.info(f"🔍 Calling semantic_search with limit={limit}")
-                search_results = await self.search_service.semantic_search(
+            stage_timings: Dict[str, int] = {}
+            conversation_task = self._start_conversation_context(conversation_id, user_id, stage_timings)
+            try:
+                retrieval = await self._retrieve_for_ask(
                     query=query,
+                    user_id=user_id,
+                    institution_filter=institution_filter,
                     limit=limit,
                     similarity_threshold=similarity_threshold,
-                    category_filter=None,
-                    date_filter=None,
-                    document_ids_filter=document_ids_filter  # Pass pre-filtered document IDs
+                    use_cache=use_cache,
+                    response_style=response_style,
+                    conversation_id=conversation_id,
+                    rate_limit_remaining=rate_limit_remaining,
+                    stage_timings=stage_timings,
+                    corpora=corpora,
+                    retrieval_mode=retrieval_mode
                 )
                 
-                # Cache search results
-                if use_cache and search_results:
-                    await self.redis_service.cache_search_results(
+                if retrieval["semantic_hit"]:
+                    result = await self._build_semantic_cache_response(
                         query=query,
-                        results=search_results,
-                        filters=search_filters or {},
-                        limit=limit,
-                        similarity_threshold=similarity_threshold,
-                        ttl=1800  # 30 minutes
-                    )
-            
-            search_time = int((time.time() - search_start) * 1000)
-            
-            # 4.5. Enhance search results with source information  
-            logger.info(f"Total search results before enhancement: {len(search_results) if search_results else 0}")
-            
-            if search_results:
-                try:
-                    logger.info(f"🔧 About to enhance {len(search_results)} search results")
-                    search_results = self.source_enhancement_service.enhance_search_results(search_results)
-                    logger.info(f"✅ Enhanced {len(search_results)} search results with source information")
-                except Exception as e:
-                    logger.error(f"Enhancement service failed: {e}")
-                    import traceback
-                    logger.error(f"Enhancement traceback: {traceback.format_exc()}")
-                    # Continue with unenhanced results
-            
-            # 5. Generate AI response using configured provider
-            ai_start = time.time()
-            
-            if self.ai_provider == "groq":
-                # Use Groq service for fast inference with OpenAI fallback
-                context_text = self._prepare_context_for_groq(search_results)
-                conversation_context = ""
-                if conversation_id:
-                    conversation_context = await self._get_recent_conversation_context(
-                        conversation_id=conversation_id,
                         user_id=user_id,
-                        limit=10
+                        institution_filter=institution_filter,
+                        cached=retrieval["semantic_hit"],
+                        pipeline_start=pipeline_start,
+                        embedding_time=retrieval["embedding_time"],
+                        embedding_cache_hit=retrieval["embedding_cache_hit"],
+                        rate_limit_remaining=retrieval["rate_limit_remaining"],
+                        stage_timings=stage_timings
                     )
+                    yield {"event": "sources", "data": {
+                        "sources": result["sources"],
+                        "total_chunks_found": result["search_stats"]["total_chunks_found"]
+                    }}
+                    yield {"event": "token", "data": {"text": result["answer"]}}
+                    yield {"event": "done", "data": result}
+                    return
                 
-                try:
-                    ai_result = await self.ai_service.generate_response(
-                        query=query,
-                        context=context_text,
-                        response_style=response_style,
-                        conversation_context=conversation_context
-                    )
-                    
-                    llm_response = {
-                        "answer": fix_markdown_formatting(ai_result["response"]),  # Post-process markdown
-                        "confidence_score": ai_result["confidence_score"],
-                        "sources": self.source_enhancement_service.format_sources_for_response(search_results),
-                        "ai_model": ai_result["model_used"],
-                        "processing_time": ai_result["processing_time"],
-                        "token_usage": ai_result.get("token_usage", {})
-                    }
-                    
-                except Exception as groq_error:
-                    # Check if it's a rate limit error (429)
-                    error_str = str(groq_error)
-                    
-                    # For AppException, check both message and detail
-                    if hasattr(groq_error, 'detail'):
-                        error_str += f" {groq_error.detail}"
-                    
-                    is_rate_limit = (
-                        "429" in error_str or 
-                        "rate limit" in error_str.lower() or
-                        "rate_limit_exceeded" in error_str.lower()
-                    )
-                    
-                    if is_rate_limit:
-                        logger.warning(f"Groq rate limit reached, falling back to OpenAI: {groq_error}")
-                        
-                        if self.openai_client:
-                            try:
-                                # Fallback to OpenAI GPT-4o
-                                openai_response = await self._generate_openai_fallback(
-                                    query=query,
-                                    context=context_text,
-                                    search_results=search_results,
-                                    conversation_context=conversation_context
-                                )
-                                llm_response = openai_response
-                                logger.info("Successfully used OpenAI fallback for rate-limited Groq request")
-                            except Exception as openai_error:
-                                logger.error(f"OpenAI fallback also failed: {openai_error}")
-                                raise AppException(
-                                    message="AI service temporarily unavailable - please try again in a few minutes",
-                                    error_code="AI_SERVICE_UNAVAILABLE"
-                                )
-                        else:
-                            logger.error("No OpenAI API key configured for fallback")
-                            raise AppException(
-                                message="AI service temporarily unavailable - please try again in a few minutes", 
-                                error_code="AI_SERVICE_UNAVAILABLE"
-                            )
+                search_results = retrieval["search_results"]
+                yield {"event": "sources", "data": {
+                    "sources": self.source_enhancement_service.format_sources_for_response(search_results),
+                    "total_chunks_found": len(search_results),
+                    "embedding_time_ms": retrieval["embedding_time"],
+                    "search_time_ms": retrieval["search_time"]
+                }}
+                
+                ai_start = time.time()
+                llm_response = None
+                async for event in self._stream_llm_response(
+                    query=query,
+                    search_results=search_results,
+                    institution_filter=institution_filter,
+                    response_style=response_style,
+                    conversation_task=conversation_task
+                ):
+                    if event["type"] == "token":
+                        yield {"event": "token", "data": {"text": event["text"]}}
                     else:
-                        # Other Groq errors, re-raise
-                        logger.error(f"Groq service error (non-rate-limit): {groq_error}")
-                        raise groq_error
-                        
-            else:
-                # Use Ollama service (fallback)
-                llm_response = await ollama_service.generate_response(
+                        llm_response = event["result"]
+                ai_time = int((time.time() - ai_start) * 1000)
+                stage_timings["generation"] = ai_time
+                
+                result = await self._finalize_ask_response(
                     query=query,
-                    context=search_results,
-                    institution_filter=institution_filter
+                    user_id=user_id,
+                    institution_filter=institution_filter,
+                    response_style=response_style,
+                    use_cache=use_cache,
+                    retrieval=retrieval,
+                    llm_response=llm_response,
+                    ai_time=ai_time,
+                    pipeline_start=pipeline_start
                 )
-                # Post-process markdown for Ollama responses too
-                if "answer" in llm_response:
-                    llm_response["answer"] = fix_markdown_formatting(llm_response["answer"])
+                yield {"event": "done", "data": result}
+            finally:
+                self._cancel_conversation_context(conversation_task)
             
-            ai_time = int((time.time() - ai_start) * 1000)
+        except AppException:
+            raise
+        except Exception as e:
+            logger.error(f"Failed to process streaming ask query: {e}")
+            raise AppException(
+                message="Failed to process query",
+                detail=str(e),
+                error_code="QUERY_PROCESSING_FAILED"
+            )
+    
+    async def _timed_stage(self, stage_timings: Dict[str, int], name: str, awaitable) -> Any:
+        """Await one pipeline stage and record its wall-clock time in stage_timings"""
+        stage_start = time.time()
+        try:
+            return await awaitable
+        finally:
+            stage_timings[name] = int((time.time() - stage_start) * 1000)
+    
+    async def _embed_query(self, query: str, use_cache: bool) -> Tuple[List[float], bool]:
+        """Embed the query through the Redis embedding cache; returns (embedding, cache_hit)"""
+        query_embedding = None
+        
+        if use_cache:
+            query_embedding = await self.redis_service.get_cached_embedding(query)
+        embedding_cache_hit = query_embedding is not None
+        
+        if not query_embedding:
+            query_embedding = await self.embedding_service.generate_embedding(query)
+            if use_cache:
+                await self.redis_service.cache_embedding(query, query_embedding)
+        
+        return query_embedding, embedding_cache_hit
+    
+    async def _retrieve_for_ask(
+        self,
+        query: str,
+        user_id: str,
+        institution_filter: Optional[str],
+        limit: int,
+        similarity_threshold: float,
+        use_cache: bool,
+        response_style: Optional[str],
+        conversation_id: Optional[str],
+        rate_limit_remaining: Optional[int] = None,
+        stage_timings: Optional[Dict[str, int]] = None,
+        corpora: Optional[List[str]] = None,
+        retrieval_mode: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Retrieval stage of the ask pipeline (embedding, caches, search)
+        
+        Rate limiting happens before this in the route dependency, which
+        passes the remaining budget in. The search cache lookup and query
+        embedding do not depend on each other and run concurrently; semantic
+        cache lookup and search wait for the embedding. The institution
+        filter is applied inside the Elasticsearch query. Any corpus set other
+        than mevzuat alone is searched with one _msearch across the indexes.
+        Hybrid retrieval adds a BM25 leg to every searched index.
+        
+        Returns:
+            Dict with the query embedding, search results, timings and cache
+            flags; "semantic_hit" is set when a cached answer can be reused
+            and search was skipped
+        """
+        if stage_timings is None:
+            stage_timings = {}
+        corpora = sorted(set(corpora or settings.ASK_DEFAULT_CORPORA))
+        multi_corpus = corpora != ["mevzuat"]
+        search_filters = {"institution": institution_filter} if institution_filter else None
+        if multi_corpus:
+            search_filters = {**(search_filters or {}), "corpora": ",".join(corpora)}
+        retrieval_mode = retrieval_mode or settings.ASK_DEFAULT_RETRIEVAL_MODE
+        if retrieval_mode != "vector":
+            search_filters = {**(search_filters or {}), "retrieval": retrieval_mode}
+        
+        # 1-3. Pre-flight: search cache and embedding
+        preflight_start = time.time()
+        # Read once so lookups and writes of this request use the same generation
+        cache_generation = await get_cache_generation() if use_cache else 0
+        search_cache_lookup = self.redis_service.get_cached_search_results(
+            query=query,
+            filters=search_filters or {},
+            limit=limit,
+            similarity_threshold=similarity_threshold,
+            generation=cache_generation
+        ) if use_cache else asyncio.sleep(0)  # resolves to None
+        
+        cached_results, embedding_result = await asyncio.gather(
+            self._timed_stage(stage_timings, "search_cache_lookup", search_cache_lookup),
+            self._timed_stage(stage_timings, "embedding", self._embed_query(query, use_cache))
+        )
+        stage_timings["preflight"] = int((time.time() - preflight_start) * 1000)
+        
+        query_embedding, embedding_cache_hit = embedding_result
+        embedding_time = stage_timings["embedding"]
+        
+        # 3.5. Semantic answer cache (near-duplicate questions)
+        # Skipped inside conversations: the answer there depends on earlier turns,
+        # and for other corpora or retrieval modes: cached answers are scoped to
+        # the default mevzuat retrieval
+        use_semantic_cache = (
+            use_cache and not conversation_id and not multi_corpus
+            and retrieval_mode == settings.ASK_DEFAULT_RETRIEVAL_MODE
+        )
+        semantic_hit = None
+        if use_semantic_cache:
+            semantic_hit = await self._timed_stage(stage_timings, "semantic_cache_lookup", semantic_cache_service.lookup(
+                query_embedding=query_embedding,
+                institution_filter=institution_filter,
+                response_style=response_style,
+                generation=cache_generation
+            ))
+        
+        retrieval = {
+            "rate_limit_remaining": rate_limit_remaining,
+            "query_embedding": query_embedding,
+            "embedding_time": embedding_time,
+            "embedding_cache_hit": embedding_cache_hit,
+            "use_semantic_cache": use_semantic_cache,
+            "cache_generation": cache_generation,
+            "semantic_hit": semantic_hit,
+            "cached_results": False,
+            "search_results": [],
+            "search_time": 0,
+            "stage_timings": stage_timings
+        }
+        if semantic_hit:
+            return retrieval
+        
+        # 4. Perform search (use cache if available)
+        search_start = time.time()
+        
+        if cached_results:
+            search_results = cached_results
+            logger.info(f"Using cached search results for: {query[:50]}")
+            # IMPORTANT: Cached results also need enhancement for PDF URLs
+            logger.info(f"🔄 Cached results found, but will still enhance for PDF URLs")
+        else:
+            if multi_corpus:
+                logger.info(f"🔍 Calling multi_corpus_search with limit={limit}, corpora={corpora}, mode={retrieval_mode}")
+                search_results = await self.search_service.multi_corpus_search(
+                    query=query,
+                    query_embedding=query_embedding,
+                    corpora=corpora,
+                    limit=limit,
+                    similarity_threshold=similarity_threshold,
+                    institution_filter=institution_filter,
+                    retrieval_mode=retrieval_mode
+                )
+            else:
+                logger.info(f"🔍 Calling semantic_search with limit={limit}, mode={retrieval_mode}")
+                search_results = await self.search_service.semantic_search(
+                    query=query,
+                    query_embedding=query_embedding,
+                    limit=limit,
+                    similarity_threshold=similarity_threshold,
+                    institution_filter=institution_filter,  # Filtered inside Elasticsearch
+                    retrieval_mode=retrieval_mode
+                )
             
-            # 6. Calculate comprehensive confidence score with detailed breakdown
-            reliability_start = time.time()
-            try:
-                reliability_data = await self.reliability_service.calculate_comprehensive_confidence(
-                    search_results, llm_response.get("answer", "")
+            # Cache search results
+            if use_cache and search_results:
+                await self.redis_service.cache_search_results(
+                    query=query,
+                    results=search_results,
+                    filters=search_filters or {},
+                    limit=limit,
+                    similarity_threshold=similarity_threshold,
+                    ttl=settings.SEARCH_CACHE_TTL,
+                    generation=cache_generation
                 )
-                enhanced_confidence = reliability_data.get("confidence_score", 0.5)
-                confidence_breakdown = reliability_data.get("confidence_breakdown")
-                logger.info(f"Reliability data calculated successfully: {enhanced_confidence}")
+        
+        search_time = int((time.time() - search_start) * 1000)
+        stage_timings["search"] = search_time
+        
+        # 4.5. Enhance search results with source information  
+        logger.info(f"Total search results before enhancement: {len(search_results) if search_results else 0}")
+        
+        if search_results:
+            enhancement_start = time.time()
+            try:
+                logger.info(f"🔧 About to enhance {len(search_results)} search results")
+                search_results = self.source_enhancement_service.enhance_search_results(search_results)
+                logger.info(f"✅ Enhanced {len(search_results)} search results with source information")
             except Exception as e:
-                logger.error(f"Reliability calculation failed: {e}")
-                enhanced_confidence = self._calculate_simple_confidence(search_results, llm_response.get("answer", ""))
-                confidence_breakdown = None
-            reliability_time = int((time.time() - reliability_start) * 1000)
-            
-            # 7. Apply confidence-based credit and source filtering
-            confidence_threshold = 0.4  # 40% eşiği
-            is_low_confidence = enhanced_confidence < confidence_threshold
-            
-            if is_low_confidence:
-                # Düşük güvenilirlik: kredi kesme, kaynakları filtreleme
-                actual_credits = 0  # Kredi kesilmez
-                filtered_sources = []  # Kaynaklar gösterilmez
-                logger.info(f"Low confidence detected ({enhanced_confidence:.2f} < {confidence_threshold}) - No credits charged, sources filtered")
-            else:
-                # Normal güvenilirlik: normal işlem
-                actual_credits = credit_service.calculate_credit_cost(query) if not await credit_service.is_admin_user(user_id) else 0
-                filtered_sources = self.source_enhancement_service.format_sources_for_response(search_results)
-                logger.info(f"Normal confidence ({enhanced_confidence:.2f} >= {confidence_threshold}) - Credits charged normally")
+                logger.error(f"Enhancement service failed: {e}")
+                import traceback
+                logger.error(f"Enhancement traceback: {traceback.format_exc()}")
+                # Continue with unenhanced results
+            stage_timings["source_enhancement"] = int((time.time() - enhancement_start) * 1000)
+        
+        retrieval.update({
+            "cached_results": cached_results is not None,
+            "search_results": search_results,
+            "search_time": search_time
+        })
+        return retrieval
+    
+    def _is_rate_limit_error(self, error: Exception) -> bool:
+        """Check whether an LLM provider error is a rate limit (429)"""
+        error_str = str(error)
+        
+        # For AppException, check both message and detail
+        if hasattr(error, 'detail'):
+            error_str += f" {error.detail}"
+        
+        return (
+            "429" in error_str or 
+            "rate limit" in error_str.lower() or
+            "rate_limit_exceeded" in error_str.lower()
+        )
+    
+    def _llm_response_from_groq(self, ai_result: Dict[str, Any], search_results: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Map a GroqService result to the pipeline's llm_response shape"""
+        return {
+            "answer": fix_markdown_formatting(ai_result["response"]),  # Post-process markdown
+            "confidence_score": ai_result["confidence_score"],
+            "sources": self.source_enhancement_service.format_sources_for_response(search_results),
+            "ai_model": ai_result["model_used"],
+            "processing_time": ai_result["processing_time"],
+            "token_usage": ai_result.get("token_usage", {})
+        }
+    
+    def _start_conversation_context(
+        self,
+        conversation_id: Optional[str],
+        user_id: str,
+        stage_timings: Dict[str, int]
+    ) -> Optional[asyncio.Task]:
+        """Start loading recent conversation questions in the background (None outside conversations)"""
+        if not conversation_id:
+            return None
+        return asyncio.create_task(self._timed_stage(
+            stage_timings,
+            "conversation_context",
+            self._get_recent_conversation_context(
+                conversation_id=conversation_id,
+                user_id=user_id,
+                limit=10
+            )
+        ))
+    
+    async def _await_conversation_context(self, conversation_task: Optional[asyncio.Task]) -> str:
+        """Wait for the background conversation context load, if any"""
+        if conversation_task is None:
+            return ""
+        return await conversation_task
+    
+    def _cancel_conversation_context(self, conversation_task: Optional[asyncio.Task]) -> None:
+        """Drop a conversation context load that is no longer needed"""
+        if conversation_task is not None and not conversation_task.done():
+            conversation_task.cancel()
+    
+    async def _generate_llm_response(
+        self,
+        query: str,
+        search_results: List[Dict[str, Any]],
+        institution_filter: Optional[str],
+        response_style: Optional[str],
+        conversation_task: Optional[asyncio.Task] = None
+    ) -> Dict[str, Any]:
+        """Generation stage: Groq with OpenAI fallback on rate limits, or Ollama"""
+        if self.ai_provider == "groq":
+            # Use Groq service for fast inference with OpenAI fallback
+            context_text = self._prepare_context_for_groq(search_results)
+            conversation_context = await self._await_conversation_context(conversation_task)
             
+            try:
+                ai_result = await self.ai_service.generate_response(
+                    query=query,
+                    context=context_text,
+                    response_style=response_style,
+                    conversation_context=conversation_context
+                )
+                
+                llm_response = self._llm_response_from_groq(ai_result, search_results)
+                
+            except Exception as groq_error:
+                # Check if it's a rate limit error (429)
+                if self._is_rate_limit_error(groq_error):
+                    logger.warning(f"Groq rate limit reached, falling back to OpenAI: {groq_error}")
+                    
+                    if self.openai_client:
+                        try:
+                            # Fallback to OpenAI GPT-4o
+                            openai_response = await self._generate_openai_fallback(
+                                query=query,
+                                context=context_text,
+                                search_results=search_results,
+                                conversation_context=conversation_context
+                            )
+                            llm_response = openai_response
+                            logger.info("Successfully used OpenAI fallback for rate-limited Groq request")
+                        except Exception as openai_error:
+                            logger.error(f"OpenAI fallback also failed: {openai_error}")
+                            raise AppException(
+                                message="AI service temporarily unavailable - please try again in a few minutes",
+                                error_code="AI_SERVICE_UNAVAILABLE"
+                            )
+                    else:
+                        logger.error("No OpenAI API key configured for fallback")
+                        raise AppException(
+                            message="AI service temporarily unavailable - please try again in a few minutes", 
+                            error_code="AI_SERVICE_UNAVAILABLE"
+                        )
+                else:
+                    # Other Groq errors, re-raise
+                    logger.error(f"Groq service error (non-rate-limit): {groq_error}")
+                    raise groq_error
+                    
+        else:
+            # Use Ollama service (fallback)
+            llm_response = await ollama_service.generate_response(
+                query=query,
+                context=search_results,
+                institution_filter=institution_filter
+            )
+            # Post-process markdown for Ollama responses too
+            if "answer" in llm_response:
+                llm_response["answer"] = fix_markdown_formatting(llm_response["answer"])
+        
+        return llm_response
+    
+    async def _stream_llm_response(
+        self,
+        query: str,
+        search_results: List[Dict[str, Any]],
+        institution_filter: Optional[str],
+        response_style: Optional[str],
+        conversation_task: Optional[asyncio.Task] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Streaming generation stage
+        
+        Yields {"type": "token", "text": ...} deltas and finally
+        {"type": "result", "result": llm_response}. Falls back to a streamed
+        OpenAI answer when Groq is rate limited before any token was sent.
+        """
+        if self.ai_provider != "groq":
+            llm_response = await self._generate_llm_response(
+                query=query,
+                search_results=search_results,
+                institution_filter=institution_filter,
+                response_style=response_style,
+                conversation_task=conversation_task
+            )
+            yield {"type": "token", "text": llm_response.get("answer", "")}
+            yield {"type": "result", "result": llm_response}
+            return
+        
+        context_text = self._prepare_context_for_groq(search_results)
+        conversation_context = await self._await_conversation_context(conversation_task)
+        
+        tokens_sent = False
+        try:
+            ai_result = None
+            async for event in self.ai_service.generate_response_stream(
+                query=query,
+                context=context_text,
+                response_style=response_style,
+                conversation_context=conversation_context
+            ):
+                if event["type"] == "token":
+                    tokens_sent = True
+                    yield event
+                else:
+                    ai_result = event["result"]
+            yield {"type": "result", "result": self._llm_response_from_groq(ai_result, search_results)}
+            return
+            
+        except Exception as groq_error:
+            if tokens_sent or not self._is_rate_limit_error(groq_error):
+                # Partial answers cannot be resumed by another provider
+                logger.error(f"Groq streaming error: {groq_error}")
+                raise
+            
+            logger.warning(f"Groq rate limit reached, falling back to streamed OpenAI: {groq_error}")
+            if not self.openai_client:
+                logger.error("No OpenAI API key configured for fallback")
+                raise AppException(
+                    message="AI service temporarily unavailable - please try again in a few minutes", 
+                    error_code="AI_SERVICE_UNAVAILABLE"
+                )
+        
+        async for event in self._generate_openai_fallback_stream(
+            query=query,
+            context=context_text,
+            search_results=search_results,
+            conversation_context=conversation_context
+        ):
+            yield event
+    
+    async def _finalize_ask_response(
+        self,
+        query: str,
+        user_id: str,
+        institution_filter: Optional[str],
+        response_style: Optional[str],
+        use_cache: bool,
+        retrieval: Dict[str, Any],
+        llm_response: Dict[str, Any],
+        ai_time: int,
+        pipeline_start: float
+    ) -> Dict[str, Any]:
+        """Scoring stage: reliability, credits, logging and the final response"""
+        search_results = retrieval["search_results"]
+        query_embedding = retrieval["query_embedding"]
+        embedding_time = retrieval["embedding_time"]
+        embedding_cache_hit = retrieval["embedding_cache_hit"]
+        search_time = retrieval["search_time"]
+        cached_results = retrieval["cached_results"]
+        remaining = retrieval["rate_limit_remaining"]
+        use_semantic_cache = retrieval["use_semantic_cache"]
+        stage_timings = retrieval.get("stage_timings", {})
+        
+        # 6. Confidence scoring, admin lookup and history updates are independent
+        async def update_search_history() -> None:
             # 8. Update user history and analytics
             if use_cache:
                 await self.redis_service.add_user_search(
@@ -785,45 +1194,86 @@ class QueryService:
                     institution=institution_filter or ""
                 )
                 await self.redis_service.increment_search_popularity(query)
-            
-            pipeline_time = int((time.time() - pipeline_start) * 1000)
-            
-            # 9. Log search with enhanced data
-            search_stats = {
-                "total_chunks_found": len(search_results),
-                "embedding_time_ms": embedding_time,
-                "search_time_ms": search_time,
-                "generation_time_ms": llm_response.get("generation_time_ms", ai_time),
-                "reliability_time_ms": reliability_time,
-                "total_pipeline_time_ms": pipeline_time,
-                "cache_used": cached_results is not None,
-                "rate_limit_remaining": remaining,
-                "low_confidence": is_low_confidence,
-                "confidence_threshold": confidence_threshold,
-                "credits_waived": is_low_confidence
-            }
-            
-            search_log_id = await self._log_search_query(
-                user_id=user_id,
-                query=query,
-                response=llm_response.get("answer", llm_response.get("response", "")),
-                sources=filtered_sources,  # Log filtered sources based on confidence
-                reliability_score=float(enhanced_confidence) if enhanced_confidence is not None else 0.0,
-                credits_used=actual_credits,
-                institution_filter=institution_filter,
-                results_count=len(search_results),
-                response_generated=True,
-                confidence_breakdown=confidence_breakdown,
-                search_stats=search_stats
-            )
-            
-            # 10. Build response with enhanced confidence and conditional warning
-            original_answer = llm_response.get("answer", llm_response.get("response", ""))
-            
-            if is_low_confidence:
-                # Add warning message for low confidence responses
-                confidence_percentage = int(enhanced_confidence * 100)
-                warning_message = f"""⚠️ **Güvenilirlik Uyarısı**
+        
+        reliability_start = time.time()
+        reliability_result, is_admin, history_result = await asyncio.gather(
+            self._timed_stage(stage_timings, "reliability", self.reliability_service.calculate_comprehensive_confidence(
+                search_results, llm_response.get("answer", "")
+            )),
+            credit_service.is_admin_user(user_id),
+            update_search_history(),
+            return_exceptions=True
+        )
+        if isinstance(reliability_result, Exception):
+            logger.error(f"Reliability calculation failed: {reliability_result}")
+            enhanced_confidence = self._calculate_simple_confidence(search_results, llm_response.get("answer", ""))
+            confidence_breakdown = None
+        else:
+            enhanced_confidence = reliability_result.get("confidence_score", 0.5)
+            confidence_breakdown = reliability_result.get("confidence_breakdown")
+            logger.info(f"Reliability data calculated successfully: {enhanced_confidence}")
+        if isinstance(is_admin, Exception):
+            logger.error(f"Admin check failed: {is_admin}")
+            is_admin = False
+        if isinstance(history_result, Exception):
+            logger.warning(f"Search history update failed: {history_result}")
+        reliability_time = int((time.time() - reliability_start) * 1000)
+        
+        # 7. Apply confidence-based credit and source filtering
+        confidence_threshold = 0.4  # 40% eşiği
+        is_low_confidence = enhanced_confidence < confidence_threshold
+        
+        if is_low_confidence:
+            # Düşük güvenilirlik: kredi kesme, kaynakları filtreleme
+            actual_credits = 0  # Kredi kesilmez
+            filtered_sources = []  # Kaynaklar gösterilmez
+            logger.info(f"Low confidence detected ({enhanced_confidence:.2f} < {confidence_threshold}) - No credits charged, sources filtered")
+        else:
+            # Normal güvenilirlik: normal işlem
+            actual_credits = credit_service.calculate_credit_cost(query) if not is_admin else 0
+            filtered_sources = self.source_enhancement_service.format_sources_for_response(search_results)
+            logger.info(f"Normal confidence ({enhanced_confidence:.2f} >= {confidence_threshold}) - Credits charged normally")
+        
+        pipeline_time = int((time.time() - pipeline_start) * 1000)
+        
+        # 9. Log search with enhanced data
+        search_stats = {
+            "total_chunks_found": len(search_results),
+            "embedding_time_ms": embedding_time,
+            "search_time_ms": search_time,
+            "generation_time_ms": llm_response.get("generation_time_ms", ai_time),
+            "reliability_time_ms": reliability_time,
+            "total_pipeline_time_ms": pipeline_time,
+            "cache_used": cached_results,
+            "embedding_cache_hit": embedding_cache_hit,
+            "rate_limit_remaining": remaining,
+            "low_confidence": is_low_confidence,
+            "confidence_threshold": confidence_threshold,
+            "credits_waived": is_low_confidence,
+            "stage_timings_ms": stage_timings
+        }
+        
+        search_log_id = await self._log_search_query(
+            user_id=user_id,
+            query=query,
+            response=llm_response.get("answer", llm_response.get("response", "")),
+            sources=filtered_sources,  # Log filtered sources based on confidence
+            reliability_score=float(enhanced_confidence) if enhanced_confidence is not None else 0.0,
+            credits_used=actual_credits,
+            institution_filter=institution_filter,
+            results_count=len(search_results),
+            response_generated=True,
+            confidence_breakdown=confidence_breakdown,
+            search_stats=search_stats
+        )
+        
+        # 10. Build response with enhanced confidence and conditional warning
+        original_answer = llm_response.get("answer", llm_response.get("response", ""))
+        
+        if is_low_confidence:
+            # Add warning message for low confidence responses
+            confidence_percentage = int(enhanced_confidence * 100)
+            warning_message = f"""⚠️ **Güvenilirlik Uyarısı**
 
 Sorgunuz için sistemimizde yeterli güvenilir bilgi bulunamadı (Güvenilirlik: %{confidence_percentage}). 
 
@@ -831,39 +1281,113 @@ Bu yanıt için **kredi kesilmedi** ve **kaynaklar gösterilmedi**. Daha spesifi
 
 ---
 {original_answer}"""
-                final_answer = warning_message
-            else:
-                final_answer = original_answer
-            
-            response = {
-                "query": query,
-                "answer": final_answer,
-                "confidence_score": enhanced_confidence,
-                "search_log_id": search_log_id,  # Add search log ID for feedback
-                "confidence_breakdown": confidence_breakdown,  # Add detailed breakdown
-                "sources": filtered_sources,  # Use filtered sources based on confidence
-                "institution_filter": institution_filter,
-                "search_stats": search_stats,
-                "llm_stats": {
-                    "model_used": llm_response.get("model_used", "llama3-8b-8192"),
-                    "prompt_tokens": llm_response.get("prompt_tokens", 0),
-                    "response_tokens": llm_response.get("response_tokens", 0)
-                }
+            final_answer = warning_message
+        else:
+            final_answer = original_answer
+        
+        response = {
+            "query": query,
+            "answer": final_answer,
+            "confidence_score": enhanced_confidence,
+            "search_log_id": search_log_id,  # Add search log ID for feedback
+            "confidence_breakdown": confidence_breakdown,  # Add detailed breakdown
+            "sources": filtered_sources,  # Use filtered sources based on confidence
+            "institution_filter": institution_filter,
+            "search_stats": search_stats,
+            "llm_stats": {
+                "model_used": llm_response.get("model_used", "llama3-8b-8192"),
+                "prompt_tokens": llm_response.get("prompt_tokens", 0),
+                "response_tokens": llm_response.get("response_tokens", 0)
             }
-            
-            logger.info(f"Ask query processed: '{query[:50]}' - {len(search_results)} sources, {pipeline_time}ms")
-            
-            return response
-            
-        except AppException:
-            raise
-        except Exception as e:
-            logger.error(f"Failed to process ask query: {e}")
-            raise AppException(
-                message="Failed to process query",
-                detail=str(e),
-                error_code="QUERY_PROCESSING_FAILED"
+        }
+        
+        # 11. Remember confident answers for paraphrased follow-up questions
+        if use_semantic_cache and not is_low_confidence and search_results:
+            await semantic_cache_service.store(
+                query_embedding=query_embedding,
+                payload={
+                    "query": query,
+                    "answer": final_answer,
+                    "confidence_score": enhanced_confidence,
+                    "confidence_breakdown": confidence_breakdown,
+                    "sources": filtered_sources,
+                    "results_count": len(search_results),
+                    "llm_stats": response["llm_stats"]
+                },
+                institution_filter=institution_filter,
+                response_style=response_style,
+                generation=retrieval["cache_generation"]
             )
+        
+        logger.info(f"Ask query processed: '{query[:50]}' - {len(search_results)} sources, {pipeline_time}ms")
+        
+        return response
+    
+    async def _build_semantic_cache_response(
+        self,
+        query: str,
+        user_id: str,
+        institution_filter: Optional[str],
+        cached: Dict[str, Any],
+        pipeline_start: float,
+        embedding_time: int,
+        embedding_cache_hit: bool,
+        rate_limit_remaining: int,
+        stage_timings: Optional[Dict[str, int]] = None
+    ) -> Dict[str, Any]:
+        """Build an ask response from a semantic cache hit (no search or LLM call)"""
+        actual_credits = credit_service.calculate_credit_cost(query) if not await credit_service.is_admin_user(user_id) else 0
+        pipeline_time = int((time.time() - pipeline_start) * 1000)
+        
+        search_stats = {
+            "total_chunks_found": cached.get("results_count", len(cached.get("sources", []))),
+            "embedding_time_ms": embedding_time,
+            "search_time_ms": 0,
+            "generation_time_ms": 0,
+            "reliability_time_ms": 0,
+            "total_pipeline_time_ms": pipeline_time,
+            "cache_used": True,
+            "embedding_cache_hit": embedding_cache_hit,
+            "semantic_cache_hit": True,
+            "semantic_cache_similarity": cached.get("similarity"),
+            "rate_limit_remaining": rate_limit_remaining,
+            "low_confidence": False,
+            "confidence_threshold": 0.4,
+            "credits_waived": False,
+            "stage_timings_ms": stage_timings or {}
+        }
+        
+        search_log_id = await self._log_search_query(
+            user_id=user_id,
+            query=query,
+            response=cached.get("answer", ""),
+            sources=cached.get("sources", []),
+            reliability_score=float(cached.get("confidence_score") or 0.0),
+            credits_used=actual_credits,
+            institution_filter=institution_filter,
+            results_count=search_stats["total_chunks_found"],
+            response_generated=True,
+            confidence_breakdown=cached.get("confidence_breakdown"),
+            search_stats=search_stats
+        )
+        
+        logger.info(f"Ask query answered from semantic cache: '{query[:50]}' ({pipeline_time}ms)")
+        
+        return {
+            "query": query,
+            "answer": cached.get("answer", ""),
+            "confidence_score": cached.get("confidence_score", 0.5),
+            "search_log_id": search_log_id,
+            "confidence_breakdown": cached.get("confidence_breakdown"),
+            "sources": cached.get("sources", []),
+            "institution_filter": institution_filter,
+            "search_stats": search_stats,
+            "llm_stats": cached.get("llm_stats") or {
+                "model_used": "semantic_cache",
+                "prompt_tokens": 0,
+                "response_tokens": 0
+            }
+        }
     
     async def get_user_suggestions(self, user_id: str) -> Dict[str, Any]:
         """Get personalized suggestions for user"""
@@ -877,11 +1401,12 @@ Bu yanıt için **kredi kesilmedi** ve **kaynaklar gösterilmedi**. Daha spesifi
             # Get popular searches
             popular_searches = await self.redis_service.get_popular_searches(limit=10)
             
-            # Get available institutions
-            institutions = await self.redis_service.get_available_institutions()
-            if not institutions:
-                await self._update_institutions_cache()
-                institutions = await self.redis_service.get_available_institutions()
+            # Get available institutions (catalog built from index aggregations)
+            try:
+                institutions = await catalog_service.get_institution_names()
+            except Exception as e:
+                logger.warning(f"Institution catalog unavailable: {e}")
+                institutions = []
             
             return {
                 "recent_searches": recent_searches,
@@ -954,14 +1479,17 @@ Bu yanıt için **kredi kesilmedi** ve **kaynaklar gösterilmedi**. Daha spesifi
     ) -> str:
         """Fetch last N user questions as context (best-effort)."""
         try:
-            result = supabase_client.supabase.table("conversation_messages").select(
-                "role, search_log_id, created_at"
-            ).eq("conversation_id", conversation_id) \
-             .eq("user_id", user_id) \
-             .eq("role", "user") \
-             .order("created_at", desc=True) \
-             .limit(limit) \
-             .execute()
+            # Supabase client is synchronous; run it in a thread so retrieval proceeds meanwhile
+            result = await asyncio.to_thread(
+                supabase_client.supabase.table("conversation_messages").select(
+                    "role, search_log_id, created_at"
+                ).eq("conversation_id", conversation_id)
+                .eq("user_id", user_id)
+                .eq("role", "user")
+                .order("created_at", desc=True)
+                .limit(limit)
+                .execute
+            )
             
             rows = result.data or []
             if not rows:
@@ -972,9 +1500,11 @@ Bu yanıt için **kredi kesilmedi** ve **kaynaklar gösterilmedi**. Daha spesifi
             if not search_log_ids:
                 return ""
             
-            logs_result = supabase_client.supabase.table("search_logs").select(
-                "id, query, response"
-            ).in_("id", search_log_ids).execute()
+            logs_result = await asyncio.to_thread(
+                supabase_client.supabase.table("search_logs").select(
+                    "id, query, response"
+                ).in_("id", search_log_ids).execute
+            )
             log_map = {row["id"]: row for row in (logs_result.data or [])}
             
             lines = []
@@ -1083,38 +1613,6 @@ Benzerlik: {similarity:.2f}
             }
         }
     
-    async def _update_institutions_cache(self):
-        """Update available institutions cache - Using metadata field for institution data"""
-        try:
-            # Get distinct institutions from metadata field
-            response = supabase_client.supabase.table('mevzuat_documents').select('metadata').execute()
-            
-            institutions = set()
-            if response.data:
-                for doc in response.data:
-                    metadata = doc.get('metadata', {})
-                    if isinstance(metadata, dict) and metadata.get('source_institution'):
-                        institutions.add(metadata['source_institution'])
-                
-                institutions_list = sorted(list(institutions))
-                
-                # Add default institutions if none found
-                if not institutions_list:
-                    institutions_list = [
-                        "Sosyal Güvenlik Kurumu",
-                        "Çalışma ve Sosyal Güvenlik Bakanlığı", 
-                        "Hazine ve Maliye Bakanlığı",
-                        "Adalet Bakanlığı",
-                        "İçişleri Bakanlığı"
-                    ]
-                
-                await self.redis_service.cache_institutions(institutions_list)
-                
-            logger.info(f"Updated institutions cache with {len(institutions_list)} institutions")
-            
-        except Exception as e:
-            logger.warning(f"Failed to update institutions cache: {e}")
-    
     def _calculate_simple_confidence(self, search_results: List[Dict[str, Any]], ai_answer: str) -> float:
         """
         Calculate simple confidence score based on search quality and AI response
@@ -1244,6 +1742,60 @@ Benzerlik: {similarity:.2f}
             logger.warning(f"Failed to log search query: {e}")
             return None
     
+    async def _build_openai_fallback_messages(
+        self,
+        query: str,
+        context: str,
+        conversation_context: Optional[str] = None
+    ) -> List[Dict[str, str]]:
+        """Build chat messages for the OpenAI fallback (shared by blocking and streaming paths)"""
+        # Get system prompt for legal questions
+        from services.prompt_service import prompt_service
+        system_message = await prompt_service.get_system_prompt("groq_legal")
+        
+        # Prepare messages for OpenAI
+        conversation_section = ""
+        if conversation_context and conversation_context.strip():
+            conversation_section = (
+                "ÖNCEKİ KONUŞMALAR (yalnızca bağlam için, bilgi kaynağı değildir):\n"
+                f"{conversation_context}\n\n"
+            )
+        
+        user_message = (
+            f"{conversation_section}"
+            f"Soru: {query}\n\n"
+            f"Bağlam (BELGE İÇERİĞİ):\n{context}\n\n"
+            "Yanıtını sadece BELGE İÇERİĞİNE dayandır."
+        )
+        
+        return [
+            {"role": "system", "content": system_message},
+            {"role": "user", "content": user_message}
+        ]
+    
+    def _build_openai_fallback_result(
+        self,
+        ai_response: str,
+        search_results: List[Dict[str, Any]],
+        start_time: float,
+        usage: Any = None
+    ) -> Dict[str, Any]:
+        """Assemble the OpenAI fallback result in the Groq-compatible llm_response shape"""
+        processing_time = int((time.time() - start_time) * 1000)
+        
+        return {
+            "answer": fix_markdown_formatting(ai_response),  # Post-process markdown
+            "confidence_score": 0.8,  # Default confidence for OpenAI fallback
+            "sources": self.source_enhancement_service.format_sources_for_response(search_results),
+            "ai_model": "gpt-4o (fallback)",
+            "processing_time": processing_time,
+            "token_usage": {
+                "prompt_tokens": usage.prompt_tokens if usage else 0,
+                "completion_tokens": usage.completion_tokens if usage else 0,
+                "total_tokens": usage.total_tokens if usage else 0
+            }
+        }
+    
     async def _generate_openai_fallback(
         self, 
         query: str, 
@@ -1265,29 +1817,7 @@ Benzerlik: {similarity:.2f}
         start_time = time.time()
         
         try:
-            # Get system prompt for legal questions
-            from services.prompt_service import prompt_service
-            system_message = await prompt_service.get_system_prompt("groq_legal")
-            
-            # Prepare messages for OpenAI
-            conversation_section = ""
-            if conversation_context and conversation_context.strip():
-                conversation_section = (
-                    "ÖNCEKİ KONUŞMALAR (yalnızca bağlam için, bilgi kaynağı değildir):\n"
-                    f"{conversation_context}\n\n"
-                )
-            
-            user_message = (
-                f"{conversation_section}"
-                f"Soru: {query}\n\n"
-                f"Bağlam (BELGE İÇERİĞİ):\n{context}\n\n"
-                "Yanıtını sadece BELGE İÇERİĞİNE dayandır."
-            )
-            
-            messages = [
-                {"role": "system", "content": system_message},
-                {"role": "user", "content": user_message}
-            ]
+            messages = await self._build_openai_fallback_messages(query, context, conversation_context)
             
             # Call OpenAI GPT-4o
             response = await self.openai_client.chat.completions.create(
@@ -1298,21 +1828,12 @@ Benzerlik: {similarity:.2f}
                 top_p=0.9
             )
             
-            ai_response = response.choices[0].message.content
-            processing_time = int((time.time() - start_time) * 1000)
-            
-            return {
-                "answer": fix_markdown_formatting(ai_response),  # Post-process markdown
-                "confidence_score": 0.8,  # Default confidence for OpenAI fallback
-                "sources": self.source_enhancement_service.format_sources_for_response(search_results),
-                "ai_model": "gpt-4o (fallback)",
-                "processing_time": processing_time,
-                "token_usage": {
-                    "prompt_tokens": response.usage.prompt_tokens,
-                    "completion_tokens": response.usage.completion_tokens,
-                    "total_tokens": response.usage.total_tokens
-                }
-            }
+            return self._build_openai_fallback_result(
+                ai_response=response.choices[0].message.content,
+                search_results=search_results,
+                start_time=start_time,
+                usage=response.usage
+            )
             
         except Exception as e:
             logger.error(f"OpenAI fallback failed: {e}")
@@ -1321,24 +1842,58 @@ Benzerlik: {similarity:.2f}
                 error_code="OPENAI_FALLBACK_FAILED"
             )
     
-    async def _get_documents_by_institution(self, institution_filter: str) -> List[str]:
-        """Get document IDs that belong to the specified institution"""
+    async def _generate_openai_fallback_stream(
+        self,
+        query: str,
+        context: str,
+        search_results: List[Dict[str, Any]],
+        conversation_context: Optional[str] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Streaming OpenAI fallback when Groq is rate limited
+        
+        Yields {"type": "token", "text": ...} deltas and a final
+        {"type": "result", "result": ...} in the same shape as _generate_openai_fallback.
+        """
+        start_time = time.time()
+        
         try:
-            # Query documents with metadata containing the institution (use service client to bypass RLS)
-            service_client = supabase_client.get_client(use_service_key=True)
-            response = service_client.table('mevzuat_documents') \
-                .select('id') \
-                .filter('metadata->source_institution', 'ilike', f'%{institution_filter}%') \
-                .execute()
-            
-            if response.data:
-                document_ids = [doc['id'] for doc in response.data]
-                logger.info(f"Found {len(document_ids)} documents for institution '{institution_filter}'")
-                return document_ids
-            else:
-                logger.warning(f"No documents found for institution: '{institution_filter}'")
-                return []
-                
+            messages = await self._build_openai_fallback_messages(query, context, conversation_context)
+            
+            stream = await self.openai_client.chat.completions.create(
+                model="gpt-4o",
+                messages=messages,
+                temperature=0.3,
+                max_tokens=2048,
+                top_p=0.9,
+                stream=True,
+                stream_options={"include_usage": True}
+            )
+            
+            parts = []
+            usage = None
+            async for chunk in stream:
+                if chunk.choices:
+                    delta = chunk.choices[0].delta.content
+                    if delta:
+                        parts.append(delta)
+                        yield {"type": "token", "text": delta}
+                if chunk.usage:
+                    usage = chunk.usage
+            
+            yield {
+                "type": "result",
+                "result": self._build_openai_fallback_result(
+                    ai_response="".join(parts),
+                    search_results=search_results,
+                    start_time=start_time,
+                    usage=usage
+                )
+            }
+            
         except Exception as e:
-            logger.error(f"Failed to get documents by institution: {e}")
-            return []
\ No newline at end of file
+            logger.error(f"OpenAI streaming fallback failed: {e}")
+            raise AppException(
+                message="AI service temporarily unavailable - please try again in a few minutes",
+                error_code="AI_SERVICE_UNAVAILABLE"
+            )
@@ -5,9 +5,13 @@ Fixes max connection leak issue
 
 import redis.asyncio as redis
 import json
+import base64
 import hashlib
 import logging
-from typing import List, Dict, Any, Optional, Union
+import unicodedata
+import uuid
+from array import array
+from typing import List, Dict, Any, Optional, Union, Tuple
 from datetime import datetime, timedelta
 from core.config import settings
 from utils.exceptions import AppException
@@ -17,6 +21,55 @@ logger = logging.getLogger(__name__)
 # Global connection pool (singleton)
 _redis_pool = None
 
+RATE_LIMIT_PREFIX = "rate_limit"
+
+# Sliding-window log limiter over one sorted set per identity (user, IP, ...).
+# All windows are checked first and the request is recorded in every window
+# only if all of them allow it, so one EVALSHA round trip decides the request.
+# KEYS[i]: window key; ARGV[1]: window ms; ARGV[2]: unique member;
+# ARGV[2 + i]: limit for KEYS[i]
+# Returns {allowed (0/1), remaining (lowest across windows), retry_after_ms}
+SLIDING_WINDOW_LUA = """
+local time = redis.call('TIME')
+local now = tonumber(time[1]) * 1000 + math.floor(tonumber(time[2]) / 1000)
+local window = tonumber(ARGV[1])
+local member = ARGV[2]
+local allowed = 1
+local remaining = -1
+local retry_after = 0
+
+for i, key in ipairs(KEYS) do
+    local limit = tonumber(ARGV[2 + i])
+    redis.call('ZREMRANGEBYSCORE', key, '-inf', now - window)
+    local left = limit - redis.call('ZCARD', key)
+    if left <= 0 then
+        allowed = 0
+        left = 0
+        local oldest = redis.call('ZRANGE', key, 0, 0, 'WITHSCORES')
+        local wait = window
+        if oldest[2] then
+            wait = tonumber(oldest[2]) + window - now
+        end
+        if wait > retry_after then
+            retry_after = wait
+        end
+    end
+    if remaining < 0 or left < remaining then
+        remaining = left
+    end
+end
+
+if allowed == 1 then
+    for i, key in ipairs(KEYS) do
+        redis.call('ZADD', key, now, member)
+        redis.call('PEXPIRE', key, window)
+    end
+    remaining = remaining - 1
+end
+
+return {allowed, remaining, retry_after}
+"""
+
 async def get_redis_pool():
     """Get or create global Redis connection pool"""
     global _redis_pool
@@ -47,18 +100,82 @@ async def close_redis_pool():
         _redis_pool = None
         logger.info("Redis connection pool closed")
 
+# Cache key prefixes and hit/miss counters
+EMBEDDING_CACHE_PREFIX = "emb_cache"
+SEARCH_CACHE_PREFIX = "search_cache"
+CACHE_STATS_KEY = "cache_stats"
+# Part of every search cache key and semantic cache scope; bumping it makes
+# all cached results and answers unreachable at once
+CACHE_GENERATION_KEY = "cache_generation"
+
+def normalize_query_for_cache(query: str) -> str:
+    """
+    Normalize a query for cache keys with Turkish-aware casing
+    
+    Python's str.lower() maps "I" to "i" and "İ" to "i̇" (dotted), which
+    breaks Turkish text, so the dotted/dotless I pairs are mapped first.
+    Whitespace is collapsed and trailing punctuation is dropped so that
+    "Kıdem tazminatı nasıl hesaplanır?" and "kıdem  tazminatı nasıl hesaplanır"
+    share a key.
+    """
+    text = unicodedata.normalize("NFC", str(query or ""))
+    text = text.replace("I", "ı").replace("İ", "i").lower()
+    text = " ".join(text.split())
+    return text.rstrip(" ?.!,;:")
+
+def encode_embedding(embedding: List[float]) -> str:
+    """Pack an embedding as base64 float32 (~11 KB instead of ~40 KB JSON for 2048D)"""
+    return base64.b64encode(array("f", embedding).tobytes()).decode("ascii")
+
+def decode_embedding(payload: str) -> List[float]:
+    """Inverse of encode_embedding"""
+    vector = array("f")
+    vector.frombytes(base64.b64decode(payload))
+    return vector.tolist()
+
+def _hash_key(*parts: Any) -> str:
+    """Stable sha256 digest for composite cache keys"""
+    raw = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+async def get_cache_generation() -> int:
+    """Current result cache generation (0 when Redis cannot be read)"""
+    try:
+        async with RedisService() as client:
+            return int(await client.get(CACHE_GENERATION_KEY) or 0)
+    except Exception as e:
+        logger.warning(f"Cache generation read failed: {e}")
+        return 0
+
+async def bump_cache_generation(reason: str) -> None:
+    """
+    Invalidate cached search results and semantic answers
+
+    Called when documents leave the index or the serving index changes, so
+    nothing is answered from content that can no longer be retrieved.
+    Safe to call from Celery workers: it only touches Redis.
+    """
+    try:
+        async with RedisService() as client:
+            generation = await client.incr(CACHE_GENERATION_KEY)
+        logger.info(f"Result caches invalidated (generation {generation}): {reason}")
+    except Exception as e:
+        logger.warning(f"Result cache invalidation failed ({reason}): {e}")
+
 class RedisService:
     """Redis service using global connection pool with context manager support"""
     
     def __init__(self):
         self.redis_url = settings.REDIS_URL
         self.redis_client = None
+        self._open_clients = []  # one per concurrent "async with" on this instance
     
     async def __aenter__(self):
         """Context manager entry - get client from pool"""
         try:
             pool = await get_redis_pool()
             self.redis_client = redis.Redis(connection_pool=pool)
+            self._open_clients.append(self.redis_client)
             return self.redis_client
         except Exception as e:
             logger.error(f"Failed to get Redis client from pool: {e}")
@@ -70,9 +187,10 @@ class RedisService:
     
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         """Context manager exit - return client to pool"""
-        if self.redis_client:
-            await self.redis_client.close(close_connection_pool=False)
-            self.redis_client = None
+        if self._open_clients:
+            client = self._open_clients.pop()
+            await client.close(close_connection_pool=False)
+        self.redis_client = self._open_clients[-1] if self._open_clients else None
     
     async def ping(self):
         """Ping Redis (for health checks only)"""
@@ -130,21 +248,154 @@ class RedisService:
             logger.error(f"Redis flush_db failed: {e}")
             raise
     
-    # Cache methods (stub implementations)
-    async def get_cached_search_results(self, query, filters=None, limit=None, similarity_threshold=None):
-        return None
+    # Cache methods
+    def _embedding_cache_key(self, query: str) -> str:
+        digest = _hash_key(normalize_query_for_cache(query))
+        return f"{EMBEDDING_CACHE_PREFIX}:{settings.OPENAI_EMBEDDING_MODEL}:{settings.OPENAI_EMBEDDING_DIMENSIONS}:{digest}"
     
-    async def cache_search_results(self, query, results, filters=None, limit=None, similarity_threshold=None, ttl=1800):
-        pass
+    def _search_cache_key(self, query, filters=None, limit=None, similarity_threshold=None, generation=0) -> str:
+        digest = _hash_key(
+            normalize_query_for_cache(query),
+            filters or {},
+            limit,
+            similarity_threshold,
+            generation
+        )
+        return f"{SEARCH_CACHE_PREFIX}:{settings.OPENAI_EMBEDDING_MODEL}:{settings.OPENAI_EMBEDDING_DIMENSIONS}:{digest}"
+    
+    async def _record_cache_result(self, client, cache_name: str, hit: bool):
+        """Increment hit/miss counters for a cache (best-effort)"""
+        try:
+            await client.hincrby(CACHE_STATS_KEY, f"{cache_name}:{'hits' if hit else 'misses'}", 1)
+        except Exception as e:
+            logger.debug(f"Cache stats update failed for {cache_name}: {e}")
+    
+    async def get_cached_search_results(self, query, filters=None, limit=None, similarity_threshold=None, generation=0):
+        """Get cached search results for a normalized query + filters, or None"""
+        try:
+            async with self as client:
+                key = self._search_cache_key(query, filters, limit, similarity_threshold, generation)
+                data = await client.get(key)
+                await self._record_cache_result(client, "search", data is not None)
+                return json.loads(data) if data else None
+        except Exception as e:
+            logger.warning(f"Search cache lookup failed: {e}")
+            return None
+    
+    async def cache_search_results(self, query, results, filters=None, limit=None, similarity_threshold=None, ttl=None, generation=0):
+        """
+        Cache search results for a normalized query + filters
+
+        generation must be the value read before searching, so results
+        computed across an invalidation are stored under the old generation.
+        """
+        try:
+            async with self as client:
+                key = self._search_cache_key(query, filters, limit, similarity_threshold, generation)
+                await client.setex(
+                    key,
+                    ttl or settings.SEARCH_CACHE_TTL,
+                    json.dumps(results, ensure_ascii=False, default=str)
+                )
+        except Exception as e:
+            logger.warning(f"Search cache write failed: {e}")
     
     async def get_cached_embedding(self, query):
-        return None
+        """Get cached query embedding (decoded from base64 float32), or None"""
+        try:
+            async with self as client:
+                data = await client.get(self._embedding_cache_key(query))
+                await self._record_cache_result(client, "embedding", data is not None)
+                if not data:
+                    return None
+                embedding = decode_embedding(data)
+                if len(embedding) != settings.OPENAI_EMBEDDING_DIMENSIONS:
+                    logger.warning(f"Discarding cached embedding with {len(embedding)} dimensions")
+                    return None
+                return embedding
+        except Exception as e:
+            logger.warning(f"Embedding cache lookup failed: {e}")
+            return None
     
-    async def cache_embedding(self, query, embedding, ttl=3600):
-        pass
+    async def cache_embedding(self, query, embedding, ttl=None):
+        """Cache a query embedding as base64 float32"""
+        try:
+            async with self as client:
+                await client.setex(
+                    self._embedding_cache_key(query),
+                    ttl or settings.EMBEDDING_CACHE_TTL,
+                    encode_embedding(embedding)
+                )
+        except Exception as e:
+            logger.warning(f"Embedding cache write failed: {e}")
+    
+    async def get_cache_stats(self) -> Dict[str, Any]:
+        """Get hit/miss counters and hit rates for the query caches"""
+        try:
+            async with self as client:
+                raw = await client.hgetall(CACHE_STATS_KEY)
+            stats = {}
+            for cache_name in ("embedding", "search", "semantic"):
+                hits = int(raw.get(f"{cache_name}:hits", 0))
+                misses = int(raw.get(f"{cache_name}:misses", 0))
+                total = hits + misses
+                stats[cache_name] = {
+                    "hits": hits,
+                    "misses": misses,
+                    "hit_rate": round(hits / total, 4) if total else 0.0
+                }
+            return stats
+        except Exception as e:
+            logger.warning(f"Failed to read cache stats: {e}")
+            return {}
     
-    async def check_rate_limit(self, user_id, endpoint="ask", limit=60, window=60):
-        return True, limit
+    async def check_rate_limit(
+        self,
+        user_id: Optional[str],
+        endpoint: str = "ask",
+        limit: int = 60,
+        window: int = 60,
+        client_ip: Optional[str] = None,
+        ip_limit: Optional[int] = None
+    ) -> Tuple[bool, int, int]:
+        """
+        Count a request against the per-user and per-IP sliding windows
+        
+        Args:
+            user_id: Authenticated user (None to limit by IP only)
+            endpoint: Endpoint name, each endpoint has its own windows
+            limit: Requests allowed per window for the user
+            window: Window length in seconds
+            client_ip: Client address (None to limit by user only)
+            ip_limit: Requests allowed per window for the IP
+            
+        Returns:
+            (is_allowed, remaining, retry_after_seconds); fails open when
+            Redis is unavailable
+        """
+        keys = []
+        limits = []
+        if user_id:
+            keys.append(f"{RATE_LIMIT_PREFIX}:{endpoint}:user:{user_id}")
+            limits.append(limit)
+        if client_ip and ip_limit:
+            keys.append(f"{RATE_LIMIT_PREFIX}:{endpoint}:ip:{client_ip}")
+            limits.append(ip_limit)
+        if not keys:
+            return True, limit, 0
+        
+        try:
+            async with self as client:
+                script = client.register_script(SLIDING_WINDOW_LUA)
+                allowed, remaining, retry_after_ms = await script(
+                    keys=keys,
+                    args=[window * 1000, uuid.uuid4().hex, *limits]
+                )
+            retry_after = -(-int(retry_after_ms) // 1000)  # ceil to whole seconds
+            return bool(allowed), int(remaining), max(retry_after, 1) if not allowed else 0
+        except Exception as e:
+            logger.warning(f"Rate limit check failed, allowing request: {e}")
+            return True, limit, 0
     
     async def add_user_search(self, user_id, query, institution=""):
         pass
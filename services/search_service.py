@@ -3,46 +3,180 @@ Search service for semantic search and AI-powered question answering
 Handles vector similarity search and OpenAI chat completion integration
 """
 
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, FrozenSet
 import logging
+import re
 import openai
 import asyncio
-from datetime import datetime, date
+from datetime import date
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from core.config import get_settings
 from services.embedding_service import EmbeddingService
+from services.elasticsearch_service import get_search_corpora
+from services.document_router import DocumentRouter
 from utils.exceptions import AppException
 
 logger = logging.getLogger(__name__)
 
+# "vector": embedding similarity only; "hybrid": BM25 + vector fused with RRF
+RETRIEVAL_MODES = ("vector", "hybrid")
+
+
+def _shingles(text: str, size: int = 3) -> FrozenSet:
+    """Word n-grams of a chunk (the words themselves for very short chunks)"""
+    words = re.findall(r"\w+", (text or "").lower())
+    if len(words) < size:
+        return frozenset(words)
+    return frozenset(tuple(words[i:i + size]) for i in range(len(words) - size + 1))
+
+
+def diversify_results(
+    results: List[Dict[str, Any]],
+    limit: int,
+    max_per_document: int,
+    max_per_page: int,
+    overlap_threshold: float
+) -> List[Dict[str, Any]]:
+    """
+    Drop redundant chunks from a ranked result list, keeping the order
+    
+    A chunk is skipped when its document already has max_per_document
+    chunks, its page already has max_per_page, or most of its word
+    shingles (overlap_threshold of the smaller chunk) already appear in a
+    kept chunk: the overlapping slices both splitters produce. 0 disables
+    a per-document/per-page limit, overlap_threshold >= 1 the text check.
+    """
+    kept, kept_shingles = [], []
+    per_document: Dict[str, int] = {}
+    per_page: Dict[tuple, int] = {}
+    for result in results:
+        if len(kept) >= limit:
+            break
+        document_id = result["document_id"]
+        page = (document_id, result.get("page_number"))
+        if max_per_document and per_document.get(document_id, 0) >= max_per_document:
+            continue
+        if max_per_page and result.get("page_number") is not None and per_page.get(page, 0) >= max_per_page:
+            continue
+        shingles = _shingles(result.get("content", ""))
+        if overlap_threshold < 1 and shingles and any(
+            len(shingles & other) / min(len(shingles), len(other)) > overlap_threshold
+            for other in kept_shingles if other
+        ):
+            continue
+        kept.append(result)
+        kept_shingles.append(shingles)
+        per_document[document_id] = per_document.get(document_id, 0) + 1
+        per_page[page] = per_page.get(page, 0) + 1
+    return kept
+
+
+def merge_corpus_results(
+    results_by_corpus: Dict[str, List[Dict[str, Any]]],
+    limit: int,
+    quotas: Dict[str, float],
+    score_key: str = "similarity_score"
+) -> List[Dict[str, Any]]:
+    """
+    Merge per-corpus result lists into one ranked list
+    
+    Scores are min-max normalized within each corpus ("normalized_score"),
+    since similarity distributions differ between corpora. Each corpus is
+    guaranteed its quota share of the slots (as far as it has results); the
+    remaining slots go to the best normalized scores of any corpus.
+    
+    Args:
+        results_by_corpus: Corpus -> results sorted by score_key, descending
+        limit: Total number of results
+        quotas: Corpus -> relative share (renormalized over the given corpora)
+        score_key: Score to normalize ("rrf_score" for hybrid results)
+    """
+    ranked = {}
+    for corpus, results in results_by_corpus.items():
+        scores = [result[score_key] for result in results]
+        high, low = (max(scores), min(scores)) if scores else (0.0, 0.0)
+        ranked[corpus] = [
+            {
+                **result,
+                "corpus": corpus,
+                "normalized_score": round((result[score_key] - low) / (high - low), 4) if high > low else 1.0
+            }
+            for result in results
+        ]
+    
+    shares = {corpus: quotas.get(corpus, 0.0) for corpus in ranked}
+    if sum(shares.values()) <= 0:
+        # No quota configured for these corpora: equal shares
+        shares = {corpus: 1.0 for corpus in ranked}
+    total_share = sum(shares.values())
+    
+    selected, leftovers = [], []
+    for corpus, results in ranked.items():
+        slots = int(limit * shares[corpus] / total_share)
+        selected.extend(results[:slots])
+        leftovers.extend(results[slots:])
+    
+    def rank_key(result: Dict[str, Any]):
+        return (result["normalized_score"], result[score_key])
+    
+    leftovers.sort(key=rank_key, reverse=True)
+    selected.extend(leftovers[:max(limit - len(selected), 0)])
+    selected.sort(key=rank_key, reverse=True)
+    return selected[:limit]
+
+
 class SearchService:
     """Service class for semantic search and AI-powered responses"""
     
-    def __init__(self, db: AsyncSession = None):
+    def __init__(
+        self,
+        db: AsyncSession = None,
+        embedding_service: Optional[EmbeddingService] = None,
+        openai_client: Optional[openai.OpenAI] = None
+    ):
         self.db = db
         self.settings = get_settings()
-        self.embedding_service = EmbeddingService()
-        self.client = openai.OpenAI(api_key=self.settings.OPENAI_API_KEY)
+        self.embedding_service = embedding_service or EmbeddingService()
+        self.client = openai_client or openai.OpenAI(api_key=self.settings.OPENAI_API_KEY)
     
     async def semantic_search(
         self,
         query: str,
+        query_embedding: List[float],
         limit: int = 10,
         similarity_threshold: float = 0.65,
         category_filter: Optional[str] = None,
         date_filter: Optional[Dict[str, date]] = None,
-        document_ids_filter: Optional[List[str]] = None
+        document_ids_filter: Optional[List[str]] = None,
+        institution_filter: Optional[str] = None,
+        retrieval_mode: str = "vector"
     ) -> List[Dict[str, Any]]:
         """
         Perform semantic search using vector similarity
         
+        The caller embeds the query once and passes the vector in; this
+        method never calls OpenAI itself. Filters are native Elasticsearch
+        filter clauses, so a filtered search still returns up to `limit` hits.
+        In hybrid mode a BM25 query on the question text runs next to the
+        vector query and both rankings are fused with reciprocal rank fusion.
+        Hits are collapsed per document in Elasticsearch and filtered with
+        diversify_results, so overlapping slices of one page do not fill the
+        result list (and the prompt).
+        With SEARCH_DOCUMENT_ROUTING_TOP_N set and no document restriction,
+        the closest documents are first picked by their centroid vectors and
+        only their chunks are searched.
+        
         Args:
-            query: Search query text
+            query: Search query text (logging; BM25 query in hybrid mode)
+            query_embedding: Precomputed embedding of the query
             limit: Maximum number of results
             similarity_threshold: Minimum similarity score
             category_filter: Optional category filter
-            date_filter: Optional date range filter
+            date_filter: Optional publish date range filter
+            document_ids_filter: Optional document ID restriction
+            institution_filter: Optional source institution filter
+            retrieval_mode: "vector" or "hybrid"
             
         Returns:
             List of search results with similarity scores
@@ -51,52 +185,43 @@ class SearchService:
             AppException: If search fails
         """
         try:
-            # Generate embedding for the search query
-            query_embedding = await self.embedding_service.generate_embedding(query)
-            
-            # Perform Elasticsearch vector similarity search
-            results = await self.embedding_service.similarity_search(
-                query_text=query,
-                k=limit,
-                institution_filter=category_filter,
-                document_ids=document_ids_filter,
-                similarity_threshold=similarity_threshold
-            )
-            
-            # Apply date filter if provided
-            if date_filter and results:
-                filtered_results = []
-                for result in results:
-                    publish_date = result.get("publish_date")
-                    if publish_date:
-                        if isinstance(publish_date, str):
-                            publish_date = datetime.strptime(publish_date, "%Y-%m-%d").date()
-                        
-                        # Check date range
-                        if "start" in date_filter and publish_date < date_filter["start"]:
-                            continue
-                        if "end" in date_filter and publish_date > date_filter["end"]:
-                            continue
-                    
-                    filtered_results.append(result)
-                
-                results = filtered_results[:limit]
+            collapse = self.settings.SEARCH_MAX_CHUNKS_PER_DOCUMENT
+            if not document_ids_filter and self.settings.SEARCH_DOCUMENT_ROUTING_TOP_N > 0:
+                document_ids_filter = await self._route_documents(
+                    query_embedding, category_filter, date_filter, institution_filter
+                )
+            if retrieval_mode == "hybrid":
+                results = await self.embedding_service.hybrid_search(
+                    query_vector=query_embedding,
+                    query_text=query,
+                    k=limit,
+                    institution_filter=institution_filter,
+                    document_ids=document_ids_filter,
+                    similarity_threshold=similarity_threshold,
+                    category_filter=category_filter,
+                    date_filter=date_filter,
+                    collapse_per_document=collapse
+                )
+            else:
+                # Perform Elasticsearch vector similarity search
+                results = await self.embedding_service.similarity_search(
+                    query_vector=query_embedding,
+                    k=limit,
+                    institution_filter=institution_filter,
+                    document_ids=document_ids_filter,
+                    similarity_threshold=similarity_threshold,
+                    category_filter=category_filter,
+                    date_filter=date_filter,
+                    collapse_per_document=collapse
+                )
             
             # Format results for API response (Elasticsearch format)
-            formatted_results = []
-            for result in results:
-                formatted_results.append({
-                    "document_id": str(result["document_id"]),
-                    "document_title": result.get("source_document", "Unknown Document"),
-                    "content": result["content"],
-                    "similarity_score": round(result["similarity"], 4),
-                    "chunk_index": result.get("chunk_index", 0),
-                    "page_number": result.get("page_number"),
-                    "source_institution": result.get("source_institution"),
-                    "metadata": result.get("metadata", {})
-                })
+            formatted_results = self._diversify([self._format_result(result) for result in results], limit)
             
-            logger.info(f"Semantic search completed: '{query}' - {len(formatted_results)} results")
+            logger.info(
+                f"Semantic search ({retrieval_mode}) completed: '{query}' - {len(formatted_results)} results "
+                f"({len(results)} hits before diversity filtering)"
+            )
             
             return formatted_results
             
@@ -108,6 +233,150 @@ class SearchService:
                 error_code="SEMANTIC_SEARCH_FAILED"
             )
     
+    async def _route_documents(
+        self,
+        query_embedding: List[float],
+        category_filter: Optional[str],
+        date_filter: Optional[Dict[str, date]],
+        institution_filter: Optional[str]
+    ) -> Optional[List[str]]:
+        """
+        First retrieval stage: IDs of the documents closest to the question
+        
+        None (search every chunk) when the routing index is unavailable or
+        has no matching document.
+        """
+        try:
+            routed = await DocumentRouter(self.embedding_service.elasticsearch_service).route(
+                query_embedding,
+                self.settings.SEARCH_DOCUMENT_ROUTING_TOP_N,
+                institution_filter=institution_filter,
+                category_filter=category_filter,
+                date_filter=date_filter
+            )
+        except Exception as e:
+            logger.warning(f"Document routing unavailable, searching all chunks: {e}")
+            return None
+        return [document["document_id"] for document in routed] or None
+    
+    def _diversify(self, results: List[Dict[str, Any]], limit: int) -> List[Dict[str, Any]]:
+        """diversify_results with the configured limits"""
+        return diversify_results(
+            results,
+            limit,
+            max_per_document=self.settings.SEARCH_MAX_CHUNKS_PER_DOCUMENT,
+            max_per_page=self.settings.SEARCH_MAX_CHUNKS_PER_PAGE,
+            overlap_threshold=self.settings.SEARCH_DEDUP_OVERLAP_THRESHOLD
+        )
+    
+    @staticmethod
+    def _format_result(result: Dict[str, Any]) -> Dict[str, Any]:
+        """API shape of an Elasticsearch similarity (or hybrid) hit"""
+        formatted = {
+            "document_id": str(result["document_id"]),
+            "document_title": result.get("source_document", "Unknown Document"),
+            "content": result["content"],
+            "similarity_score": round(result["similarity"], 4),
+            "chunk_index": result.get("chunk_index", 0),
+            "page_number": result.get("page_number"),
+            "source_institution": result.get("source_institution"),
+            "category": result.get("category"),
+            "publish_date": result.get("publish_date"),
+            "metadata": result.get("metadata", {})
+        }
+        if "rrf_score" in result:
+            formatted["rrf_score"] = round(result["rrf_score"], 6)
+            formatted["retrieval_ranks"] = result["ranks"]
+        return formatted
+    
+    async def multi_corpus_search(
+        self,
+        query: str,
+        query_embedding: List[float],
+        corpora: List[str],
+        limit: int = 10,
+        similarity_threshold: float = 0.65,
+        quotas: Optional[Dict[str, float]] = None,
+        category_filter: Optional[str] = None,
+        date_filter: Optional[Dict[str, date]] = None,
+        institution_filter: Optional[str] = None,
+        retrieval_mode: str = "vector"
+    ) -> List[Dict[str, Any]]:
+        """
+        Semantic search over several corpora (mevzuat, Yargıtay, ...) at once
+        
+        All corpora are searched in one Elasticsearch _msearch request, each
+        for up to `limit` hits, and merged with merge_corpus_results. Every
+        result carries "corpus" and "normalized_score". Hybrid results are
+        fused per corpus and merged on their RRF scores.
+        
+        Args:
+            query: Search query text (logging; BM25 query in hybrid mode)
+            query_embedding: Precomputed embedding of the query
+            corpora: Corpus names, see get_search_corpora
+            limit: Maximum number of merged results
+            similarity_threshold: Minimum similarity score
+            quotas: Corpus -> result share (defaults to SEARCH_CORPUS_QUOTAS)
+            category_filter: Optional category filter
+            date_filter: Optional publish date range filter
+            institution_filter: Optional source institution filter
+            retrieval_mode: "vector" or "hybrid"
+            
+        Returns:
+            Merged search results
+            
+        Raises:
+            AppException: If a corpus is unknown or the search fails
+        """
+        available = get_search_corpora()
+        unknown = [corpus for corpus in corpora if corpus not in available]
+        if unknown:
+            raise AppException(
+                message="Unknown search corpus",
+                detail=f"{', '.join(unknown)} (available: {', '.join(available)})",
+                error_code="UNKNOWN_SEARCH_CORPUS",
+                status_code=400
+            )
+        
+        try:
+            results_by_index = await self.embedding_service.elasticsearch_service.multi_index_search(
+                query_vector=query_embedding,
+                index_limits={available[corpus]: limit for corpus in corpora},
+                similarity_threshold=similarity_threshold,
+                institution_filter=institution_filter,
+                category_filter=category_filter,
+                date_filter=date_filter,
+                query_text=query if retrieval_mode == "hybrid" else None,
+                collapse_per_document=self.settings.SEARCH_MAX_CHUNKS_PER_DOCUMENT
+            )
+            results_by_corpus = {
+                corpus: self._diversify(
+                    [self._format_result(result) for result in results_by_index.get(available[corpus], [])],
+                    limit
+                )
+                for corpus in corpora
+            }
+            merged = merge_corpus_results(
+                results_by_corpus,
+                limit,
+                quotas if quotas is not None else self.settings.SEARCH_CORPUS_QUOTAS,
+                score_key="rrf_score" if retrieval_mode == "hybrid" else "similarity_score"
+            )
+            
+            corpus_counts = {corpus: 0 for corpus in corpora}
+            for result in merged:
+                corpus_counts[result["corpus"]] += 1
+            logger.info(f"Multi-corpus search completed: '{query}' - {len(merged)} results {corpus_counts}")
+            return merged
+            
+        except Exception as e:
+            logger.error(f"Multi-corpus search failed for query '{query}': {str(e)}")
+            raise AppException(
+                message="Search operation failed",
+                detail=str(e),
+                error_code="MULTI_CORPUS_SEARCH_FAILED"
+            )
+    
     async def generate_answer(
         self, 
         question: str, 
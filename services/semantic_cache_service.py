@@ -0,0 +1,265 @@
+"""
+Semantic answer cache for the ask pipeline
+Reuses answers of recently asked, near-identical questions (by query embedding)
+"""
+
+import json
+import time
+import uuid
+import hashlib
+import logging
+from typing import Dict, Any, Optional, List
+
+import numpy as np
+
+from core.config import settings
+from services.redis_service import RedisService, CACHE_STATS_KEY, encode_embedding, decode_embedding
+
+logger = logging.getLogger(__name__)
+
+
+class SemanticCacheService:
+    """
+    Bounded in-process vector index of answered questions, mirrored in Redis
+
+    Vectors are L2-normalized and kept in a preallocated float32 matrix so a
+    lookup is a single matrix-vector product. Entries are scoped by
+    institution filter, response style and cache generation (see
+    bump_cache_generation); a hit requires the same scope and
+    a cosine distance <= SEMANTIC_CACHE_MAX_DISTANCE. Eviction is LRU when
+    the matrix is full, and entries expire after SEMANTIC_CACHE_TTL.
+    """
+
+    def __init__(
+        self,
+        capacity: Optional[int] = None,
+        max_distance: Optional[float] = None,
+        ttl: Optional[int] = None
+    ):
+        self.capacity = capacity or settings.SEMANTIC_CACHE_CAPACITY
+        self.max_distance = max_distance if max_distance is not None else settings.SEMANTIC_CACHE_MAX_DISTANCE
+        self.ttl = ttl or settings.SEMANTIC_CACHE_TTL
+        self.dimensions = settings.OPENAI_EMBEDDING_DIMENSIONS
+        self.redis_key_prefix = "semantic_cache:"
+        self.redis_index_key = "semantic_cache:index"
+
+        self._vectors = np.zeros((self.capacity, self.dimensions), dtype=np.float32)
+        self._occupied = np.zeros(self.capacity, dtype=bool)
+        self._expires_at = np.zeros(self.capacity, dtype=np.float64)
+        self._last_used = np.zeros(self.capacity, dtype=np.float64)
+        self._scopes: List[Optional[str]] = [None] * self.capacity
+        self._entry_ids: List[Optional[str]] = [None] * self.capacity
+        self._payloads: List[Optional[Dict[str, Any]]] = [None] * self.capacity
+        self._warmed = False
+
+    @staticmethod
+    def build_scope(institution_filter: Optional[str], response_style: Optional[str], generation: int = 0) -> str:
+        """Cache scope: answers are only shared between identical filter/style within one generation"""
+        raw = f"{(institution_filter or '').strip().lower()}|{response_style or 'default'}|{generation}"
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+
+    def _normalize(self, embedding: List[float]) -> Optional[np.ndarray]:
+        vector = np.asarray(embedding, dtype=np.float32)
+        if vector.shape != (self.dimensions,):
+            return None
+        norm = float(np.linalg.norm(vector))
+        if norm == 0.0:
+            return None
+        return vector / norm
+
+    def _evict_expired(self, now: float) -> None:
+        expired = np.flatnonzero(self._occupied & (self._expires_at <= now))
+        for slot in expired:
+            self._free_slot(int(slot))
+
+    def _free_slot(self, slot: int) -> None:
+        self._occupied[slot] = False
+        self._scopes[slot] = None
+        self._entry_ids[slot] = None
+        self._payloads[slot] = None
+
+    def _allocate_slot(self) -> int:
+        free = np.flatnonzero(~self._occupied)
+        if free.size:
+            return int(free[0])
+        # LRU eviction
+        slot = int(np.argmin(self._last_used))
+        self._free_slot(slot)
+        return slot
+
+    def _insert(
+        self,
+        entry_id: str,
+        vector: np.ndarray,
+        scope: str,
+        payload: Dict[str, Any],
+        expires_at: float
+    ) -> None:
+        if entry_id in self._entry_ids:
+            return
+        slot = self._allocate_slot()
+        self._vectors[slot] = vector
+        self._occupied[slot] = True
+        self._expires_at[slot] = expires_at
+        self._last_used[slot] = time.time()
+        self._scopes[slot] = scope
+        self._entry_ids[slot] = entry_id
+        self._payloads[slot] = payload
+
+    async def _warm_from_redis(self) -> None:
+        """Load the most recent mirrored entries so new workers start warm"""
+        self._warmed = True
+        try:
+            now = time.time()
+            async with RedisService() as client:
+                await client.zremrangebyscore(self.redis_index_key, "-inf", now)
+                entry_keys = await client.zrevrange(self.redis_index_key, 0, self.capacity - 1)
+                if not entry_keys:
+                    return
+                pipe = client.pipeline()
+                for key in entry_keys:
+                    pipe.hgetall(key)
+                    pipe.ttl(key)
+                rows = await pipe.execute()
+
+            loaded = 0
+            for key, data, ttl in zip(entry_keys, rows[0::2], rows[1::2]):
+                if not data or ttl is None or ttl <= 0:
+                    continue
+                vector = self._normalize(decode_embedding(data["vector"]))
+                if vector is None:
+                    continue
+                self._insert(
+                    entry_id=key,
+                    vector=vector,
+                    scope=data["scope"],
+                    payload=json.loads(data["payload"]),
+                    expires_at=now + ttl
+                )
+                loaded += 1
+            logger.info(f"Semantic cache warmed with {loaded} entries from Redis")
+        except Exception as e:
+            logger.warning(f"Semantic cache warm-up failed: {e}")
+
+    async def _record_lookup(self, hit: bool) -> None:
+        try:
+            async with RedisService() as client:
+                await client.hincrby(CACHE_STATS_KEY, f"semantic:{'hits' if hit else 'misses'}", 1)
+        except Exception as e:
+            logger.debug(f"Semantic cache stats update failed: {e}")
+
+    async def lookup(
+        self,
+        query_embedding: List[float],
+        institution_filter: Optional[str] = None,
+        response_style: Optional[str] = None,
+        generation: int = 0
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Find a cached answer for a near-duplicate question
+
+        Args:
+            query_embedding: Embedding of the new question
+            institution_filter: Institution filter of the request
+            response_style: Response style of the request
+            generation: Current cache generation (get_cache_generation)
+
+        Returns:
+            Cached payload plus "similarity" and "cached_query", or None
+        """
+        if not settings.SEMANTIC_CACHE_ENABLED:
+            return None
+        try:
+            if not self._warmed:
+                await self._warm_from_redis()
+
+            vector = self._normalize(query_embedding)
+            if vector is None:
+                return None
+
+            now = time.time()
+            self._evict_expired(now)
+
+            scope = self.build_scope(institution_filter, response_style, generation)
+            candidates = np.flatnonzero(self._occupied)
+            candidates = np.array([slot for slot in candidates if self._scopes[slot] == scope], dtype=np.int64)
+
+            hit = None
+            if candidates.size:
+                similarities = self._vectors[candidates] @ vector
+                best = int(np.argmax(similarities))
+                best_similarity = float(similarities[best])
+                if 1.0 - best_similarity <= self.max_distance:
+                    slot = int(candidates[best])
+                    self._last_used[slot] = now
+                    hit = dict(self._payloads[slot])
+                    hit["similarity"] = round(best_similarity, 4)
+
+            await self._record_lookup(hit is not None)
+            if hit:
+                logger.info(f"Semantic cache hit (similarity={hit['similarity']}) for cached query: '{hit.get('query', '')[:50]}'")
+            return hit
+
+        except Exception as e:
+            logger.warning(f"Semantic cache lookup failed: {e}")
+            return None
+
+    async def store(
+        self,
+        query_embedding: List[float],
+        payload: Dict[str, Any],
+        institution_filter: Optional[str] = None,
+        response_style: Optional[str] = None,
+        generation: int = 0
+    ) -> None:
+        """
+        Store an answered question in the local index and mirror it in Redis
+
+        Args:
+            query_embedding: Embedding of the answered question
+            payload: JSON-serializable answer data (query, answer, sources, ...)
+            institution_filter: Institution filter of the request
+            response_style: Response style of the request
+            generation: Cache generation read before retrieval, so an answer
+                built across an invalidation is never served afterwards
+        """
+        if not settings.SEMANTIC_CACHE_ENABLED:
+            return
+        try:
+            vector = self._normalize(query_embedding)
+            if vector is None:
+                return
+
+            now = time.time()
+            scope = self.build_scope(institution_filter, response_style, generation)
+            entry_id = f"{self.redis_key_prefix}{scope}:{uuid.uuid4().hex}"
+            self._insert(entry_id, vector, scope, payload, now + self.ttl)
+
+            async with RedisService() as client:
+                pipe = client.pipeline()
+                pipe.hset(entry_id, mapping={
+                    "vector": encode_embedding(vector.tolist()),
+                    "scope": scope,
+                    "payload": json.dumps(payload, ensure_ascii=False, default=str)
+                })
+                pipe.expire(entry_id, self.ttl)
+                pipe.zadd(self.redis_index_key, {entry_id: now + self.ttl})
+                # Keep the mirror bounded to the same capacity as the local index
+                pipe.zremrangebyrank(self.redis_index_key, 0, -(self.capacity + 1))
+                await pipe.execute()
+
+        except Exception as e:
+            logger.warning(f"Semantic cache store failed: {e}")
+
+    def get_local_stats(self) -> Dict[str, Any]:
+        """In-process index occupancy (hit/miss counters live in Redis)"""
+        return {
+            "entries": int(self._occupied.sum()),
+            "capacity": self.capacity,
+            "max_distance": self.max_distance,
+            "ttl_seconds": self.ttl
+        }
+
+
+# Global instance
+semantic_cache_service = SemanticCacheService()
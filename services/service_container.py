@@ -0,0 +1,163 @@
+"""
+Process-wide service container
+Owns the long-lived, connection-pooled clients and stateless services used by
+the request path so they are built once per worker instead of per request
+"""
+
+import logging
+from typing import Optional
+
+import openai
+from openai import AsyncOpenAI
+
+from core.config import settings
+from core.supabase_client import supabase_client
+from services.elasticsearch_service import ElasticsearchService, get_elasticsearch_session, close_elasticsearch_session
+from services.elasticsearch_index_manager import ElasticsearchIndexManager
+from services.document_router import DocumentRouter
+from services.embedding_service import EmbeddingService
+from services.groq_service import GroqService, close_groq_client
+from services.reliability_service import ReliabilityService
+from services.source_enhancement_service import SourceEnhancementService
+from services.storage_service import StorageService
+from services.redis_service import get_redis_pool, close_redis_pool
+
+logger = logging.getLogger(__name__)
+
+
+class ServiceContainer:
+    """
+    Singleton holder for shared clients and services
+
+    Built eagerly in the FastAPI lifespan (startup/shutdown). Attributes are
+    also built lazily on first access so code paths that run outside the
+    lifespan (scripts, tests) keep working.
+
+    Request-scoped services that need the DB session (QueryService,
+    SearchService, SearchHistoryService) stay per-request but take their
+    heavy dependencies from here.
+    """
+
+    def __init__(self):
+        self._openai_client: Optional[openai.OpenAI] = None
+        self._async_openai_client: Optional[AsyncOpenAI] = None
+        self._groq_service: Optional[GroqService] = None
+        self._elasticsearch_service: Optional[ElasticsearchService] = None
+        self._embedding_service: Optional[EmbeddingService] = None
+        self._reliability_service: Optional[ReliabilityService] = None
+        self._source_enhancement_service: Optional[SourceEnhancementService] = None
+        self._storage_service: Optional[StorageService] = None
+        self.started = False
+
+    @property
+    def openai_client(self) -> openai.OpenAI:
+        """Synchronous OpenAI client (embeddings run it in the default executor)"""
+        if self._openai_client is None:
+            self._openai_client = openai.OpenAI(api_key=settings.OPENAI_API_KEY)
+        return self._openai_client
+
+    @property
+    def async_openai_client(self) -> Optional[AsyncOpenAI]:
+        """Async OpenAI client (chat fallback, batched query embeddings), None without an API key"""
+        if self._async_openai_client is None and settings.OPENAI_API_KEY:
+            self._async_openai_client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
+        return self._async_openai_client
+
+    @property
+    def groq_service(self) -> Optional[GroqService]:
+        """Groq inference service, None when Groq is not the configured provider"""
+        if self._groq_service is None and settings.AI_PROVIDER == "groq" and settings.GROQ_API_KEY:
+            self._groq_service = GroqService()
+        return self._groq_service
+
+    @property
+    def elasticsearch_service(self) -> ElasticsearchService:
+        """Elasticsearch client for the default index (all instances share one pooled session)"""
+        if self._elasticsearch_service is None:
+            self._elasticsearch_service = ElasticsearchService()
+        return self._elasticsearch_service
+
+    @property
+    def embedding_service(self) -> EmbeddingService:
+        if self._embedding_service is None:
+            self._embedding_service = EmbeddingService(
+                openai_client=self.openai_client,
+                elasticsearch_service=self.elasticsearch_service,
+                async_openai_client=self.async_openai_client
+            )
+        return self._embedding_service
+
+    @property
+    def reliability_service(self) -> ReliabilityService:
+        if self._reliability_service is None:
+            self._reliability_service = ReliabilityService()
+        return self._reliability_service
+
+    @property
+    def source_enhancement_service(self) -> SourceEnhancementService:
+        if self._source_enhancement_service is None:
+            self._source_enhancement_service = SourceEnhancementService()
+        return self._source_enhancement_service
+
+    @property
+    def storage_service(self) -> StorageService:
+        """Bunny.net storage service"""
+        if self._storage_service is None:
+            self._storage_service = StorageService()
+        return self._storage_service
+
+    @property
+    def supabase(self):
+        """Shared Supabase client (already a module-level singleton)"""
+        return supabase_client
+
+    async def startup(self) -> None:
+        """Build every shared client up front (application startup)"""
+        await get_redis_pool()
+        await get_elasticsearch_session()
+        _ = (
+            self.openai_client,
+            self.async_openai_client,
+            self.groq_service,
+            self.embedding_service,
+            self.reliability_service,
+            self.source_enhancement_service,
+            self.storage_service
+        )
+        # Missing chunk indexes are created with the HNSW mapping; filter fields
+        # must be mapped before the first chunk carrying them is indexed, and
+        # the routing index must exist before the first centroid is stored
+        try:
+            index_manager = ElasticsearchIndexManager(self.elasticsearch_service)
+            for index_name in (settings.ELASTICSEARCH_INDEX, settings.ELASTICSEARCH_YARGITAY_INDEX):
+                await index_manager.ensure_index(index_name)
+            await self.elasticsearch_service.ensure_filter_mappings()
+            await DocumentRouter(self.elasticsearch_service).ensure_index()
+        except Exception as e:
+            logger.warning(f"Elasticsearch index mappings not ensured: {e}")
+        self.started = True
+        logger.info("Service container initialized")
+
+    async def shutdown(self) -> None:
+        """Release pooled connections and worker threads (application shutdown)"""
+        await close_elasticsearch_session()
+        if self._reliability_service is not None:
+            self._reliability_service.executor.shutdown(wait=False)
+            self._reliability_service = None
+        if self._async_openai_client is not None:
+            await self._async_openai_client.close()
+            self._async_openai_client = None
+        if self._openai_client is not None:
+            self._openai_client.close()
+            self._openai_client = None
+        await close_groq_client()
+        await close_redis_pool()
+        self._groq_service = None
+        self._embedding_service = None
+        self._elasticsearch_service = None
+        self.started = False
+        logger.info("Service container shut down")
+
+
+# Global instance
+service_container = ServiceContainer()
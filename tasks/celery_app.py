@@ -4,7 +4,9 @@ Sets up distributed task queue for background processing
 """
 
 from celery import Celery
+from celery.signals import worker_process_init, worker_process_shutdown
 from kombu import Queue
+import asyncio
 import logging
 from core.config import settings
 
@@ -18,7 +20,8 @@ celery_app = Celery(
     backend=None,  # Disabled to reduce Redis connections
     include=[
         "tasks.document_processor",
-        "tasks.yargitay_document_processor"
+        "tasks.yargitay_document_processor",
+        "tasks.index_maintenance"
     ]
 )
 
@@ -67,6 +70,8 @@ celery_app.conf.update(
         "tasks.document_processor.process_document_task": {"queue": "celery"},
         "tasks.document_processor.bulk_process_documents_task": {"queue": "celery"},
         "tasks.document_processor.cleanup_failed_documents": {"queue": "celery"},
+        "backfill_filter_fields_task": {"queue": "celery"},
+        "reembed_index_task": {"queue": "celery"},
         "process_yargitay_document_task": {"queue": "yargitay"},
     },
     
@@ -109,6 +114,60 @@ def setup_workers(sender, **kwargs):
     """Setup worker configuration after finalize"""
     logger.info("Celery workers configured")
 
+# Per-process event loop: pooled async clients (Elasticsearch session, Redis
+# pool) are bound to the loop that created them, so every task of a worker
+# process runs on the same loop instead of a fresh one per task
+_worker_loop = None
+
+@worker_process_init.connect
+def init_worker_process(**kwargs):
+    """Create the process event loop and open the shared Elasticsearch session"""
+    global _worker_loop
+    from services.elasticsearch_service import get_elasticsearch_session
+
+    _worker_loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(_worker_loop)
+    _worker_loop.run_until_complete(get_elasticsearch_session())
+    logger.info("Celery worker process initialized (event loop, Elasticsearch session)")
+
+@worker_process_shutdown.connect
+def shutdown_worker_process(**kwargs):
+    """Close the shared clients and the process event loop"""
+    global _worker_loop
+    if _worker_loop is None or _worker_loop.is_closed():
+        return
+    from services.elasticsearch_service import close_elasticsearch_session
+    from services.redis_service import close_redis_pool
+
+    try:
+        _worker_loop.run_until_complete(close_elasticsearch_session())
+        _worker_loop.run_until_complete(close_redis_pool())
+    except Exception as e:
+        logger.warning(f"Worker process cleanup warning: {e}")
+    finally:
+        _worker_loop.close()
+        _worker_loop = None
+
+def run_async(coro):
+    """
+    Run a task coroutine to completion on the worker process loop
+
+    Outside a prefork worker process (eager mode, solo pool, scripts) the
+    coroutine runs on a temporary loop and the clients it opened are closed
+    with it.
+    """
+    if _worker_loop is not None and not _worker_loop.is_closed():
+        return _worker_loop.run_until_complete(coro)
+    return asyncio.run(_run_with_cleanup(coro))
+
+async def _run_with_cleanup(coro):
+    from services.elasticsearch_service import close_elasticsearch_session
+
+    try:
+        return await coro
+    finally:
+        await close_elasticsearch_session()
+
 # Error handling
 class CeleryTaskError(Exception):
     """Custom exception for Celery task errors"""
@@ -14,12 +14,14 @@ import pdfplumber
 import io
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 
-from tasks.celery_app import celery_app, CeleryTaskError, TaskStates
+from tasks.celery_app import celery_app, run_async, CeleryTaskError, TaskStates
 from models.supabase_client import supabase_client
 from services.storage_service import StorageService
 from services.embedding_service import EmbeddingService
 from services.pdf_source_parser import PDFSourceParser
 from services.progress_service import progress_service
+from services.catalog_service import invalidate_catalog_cache
+from services.elasticsearch_service import extract_filter_fields
 from utils.exceptions import AppException
 
 logger = logging.getLogger(__name__)
@@ -46,22 +48,15 @@ def process_document_task(self, document_id: str):
     logger.info(f"Starting document processing for document_id: {document_id}")
     
     try:
-        # Run async processing in event loop
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        
+        # Run async processing on the worker process loop (shared clients live there)
+        task_id = self.request.id if hasattr(self.request, 'id') else None
         try:
-            task_id = self.request.id if hasattr(self.request, 'id') else None
-            result = loop.run_until_complete(_process_document_async(document_id, task_id))
-            return result
+            return run_async(_process_document_async(document_id, task_id))
         finally:
-            # Ensure all async connections are properly closed
             try:
-                loop.run_until_complete(_cleanup_connections())
+                run_async(_cleanup_connections())
             except Exception as cleanup_error:
                 logger.warning(f"Cleanup warning: {cleanup_error}")
-            finally:
-                loop.close()
             
     except Exception as e:
         logger.error(f"Document processing failed for {document_id}: {str(e)}")
@@ -69,16 +64,7 @@ def process_document_task(self, document_id: str):
         
         # Update document status to failed
         try:
-            error_loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(error_loop)
-            try:
-                error_loop.run_until_complete(_update_document_status(document_id, "failed", str(e)))
-            finally:
-                try:
-                    error_loop.run_until_complete(_cleanup_connections())
-                except:
-                    pass
-                error_loop.close()
+            run_async(_update_document_status(document_id, "failed", str(e)))
         except Exception as status_error:
             logger.error(f"Failed to update document status: {str(status_error)}")
         
@@ -205,12 +191,10 @@ async def _process_document_async(
         
         # Prepare chunks data for Elasticsearch bulk storage
         chunks_for_elasticsearch = []
+        filter_fields = extract_filter_fields(document)
         for i, chunk_data in enumerate(chunks_with_sources):
             chunk_text = chunk_data["content"]
             
-            # Generate 2048-dimensional embedding
-            embedding = await embedding_service.generate_embedding(chunk_text)
-            
             # Prepare enhanced metadata for Elasticsearch
             # Use metadata_overrides if provided (from bulk upload JSON)
             doc_title = document['title']
@@ -237,26 +221,43 @@ async def _process_document_async(
             }
             
             # Prepare chunk for Elasticsearch
+            # No embedding yet: only new or changed chunks are embedded (see sync_document_chunks)
             elasticsearch_chunk = {
                 "content": chunk_text,
-                "embedding": embedding,
                 "chunk_index": chunk_data["chunk_index"],
                 "page_number": chunk_data.get("page_number"),
                 "line_start": chunk_data.get("line_start"),
                 "line_end": chunk_data.get("line_end"),
-                "source_institution": document.get('source_institution') or document.get('institution') or 'Belirtilmemiş',
                 "source_document": document['filename'],
                 "belge_adi": document.get('belge_adi'),  # Top-level field for easier access
-                "metadata": chunk_metadata
+                "metadata": chunk_metadata,
+                # Institution, category, publish date, status - filtered natively in ES
+                **filter_fields
             }
             chunks_for_elasticsearch.append(elasticsearch_chunk)
         
-        # Store all embeddings in Elasticsearch using bulk operation
+        async def report_embedding_batch(batch: Dict[str, Any]) -> None:
+            if task_id:
+                await progress_service.update_progress(
+                    task_id=task_id,
+                    stage="embed",
+                    current_step=f"{batch['inputs_done']}/{batch['inputs_total']} parça vektörleştirildi...",
+                    completed_steps=4,
+                    details={"embedding": batch}
+                )
+        
+        # Embed new/changed chunks in token-packed batches and sync the document's chunks in Elasticsearch
         logger.info(f"Storing {len(chunks_for_elasticsearch)} embeddings in Elasticsearch")
-        embedding_ids = await embedding_service.store_embeddings(
+        sync_result = await embedding_service.sync_document_chunks(
             document_id=document_id,
-            chunks=chunks_for_elasticsearch
+            chunks=chunks_for_elasticsearch,
+            on_batch=report_embedding_batch
         )
+        embedding_ids = sync_result["ids"]
+        if len(embedding_ids) != len(chunks_for_elasticsearch):
+            raise Exception(
+                f"Only {len(embedding_ids)} of {len(chunks_for_elasticsearch)} chunks were indexed"
+            )
         
         # Step 5 Progress: Storage completed
         if task_id:
@@ -278,12 +279,20 @@ async def _process_document_async(
         # Step 6: Update document status to completed
         await supabase_client.update_document_status(document_id, "completed")
         
+        # Kurum kataloğu bir sonraki okumada yeniden oluşturulsun
+        await invalidate_catalog_cache()
+        
         result = {
             "document_id": document_id,
             "status": "completed",
             "total_pages": parsed_data.get("total_pages", 0),
             "text_length": parsed_data.get("total_text_length", 0),
             "chunks_created": len(chunks_with_sources),
+            "chunks_indexed": len(embedding_ids),
+            "chunks_unchanged": sync_result["unchanged"],
+            "chunks_embedded": sync_result["embedded"],
+            "chunks_reused": sync_result["reused"],
+            "stale_chunks_deleted": sync_result["deleted"],
             "parsing_success": parsed_data.get("parsing_success", False),
             "processing_time": datetime.now().isoformat()
         }
@@ -495,14 +504,7 @@ def cleanup_failed_documents(self):
     logger.info("Starting cleanup of failed documents")
     
     try:
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        
-        try:
-            result = loop.run_until_complete(_cleanup_failed_documents_async())
-            return result
-        finally:
-            loop.close()
+        return run_async(_cleanup_failed_documents_async())
             
     except Exception as e:
         logger.error(f"Failed document cleanup error: {str(e)}")
@@ -552,13 +554,7 @@ def reprocess_failed_document(self, document_id: str):
     
     try:
         # Reset document status to pending
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        
-        try:
-            loop.run_until_complete(_update_document_status(document_id, "pending"))
-        finally:
-            loop.close()
+        run_async(_update_document_status(document_id, "pending"))
         
         # Trigger normal processing - return task result not task object
         result = process_document_task.apply_async((document_id,))
@@ -592,19 +588,13 @@ def bulk_process_documents_task(self, task_payload: Dict[str, Any]):
     logger.info(f"Starting bulk document processing: task_id={task_id}, total_documents={len(documents)}")
     
     try:
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        
         try:
-            result = loop.run_until_complete(_bulk_process_documents_async(task_id, documents, user_id))
-            return result
+            return run_async(_bulk_process_documents_async(task_id, documents, user_id))
         finally:
             try:
-                loop.run_until_complete(_cleanup_connections())
+                run_async(_cleanup_connections())
             except Exception as cleanup_error:
                 logger.warning(f"Bulk cleanup warning: {cleanup_error}")
-            finally:
-                loop.close()
     
     except Exception as e:
         logger.error(f"Bulk document processing failed for task {task_id}: {str(e)}")
@@ -612,16 +602,9 @@ def bulk_process_documents_task(self, task_payload: Dict[str, Any]):
         
         # Update Redis status to failed
         try:
-            error_loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(error_loop)
-            try:
-                from services.redis_service import RedisService
-                redis_service = RedisService()
-                error_loop.run_until_complete(
-                    redis_service.update_bulk_upload_progress(task_id, {"status": "failed", "error": str(e)})
-                )
-            finally:
-                error_loop.close()
+            from services.redis_service import RedisService
+            redis_service = RedisService()
+            run_async(redis_service.update_bulk_upload_progress(task_id, {"status": "failed", "error": str(e)}))
         except Exception as status_error:
             logger.error(f"Failed to update bulk task status: {str(status_error)}")
         
@@ -0,0 +1,575 @@
+"""
+Elasticsearch index maintenance tasks
+One-off and administrative jobs over already indexed chunks
+"""
+
+import json
+import time
+import logging
+import asyncio
+import statistics
+from typing import Dict, Any, Optional, List
+from datetime import datetime
+
+from core.config import settings
+from tasks.celery_app import celery_app, run_async
+from models.supabase_client import supabase_client
+from services.elasticsearch_service import ElasticsearchService, VectorsNotInSourceError, extract_filter_fields
+from services.elasticsearch_index_manager import (
+    ElasticsearchIndexManager, EmbeddingModelMismatchError, reindex_state_key, reindex_dirty_key
+)
+from services.embedding_service import EmbeddingService
+from services.document_router import DocumentRouter
+from services.redis_service import RedisService
+from services.catalog_service import invalidate_catalog_cache
+
+logger = logging.getLogger(__name__)
+
+BACKFILL_PAGE_SIZE = 500
+BACKFILL_CONCURRENCY = 4
+
+# Chunks returned per sampled query in the pre-swap report
+REPORT_TOP_K = 10
+
+
+async def _reembed_document_chunks(
+    source: ElasticsearchService,
+    target: ElasticsearchService,
+    embedding_service: EmbeddingService,
+    document_id: str,
+    embedding_model: Optional[str] = None,
+    embedding_dimensions: Optional[int] = None,
+    overrides: Optional[Dict[str, Any]] = None
+) -> int:
+    """
+    Embed the chunks of a document from their stored content and index them
+    under their existing IDs
+
+    Also the last resort for changing fields of chunks whose stored vectors
+    cannot be read back (see VectorsNotInSourceError).
+
+    Args:
+        source: Index the chunks are read from
+        target: Index the chunks are written to (may be the same index)
+        overrides: Fields replaced on every chunk
+
+    Returns:
+        Number of indexed chunks
+    """
+    chunks = [
+        chunk for chunk in await source.get_document_chunks(document_id)
+        if (chunk["_source"].get("content") or "").strip()
+    ]
+    # One batched pass: requests are packed by tokens inside generate_embeddings_batch
+    embeddings = await embedding_service.generate_embeddings_batch(
+        [chunk["_source"]["content"] for chunk in chunks],
+        model=embedding_model,
+        dimensions=embedding_dimensions
+    )
+    documents = [
+        {"_id": chunk["_id"], "_source": {**chunk["_source"], **(overrides or {}), "embedding": embedding}}
+        for chunk, embedding in zip(chunks, embeddings)
+    ]
+    return await target.bulk_index_documents(documents)
+
+
+@celery_app.task(bind=True, name="backfill_filter_fields_task")
+def backfill_filter_fields_task(self) -> Dict[str, Any]:
+    """
+    Write institution/category/publish date/status filter fields onto chunks
+    indexed before ingestion started populating them
+
+    Safe to re-run: every run overwrites the fields from the current
+    mevzuat_documents rows. Chunks whose stored vectors cannot be read back
+    are re-embedded with the new fields.
+    """
+    logger.info("Starting filter field backfill")
+    return run_async(_backfill_filter_fields_async())
+
+
+async def _backfill_filter_fields_async() -> Dict[str, Any]:
+    """
+    Async implementation of the filter field backfill
+
+    Returns:
+        Backfill statistics
+    """
+    stats = {
+        "started_at": datetime.utcnow().isoformat(),
+        "documents_scanned": 0,
+        "documents_updated": 0,
+        "chunks_updated": 0,
+        "documents_reembedded": 0,
+        "failed_documents": []
+    }
+    semaphore = asyncio.Semaphore(BACKFILL_CONCURRENCY)
+    embedding_service = EmbeddingService()
+
+    async with ElasticsearchService() as es_service:
+        await es_service.ensure_filter_mappings()
+
+        async def backfill_document(document: Dict[str, Any]) -> None:
+            async with semaphore:
+                fields = extract_filter_fields(document)
+                try:
+                    try:
+                        updated = await es_service.update_document_fields(document["id"], fields)
+                    except VectorsNotInSourceError:
+                        updated = await _reembed_document_chunks(
+                            es_service, es_service, embedding_service, document["id"], overrides=fields
+                        )
+                        if updated:
+                            stats["documents_reembedded"] += 1
+                    if updated:
+                        stats["documents_updated"] += 1
+                        stats["chunks_updated"] += updated
+                except Exception as e:
+                    logger.error(f"Filter field backfill failed for {document['id']}: {e}")
+                    stats["failed_documents"].append(document["id"])
+
+        offset = 0
+        while True:
+            response = await asyncio.to_thread(
+                supabase_client.supabase.table('mevzuat_documents')
+                .select('id, institution, category, status, metadata')
+                .eq('processing_status', 'completed')
+                .order('id')
+                .range(offset, offset + BACKFILL_PAGE_SIZE - 1)
+                .execute
+            )
+            documents = response.data or []
+            if not documents:
+                break
+
+            await asyncio.gather(*(backfill_document(document) for document in documents))
+            stats["documents_scanned"] += len(documents)
+            logger.info(f"Filter field backfill progress: {stats['documents_scanned']} documents scanned")
+
+            if len(documents) < BACKFILL_PAGE_SIZE:
+                break
+            offset += BACKFILL_PAGE_SIZE
+
+    await embedding_service.cleanup()
+    await invalidate_catalog_cache()
+    stats["completed_at"] = datetime.utcnow().isoformat()
+    logger.info(
+        f"Filter field backfill completed: {stats['documents_updated']} documents, "
+        f"{stats['chunks_updated']} chunks, {len(stats['failed_documents'])} failures"
+    )
+    return stats
+
+
+@celery_app.task(bind=True, name="build_document_centroids_task")
+def build_document_centroids_task(self, recreate: bool = False) -> Dict[str, Any]:
+    """
+    (Re)build the document routing index from the stored chunk vectors
+
+    No OpenAI calls: every centroid is the normalized mean of the vectors
+    already in the mevzuat chunk index. Safe to re-run.
+
+    Args:
+        recreate: Drop the routing index first (after the embedding model changed)
+    """
+    logger.info(f"Starting document centroid build (recreate={recreate})")
+    return run_async(_build_document_centroids_async(recreate))
+
+
+async def _build_document_centroids_async(recreate: bool) -> Dict[str, Any]:
+    """
+    Async implementation of the centroid build
+
+    Returns:
+        Build statistics
+    """
+    stats = {
+        "started_at": datetime.utcnow().isoformat(),
+        "documents_scanned": 0,
+        "centroids_stored": 0,
+        "failed_documents": []
+    }
+    semaphore = asyncio.Semaphore(BACKFILL_CONCURRENCY)
+    es_service = ElasticsearchService()
+    router = DocumentRouter(es_service)
+    if recreate:
+        await router.recreate_index()
+    else:
+        await router.ensure_index()
+
+    async def build_document(document_id: str) -> None:
+        async with semaphore:
+            try:
+                chunks = await es_service.get_document_chunks(document_id)
+                vectors = await es_service.get_chunk_vectors([chunk["_id"] for chunk in chunks])
+                if await router.upsert_document(
+                    document_id,
+                    [vectors[chunk["_id"]] for chunk in chunks if chunk["_id"] in vectors],
+                    chunks[0]["_source"] if chunks else {}
+                ):
+                    stats["centroids_stored"] += 1
+            except Exception as e:
+                logger.error(f"Centroid build failed for {document_id}: {e}")
+                stats["failed_documents"].append(document_id)
+
+    after_key = None
+    while True:
+        document_ids, after_key = await es_service.scan_document_ids(after_key)
+        await asyncio.gather(*(build_document(document_id) for document_id in document_ids))
+        stats["documents_scanned"] += len(document_ids)
+        logger.info(f"Document centroid build progress: {stats['documents_scanned']} documents scanned")
+        if after_key is None:
+            break
+
+    await router.refresh()
+    stats["completed_at"] = datetime.utcnow().isoformat()
+    logger.info(
+        f"Document centroid build completed: {stats['centroids_stored']} centroids, "
+        f"{len(stats['failed_documents'])} failures"
+    )
+    return stats
+
+
+@celery_app.task(bind=True, name="reembed_index_task")
+def reembed_index_task(
+    self,
+    alias: str,
+    resume: bool = True,
+    embedding_model: Optional[str] = None,
+    embedding_dimensions: Optional[int] = None,
+    delete_legacy_index: bool = False
+) -> Dict[str, Any]:
+    """
+    Re-embed every chunk behind an alias into a new index version and swap the alias
+
+    Search keeps serving the current version until the atomic alias swap.
+    Progress is checkpointed in Redis after every page of documents, so a
+    job interrupted by a worker restart continues where it stopped when it
+    is triggered again with resume=True.
+
+    Args:
+        alias: Read/write alias (ELASTICSEARCH_INDEX or ELASTICSEARCH_YARGITAY_INDEX)
+        resume: Continue an interrupted job for this alias instead of starting over
+        embedding_model: Model for the new version (defaults to OPENAI_EMBEDDING_MODEL)
+        embedding_dimensions: Dimensions for the new version (defaults to OPENAI_EMBEDDING_DIMENSIONS)
+        delete_legacy_index: When the alias name is still a physical index, drop it at the
+            swap instead of keeping it as <alias>_v0 for rollback
+    """
+    logger.info(f"Starting re-embedding job for {alias} (resume={resume})")
+    return run_async(_reembed_index_async(alias, resume, embedding_model, embedding_dimensions, delete_legacy_index))
+
+
+async def get_reindex_state(alias: str) -> Dict[str, Any]:
+    """Current re-embedding job state for an alias ({} if none ran)"""
+    async with RedisService() as client:
+        state = await client.hgetall(reindex_state_key(alias))
+        dirty = await client.scard(reindex_dirty_key(alias))
+    if state:
+        state["pending_dirty_documents"] = dirty
+        if state.get("switch_report"):
+            state["switch_report"] = json.loads(state["switch_report"])
+    return state
+
+
+def reindex_job_is_active(state: Dict[str, Any]) -> bool:
+    """Running and checkpointed recently (a dead worker's job can be resumed)"""
+    return (
+        state.get("status") == "running"
+        and time.time() - float(state.get("heartbeat", 0)) < settings.REINDEX_STALE_AFTER
+    )
+
+
+async def _save_reindex_state(alias: str, **fields) -> None:
+    fields["updated_at"] = datetime.utcnow().isoformat()
+    fields["heartbeat"] = time.time()
+    async with RedisService() as client:
+        await client.hset(reindex_state_key(alias), mapping={
+            key: json.dumps(value) if isinstance(value, (dict, list)) or value is None else value
+            for key, value in fields.items()
+        })
+
+
+async def _reembed_index_async(
+    alias: str,
+    resume: bool,
+    embedding_model: Optional[str],
+    embedding_dimensions: Optional[int],
+    delete_legacy_index: bool = False
+) -> Dict[str, Any]:
+    """
+    Async implementation of the re-embedding job
+
+    Phases: "scan" walks the document IDs of the current version page by
+    page; "drain" copies documents written or deleted through the alias
+    meanwhile (and retries failed ones); then the alias is swapped. A
+    version embedded with another model or dimensions than the query
+    settings is not swapped: the job ends in status "awaiting_swap" and the
+    admin swap endpoint switches to it once queries use the new model.
+
+    Returns:
+        Final job state
+    """
+    state = await get_reindex_state(alias)
+    if reindex_job_is_active(state):
+        logger.warning(f"Re-embedding job for {alias} is already running, not starting another")
+        return {"status": "skipped", "reason": "already running", **state}
+
+    embedding_service = EmbeddingService()
+    semaphore = asyncio.Semaphore(settings.REINDEX_CONCURRENCY)
+
+    try:
+        async with ElasticsearchService(index_name=alias) as source:
+            index_manager = ElasticsearchIndexManager(source)
+
+            if resume and state.get("target_index") and state.get("status") in ("running", "failed"):
+                target_index = state["target_index"]
+                embedding_model = state["embedding_model"]
+                embedding_dimensions = int(state["embedding_dimensions"])
+                phase = state.get("phase", "scan")
+                after_key = json.loads(state["after_key"]) if state.get("after_key") else None
+                documents_done = int(state.get("documents_done", 0))
+                chunks_done = int(state.get("chunks_done", 0))
+                logger.info(f"Resuming re-embedding of {alias} into {target_index} (phase={phase}, documents_done={documents_done})")
+            else:
+                embedding_model = embedding_model or settings.OPENAI_EMBEDDING_MODEL
+                embedding_dimensions = embedding_dimensions or settings.OPENAI_EMBEDDING_DIMENSIONS
+                target_index = await index_manager.create_next_version(
+                    alias,
+                    dims=embedding_dimensions,
+                    meta={"embedding_model": embedding_model}
+                )
+                phase, after_key, documents_done, chunks_done = "scan", None, 0, 0
+                async with RedisService() as client:
+                    await client.delete(reindex_state_key(alias), reindex_dirty_key(alias))
+                await _save_reindex_state(
+                    alias,
+                    started_at=datetime.utcnow().isoformat(),
+                    source_indexes=await index_manager.get_alias_indexes(alias) or [alias]
+                )
+
+            await _save_reindex_state(
+                alias,
+                status="running",
+                phase=phase,
+                target_index=target_index,
+                embedding_model=embedding_model,
+                embedding_dimensions=embedding_dimensions,
+                error=""
+            )
+
+            async with ElasticsearchService(index_name=target_index) as target:
+
+                async def reembed_document(document_id: str) -> int:
+                    async with semaphore:
+                        return await _reembed_document_chunks(
+                            source, target, embedding_service, document_id,
+                            embedding_model=embedding_model,
+                            embedding_dimensions=embedding_dimensions
+                        )
+
+                async def resync_document(document_id: str) -> int:
+                    # Drop whatever the new version has, then copy the current state
+                    await target.delete_document_embeddings(document_id)
+                    return await reembed_document(document_id)
+
+                # Phase 1: every document of the current version
+                while phase == "scan":
+                    document_ids, next_after_key = await source.scan_document_ids(after_key, settings.REINDEX_PAGE_SIZE)
+                    results = await asyncio.gather(
+                        *(reembed_document(document_id) for document_id in document_ids),
+                        return_exceptions=True
+                    )
+
+                    failed = []
+                    for document_id, result in zip(document_ids, results):
+                        if isinstance(result, Exception):
+                            logger.error(f"Re-embedding failed for {document_id}: {result}")
+                            failed.append(document_id)
+                        else:
+                            documents_done += 1
+                            chunks_done += result
+                    if failed:
+                        # Retried in the drain phase
+                        async with RedisService() as client:
+                            await client.sadd(reindex_dirty_key(alias), *failed)
+
+                    after_key = next_after_key
+                    if after_key is None:
+                        phase = "drain"
+                    await _save_reindex_state(
+                        alias,
+                        phase=phase,
+                        after_key=after_key,
+                        documents_done=documents_done,
+                        chunks_done=chunks_done
+                    )
+                    logger.info(f"Re-embedding {alias} -> {target_index}: {documents_done} documents, {chunks_done} chunks")
+
+                # Phase 2: documents changed through the alias meanwhile (twice, the
+                # second pass picks up writes that landed during the first)
+                failed = []
+                for _ in range(2):
+                    while True:
+                        async with RedisService() as client:
+                            document_ids = await client.spop(reindex_dirty_key(alias), settings.REINDEX_PAGE_SIZE)
+                        if not document_ids:
+                            break
+                        results = await asyncio.gather(
+                            *(resync_document(document_id) for document_id in document_ids),
+                            return_exceptions=True
+                        )
+                        for document_id, result in zip(document_ids, results):
+                            if isinstance(result, Exception):
+                                logger.error(f"Re-embedding resync failed for {document_id}: {result}")
+                                failed.append(document_id)
+                            else:
+                                chunks_done += result
+                        await _save_reindex_state(alias, chunks_done=chunks_done)
+
+                if failed:
+                    async with RedisService() as client:
+                        await client.sadd(reindex_dirty_key(alias), *failed)
+                    raise Exception(f"{len(failed)} documents could not be re-embedded; resume the job to retry them")
+
+                # Chunks were loaded with refresh=false
+                await target.refresh_index()
+
+                # Size and latency of the new version next to the one it replaces
+                try:
+                    source_meta = await index_manager.get_index_meta(alias)
+                    report = await _build_switch_report(
+                        source, target, embedding_service,
+                        source_model=source_meta.get("embedding_model") or settings.OPENAI_EMBEDDING_MODEL,
+                        source_dimensions=source_meta.get("embedding_dimensions") or settings.OPENAI_EMBEDDING_DIMENSIONS,
+                        target_model=embedding_model,
+                        target_dimensions=embedding_dimensions
+                    )
+                    await _save_reindex_state(alias, switch_report=report)
+                    logger.info(f"Re-embedding switch report for {alias}: {report['summary']}")
+                except Exception as e:
+                    logger.warning(f"Re-embedding switch report for {alias} failed: {e}")
+
+                # Phase 3: atomic alias swap, the previous version (a pre-alias index as <alias>_v0) is kept for rollback.
+                # A version in another model waits: queries would still be embedded with the serving model
+                try:
+                    swap = await index_manager.swap_alias(alias, target_index, delete_legacy_index=delete_legacy_index)
+                except EmbeddingModelMismatchError as e:
+                    logger.warning(f"Re-embedding of {alias} finished, alias swap held back: {e}")
+                    await _save_reindex_state(alias, status="awaiting_swap", phase="awaiting_swap", error=str(e))
+                    return await get_reindex_state(alias)
+
+        await _save_reindex_state(
+            alias,
+            status="completed",
+            phase="done",
+            swapped_at=datetime.utcnow().isoformat(),
+            previous_indexes=swap["previous"]
+        )
+        if alias == settings.ELASTICSEARCH_INDEX:
+            await invalidate_catalog_cache()
+            # Routing centroids still average the previous version's vectors
+            build_document_centroids_task.delay(True)
+        logger.info(f"Re-embedding of {alias} completed: alias now points to {target_index}")
+
+    except Exception as e:
+        logger.error(f"Re-embedding job for {alias} failed: {e}")
+        await _save_reindex_state(alias, status="failed", error=str(e))
+
+    finally:
+        await embedding_service.cleanup()
+
+    return await get_reindex_state(alias)
+
+
+async def _measure_knn(
+    es_service: ElasticsearchService,
+    embedding_service: EmbeddingService,
+    queries: List[str],
+    embedding_model: str,
+    embedding_dimensions: int
+) -> Dict[str, Any]:
+    """Query latency of an index over the sampled queries, plus the hit IDs per query"""
+    vectors = await embedding_service.generate_embeddings_batch(
+        queries, model=embedding_model, dimensions=int(embedding_dimensions), use_store=False
+    )
+    latencies, hits = [], []
+    for vector in vectors:
+        start = time.perf_counter()
+        results = await es_service.similarity_search(
+            query_vector=vector.tolist(), k=REPORT_TOP_K, similarity_threshold=0.0
+        )
+        latencies.append((time.perf_counter() - start) * 1000)
+        hits.append([result["id"] for result in results])
+    return {
+        "search_mode": await es_service._resolve_search_mode(None),
+        "latency_ms": {
+            "avg": round(statistics.mean(latencies), 1),
+            "p50": round(statistics.median(latencies), 1),
+            "max": round(max(latencies), 1)
+        },
+        "hits": hits
+    }
+
+
+async def _build_switch_report(
+    source: ElasticsearchService,
+    target: ElasticsearchService,
+    embedding_service: EmbeddingService,
+    source_model: str,
+    source_dimensions: int,
+    target_model: str,
+    target_dimensions: int
+) -> Dict[str, Any]:
+    """
+    Compare the index version about to be swapped in with the current one
+
+    Disk footprint of both, kNN latency over REINDEX_REPORT_SAMPLE_QUERIES
+    chunk texts sampled from the current version (each side queried with its
+    own embedding model) and, when both use the same model, the overlap of
+    the top hits, i.e. what quantization costs in recall.
+    """
+    report = {
+        "generated_at": datetime.utcnow().isoformat(),
+        "source": {
+            "embedding_model": source_model,
+            "embedding_dimensions": int(source_dimensions),
+            "vector_index": await source.get_vector_field_info(refresh=True),
+            "footprint": await source.get_index_footprint()
+        },
+        "target": {
+            "embedding_model": target_model,
+            "embedding_dimensions": int(target_dimensions),
+            "vector_index": await target.get_vector_field_info(refresh=True),
+            "footprint": await target.get_index_footprint()
+        }
+    }
+    source_bytes = report["source"]["footprint"]["primary_store_bytes"]
+    target_bytes = report["target"]["footprint"]["primary_store_bytes"]
+    summary = {"store_ratio": round(target_bytes / source_bytes, 3) if source_bytes else None}
+
+    # Sampled chunk texts stand in for user queries (first 500 characters)
+    queries = [
+        content[:500] for content in await source.sample_chunk_contents(
+            settings.REINDEX_REPORT_SAMPLE_QUERIES, seed=int(time.time())
+        )
+    ]
+    if queries:
+        source_run = await _measure_knn(source, embedding_service, queries, source_model, source_dimensions)
+        target_run = await _measure_knn(target, embedding_service, queries, target_model, target_dimensions)
+        report["sample_queries"] = len(queries)
+        report["source"]["knn"] = {key: value for key, value in source_run.items() if key != "hits"}
+        report["target"]["knn"] = {key: value for key, value in target_run.items() if key != "hits"}
+        summary["latency_p50_ratio"] = (
+            round(target_run["latency_ms"]["p50"] / source_run["latency_ms"]["p50"], 3)
+            if source_run["latency_ms"]["p50"] else None
+        )
+
+        # Hit overlap is only meaningful when both sides embed queries the same way
+        if source_model == target_model and int(source_dimensions) == int(target_dimensions):
+            overlaps = [
+                len(set(source_hits) & set(target_hits)) / len(source_hits)
+                for source_hits, target_hits in zip(source_run["hits"], target_run["hits"])
+                if source_hits
+            ]
+            summary["top_k_overlap"] = round(statistics.mean(overlaps), 4) if overlaps else None
+
+    report["summary"] = summary
+    return report
@@ -3,7 +3,6 @@ Yargitay document processing tasks.
 Uses HTML content for chunking and embeddings, stores in Yargitay Elasticsearch index.
 """
 
-import asyncio
 import logging
 import traceback
 from datetime import datetime
@@ -16,7 +15,7 @@ from langchain_text_splitters import RecursiveCharacterTextSplitter
 from core.config import settings
 from models.supabase_client import supabase_client
 from services.embedding_service import EmbeddingService
-from tasks.celery_app import celery_app, CeleryTaskError
+from tasks.celery_app import celery_app, run_async, CeleryTaskError
 from utils.exceptions import AppException
 
 logger = logging.getLogger(__name__)
@@ -43,14 +42,7 @@ def process_yargitay_document_task(self, document_id: str):
     logger.info(f"Starting Yargitay document processing for document_id: {document_id}")
 
     try:
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-
-        try:
-            result = loop.run_until_complete(_process_yargitay_document_async(document_id))
-            return result
-        finally:
-            loop.close()
+        return run_async(_process_yargitay_document_async(document_id))
 
     except Exception as e:
         logger.error(f"Yargitay document processing failed for {document_id}: {str(e)}")
@@ -105,9 +97,8 @@ async def _process_yargitay_document_async(document_id: str) -> Dict[str, Any]:
         filename = _extract_filename_from_url(document.get("pdf_url"))
         chunks_for_elasticsearch = []
 
+        # No embeddings here: sync_document_chunks embeds new/changed chunks in batches
         for i, chunk_text in enumerate(chunks):
-            embedding = await embedding_service.generate_embedding(chunk_text)
-
             metadata = {
                 "document_title": document.get("belge_adi"),
                 "document_filename": filename,
@@ -124,7 +115,6 @@ async def _process_yargitay_document_async(document_id: str) -> Dict[str, Any]:
 
             chunks_for_elasticsearch.append({
                 "content": chunk_text,
-                "embedding": embedding,
                 "chunk_index": i,
                 "source_institution": document.get("institution") or "Yargıtay Başkanlığı",
                 "source_document": filename,
@@ -0,0 +1,17 @@
+"""
+Shared pytest setup for the infra-free unit tests
+
+Settings require the MongoDB connection values at import time; the unit
+tests never connect, so placeholders are enough.
+"""
+
+import os
+
+for _name in (
+    "MONGODB_CONNECTION_STRING",
+    "MONGODB_DATABASE",
+    "MONGODB_METADATA_COLLECTION",
+    "MONGODB_CONTENT_COLLECTION",
+    "MONGODB_YARGI_COLLECTION",
+):
+    os.environ.setdefault(_name, "unit-test")
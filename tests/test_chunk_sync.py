@@ -0,0 +1,179 @@
+"""
+Unit tests for the chunk diff of sync_document_chunks
+
+Elasticsearch and OpenAI are replaced by in-memory fakes, so these run
+without any infrastructure.
+"""
+
+import asyncio
+
+import numpy as np
+import pytest
+
+import services.elasticsearch_index_manager as index_manager
+from core.config import settings
+from services.elasticsearch_service import (
+    build_chunk_source,
+    chunk_content_hash,
+    chunk_id,
+    chunk_source_matches,
+)
+from services.embedding_service import EmbeddingService
+
+DOCUMENT_ID = "doc-1"
+
+
+def _vector(seed: float) -> np.ndarray:
+    return np.full(settings.OPENAI_EMBEDDING_DIMENSIONS, seed, dtype=np.float32)
+
+
+class FakeElasticsearch:
+    """Chunk index of one document held in a dict"""
+
+    index_name = "unit_test_chunks"
+
+    def __init__(self):
+        self.sources = {}
+        self.vectors = {}
+        self.written = []
+        self.deleted = []
+
+    async def get_document_chunks(self, document_id):
+        return [
+            {"_id": chunk_id, "_source": source}
+            for chunk_id, source in self.sources.items()
+            if source["document_id"] == document_id
+        ]
+
+    async def get_chunk_vectors(self, chunk_ids):
+        return {chunk_id: self.vectors[chunk_id] for chunk_id in chunk_ids if chunk_id in self.vectors}
+
+    async def bulk_create_embeddings(self, embeddings_data):
+        for data in embeddings_data:
+            self.written.append(data["_id"])
+            source = build_chunk_source(data, "2024-01-01T00:00:00")
+            self.vectors[data["_id"]] = np.asarray(source.pop("embedding"))
+            self.sources[data["_id"]] = source
+        return len(embeddings_data)
+
+    async def delete_chunks(self, chunk_ids):
+        for chunk_id in chunk_ids:
+            self.deleted.append(chunk_id)
+            self.sources.pop(chunk_id, None)
+            self.vectors.pop(chunk_id, None)
+        return len(chunk_ids)
+
+
+@pytest.fixture
+def es(monkeypatch):
+    async def no_reindex(alias, document_id):
+        return None
+
+    monkeypatch.setattr(index_manager, "mark_reindex_dirty", no_reindex)
+    return FakeElasticsearch()
+
+
+@pytest.fixture
+def service(es):
+    embedding_service = EmbeddingService(openai_client=object(), elasticsearch_service=es)
+    embedding_service.embedded_texts = []
+
+    async def generate_embeddings_batch(texts, on_batch=None):
+        embedding_service.embedded_texts.extend(texts)
+        return [_vector(len(text)) for text in texts]
+
+    embedding_service.generate_embeddings_batch = generate_embeddings_batch
+    return embedding_service
+
+
+def _chunks(*contents, **fields):
+    return [{"content": content, "metadata": {"page": 1}, **fields} for content in contents]
+
+
+def _sync(service, chunks):
+    return asyncio.run(service.sync_document_chunks(DOCUMENT_ID, chunks))
+
+
+def test_chunk_id_changes_with_position_and_text():
+    content_hash = chunk_content_hash("Madde 1")
+    assert chunk_id(DOCUMENT_ID, 0, content_hash) == chunk_id(DOCUMENT_ID, 0, chunk_content_hash("Madde 1"))
+    assert chunk_id(DOCUMENT_ID, 0, content_hash) != chunk_id(DOCUMENT_ID, 1, content_hash)
+    assert chunk_id(DOCUMENT_ID, 0, content_hash) != chunk_id(DOCUMENT_ID, 0, chunk_content_hash("Madde 2"))
+
+
+def test_chunk_source_matches_ignores_volatile_fields():
+    data = {"document_id": DOCUMENT_ID, "content": "Madde 1", "metadata": {"page": 1, "processing_timestamp": "t1"}}
+    stored = build_chunk_source({**data, "embedding": [0.1]}, "2024-01-01T00:00:00")
+    new = build_chunk_source({**data, "metadata": {"page": 1, "processing_timestamp": "t2"}}, "")
+    assert chunk_source_matches(stored, new)
+
+
+def test_chunk_source_matches_tolerates_backfilled_fields():
+    data = {"document_id": DOCUMENT_ID, "content": "Madde 1", "metadata": {"page": 1}}
+    stored = build_chunk_source(data, "2024-01-01T00:00:00")
+    stored["document_status"] = "active"
+    stored["metadata"]["document_title"] = "Kanun"
+    assert chunk_source_matches(stored, build_chunk_source(data, ""))
+
+
+def test_chunk_source_matches_detects_changed_field():
+    data = {"document_id": DOCUMENT_ID, "content": "Madde 1", "category": "Kanun", "metadata": {"page": 1}}
+    stored = build_chunk_source(data, "2024-01-01T00:00:00")
+    assert not chunk_source_matches(stored, build_chunk_source({**data, "category": "Yönetmelik"}, ""))
+    assert not chunk_source_matches(stored, build_chunk_source({**data, "metadata": {"page": 2}}, ""))
+
+
+def test_unchanged_document_writes_nothing(service, es):
+    chunks = _chunks("Madde 1", "Madde 2")
+    _sync(service, chunks)
+    es.written.clear()
+    service.embedded_texts.clear()
+
+    result = _sync(service, chunks)
+
+    assert result["unchanged"] == 2
+    assert result["embedded"] == result["reused"] == result["deleted"] == 0
+    assert es.written == []
+    assert service.embedded_texts == []
+
+
+def test_moved_chunk_reuses_stored_vector(service, es):
+    _sync(service, _chunks("Madde 1", "Madde 2"))
+    es.written.clear()
+    service.embedded_texts.clear()
+
+    # A new first article shifts the existing ones down by one position
+    result = _sync(service, _chunks("Madde 0", "Madde 1", "Madde 2"))
+
+    assert result["unchanged"] == 0
+    assert result["reused"] == 2
+    assert result["embedded"] == 1
+    assert service.embedded_texts == ["Madde 0"]
+    assert result["deleted"] == 2
+    assert sorted(es.sources) == sorted(result["ids"])
+
+
+def test_removed_chunk_is_deleted_as_stale(service, es):
+    first = _sync(service, _chunks("Madde 1", "Madde 2", "Madde 3"))
+
+    result = _sync(service, _chunks("Madde 1", "Madde 2"))
+
+    assert result["unchanged"] == 2
+    assert result["deleted"] == 1
+    assert es.deleted == [first["ids"][2]]
+    assert sorted(es.sources) == sorted(result["ids"])
+
+
+def test_metadata_only_edit_rewrites_without_embedding(service, es):
+    _sync(service, _chunks("Madde 1", "Madde 2", category="Kanun"))
+    es.written.clear()
+    service.embedded_texts.clear()
+
+    result = _sync(service, _chunks("Madde 1", "Madde 2", category="Yönetmelik"))
+
+    assert result["unchanged"] == 0
+    assert result["embedded"] == 0
+    assert result["reused"] == 2
+    assert result["deleted"] == 0
+    assert len(es.written) == 2
+    assert all(source["category"] == "Yönetmelik" for source in es.sources.values())
@@ -0,0 +1,130 @@
+"""
+Unit tests for merge_corpus_results (per-corpus normalization and slot quotas)
+"""
+
+import pytest
+
+from services.search_service import merge_corpus_results
+
+
+def _results(corpus, *scores, score_key="similarity_score"):
+    return [{"id": f"{corpus}-{i}", score_key: score} for i, score in enumerate(scores)]
+
+
+def _ids(results):
+    return [result["id"] for result in results]
+
+
+def test_scores_are_min_max_normalized_per_corpus():
+    merged = merge_corpus_results(
+        {"mevzuat": _results("mevzuat", 0.9, 0.7, 0.5)},
+        limit=3,
+        quotas={"mevzuat": 1.0}
+    )
+
+    assert [result["normalized_score"] for result in merged] == [1.0, 0.5, 0.0]
+    assert all(result["corpus"] == "mevzuat" for result in merged)
+
+
+def test_single_score_corpus_normalizes_to_one():
+    merged = merge_corpus_results(
+        {"mevzuat": _results("mevzuat", 0.9, 0.8), "yargitay": _results("yargitay", 0.4)},
+        limit=3,
+        quotas={"mevzuat": 0.5, "yargitay": 0.5}
+    )
+
+    by_id = {result["id"]: result for result in merged}
+    assert by_id["yargitay-0"]["normalized_score"] == 1.0
+    assert _ids(merged)[:2] == ["mevzuat-0", "yargitay-0"]
+
+
+def test_quota_slots_are_floored_and_guaranteed():
+    # int(5 * 0.6) = 3 mevzuat slots, int(5 * 0.4) = 2 yargitay slots
+    merged = merge_corpus_results(
+        {
+            "mevzuat": _results("mevzuat", 0.9, 0.89, 0.88, 0.87, 0.86, 0.1),
+            "yargitay": _results("yargitay", 0.5, 0.4, 0.3),
+        },
+        limit=5,
+        quotas={"mevzuat": 0.6, "yargitay": 0.4}
+    )
+
+    assert sorted(_ids(merged)) == ["mevzuat-0", "mevzuat-1", "mevzuat-2", "yargitay-0", "yargitay-1"]
+
+
+def test_leftover_slots_go_to_best_normalized_scores():
+    # int(4 * 0.5) = 2 slots each; yargitay has one result, the free slot
+    # goes to the best remaining mevzuat result
+    merged = merge_corpus_results(
+        {
+            "mevzuat": _results("mevzuat", 0.9, 0.8, 0.7, 0.1),
+            "yargitay": _results("yargitay", 0.6),
+        },
+        limit=4,
+        quotas={"mevzuat": 0.5, "yargitay": 0.5}
+    )
+
+    assert sorted(_ids(merged)) == ["mevzuat-0", "mevzuat-1", "mevzuat-2", "yargitay-0"]
+
+
+def test_flooring_remainder_is_filled_from_leftovers():
+    # int(3 * 0.5) = 1 slot each, the third slot is a leftover
+    merged = merge_corpus_results(
+        {
+            "mevzuat": _results("mevzuat", 0.9, 0.5, 0.1),
+            "yargitay": _results("yargitay", 0.8, 0.7, 0.2),
+        },
+        limit=3,
+        quotas={"mevzuat": 0.5, "yargitay": 0.5}
+    )
+
+    assert len(merged) == 3
+    assert sorted(_ids(merged)) == ["mevzuat-0", "yargitay-0", "yargitay-1"]
+
+
+def test_quotas_are_renormalized_over_given_corpora():
+    # ozelge has no quota, mevzuat's 0.6 becomes the whole share
+    merged = merge_corpus_results(
+        {"mevzuat": _results("mevzuat", 0.9, 0.8), "ozelge": _results("ozelge", 0.99, 0.98)},
+        limit=2,
+        quotas={"mevzuat": 0.6, "yargitay": 0.4}
+    )
+
+    assert sorted(_ids(merged)) == ["mevzuat-0", "mevzuat-1"]
+
+
+def test_equal_shares_when_no_quota_configured():
+    merged = merge_corpus_results(
+        {"ozelge": _results("ozelge", 0.9, 0.8), "danistay": _results("danistay", 0.5, 0.4)},
+        limit=2,
+        quotas={}
+    )
+
+    assert sorted(_ids(merged)) == ["danistay-0", "ozelge-0"]
+
+
+def test_result_is_sorted_and_uses_score_key():
+    merged = merge_corpus_results(
+        {
+            "mevzuat": _results("mevzuat", 0.03, 0.02, 0.01, score_key="rrf_score"),
+            "yargitay": _results("yargitay", 0.02, 0.01, score_key="rrf_score"),
+        },
+        limit=4,
+        quotas={"mevzuat": 0.5, "yargitay": 0.5},
+        score_key="rrf_score"
+    )
+
+    keys = [(result["normalized_score"], result["rrf_score"]) for result in merged]
+    assert keys == sorted(keys, reverse=True)
+    assert merged[0]["id"] == "mevzuat-0"
+    assert merged[0]["normalized_score"] == pytest.approx(1.0)
+
+
+def test_empty_corpus_is_ignored():
+    merged = merge_corpus_results(
+        {"mevzuat": _results("mevzuat", 0.9, 0.8), "yargitay": []},
+        limit=2,
+        quotas={"mevzuat": 0.5, "yargitay": 0.5}
+    )
+
+    assert _ids(merged) == ["mevzuat-0", "mevzuat-1"]
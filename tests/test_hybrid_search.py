@@ -0,0 +1,100 @@
+"""
+Unit tests for hybrid retrieval: reciprocal rank fusion and the BM25 clauses
+"""
+
+import pytest
+
+from services.elasticsearch_service import build_lexical_clauses, reciprocal_rank_fusion
+
+
+def _results(*ids):
+    return [{"id": result_id, "content": f"chunk {result_id}"} for result_id in ids]
+
+
+def _phrases(clauses):
+    return sorted({
+        clause["match_phrase"][field]["query"]
+        for clause in clauses if "match_phrase" in clause
+        for field in clause["match_phrase"]
+    })
+
+
+def test_rrf_sums_reciprocal_ranks():
+    fused = reciprocal_rank_fusion(
+        {"vector": _results("a", "b"), "lexical": _results("b", "c")},
+        limit=10,
+        rank_constant=60
+    )
+
+    scores = {result["id"]: result["rrf_score"] for result in fused}
+    assert scores["a"] == pytest.approx(1 / 61)
+    assert scores["b"] == pytest.approx(1 / 62 + 1 / 61)
+    assert scores["c"] == pytest.approx(1 / 62)
+    assert [result["id"] for result in fused] == ["b", "a", "c"]
+    assert fused[0]["ranks"] == {"vector": 2, "lexical": 1}
+
+
+def test_rrf_weights_scale_each_list():
+    fused = reciprocal_rank_fusion(
+        {"vector": _results("a"), "lexical": _results("b")},
+        limit=10,
+        rank_constant=60,
+        weights={"vector": 1.0, "lexical": 2.0}
+    )
+
+    assert [result["id"] for result in fused] == ["b", "a"]
+    assert fused[0]["rrf_score"] == pytest.approx(2 / 61)
+
+
+def test_rrf_keeps_lexical_only_hits_and_first_list_fields():
+    vector = [{"id": "a", "content": "from vector", "similarity": 0.9}]
+    lexical = [{"id": "a", "content": "from lexical"}, {"id": "z", "content": "lexical only"}]
+
+    fused = reciprocal_rank_fusion({"vector": vector, "lexical": lexical}, limit=10, rank_constant=60)
+
+    by_id = {result["id"]: result for result in fused}
+    assert by_id["a"]["content"] == "from vector"
+    assert by_id["a"]["similarity"] == 0.9
+    assert by_id["z"]["ranks"] == {"lexical": 2}
+    assert "similarity" not in by_id["z"]
+
+
+def test_rrf_truncates_to_limit():
+    fused = reciprocal_rank_fusion({"vector": _results("a", "b", "c")}, limit=2, rank_constant=60)
+
+    assert [result["id"] for result in fused] == ["a", "b"]
+
+
+def test_lexical_clauses_match_both_content_fields():
+    clauses = build_lexical_clauses("kıdem tazminatı nasıl hesaplanır")
+
+    assert clauses == [{
+        "multi_match": {
+            "query": "kıdem tazminatı nasıl hesaplanır",
+            "fields": ["content", "content.tr"],
+            "type": "most_fields"
+        }
+    }]
+
+
+def test_lexical_clauses_add_law_and_article_phrases():
+    clauses = build_lexical_clauses("4857 sayılı Kanun madde 17 ne diyor")
+
+    assert _phrases(clauses) == ["4857 sayılı", "madde 17"]
+    phrase_clauses = [clause for clause in clauses if "match_phrase" in clause]
+    assert len(phrase_clauses) == 4
+    assert {field for clause in phrase_clauses for field in clause["match_phrase"]} == {"content", "content.tr"}
+    assert all(
+        clause["match_phrase"][field]["boost"] == 3.0
+        for clause in phrase_clauses for field in clause["match_phrase"]
+    )
+
+
+@pytest.mark.parametrize("question, phrase", [
+    ("md. 25 uyarınca fesih", "madde 25"),
+    ("md 8 kapsamında", "madde 8"),
+    ("17. madde ne diyor", "madde 17"),
+    ("MADDE 4 nedir", "madde 4"),
+])
+def test_lexical_clauses_normalize_article_forms(question, phrase):
+    assert _phrases(build_lexical_clauses(question)) == [phrase]
@@ -0,0 +1,110 @@
+"""
+Unit tests for diversify_results (per-document/per-page limits and overlap dedup)
+"""
+
+from services.search_service import diversify_results
+
+
+def _result(result_id, document_id="doc-1", page_number=None, content=None):
+    return {
+        "id": result_id,
+        "document_id": document_id,
+        "page_number": page_number,
+        "content": content if content is not None else f"benzersiz metin {result_id} parçası burada yer alır"
+    }
+
+
+def _ids(results):
+    return [result["id"] for result in results]
+
+
+def test_keeps_order_and_limit_without_redundancy():
+    results = [_result(i, document_id=f"doc-{i}") for i in range(5)]
+
+    kept = diversify_results(results, limit=3, max_per_document=0, max_per_page=0, overlap_threshold=1.0)
+
+    assert _ids(kept) == [0, 1, 2]
+
+
+def test_limits_chunks_per_document():
+    results = [_result(0), _result(1), _result(2, document_id="doc-2"), _result(3)]
+
+    kept = diversify_results(results, limit=10, max_per_document=2, max_per_page=0, overlap_threshold=1.0)
+
+    assert _ids(kept) == [0, 1, 2]
+
+
+def test_limits_chunks_per_page_but_not_pageless_chunks():
+    results = [
+        _result(0, page_number=3),
+        _result(1, page_number=3),
+        _result(2, page_number=4),
+        _result(3),
+        _result(4),
+    ]
+
+    kept = diversify_results(results, limit=10, max_per_document=0, max_per_page=1, overlap_threshold=1.0)
+
+    assert _ids(kept) == [0, 2, 3, 4]
+
+
+def test_same_page_number_in_other_document_is_not_limited():
+    results = [_result(0, page_number=1), _result(1, document_id="doc-2", page_number=1)]
+
+    kept = diversify_results(results, limit=10, max_per_document=0, max_per_page=1, overlap_threshold=1.0)
+
+    assert _ids(kept) == [0, 1]
+
+
+def test_drops_chunks_overlapping_a_kept_chunk():
+    text = "işveren işçiyi haklı bir neden olmadan işten çıkarırsa kıdem tazminatı öder"
+    results = [
+        _result(0, content=text),
+        # The next slice of the splitter repeats most of the previous one
+        _result(1, content=text + " ve ihbar süresine uyar"),
+        _result(2, content="yıllık ücretli izin süreleri hizmet süresine göre belirlenir"),
+    ]
+
+    kept = diversify_results(results, limit=10, max_per_document=0, max_per_page=0, overlap_threshold=0.8)
+
+    assert _ids(kept) == [0, 2]
+
+
+def test_overlap_at_threshold_is_kept():
+    # 2 of the 4 shingles of each chunk are shared: overlap 0.5
+    results = [
+        _result(0, content="a b c d e f"),
+        _result(1, content="c d e f g h"),
+    ]
+
+    assert _ids(diversify_results(results, 10, 0, 0, overlap_threshold=0.5)) == [0, 1]
+    assert _ids(diversify_results(results, 10, 0, 0, overlap_threshold=0.4)) == [0]
+
+
+def test_threshold_of_one_disables_overlap_check():
+    results = [_result(0, content="aynı metin tekrar"), _result(1, content="aynı metin tekrar")]
+
+    kept = diversify_results(results, limit=10, max_per_document=0, max_per_page=0, overlap_threshold=1.0)
+
+    assert _ids(kept) == [0, 1]
+
+
+def test_short_chunks_compare_words():
+    # Fewer words than the shingle size: the words themselves are compared
+    results = [
+        _result(0, content="Madde 17"),
+        _result(1, content="madde 17"),
+        _result(2, content="Madde 18"),
+    ]
+
+    kept = diversify_results(results, limit=10, max_per_document=0, max_per_page=0, overlap_threshold=0.8)
+
+    assert _ids(kept) == [0, 2]
+
+
+def test_empty_chunks_are_never_treated_as_duplicates():
+    results = [_result(0, content=""), _result(1, content=""), _result(2, content="  ")]
+
+    kept = diversify_results(results, limit=10, max_per_document=0, max_per_page=0, overlap_threshold=0.5)
+
+    assert _ids(kept) == [0, 1, 2]